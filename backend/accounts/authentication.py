@@ -6,25 +6,69 @@ from rest_framework_simplejwt.authentication import JWTAuthentication as SimpleJ
 
 from tenancy.context import TenantContext, TenantNotActive, TenantNotFound
 
+_REQUEST_CACHE_ATTR = "_jwt_auth_cache"
+
+
+def _django_request(request):
+    """DRF ``Request`` delega lecturas, pero ``setattr`` no llega al ``HttpRequest``."""
+
+    return getattr(request, "_request", request)
+
 
 class JWTAuthentication(SimpleJWTAuthentication):
+    """Autenticación JWT con caché por petición compartida con ``TenantMiddleware``.
+
+    El token se decodifica y el usuario se carga una sola vez por petición; el
+    resultado queda en el ``HttpRequest`` para que middleware y DRF lo reutilicen.
+    """
+
+    def resolve_request_token(self, request) -> dict | None:
+        """Decodifica el token Bearer una sola vez por petición.
+
+        Regresa ``None`` si no hay token y propaga ``InvalidToken`` igual que SimpleJWT.
+        """
+
+        http_request = _django_request(request)
+        header = self.get_header(http_request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+
+        cached = getattr(http_request, _REQUEST_CACHE_ATTR, None)
+        if cached and cached["raw"] == raw_token:
+            return cached
+
+        cached = {"raw": raw_token, "token": self.get_validated_token(raw_token), "user": None}
+        setattr(http_request, _REQUEST_CACHE_ATTR, cached)
+        return cached
+
+    def resolve_request_user(self, cached: dict):
+        if cached["user"] is None:
+            cached["user"] = self.get_user(cached["token"])
+        return cached["user"]
+
     def authenticate(self, request):
-        authentication = super().authenticate(request)
-        if not authentication:
+        cached = self.resolve_request_token(request)
+        if cached is None:
             return None
 
-        user, token = authentication
+        user = self.resolve_request_user(cached)
+        token = cached["token"]
         tenant_slug = token.payload.get("tenant")  # type: ignore[attr-defined]
         if not tenant_slug:
             tenant_slug = request.META.get(settings.TENANT_HEADER)
 
         if tenant_slug:
-            try:
-                TenantContext.activate(tenant_slug)
-            except TenantNotFound as exc:
-                raise AuthenticationFailed("El tenant indicado no existe") from exc
-            except TenantNotActive as exc:
-                raise AuthenticationFailed("El tenant indicado está inactivo") from exc
+            current = TenantContext.get_current_tenant()
+            if current is None or current.slug != tenant_slug:
+                try:
+                    TenantContext.activate(tenant_slug)
+                except TenantNotFound as exc:
+                    raise AuthenticationFailed("El tenant indicado no existe") from exc
+                except TenantNotActive as exc:
+                    raise AuthenticationFailed("El tenant indicado está inactivo") from exc
             request.tenant = TenantContext.get_current_tenant()
         else:
             request.tenant = None
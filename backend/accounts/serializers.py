@@ -99,6 +99,9 @@ class TenantTokenObtainPairSerializer(TokenObtainPairSerializer):
     @classmethod
     def get_token(cls, user):
         token = super().get_token(user)
+        # Claim de enrutamiento: TenantMiddleware lo usa para permitir acceso de
+        # control plane sin consultar al usuario; los permisos siguen usando la BD.
+        token["is_superuser"] = bool(user.is_superuser)
         # We handle dynamic tenant injection inside validate() now
         # using the request data.
         return token
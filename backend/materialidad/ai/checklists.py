@@ -349,6 +349,7 @@ def generate_checklist_draft(
     proveedor: Proveedor | None = None,
     contrato: Contrato | None = None,
     operacion: Operacion | None = None,
+    bypass_cache: bool = False,
 ) -> dict[str, Any]:
     context = _build_context(
         naturaleza_operacion=naturaleza_operacion,
@@ -371,6 +372,8 @@ def generate_checklist_draft(
             ],
             temperature=0.2,
             max_output_tokens=1200,
+            cache_feature="checklist_draft",
+            bypass_cache=bypass_cache,
         )
         parsed = _extract_json_payload(raw_response)
         draft = _normalize_draft_payload(parsed, context=context)
@@ -151,6 +151,7 @@ def optimize_clause(
     contexto_contrato: str = "",
     objetivo: str = "mejorar_fiscal",
     idioma: str = "es",
+    bypass_cache: bool = False,
 ) -> dict[str, Any]:
     """Optimiza una cláusula contractual usando IA.
 
@@ -160,6 +161,7 @@ def optimize_clause(
         objetivo: Tipo de optimización (mejorar_fiscal, simplificar,
                   reforzar_materialidad, compliance_integral).
         idioma: Idioma del resultado (es/en).
+        bypass_cache: Ignora la respuesta cacheada y la refresca.
 
     Returns:
         dict con texto_mejorado, justificacion, referencias_legales,
@@ -183,6 +185,8 @@ def optimize_clause(
             messages,
             temperature=0.20,
             max_output_tokens=1400,
+            cache_feature="clause_optimizer",
+            bypass_cache=bypass_cache,
         )
     except OpenAIClientError as exc:
         raise ClauseOptimizationError(f"Error al invocar el modelo AI: {exc}") from exc
@@ -1,9 +1,16 @@
 from __future__ import annotations
 
+import hashlib
+import json
+import threading
+import time
+from contextlib import contextmanager
 from dataclasses import dataclass
-from typing import Literal, Sequence
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Iterator, Literal, Sequence
 
 from django.conf import settings
+from django.core.cache import cache
 from django.core.exceptions import ImproperlyConfigured
 import requests
 from openai import OpenAI
@@ -16,8 +23,126 @@ from openai import (
 )
 import logging
 
+from . import latency, response_cache
+
 logger = logging.getLogger("materialidad.ai")
 
+# Un CachedContent pertenece al proyecto de la API key que lo creó: la huella de la key va en la llave.
+GEMINI_CONTEXT_CACHE_KEY = "materialidad:gemini_context_cache:{key}:{model}:{digest}"
+# Margen para no usar un CachedContent que expira durante la llamada.
+_CONTEXT_CACHE_MARGIN_SECONDS = 60
+_context_models: dict[tuple[str, str, str], tuple[Any, float]] = {}
+_context_lock = threading.Lock()
+
+# Transportes por proceso (``openai.OpenAI``, ``requests.Session``, modelos Gemini):
+# conservan sus pools keep-alive entre llamadas en lugar de abrir TCP+TLS cada vez.
+_transports: dict[tuple[str, ...], Any] = {}
+_transport_lock = threading.Lock()
+_transport_stats = {"created": 0, "reused": 0}
+_gemini_lock = threading.Lock()
+_gemini_configured_key: str | None = None
+
+
+def _key_fingerprint(api_key: str | None) -> str:
+    return hashlib.sha256((api_key or "").encode("utf-8")).hexdigest()[:16]
+
+
+def _pooled_transport(key: tuple[str, ...], factory) -> Any:
+    with _transport_lock:
+        transport = _transports.get(key)
+        if transport is not None:
+            _transport_stats["reused"] += 1
+            return transport
+    transport = factory()
+    with _transport_lock:
+        existing = _transports.setdefault(key, transport)
+        _transport_stats["created" if existing is transport else "reused"] += 1
+    if existing is not transport:
+        _close_transport(transport)
+    return existing
+
+
+def _close_transport(transport: Any) -> None:
+    close = getattr(transport, "close", None)
+    if callable(close):
+        try:
+            close()
+        except Exception:  # pragma: no cover - best effort
+            logger.debug("No se pudo cerrar el transporte IA", exc_info=True)
+
+
+def get_openai_transport(api_key: str, *, base_url: str | None = None, timeout: float = 60) -> OpenAI:
+    """``openai.OpenAI`` compartido por (api key, base URL, timeout)."""
+
+    key = ("openai", _key_fingerprint(api_key), base_url or "", str(timeout))
+    return _pooled_transport(key, lambda: OpenAI(api_key=api_key, base_url=base_url, timeout=timeout))
+
+
+def _get_http_session(base_url: str) -> requests.Session:
+    def factory() -> requests.Session:
+        session = requests.Session()
+        pool_size = max(1, int(getattr(settings, "AI_HTTP_POOL_MAXSIZE", 10)))
+        adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    # Las credenciales viajan en los headers de cada petición: una sesión por host basta.
+    return _pooled_transport(("http", base_url), factory)
+
+
+def get_gemini_model(api_key: str, model_name: str) -> Any:
+    """``GenerativeModel`` compartido por (api key, modelo).
+
+    ``genai.configure`` es global al proceso: sólo se vuelve a llamar si cambia la key.
+    El modelo resolvería su cliente en la primera llamada, cuando otro tenant ya pudo haber
+    reconfigurado el SDK; por eso se le fija aquí, con la key de este tenant configurada.
+    """
+
+    import google.generativeai as genai
+
+    def factory() -> Any:
+        with _gemini_configured(api_key) as genai_client:
+            model = genai.GenerativeModel(model_name)
+            model._client = genai_client.get_default_generative_client()
+            return model
+
+    return _pooled_transport(("gemini", _key_fingerprint(api_key), model_name), factory)
+
+
+@contextmanager
+def _gemini_configured(api_key: str) -> Iterator[Any]:
+    """Sostiene ``_gemini_lock`` con el SDK configurado para ``api_key``; entrega ``genai.client``."""
+
+    global _gemini_configured_key
+    import google.generativeai as genai
+    from google.generativeai import client as genai_client
+
+    fingerprint = _key_fingerprint(api_key)
+    with _gemini_lock:
+        if _gemini_configured_key != fingerprint:
+            genai.configure(api_key=api_key)
+            _gemini_configured_key = fingerprint
+        yield genai_client
+
+
+def get_pool_stats() -> dict[str, Any]:
+    with _transport_lock:
+        return {**_transport_stats, "size": len(_transports)}
+
+
+def reset_pool() -> None:
+    global _gemini_configured_key
+    with _transport_lock:
+        transports = list(_transports.values())
+        _transports.clear()
+        for key in _transport_stats:
+            _transport_stats[key] = 0
+    with _gemini_lock:
+        _gemini_configured_key = None
+    for transport in transports:
+        _close_transport(transport)
+
 __all__ = [
     "ChatMessage",
     "OpenAIClient",
@@ -26,6 +151,9 @@ __all__ = [
     "GeminiClient",
     "GeminiClientError",
     "get_ai_client",
+    "get_gemini_model",
+    "get_openai_transport",
+    "get_tenant_api_key",
 ]
 
 
@@ -59,37 +187,121 @@ class GeminiClient:
         if not api_key:
             raise ImproperlyConfigured("GEMINI_API_KEY debe estar configurada")
 
-        genai.configure(api_key=api_key)
+        self._genai = genai
+        self._api_key = api_key
+        self._key_fingerprint = _key_fingerprint(api_key)
         self._model_name = model or settings.GEMINI_DEFAULT_MODEL
-        self._model = genai.GenerativeModel(self._model_name)
+        self._model = get_gemini_model(api_key, self._model_name)
+        self.last_prompt_bytes = 0
+        self.last_cached_prefix_bytes = 0
 
     @property
     def model_name(self) -> str:
         return self._model_name
 
+    def _cached_context_model(self, system_prompt: str) -> Any | None:
+        """Modelo ligado a un ``CachedContent`` con ``system_prompt`` para no reenviarlo en cada llamada.
+
+        El nombre del contenido cacheado se comparte entre workers vía el cache de Django.
+        Regresa ``None`` si está desactivado o el SDK no soporta cache de contexto (<0.7).
+        """
+
+        if not getattr(settings, "GEMINI_CONTEXT_CACHE_ENABLED", True):
+            return None
+        try:
+            from google.generativeai import caching
+        except ImportError:
+            return None
+
+        digest = hashlib.sha256(system_prompt.encode("utf-8")).hexdigest()
+        key = (self._key_fingerprint, self._model_name, digest)
+        now = time.monotonic()
+        with _context_lock:
+            entry = _context_models.get(key)
+        if entry is not None and entry[1] > now:
+            return entry[0]
+
+        ttl = max(int(getattr(settings, "GEMINI_CONTEXT_CACHE_TTL_SECONDS", 3600)), 2 * _CONTEXT_CACHE_MARGIN_SECONDS)
+        shared_key = GEMINI_CONTEXT_CACHE_KEY.format(key=self._key_fingerprint, model=self._model_name, digest=digest)
+        try:
+            name = cache.get(shared_key)
+        except Exception:
+            name = None
+        # Las llamadas del SDK usan el cliente global: se hacen con la key de este cliente configurada.
+        with _gemini_configured(self._api_key) as genai_client:
+            cached = None
+            try:
+                if name:
+                    cached = caching.CachedContent.get(name)
+            except Exception:
+                cached = None
+            try:
+                if cached is None:
+                    cached = caching.CachedContent.create(
+                        model=self._model_name,
+                        system_instruction=system_prompt,
+                        ttl=timedelta(seconds=ttl),
+                    )
+                    cache.set(shared_key, cached.name, timeout=ttl - _CONTEXT_CACHE_MARGIN_SECONDS)
+                model = self._genai.GenerativeModel.from_cached_content(cached_content=cached)
+                model._client = genai_client.get_default_generative_client()
+            except Exception as exc:
+                logger.warning("Gemini: no se pudo usar cache de contexto, se envía el prompt completo: %s", exc)
+                return None
+
+        seconds_left = ttl
+        expire_time = getattr(cached, "expire_time", None)
+        if isinstance(expire_time, datetime):
+            seconds_left = (expire_time - datetime.now(timezone.utc)).total_seconds()
+        with _context_lock:
+            _context_models[key] = (model, now + max(seconds_left - _CONTEXT_CACHE_MARGIN_SECONDS, 0))
+        return model
+
+    def _forget_cached_context(self, system_prompt: str) -> None:
+        digest = hashlib.sha256(system_prompt.encode("utf-8")).hexdigest()
+        with _context_lock:
+            _context_models.pop((self._key_fingerprint, self._model_name, digest), None)
+        cache.delete(GEMINI_CONTEXT_CACHE_KEY.format(key=self._key_fingerprint, model=self._model_name, digest=digest))
+
+    def _start_chat(self, messages: Sequence[ChatMessage], *, cache_system_prompt: bool) -> tuple[Any, str, int]:
+        """Abre el chat del SDK con todo salvo el último mensaje: ``(chat, último contenido, bytes cacheados)``."""
+
+        model = self._model
+        cached_prefix_bytes = 0
+        pending = list(messages)
+        if cache_system_prompt and len(pending) > 1 and pending[0].role == "system":
+            cached_model = self._cached_context_model(pending[0].content)
+            if cached_model is not None:
+                model = cached_model
+                cached_prefix_bytes = len(pending[0].content.encode("utf-8"))
+                pending = pending[1:]
+        self.last_prompt_bytes = sum(len(msg.content.encode("utf-8")) for msg in pending)
+        self.last_cached_prefix_bytes = cached_prefix_bytes
+
+        # Convertimos para el SDK de Gemini
+        # Gemini usa 'user' y 'model' (assistant)
+        history = []
+        for msg in pending[:-1]:
+            role = "user" if msg.role in ("user", "system") else "model"
+            history.append({"role": role, "parts": [msg.content]})
+
+        return model.start_chat(history=history), pending[-1].content, cached_prefix_bytes
+
     def generate_text(
         self,
         messages: Sequence[ChatMessage],
         *,
         temperature: float = 0.2,
         max_output_tokens: int = 2048,
+        cache_system_prompt: bool = False,
     ) -> str:
         if not messages:
             raise ValueError("messages no puede estar vacío")
 
-        # Convertimos para el SDK de Gemini
-        # Gemini usa 'user' y 'model' (assistant)
-        history = []
-        for msg in messages[:-1]:
-            role = "user" if msg.role in ("user", "system") else "model"
-            history.append({"role": role, "parts": [msg.content]})
-
-        last_msg = messages[-1]
-        
-        chat = self._model.start_chat(history=history)
+        chat, last_content, cached_prefix_bytes = self._start_chat(messages, cache_system_prompt=cache_system_prompt)
         try:
             response = chat.send_message(
-                last_msg.content,
+                last_content,
                 generation_config={
                     "temperature": temperature,
                     "max_output_tokens": max_output_tokens,
@@ -97,15 +309,77 @@ class GeminiClient:
             )
             return response.text.strip()
         except Exception as exc:
+            if cached_prefix_bytes:
+                # El contenido cacheado pudo expirar del lado de Gemini: se reintenta con el prompt completo.
+                logger.warning("Gemini: falló la llamada con cache de contexto, reintentando sin cache: %s", exc)
+                self._forget_cached_context(messages[0].content)
+                return self.generate_text(
+                    messages,
+                    temperature=temperature,
+                    max_output_tokens=max_output_tokens,
+                )
+            raise GeminiClientError(f"Error al invocar Gemini: {exc}") from exc
+
+    def stream_text(
+        self,
+        messages: Sequence[ChatMessage],
+        *,
+        temperature: float = 0.2,
+        max_output_tokens: int = 2048,
+        cache_system_prompt: bool = False,
+    ) -> Iterator[str]:
+        """Como ``generate_text`` pero entrega los fragmentos conforme Gemini los produce."""
+
+        if not messages:
+            raise ValueError("messages no puede estar vacío")
+
+        chat, last_content, cached_prefix_bytes = self._start_chat(messages, cache_system_prompt=cache_system_prompt)
+        emitted = False
+        try:
+            response = chat.send_message(
+                last_content,
+                generation_config={
+                    "temperature": temperature,
+                    "max_output_tokens": max_output_tokens,
+                },
+                stream=True,
+            )
+            for chunk in response:
+                text = getattr(chunk, "text", "")
+                if text:
+                    emitted = True
+                    yield text
+        except Exception as exc:
+            if cached_prefix_bytes and not emitted:
+                logger.warning("Gemini: falló el streaming con cache de contexto, reintentando sin cache: %s", exc)
+                self._forget_cached_context(messages[0].content)
+                yield from self.stream_text(
+                    messages,
+                    temperature=temperature,
+                    max_output_tokens=max_output_tokens,
+                )
+                return
             raise GeminiClientError(f"Error al invocar Gemini: {exc}") from exc
 
 
 class OpenAIClient:
     """Cliente reutilizable para invocar modelos AI desde el backend."""
 
-    def __init__(self, *, model: str | None = None, api_key: str | None = None) -> None:
+    def __init__(
+        self,
+        *,
+        model: str | None = None,
+        api_key: str | None = None,
+        cache_scope: str = "global",
+        hedging: bool = False,
+    ) -> None:
         self._provider = getattr(settings, "AI_PROVIDER", "openai").lower()
         self._last_used_model: str | None = None
+        self._cache_scope = cache_scope
+        self._hedging = hedging
+        self.last_prompt_bytes = 0
+        self.last_cached_prefix_bytes = 0
+        self.last_response_cached = False
 
         if self._provider == "perplexity":
             self._configure_perplexity(model)
@@ -131,56 +405,205 @@ class OpenAIClient:
         *,
         temperature: float = 0.2,
         max_output_tokens: int = 800,
+        cache_system_prompt: bool = False,
+        cache_feature: str | None = None,
+        bypass_cache: bool = False,
     ) -> str:
+        """Genera texto con el proveedor configurado.
+
+        ``cache_system_prompt`` pide reutilizar del lado del proveedor el primer mensaje
+        ``system`` (Gemini ``CachedContent``); OpenAI cachea prefijos largos por su cuenta.
+        ``last_prompt_bytes`` y ``last_cached_prefix_bytes`` registran lo enviado.
+
+        Con ``cache_feature`` la respuesta se guarda en ``response_cache`` bajo el TTL de
+        esa funcionalidad; una petición idéntica del mismo tenant ya no llega al proveedor.
+        ``bypass_cache`` fuerza la llamada y refresca la entrada.
+        """
+
         if not messages:
             raise ValueError("messages no puede estar vacío")
 
+        self.last_response_cached = False
+        if cache_feature is None:
+            return self._generate_uncached(
+                messages,
+                temperature=temperature,
+                max_output_tokens=max_output_tokens,
+                cache_system_prompt=cache_system_prompt,
+            )
+
+        def generate() -> dict[str, str]:
+            text = self._generate_uncached(
+                messages,
+                temperature=temperature,
+                max_output_tokens=max_output_tokens,
+                cache_system_prompt=cache_system_prompt,
+            )
+            return {"text": text, "model": self.model_name}
+
+        result, hit = response_cache.get_or_generate(
+            feature=cache_feature,
+            scope=self._cache_scope,
+            provider=self._provider,
+            model=self._requested_model,
+            messages=[{"role": message.role, "content": message.content} for message in messages],
+            temperature=temperature,
+            max_output_tokens=max_output_tokens,
+            generate=generate,
+            bypass=bypass_cache,
+        )
+        if hit:
+            self._last_used_model = result.get("model") or self._last_used_model
+            self.last_prompt_bytes = 0
+            self.last_cached_prefix_bytes = 0
+            self.last_response_cached = True
+        return result["text"]
+
+    def stream_text(
+        self,
+        messages: Sequence[ChatMessage],
+        *,
+        temperature: float = 0.2,
+        max_output_tokens: int = 800,
+        cache_system_prompt: bool = False,
+        cache_feature: str | None = None,
+        bypass_cache: bool = False,
+    ) -> Iterator[str]:
+        """Variante de ``generate_text`` que entrega el texto en fragmentos conforme llega.
+
+        Los errores al abrir la llamada se señalan igual que en ``generate_text`` (y el
+        modelo de respaldo de OpenAI sólo se intenta en ese punto); un corte a medio
+        flujo levanta ``OpenAIClientError``/``GeminiClientError`` tras los fragmentos ya
+        entregados. Un acierto de ``response_cache`` se entrega como un único fragmento y
+        el texto completo se guarda al terminar el flujo.
+        """
+
+        if not messages:
+            raise ValueError("messages no puede estar vacío")
+
+        self.last_response_cached = False
+        use_cache = cache_feature is not None and response_cache.is_enabled()
+        digest = ""
+        if use_cache:
+            key_parts = {
+                "feature": cache_feature,
+                "scope": self._cache_scope,
+                "provider": self._provider,
+                "model": self._requested_model,
+                "messages": [{"role": message.role, "content": message.content} for message in messages],
+                "temperature": temperature,
+                "max_output_tokens": max_output_tokens,
+            }
+            if bypass_cache:
+                digest = response_cache.build_key(**key_parts)
+            else:
+                digest, cached = response_cache.lookup(**key_parts)
+                if cached is not None:
+                    self._last_used_model = cached.get("model") or self._last_used_model
+                    self.last_prompt_bytes = 0
+                    self.last_cached_prefix_bytes = 0
+                    self.last_response_cached = True
+                    yield cached["text"]
+                    return
+
+        parts: list[str] = []
+        for fragment in self._stream_uncached(
+            messages,
+            temperature=temperature,
+            max_output_tokens=max_output_tokens,
+            cache_system_prompt=cache_system_prompt,
+        ):
+            parts.append(fragment)
+            yield fragment
+
+        text = "".join(parts).strip()
+        if use_cache and text:
+            response_cache.store(digest, {"text": text, "model": self.model_name}, feature=cache_feature, bypass=bypass_cache)
+
+    @property
+    def _requested_model(self) -> str:
+        if self._provider == "perplexity":
+            return self._perplexity_model
+        if self._provider == "gemini":
+            return self._gemini_client.model_name
+        return self._primary_model
+
+    def _generate_uncached(
+        self,
+        messages: Sequence[ChatMessage],
+        *,
+        temperature: float,
+        max_output_tokens: int,
+        cache_system_prompt: bool,
+    ) -> str:
         payload = [
             {"role": message.role, "content": message.content}
             for message in messages
         ]
+        self.last_prompt_bytes = sum(len(message.content.encode("utf-8")) for message in messages)
+        self.last_cached_prefix_bytes = 0
 
+        started = time.perf_counter()
         if self._provider == "gemini":
-            text = self._gemini_client.generate_text(
-                messages,
-                temperature=temperature,
-                max_output_tokens=max_output_tokens,
-            )
+            try:
+                text = self._gemini_client.generate_text(
+                    messages,
+                    temperature=temperature,
+                    max_output_tokens=max_output_tokens,
+                    cache_system_prompt=cache_system_prompt,
+                )
+            finally:
+                latency.record(self._provider, self._gemini_client.model_name, time.perf_counter() - started)
             self._last_used_model = self._gemini_client.model_name
+            self.last_prompt_bytes = self._gemini_client.last_prompt_bytes
+            self.last_cached_prefix_bytes = self._gemini_client.last_cached_prefix_bytes
             return text
 
         if self._provider == "perplexity":
-            text = self._generate_perplexity_with_continuations(
-                payload,
-                temperature=temperature,
-                max_output_tokens=max_output_tokens,
-            )
+            try:
+                text = self._generate_perplexity_with_continuations(
+                    payload,
+                    temperature=temperature,
+                    max_output_tokens=max_output_tokens,
+                )
+            finally:
+                latency.record(self._provider, self._perplexity_model, time.perf_counter() - started)
             self._last_used_model = self._perplexity_model
             return text
 
-        use_responses_api = hasattr(self._client, "responses")
         models_to_try: list[str] = [self._primary_model]
         if self._fallback_model and self._fallback_model not in models_to_try:
             models_to_try.append(self._fallback_model)
 
+        def call(model_name: str) -> Callable[[], str]:
+            return lambda: self._generate_via_openai(
+                payload,
+                model_name=model_name,
+                temperature=temperature,
+                max_output_tokens=max_output_tokens,
+            )
+
+        delay = latency.hedge_delay(self._provider, models_to_try[0]) if self._hedging and len(models_to_try) > 1 else None
+        if delay is not None:
+            # Se cubre el primario con el respaldo. Antes de la cobertura sólo un modelo inexistente
+            # pasa al respaldo, igual que en el recorrido secuencial de abajo.
+            text, winner = latency.run_hedged(
+                call(models_to_try[0]),
+                call(models_to_try[1]),
+                delay=delay,
+                provider=self._provider,
+                primary_model=models_to_try[0],
+                fallback_model=models_to_try[1],
+                failover_on=(OpenAIModelNotFoundError,),
+            )
+            self._last_used_model = models_to_try[0] if winner == "primary" else models_to_try[1]
+            return text
+
         last_error: OpenAIClientError | None = None
 
         for candidate_model in models_to_try:
             try:
-                if use_responses_api:
-                    text = self._generate_via_responses(
-                        payload,
-                        model_name=candidate_model,
-                        temperature=temperature,
-                        max_output_tokens=max_output_tokens,
-                    )
-                else:
-                    text = self._generate_via_chat(
-                        payload,
-                        model_name=candidate_model,
-                        temperature=temperature,
-                        max_output_tokens=max_output_tokens,
-                    )
+                text = call(candidate_model)()
                 self._last_used_model = candidate_model
                 return text
             except OpenAIModelNotFoundError as exc:
@@ -194,6 +617,163 @@ class OpenAIClient:
             raise last_error
         raise OpenAIClientError("No se pudo generar texto con OpenAI")
 
+    def _generate_via_openai(
+        self,
+        payload: list[dict[str, str]],
+        *,
+        model_name: str,
+        temperature: float,
+        max_output_tokens: int,
+    ) -> str:
+        """Una llamada a ``model_name`` (Responses API si el SDK la tiene) que registra su latencia.
+
+        Las fallas también se registran: un timeout cuenta con lo que tardó en expirar.
+        """
+
+        started = time.perf_counter()
+        generate = self._generate_via_responses if hasattr(self._client, "responses") else self._generate_via_chat
+        try:
+            return generate(
+                payload,
+                model_name=model_name,
+                temperature=temperature,
+                max_output_tokens=max_output_tokens,
+            )
+        finally:
+            latency.record(self._provider, model_name, time.perf_counter() - started)
+
+    def _stream_uncached(
+        self,
+        messages: Sequence[ChatMessage],
+        *,
+        temperature: float,
+        max_output_tokens: int,
+        cache_system_prompt: bool,
+    ) -> Iterator[str]:
+        payload = [
+            {"role": message.role, "content": message.content}
+            for message in messages
+        ]
+        self.last_prompt_bytes = sum(len(message.content.encode("utf-8")) for message in messages)
+        self.last_cached_prefix_bytes = 0
+
+        if self._provider == "gemini":
+            self._last_used_model = self._gemini_client.model_name
+            fragments = self._gemini_client.stream_text(
+                messages,
+                temperature=temperature,
+                max_output_tokens=max_output_tokens,
+                cache_system_prompt=cache_system_prompt,
+            )
+            first = next(fragments, None)
+            self.last_prompt_bytes = self._gemini_client.last_prompt_bytes
+            self.last_cached_prefix_bytes = self._gemini_client.last_cached_prefix_bytes
+            if first is not None:
+                yield first
+                yield from fragments
+            return
+
+        if self._provider == "perplexity":
+            self._last_used_model = self._perplexity_model
+            yield from self._stream_perplexity_with_continuations(
+                payload,
+                temperature=temperature,
+                max_output_tokens=max_output_tokens,
+            )
+            return
+
+        use_responses_api = hasattr(self._client, "responses")
+        models_to_try: list[str] = [self._primary_model]
+        if self._fallback_model and self._fallback_model not in models_to_try:
+            models_to_try.append(self._fallback_model)
+
+        last_error: OpenAIClientError | None = None
+        for candidate_model in models_to_try:
+            try:
+                stream = self._open_openai_stream(
+                    payload,
+                    model_name=candidate_model,
+                    temperature=temperature,
+                    max_output_tokens=max_output_tokens,
+                    use_responses_api=use_responses_api,
+                )
+            except OpenAIModelNotFoundError as exc:
+                last_error = exc
+                continue
+            self._last_used_model = candidate_model
+            yield from self._iter_openai_stream(stream, use_responses_api=use_responses_api)
+            return
+
+        if last_error:
+            raise last_error
+        raise OpenAIClientError("No se pudo generar texto con OpenAI")
+
+    def _open_openai_stream(
+        self,
+        payload: list[dict[str, str]],
+        *,
+        model_name: str,
+        temperature: float,
+        max_output_tokens: int,
+        use_responses_api: bool,
+    ) -> Any:
+        """Abre el flujo probando las mismas variantes de parámetros que la vía no streaming."""
+
+        if use_responses_api:
+            create = self._client.responses.create
+            base = {"model": model_name, "input": payload, "max_output_tokens": max_output_tokens, "stream": True}
+            variants = [{"temperature": temperature}, {}]
+        else:
+            create = self._client.chat.completions.create
+            base = {"model": model_name, "messages": payload, "stream": True}
+            variants = [
+                {"temperature": temperature, "max_tokens": max_output_tokens},
+                {"temperature": temperature, "max_completion_tokens": max_output_tokens},
+                {"max_completion_tokens": max_output_tokens},
+                {"max_tokens": max_output_tokens},
+            ]
+
+        last_exc: Exception | None = None
+        for extra in variants:
+            try:
+                return create(**base, **extra)
+            except NotFoundError as exc:
+                raise OpenAIModelNotFoundError(f"Modelo {model_name} no disponible: {exc}") from exc
+            except (APIError, APIConnectionError, APITimeoutError, OpenAIError) as exc:
+                message = str(exc).lower()
+                retryable = ("temperature" in message and "only the default" in message) or (
+                    "max_tokens" in message and "max_completion_tokens" in message
+                )
+                if not retryable:
+                    raise OpenAIClientError(f"Error al invocar el modelo de OpenAI: {exc}") from exc
+                last_exc = exc
+        raise OpenAIClientError(f"Error al invocar el modelo de OpenAI: {last_exc}") from last_exc
+
+    @staticmethod
+    def _iter_openai_stream(stream: Any, *, use_responses_api: bool) -> Iterator[str]:
+        try:
+            for event in stream:
+                if use_responses_api:
+                    event_type = getattr(event, "type", "")
+                    if event_type in {"error", "response.failed"}:
+                        raise OpenAIClientError(f"OpenAI interrumpió el flujo: {event_type}")
+                    if event_type != "response.output_text.delta":
+                        continue
+                    fragment = getattr(event, "delta", "")
+                else:
+                    choices = getattr(event, "choices", None) or []
+                    if not choices:
+                        continue
+                    fragment = getattr(getattr(choices[0], "delta", None), "content", None)
+                if fragment:
+                    yield fragment
+        except (APIError, APIConnectionError, APITimeoutError, OpenAIError) as exc:
+            raise OpenAIClientError(f"Error al leer el flujo de OpenAI: {exc}") from exc
+        finally:
+            close = getattr(stream, "close", None)
+            if callable(close):
+                close()
+
     def _generate_via_responses(
         self,
         payload: list[dict[str, str]],
@@ -428,8 +1008,8 @@ class OpenAIClient:
         if self._fallback_model == "":
             self._fallback_model = None
 
-        self._client = OpenAI(
-            api_key=api_key,
+        self._client = get_openai_transport(
+            api_key,
             base_url=settings.OPENAI_API_BASE_URL,
             timeout=settings.OPENAI_TIMEOUT_SECONDS,
         )
@@ -456,7 +1036,7 @@ class OpenAIClient:
             "Accept": "application/json",
             "User-Agent": "materialidad-ai-client/1.0",
         }
-        self._perplexity_session = requests.Session()
+        self._perplexity_session = _get_http_session(self._perplexity_base_url)
         raw_continuations = getattr(settings, "PERPLEXITY_MAX_CONTINUATIONS", 2)
         try:
             self._perplexity_max_continuations = max(0, int(raw_continuations))
@@ -564,6 +1144,107 @@ class OpenAIClient:
         return text.strip(), finish_reason
 
 
+    def _stream_perplexity_with_continuations(
+        self,
+        payload: list[dict[str, str]],
+        *,
+        temperature: float,
+        max_output_tokens: int,
+    ) -> Iterator[str]:
+        attempts = 0
+        messages = [dict(item) for item in payload]
+        separator = ""
+
+        while True:
+            parts: list[str] = []
+            finish_reason = ""
+            for fragment, reason in self._stream_via_perplexity(
+                messages,
+                temperature=temperature,
+                max_output_tokens=max_output_tokens,
+            ):
+                if fragment:
+                    if not parts and separator:
+                        yield separator
+                    parts.append(fragment)
+                    yield fragment
+                finish_reason = reason or finish_reason
+            text = "".join(parts)
+            if finish_reason != "length" or attempts >= self._perplexity_max_continuations:
+                break
+            attempts += 1
+            separator = "\n\n"
+            messages = messages + [
+                {"role": "assistant", "content": text},
+                {
+                    "role": "user",
+                    "content": "Continúa exactamente donde terminaste, sin repetir contenido ya entregado.",
+                },
+            ]
+
+    def _stream_via_perplexity(
+        self,
+        payload: list[dict[str, str]],
+        *,
+        temperature: float,
+        max_output_tokens: int,
+    ) -> Iterator[tuple[str, str]]:
+        """Lee el SSE de Perplexity: ``(fragmento, finish_reason)`` por evento."""
+
+        body = {
+            "model": self._perplexity_model,
+            "messages": payload,
+            "temperature": temperature,
+            "max_tokens": max_output_tokens,
+            "stream": True,
+        }
+        try:
+            response = self._perplexity_session.post(
+                self._perplexity_base_url,
+                json=body,
+                headers={**self._perplexity_headers, "Accept": "text/event-stream"},
+                timeout=self._perplexity_timeout,
+                stream=True,
+            )
+        except requests.Timeout as exc:
+            raise OpenAIClientError(
+                "Perplexity tardó demasiado en responder; intenta nuevamente"
+            ) from exc
+        except requests.RequestException as exc:
+            raise OpenAIClientError(f"Error de red al invocar Perplexity: {exc}") from exc
+
+        try:
+            if response.status_code == 404:
+                raise OpenAIModelNotFoundError(
+                    f"Modelo {self._perplexity_model} no disponible: {response.text}"
+                )
+            if response.status_code >= 400:
+                raise OpenAIClientError(
+                    f"Perplexity devolvió un error {response.status_code}: {response.text}"
+                )
+
+            for line in response.iter_lines(decode_unicode=True):
+                if not line or not line.startswith("data:"):
+                    continue
+                data = line[len("data:"):].strip()
+                if data == "[DONE]":
+                    break
+                try:
+                    chunk = json.loads(data)
+                except ValueError as exc:
+                    raise OpenAIClientError("Perplexity no devolvió JSON válido") from exc
+                choices = chunk.get("choices") or []
+                if not choices:
+                    continue
+                choice = choices[0]
+                fragment = (choice.get("delta") or {}).get("content") or ""
+                yield fragment if isinstance(fragment, str) else "", choice.get("finish_reason") or ""
+        except requests.RequestException as exc:
+            raise OpenAIClientError(f"Error de red al leer el flujo de Perplexity: {exc}") from exc
+        finally:
+            response.close()
+
+
 def get_ai_client(tenant=None, *, model: str | None = None) -> OpenAIClient:
     """Factory que devuelve un OpenAIClient configurado para el tenant dado.
 
@@ -572,32 +1253,58 @@ def get_ai_client(tenant=None, *, model: str | None = None) -> OpenAIClient:
     Esto permite que la key del .env sirva como fallback para todos los tenants
     que no tengan configuración propia.
     """
-    api_key: str | None = None
+    api_key = get_tenant_api_key(tenant)
+    if api_key is None:
+        logger.debug("get_ai_client: usando OPENAI_API_KEY global del .env")
 
-    if tenant is not None:
-        try:
-            # Import diferido para evitar dependencias circulares
-            from tenancy.models import TenantAIConfig  # noqa: PLC0415
-            ai_cfg = getattr(tenant, "ai_config", None)
-            if ai_cfg is None:
-                try:
-                    ai_cfg = TenantAIConfig.objects.get(tenant=tenant)
-                except TenantAIConfig.DoesNotExist:
-                    ai_cfg = None
-            if ai_cfg and ai_cfg.api_key:
-                api_key = ai_cfg.api_key
-                logger.debug(
-                    "get_ai_client: usando api_key de TenantAIConfig para tenant=%s",
-                    getattr(tenant, "slug", tenant),
-                )
-        except Exception as exc:  # pragma: no cover
-            logger.warning(
-                "get_ai_client: no se pudo leer TenantAIConfig para tenant=%s — %s",
+    return OpenAIClient(
+        model=model,
+        api_key=api_key,
+        cache_scope=response_cache.tenant_scope(tenant),
+        hedging=get_tenant_hedging(tenant),
+    )
+
+
+def get_tenant_api_key(tenant) -> str | None:
+    """API key propia del tenant (``TenantAIConfig``), cacheada por proceso e invalidada al guardarla."""
+
+    if tenant is None or getattr(tenant, "pk", None) is None:
+        return None
+    try:
+        # Import diferido para evitar dependencias circulares
+        from tenancy import ai_config_cache  # noqa: PLC0415
+
+        api_key = ai_config_cache.get_api_key(tenant.pk)
+        if api_key:
+            logger.debug(
+                "get_ai_client: usando api_key de TenantAIConfig para tenant=%s",
                 getattr(tenant, "slug", tenant),
-                exc,
             )
+        return api_key
+    except Exception as exc:  # pragma: no cover
+        logger.warning(
+            "get_ai_client: no se pudo leer TenantAIConfig para tenant=%s — %s",
+            getattr(tenant, "slug", tenant),
+            exc,
+        )
+        return None
 
-    if api_key is None:
-        logger.debug("get_ai_client: usando OPENAI_API_KEY global del .env")
 
-    return OpenAIClient(model=model, api_key=api_key)
+def get_tenant_hedging(tenant) -> bool:
+    """Hedging activo para todos (``AI_HEDGING_ENABLED``) o por opt-in del tenant en ``TenantAIConfig``."""
+
+    if getattr(settings, "AI_HEDGING_ENABLED", False):
+        return True
+    if tenant is None or getattr(tenant, "pk", None) is None:
+        return False
+    try:
+        from tenancy import ai_config_cache  # noqa: PLC0415
+
+        return ai_config_cache.hedging_enabled(tenant.pk)
+    except Exception as exc:  # pragma: no cover
+        logger.warning(
+            "get_ai_client: no se pudo leer el hedging de TenantAIConfig para tenant=%s — %s",
+            getattr(tenant, "slug", tenant),
+            exc,
+        )
+        return False
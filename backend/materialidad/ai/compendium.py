@@ -0,0 +1,119 @@
+"""Compendio de normatividad fiscal que acompaña las consultas legales en modo Gemini.
+
+El archivo se lee una sola vez por proceso (con ``mmap``) y se recarga sólo si cambia
+su ``mtime`` o tamaño; el prompt de sistema que lo envuelve también se arma una vez.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import mmap
+import os
+import threading
+from dataclasses import dataclass
+
+from django.conf import settings
+
+logger = logging.getLogger("materialidad.ai")
+
+# Un carácter UTF-8 ocupa a lo más 4 bytes: basta decodificar ese prefijo del archivo.
+_MAX_BYTES_PER_CHAR = 4
+
+COMPENDIUM_SYSTEM_PROMPT = (
+    "Eres un Socio Senior de una firma fiscal líder en México, experto en materialidad y cumplimiento.\n"
+    "Tienes acceso a un COMPENDIO DE NORMATIVIDAD FISCAL detallado que se te proporciona a continuación.\n"
+    "Tu objetivo es dar una respuesta técnica, precisa y accionable basada estrictamente en este conocimiento y en el contexto del cliente.\n\n"
+    "INSTRUCCIONES DE FORMATO:\n"
+    "1. Usa Markdown con títulos descriptivos.\n"
+    "2. Abre siempre con '## 0. Conclusión Ejecutiva' e incluye tres bullets: postura, nivel de sustento y acción inmediata.\n"
+    "3. Cita específicamente leyes y artículos mencionados en el compendio.\n"
+    "4. Divide el resto de tu respuesta en: Análisis Normativo, Aplicación al Caso, Riesgos Identificados y Pasos a Seguir.\n"
+    "5. Si el compendio no contiene la información, indícalo claramente.\n\n"
+    "--- COMPENDIO DE NORMATIVIDAD FISCAL ---\n{content}\n--- FIN DEL COMPENDIO ---"
+)
+
+
+@dataclass(frozen=True)
+class LegalCompendium:
+    path: str
+    mtime_ns: int
+    size: int
+    content: str
+    system_prompt: str
+    sha256: str
+
+    @property
+    def prompt_bytes(self) -> int:
+        return len(self.system_prompt.encode("utf-8"))
+
+
+_lock = threading.Lock()
+_current: LegalCompendium | None = None
+_stats = {"loads": 0, "hits": 0}
+
+
+def _compendium_path() -> str:
+    return str(getattr(settings, "LEGAL_COMPENDIUM_PATH", ""))
+
+
+def _max_chars() -> int:
+    return int(getattr(settings, "LEGAL_COMPENDIUM_MAX_CHARS", 750_000))
+
+
+def _read_prefix(path: str, *, size: int, max_chars: int) -> str:
+    if not size:
+        return ""
+    with open(path, "rb") as fh, mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        raw = mapped[: min(size, max_chars * _MAX_BYTES_PER_CHAR)]
+    return raw.decode("utf-8", errors="ignore")[:max_chars]
+
+
+def get_legal_compendium() -> LegalCompendium | None:
+    """Compendio vigente del proceso; ``None`` si el archivo no existe o no se puede leer."""
+
+    global _current
+    path = _compendium_path()
+    try:
+        stat = os.stat(path)
+    except OSError:
+        logger.warning("Archivo de compendio legal no encontrado en %s", path)
+        return None
+
+    current = _current
+    if current is not None and (current.path, current.mtime_ns, current.size) == (path, stat.st_mtime_ns, stat.st_size):
+        with _lock:
+            _stats["hits"] += 1
+        return current
+
+    try:
+        content = _read_prefix(path, size=stat.st_size, max_chars=_max_chars())
+    except (OSError, ValueError) as exc:
+        logger.error("Error leyendo el compendio legal %s: %s", path, exc)
+        return None
+    system_prompt = COMPENDIUM_SYSTEM_PROMPT.format(content=content)
+    compendium = LegalCompendium(
+        path=path,
+        mtime_ns=stat.st_mtime_ns,
+        size=stat.st_size,
+        content=content,
+        system_prompt=system_prompt,
+        sha256=hashlib.sha256(system_prompt.encode("utf-8")).hexdigest(),
+    )
+    with _lock:
+        _current = compendium
+        _stats["loads"] += 1
+    return compendium
+
+
+def get_stats() -> dict[str, int]:
+    with _lock:
+        return dict(_stats)
+
+
+def reset() -> None:
+    global _current
+    with _lock:
+        _current = None
+        for key in _stats:
+            _stats[key] = 0
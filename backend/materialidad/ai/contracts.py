@@ -4,7 +4,7 @@ from dataclasses import dataclass
 from datetime import date
 from decimal import Decimal
 from textwrap import dedent
-from typing import Any, Iterable, Optional
+from typing import Any, Iterable, Iterator, Optional
 
 from ..models import ContratoTemplate, Empresa
 from .client import ChatMessage, get_ai_client
@@ -474,7 +474,7 @@ def build_definitive_contract_prompt(req: ContractFinalRequest) -> list[ChatMess
     ]
 
 
-def generate_contract_document(
+def _build_draft_request(
     *,
     empresa: Empresa,
     template: ContratoTemplate | None,
@@ -486,8 +486,8 @@ def generate_contract_document(
     clausulas_especiales: Iterable[str] | None,
     idioma: str = "es",
     tono: str = "formal",
-) -> dict[str, Any]:
-    req = ContractDraftRequest(
+) -> ContractDraftRequest:
+    return ContractDraftRequest(
         empresa=empresa,
         template=template,
         razon_negocio=razon_negocio,
@@ -503,15 +503,9 @@ def generate_contract_document(
         idioma=idioma,
         tono=tono,
     )
-    messages = build_contract_prompt(req)
-    temperature, max_tokens = _tone_params(req.tono)
-    from tenancy.middleware import TenantContext
-    client = get_ai_client(TenantContext.get_current_tenant())
-    document_text = client.generate_text(
-        messages,
-        temperature=temperature,
-        max_output_tokens=max_tokens,
-    )
+
+
+def _draft_document_result(req: ContractDraftRequest, document_text: str, *, model_name: str) -> dict[str, Any]:
     citations, citation_metadata = get_or_generate_citations(
         document_text=document_text,
         empresa=req.empresa,
@@ -522,12 +516,52 @@ def generate_contract_document(
         "documento_markdown": document_text,
         "idioma": req.idioma,
         "tono": req.tono,
-        "modelo": public_model_label(client.model_name),
+        "modelo": public_model_label(model_name),
         "citas_legales": citations,
         "citas_legales_metadata": citation_metadata,
     }
 
 
+def generate_contract_document(*, bypass_cache: bool = False, **kwargs: Any) -> dict[str, Any]:
+    req = _build_draft_request(**kwargs)
+    messages = build_contract_prompt(req)
+    temperature, max_tokens = _tone_params(req.tono)
+    from tenancy.middleware import TenantContext
+    client = get_ai_client(TenantContext.get_current_tenant())
+    document_text = client.generate_text(
+        messages,
+        temperature=temperature,
+        max_output_tokens=max_tokens,
+        cache_feature="contract_document",
+        bypass_cache=bypass_cache,
+    )
+    return _draft_document_result(req, document_text, model_name=client.model_name)
+
+
+def stream_contract_document(*, bypass_cache: bool = False, **kwargs: Any) -> Iterator[tuple[str, Any]]:
+    """Como ``generate_contract_document`` pero en eventos: ``delta`` por fragmento y ``done`` con el resultado.
+
+    Las citas legales se calculan sobre el texto completo, al cerrar el flujo.
+    """
+
+    req = _build_draft_request(**kwargs)
+    messages = build_contract_prompt(req)
+    temperature, max_tokens = _tone_params(req.tono)
+    from tenancy.middleware import TenantContext
+    client = get_ai_client(TenantContext.get_current_tenant())
+    parts: list[str] = []
+    for fragment in client.stream_text(
+        messages,
+        temperature=temperature,
+        max_output_tokens=max_tokens,
+        cache_feature="contract_document",
+        bypass_cache=bypass_cache,
+    ):
+        parts.append(fragment)
+        yield "delta", fragment
+    yield "done", _draft_document_result(req, "".join(parts).strip(), model_name=client.model_name)
+
+
 def generate_definitive_contract(markdown_borrador: str, *, idioma: str = "es") -> dict[str, Any]:
     req = ContractFinalRequest(markdown_borrador=markdown_borrador, idioma=idioma, tono="formal")
     messages = build_definitive_contract_prompt(req)
@@ -17,21 +17,17 @@ from typing import Any
 
 from django.conf import settings
 
+from ..pdf_text import PdfSource, extract_pdf_text
+from . import response_cache
+from .client import get_gemini_model, get_openai_transport, get_tenant_api_key
+
 logger = logging.getLogger("materialidad.ai")
 
 
 def _extract_pdf_text(pdf_bytes: bytes, *, max_pages: int = 3) -> str:
     """Extrae texto nativo de un PDF (sin OCR)."""
     try:
-        from pypdf import PdfReader
-
-        reader = PdfReader(io.BytesIO(pdf_bytes))
-        text_parts: list[str] = []
-        for page in reader.pages[:max_pages]:
-            extracted = page.extract_text() or ""
-            if extracted:
-                text_parts.append(extracted)
-        text = "\n".join(text_parts).strip()
+        text = extract_pdf_text(PdfSource.from_bytes(pdf_bytes), max_pages=max_pages, skip_empty=True).strip()
         text = re.sub(r"\s+", " ", text)
         return text
     except Exception as exc:
@@ -157,19 +153,9 @@ REGLAS:
 def _resolve_api_key(tenant, provider: str) -> str | None:
     """Resuelve la API key para el proveedor dado: tenant primero, luego .env."""
     # Primero intentar TenantAIConfig
-    if tenant is not None:
-        try:
-            from tenancy.models import TenantAIConfig
-            ai_cfg = getattr(tenant, "ai_config", None)
-            if ai_cfg is None:
-                try:
-                    ai_cfg = TenantAIConfig.objects.get(tenant=tenant)
-                except TenantAIConfig.DoesNotExist:
-                    ai_cfg = None
-            if ai_cfg and ai_cfg.api_key:
-                return ai_cfg.api_key
-        except Exception as exc:
-            logger.warning("CSF: no se pudo leer TenantAIConfig: %s", exc)
+    api_key = get_tenant_api_key(tenant)
+    if api_key:
+        return api_key
 
     # Fallback a settings globales según proveedor
     if provider == "gemini":
@@ -179,11 +165,8 @@ def _resolve_api_key(tenant, provider: str) -> str | None:
 
 def _extract_with_gemini(image_urls: list[str], api_key: str) -> dict[str, Any]:
     """Extrae datos de CSF usando Gemini Vision (inline bytes, sin PIL)."""
-    import google.generativeai as genai
-
-    genai.configure(api_key=api_key)
     model_name = getattr(settings, "GEMINI_DEFAULT_MODEL", "gemini-1.5-flash")
-    model = genai.GenerativeModel(model_name)
+    model = get_gemini_model(api_key, model_name)
 
     parts: list[Any] = [CSF_EXTRACTION_PROMPT]
     for url in image_urls:
@@ -202,11 +185,8 @@ def _extract_with_gemini(image_urls: list[str], api_key: str) -> dict[str, Any]:
 
 def _extract_from_text_with_gemini(text: str, api_key: str) -> dict[str, Any]:
     """Parsea texto de CSF usando Gemini (sin visión)."""
-    import google.generativeai as genai
-
-    genai.configure(api_key=api_key)
     model_name = getattr(settings, "GEMINI_DEFAULT_MODEL", "gemini-1.5-flash")
-    model = genai.GenerativeModel(model_name)
+    model = get_gemini_model(api_key, model_name)
 
     response = model.generate_content([
         CSF_TEXT_EXTRACTION_PROMPT,
@@ -222,8 +202,6 @@ def _extract_from_text_with_gemini(text: str, api_key: str) -> dict[str, Any]:
 
 def _extract_with_openai(image_urls: list[str], api_key: str) -> dict[str, Any]:
     """Extrae datos de CSF usando OpenAI Vision."""
-    from openai import OpenAI
-
     content: list[dict] = [{"type": "text", "text": CSF_EXTRACTION_PROMPT}]
     for url in image_urls:
         content.append({
@@ -231,7 +209,7 @@ def _extract_with_openai(image_urls: list[str], api_key: str) -> dict[str, Any]:
             "image_url": {"url": url, "detail": "high"},
         })
 
-    client = OpenAI(api_key=api_key, timeout=60)
+    client = get_openai_transport(api_key, timeout=60)
     response = client.chat.completions.create(
         model="gpt-4o",
         messages=[{"role": "user", "content": content}],
@@ -247,9 +225,7 @@ def _extract_with_openai(image_urls: list[str], api_key: str) -> dict[str, Any]:
 
 def _extract_from_text_with_openai(text: str, api_key: str) -> dict[str, Any]:
     """Parsea texto de CSF usando OpenAI (sin visión)."""
-    from openai import OpenAI
-
-    client = OpenAI(api_key=api_key, timeout=60)
+    client = get_openai_transport(api_key, timeout=60)
     model_name = getattr(settings, "OPENAI_DEFAULT_MODEL", "gpt-4o-mini")
     response = client.chat.completions.create(
         model=model_name,
@@ -268,11 +244,53 @@ def _extract_from_text_with_openai(text: str, api_key: str) -> dict[str, Any]:
     return json.loads(raw)
 
 
-def extract_csf_data(file_content: bytes, filename: str = "csf.pdf", *, tenant=None) -> dict[str, Any]:
+def _extract_csf_uncached(
+    file_content: bytes,
+    *,
+    is_pdf: bool,
+    image_urls: list[str],
+    use_gemini: bool,
+    gemini_key: str | None,
+    openai_key: str | None,
+) -> dict[str, Any]:
+    if is_pdf:
+        pdf_text = _extract_pdf_text(file_content, max_pages=3)
+        if len(pdf_text) >= 150:
+            logger.info("CSF: usando extracción por texto nativo de PDF")
+            if use_gemini:
+                return _extract_from_text_with_gemini(pdf_text, gemini_key)
+            if openai_key:
+                return _extract_from_text_with_openai(pdf_text, openai_key)
+            raise RuntimeError("No hay API key de IA configurada (GEMINI_API_KEY ni OPENAI_API_KEY)")
+        logger.info("CSF: PDF sin texto utilizable, usando Vision")
+        image_urls = _pdf_to_images_b64(file_content)
+        if use_gemini:
+            return _extract_with_gemini(image_urls, gemini_key)
+        if openai_key:
+            return _extract_with_openai(image_urls, openai_key)
+        raise RuntimeError("No hay API key de IA configurada (GEMINI_API_KEY ni OPENAI_API_KEY)")
+
+    if use_gemini:
+        logger.info("CSF: usando Gemini Vision")
+        return _extract_with_gemini(image_urls, gemini_key)
+    if openai_key:
+        logger.info("CSF: usando OpenAI Vision")
+        return _extract_with_openai(image_urls, openai_key)
+    raise RuntimeError("No hay API key de IA configurada (GEMINI_API_KEY ni OPENAI_API_KEY)")
+
+
+def extract_csf_data(
+    file_content: bytes,
+    filename: str = "csf.pdf",
+    *,
+    tenant=None,
+    bypass_cache: bool = False,
+) -> dict[str, Any]:
     """Extrae datos de un PDF/imagen de CSF usando Vision AI.
 
     Usa Gemini Vision si AI_PROVIDER=gemini o hay GEMINI_API_KEY disponible.
     Cae a OpenAI Vision si solo hay OPENAI_API_KEY.
+    El resultado se cachea por tenant y SHA-256 del archivo (``response_cache``).
     """
     ext = filename.rsplit(".", 1)[-1].lower() if "." in filename else ""
     is_pdf = ext == "pdf"
@@ -290,36 +308,35 @@ def extract_csf_data(file_content: bytes, filename: str = "csf.pdf", *, tenant=N
     openai_key = _resolve_api_key(tenant, "openai")
 
     use_gemini = bool(gemini_key) and (ai_provider == "gemini" or not openai_key)
+    if use_gemini:
+        provider, model = "gemini", getattr(settings, "GEMINI_DEFAULT_MODEL", "gemini-1.5-flash")
+    else:
+        # Texto nativo y visión usan modelos distintos; la ruta depende sólo del archivo.
+        provider, model = "openai", f"{getattr(settings, 'OPENAI_DEFAULT_MODEL', 'gpt-4o-mini')}|gpt-4o"
 
     try:
-        if is_pdf:
-            pdf_text = _extract_pdf_text(file_content, max_pages=3)
-            if len(pdf_text) >= 150:
-                logger.info("CSF: usando extracción por texto nativo de PDF")
-                if use_gemini:
-                    data = _extract_from_text_with_gemini(pdf_text, gemini_key)
-                elif openai_key:
-                    data = _extract_from_text_with_openai(pdf_text, openai_key)
-                else:
-                    raise RuntimeError("No hay API key de IA configurada (GEMINI_API_KEY ni OPENAI_API_KEY)")
-            else:
-                logger.info("CSF: PDF sin texto utilizable, usando Vision")
-                image_urls = _pdf_to_images_b64(file_content)
-                if use_gemini:
-                    data = _extract_with_gemini(image_urls, gemini_key)
-                elif openai_key:
-                    data = _extract_with_openai(image_urls, openai_key)
-                else:
-                    raise RuntimeError("No hay API key de IA configurada (GEMINI_API_KEY ni OPENAI_API_KEY)")
-        else:
-            if use_gemini:
-                logger.info("CSF: usando Gemini Vision")
-                data = _extract_with_gemini(image_urls, gemini_key)
-            elif openai_key:
-                logger.info("CSF: usando OpenAI Vision")
-                data = _extract_with_openai(image_urls, openai_key)
-            else:
-                raise RuntimeError("No hay API key de IA configurada (GEMINI_API_KEY ni OPENAI_API_KEY)")
+        data, _ = response_cache.get_or_generate(
+            feature="csf_extraction",
+            scope=response_cache.tenant_scope(tenant),
+            provider=provider,
+            model=model,
+            messages=[
+                {"role": "user", "content": CSF_TEXT_EXTRACTION_PROMPT},
+                {"role": "user", "content": CSF_EXTRACTION_PROMPT},
+                {"role": "user", "content": file_content, "pdf": is_pdf},
+            ],
+            temperature=0.0,
+            max_output_tokens=2000,
+            generate=lambda: _extract_csf_uncached(
+                file_content,
+                is_pdf=is_pdf,
+                image_urls=image_urls,
+                use_gemini=use_gemini,
+                gemini_key=gemini_key,
+                openai_key=openai_key,
+            ),
+            bypass=bypass_cache,
+        )
 
         logger.info("CSF extraída exitosamente: RFC=%s", data.get("rfc", "?"))
         return data
@@ -0,0 +1,228 @@
+"""Latencia reciente por (proveedor, modelo) y solicitudes cubiertas (hedging).
+
+Cada llamada al proveedor, exitosa o no, registra su duración en una ventana móvil
+(``AI_HEDGING_LATENCY_WINDOW`` muestras), así que un timeout cuenta con el tiempo que tardó.
+Con ``AI_HEDGING_MIN_SAMPLES`` muestras, el p95 del modelo primario es su presupuesto.
+
+``run_hedged`` lanza el primario en un hilo propio de la llamada, fuera del pool, así que el
+pool (``AI_HEDGING_MAX_WORKERS`` hilos) nunca limita cuántas llamadas al proveedor hay en curso.
+Si el primario sigue en curso al agotar su presupuesto, la misma petición se lanza al respaldo
+en el pool y gana la primera respuesta exitosa. Sin lugar libre en el pool la cobertura se
+omite en vez de encolarse. Un hilo no se puede interrumpir: la llamada perdedora termina en
+segundo plano y su resultado se descarta.
+"""
+
+from __future__ import annotations
+
+import logging
+import math
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from queue import Empty, Queue
+from typing import Any, Callable, TypeVar
+
+from django.conf import settings
+
+observability_logger = logging.getLogger("materialidad.observability")
+
+T = TypeVar("T")
+
+# primary: el primario respondió dentro de su presupuesto (no hubo cobertura).
+# hedged_primary / hedged_fallback: se lanzó la cobertura y respondió el primario / el respaldo.
+# failover: el primario falló antes de cubrirse con un error de ``failover_on`` y respondió el respaldo.
+# skipped: el primario excedió su presupuesto pero no había lugar en el pool para cubrirlo.
+# failed: ninguno respondió.
+OUTCOMES = ("primary", "hedged_primary", "hedged_fallback", "failover", "skipped", "failed")
+
+_lock = threading.Lock()
+_samples: dict[tuple[str, str], deque[float]] = {}
+_outcomes: dict[str, int] = {outcome: 0 for outcome in OUTCOMES}
+_executor: ThreadPoolExecutor | None = None
+_slots: threading.BoundedSemaphore | None = None
+
+
+def _window() -> int:
+    return max(1, int(getattr(settings, "AI_HEDGING_LATENCY_WINDOW", 200)))
+
+
+def _min_samples() -> int:
+    return max(1, int(getattr(settings, "AI_HEDGING_MIN_SAMPLES", 20)))
+
+
+def record(provider: str, model: str, seconds: float) -> None:
+    key = (provider, model)
+    with _lock:
+        samples = _samples.get(key)
+        if samples is None or samples.maxlen != _window():
+            samples = _samples[key] = deque(samples or (), maxlen=_window())
+        samples.append(seconds)
+
+
+def _percentile(ordered: list[float], fraction: float) -> float:
+    index = max(0, math.ceil(fraction * len(ordered)) - 1)
+    return ordered[index]
+
+
+def percentiles(provider: str, model: str) -> dict[str, Any]:
+    with _lock:
+        ordered = sorted(_samples.get((provider, model)) or ())
+    if not ordered:
+        return {"samples": 0, "p50": None, "p95": None}
+    return {
+        "samples": len(ordered),
+        "p50": round(_percentile(ordered, 0.50), 3),
+        "p95": round(_percentile(ordered, 0.95), 3),
+    }
+
+
+def hedge_delay(provider: str, model: str) -> float | None:
+    """Segundos a esperar al primario antes de cubrirlo; ``None`` sin muestras suficientes."""
+
+    stats = percentiles(provider, model)
+    if stats["samples"] < _min_samples():
+        return None
+    return max(stats["p95"], float(getattr(settings, "AI_HEDGING_MIN_DELAY_SECONDS", 2.0)))
+
+
+def _get_executor() -> tuple[ThreadPoolExecutor, threading.BoundedSemaphore]:
+    global _executor, _slots
+    with _lock:
+        if _executor is None:
+            workers = max(1, int(getattr(settings, "AI_HEDGING_MAX_WORKERS", 8)))
+            _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ai-hedge")
+            _slots = threading.BoundedSemaphore(workers)
+        return _executor, _slots
+
+
+def _reserve_hedge() -> tuple[ThreadPoolExecutor, threading.BoundedSemaphore] | None:
+    executor, slots = _get_executor()
+    if not slots.acquire(blocking=False):
+        return None
+    return executor, slots
+
+
+def _call(role: str, fn: Callable[[], T], results: Queue) -> None:
+    try:
+        results.put((role, fn(), None))
+    except Exception as exc:
+        results.put((role, None, exc))
+
+
+def run_hedged(
+    primary: Callable[[], T],
+    fallback: Callable[[], T],
+    *,
+    delay: float,
+    provider: str,
+    primary_model: str,
+    fallback_model: str,
+    failover_on: tuple[type[BaseException], ...] = (),
+) -> tuple[T, str]:
+    """Devuelve ``(resultado, "primary"|"fallback")`` con la primera respuesta exitosa.
+
+    Si el primario falla antes de cubrirse, sólo los errores de ``failover_on`` pasan al
+    respaldo, igual que sin hedging; cualquier otro se propaga. Si ambos fallan se propaga el
+    error del primario.
+    """
+
+    started = time.perf_counter()
+    results: Queue = Queue()
+    threading.Thread(
+        target=_call, args=("primary", primary, results), name="ai-hedge-primary", daemon=True
+    ).start()
+
+    try:
+        _role, result, error = results.get(timeout=delay)
+    except Empty:
+        reserved = _reserve_hedge()
+        if reserved is None:
+            _role, result, error = results.get()
+            return _settle_unhedged(
+                "skipped", result, error, fallback, failover_on, provider, primary_model, fallback_model, started
+            )
+    else:
+        return _settle_unhedged(
+            "primary", result, error, fallback, failover_on, provider, primary_model, fallback_model, started
+        )
+
+    executor, slots = reserved
+    executor.submit(_call, "fallback", fallback, results).add_done_callback(lambda _future: slots.release())
+    primary_error: Exception | None = None
+    for _ in range(2):
+        role, result, error = results.get()
+        if error is None:
+            _finish(f"hedged_{role}", provider, primary_model, fallback_model, started)
+            return result, role
+        if role == "primary":
+            primary_error = error
+    _finish("failed", provider, primary_model, fallback_model, started)
+    raise primary_error
+
+
+def _settle_unhedged(
+    outcome: str,
+    result: T,
+    error: Exception | None,
+    fallback: Callable[[], T],
+    failover_on: tuple[type[BaseException], ...],
+    provider: str,
+    primary_model: str,
+    fallback_model: str,
+    started: float,
+) -> tuple[T, str]:
+    if error is None:
+        _finish(outcome, provider, primary_model, fallback_model, started)
+        return result, "primary"
+    if not isinstance(error, failover_on):
+        _finish("failed", provider, primary_model, fallback_model, started)
+        raise error
+    try:
+        result = fallback()
+    except Exception:
+        _finish("failed", provider, primary_model, fallback_model, started)
+        raise
+    _finish("failover", provider, primary_model, fallback_model, started)
+    return result, "fallback"
+
+
+def _finish(outcome: str, provider: str, primary_model: str, fallback_model: str, started: float) -> None:
+    with _lock:
+        _outcomes[outcome] += 1
+    observability_logger.info(
+        "materialidad_ai_hedge",
+        extra={
+            "metric": {
+                "outcome": outcome,
+                "provider": provider,
+                "primary_model": primary_model,
+                "fallback_model": fallback_model,
+                "duration_ms": int((time.perf_counter() - started) * 1000),
+            }
+        },
+    )
+
+
+def get_stats() -> dict[str, Any]:
+    """Percentiles por modelo y resultados de la cobertura en este proceso.
+
+    ``hedge_win_ratio`` es la fracción de coberturas lanzadas en las que ganó el respaldo.
+    """
+
+    with _lock:
+        keys = sorted(_samples)
+        outcomes = dict(_outcomes)
+    hedged = outcomes["hedged_primary"] + outcomes["hedged_fallback"]
+    return {
+        "models": {f"{provider}:{model}": percentiles(provider, model) for provider, model in keys},
+        "outcomes": outcomes,
+        "hedge_win_ratio": round(outcomes["hedged_fallback"] / hedged, 4) if hedged else 0.0,
+    }
+
+
+def reset() -> None:
+    with _lock:
+        _samples.clear()
+        for outcome in OUTCOMES:
+            _outcomes[outcome] = 0
@@ -84,11 +84,17 @@ def _safe_json(text: str) -> dict[str, Any]:
     return {"resumen": cleaned}
 
 
-def _summarize_changes(original: str, revised: str, idioma: str) -> dict[str, Any]:
+def _summarize_changes(original: str, revised: str, idioma: str, *, bypass_cache: bool = False) -> dict[str, Any]:
     from tenancy.middleware import TenantContext
     client = get_ai_client(TenantContext.get_current_tenant())
     messages = _build_prompt(original, revised, idioma)
-    raw = client.generate_text(messages, temperature=0.15, max_output_tokens=1100)
+    raw = client.generate_text(
+        messages,
+        temperature=0.15,
+        max_output_tokens=1100,
+        cache_feature="redlines",
+        bypass_cache=bypass_cache,
+    )
     parsed = _safe_json(raw)
     parsed["modelo"] = public_model_label(client.model_name)
     return parsed
@@ -124,7 +130,13 @@ def _build_diff_segments(original: str, revised: str, *, max_segments: int = 120
     return segments
 
 
-def analyze_redlines(*, original_text: str, revised_text: str, idioma: str = "es") -> dict[str, Any]:
+def analyze_redlines(
+    *,
+    original_text: str,
+    revised_text: str,
+    idioma: str = "es",
+    bypass_cache: bool = False,
+) -> dict[str, Any]:
     if not original_text.strip():
         raise ValueError("El texto original no puede estar vacio")
     if not revised_text.strip():
@@ -133,7 +145,7 @@ def analyze_redlines(*, original_text: str, revised_text: str, idioma: str = "es
     diff_segments = _build_diff_segments(original_text, revised_text)
     matcher = SequenceMatcher(None, original_text.splitlines(), revised_text.splitlines())
     change_ratio = round(1 - matcher.ratio(), 4)
-    summary = _summarize_changes(original_text, revised_text, idioma)
+    summary = _summarize_changes(original_text, revised_text, idioma, bypass_cache=bypass_cache)
 
     riesgos = summary.get("riesgos") or []
     oportunidades = summary.get("oportunidades") or []
@@ -0,0 +1,326 @@
+"""Caché de respuestas LLM direccionada por contenido.
+
+La llave es el SHA-256 de (funcionalidad, tenant, proveedor, modelo, mensajes normalizados,
+temperatura, tokens máximos): dos peticiones idénticas del mismo tenant comparten respuesta
+y ningún tenant puede leer la de otro. Hay dos niveles:
+
+* un LRU por proceso acotado en bytes (``AI_RESPONSE_CACHE_LOCAL_MAX_BYTES``) que responde
+  en microsegundos, y
+* el cache de Django, compartido entre workers, con la expiración de cada funcionalidad.
+
+Los contadores de aciertos se llevan por proceso (``get_stats``) y, en el cache de Django,
+agregados por funcionalidad (``get_shared_stats``) para ``report_ai_response_cache``.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Any, Callable
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger("materialidad.ai")
+observability_logger = logging.getLogger("materialidad.observability")
+
+# Súbelo si cambia la normalización o el formato guardado: invalida todo lo anterior.
+KEY_SCHEMA_VERSION = 1
+CACHE_KEY = "materialidad:ai_response:{digest}"
+STATS_CACHE_KEY = "materialidad:ai_response_stats:{feature}:{counter}"
+
+DEFAULT_FEATURE_TTLS: dict[str, int] = {
+    "checklist_draft": 24 * 3600,
+    "redlines": 7 * 24 * 3600,
+    "clause_optimizer": 24 * 3600,
+    "fdi_narrative": 6 * 3600,
+    "contract_document": 24 * 3600,
+    "csf_extraction": 30 * 24 * 3600,
+}
+_DEFAULT_TTL_SECONDS = 3600
+_COUNTERS = ("hits", "misses", "bypassed")
+
+_lock = threading.Lock()
+# digest -> (expira_en epoch, payload comprimido)
+_entries: OrderedDict[str, tuple[float, bytes]] = OrderedDict()
+_local_bytes = 0
+_stats: dict[str, dict[str, int]] = {}
+
+
+def is_enabled() -> bool:
+    return bool(getattr(settings, "AI_RESPONSE_CACHE_ENABLED", True))
+
+
+def feature_ttl(feature: str) -> int:
+    overrides = getattr(settings, "AI_RESPONSE_CACHE_TTLS", None) or {}
+    if feature in overrides:
+        return int(overrides[feature])
+    return DEFAULT_FEATURE_TTLS.get(feature, _DEFAULT_TTL_SECONDS)
+
+
+def known_features() -> list[str]:
+    overrides = getattr(settings, "AI_RESPONSE_CACHE_TTLS", None) or {}
+    return sorted({*DEFAULT_FEATURE_TTLS, *overrides})
+
+
+def tenant_scope(tenant) -> str:
+    """Alcance de la llave: cada tenant tiene su propio espacio de respuestas."""
+
+    if tenant is None or getattr(tenant, "pk", None) is None:
+        return "global"
+    return f"tenant:{tenant.pk}"
+
+
+def _normalize(value: Any) -> Any:
+    if isinstance(value, str):
+        # Saltos de línea y espacios finales no cambian el prompt para el modelo.
+        lines = value.replace("\r\n", "\n").replace("\r", "\n").strip().split("\n")
+        return "\n".join(line.rstrip() for line in lines)
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return "sha256:" + hashlib.sha256(value).hexdigest()
+    if isinstance(value, dict):
+        return {str(key): _normalize(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(item) for item in value]
+    if hasattr(value, "role") and hasattr(value, "content"):
+        return {"role": value.role, "content": _normalize(value.content)}
+    return value
+
+
+def build_key(
+    *,
+    feature: str,
+    scope: str,
+    provider: str,
+    model: str,
+    messages: Any,
+    temperature: float,
+    max_output_tokens: int,
+) -> str:
+    material = [
+        KEY_SCHEMA_VERSION,
+        feature,
+        scope,
+        provider,
+        model,
+        _normalize(messages),
+        round(float(temperature), 3),
+        int(max_output_tokens),
+    ]
+    encoded = json.dumps(material, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+def _local_max_bytes() -> int:
+    return int(getattr(settings, "AI_RESPONSE_CACHE_LOCAL_MAX_BYTES", 8 * 1024 * 1024))
+
+
+def _max_entry_bytes() -> int:
+    return int(getattr(settings, "AI_RESPONSE_CACHE_MAX_ENTRY_BYTES", 256 * 1024))
+
+
+def _local_get(digest: str, now: float) -> bytes | None:
+    global _local_bytes
+    with _lock:
+        entry = _entries.get(digest)
+        if entry is None:
+            return None
+        expires_at, payload = entry
+        if expires_at <= now:
+            del _entries[digest]
+            _local_bytes -= len(payload)
+            return None
+        _entries.move_to_end(digest)
+        return payload
+
+
+def _local_set(digest: str, expires_at: float, payload: bytes) -> None:
+    global _local_bytes
+    limit = _local_max_bytes()
+    if len(payload) > limit:
+        return
+    with _lock:
+        previous = _entries.pop(digest, None)
+        if previous is not None:
+            _local_bytes -= len(previous[1])
+        _entries[digest] = (expires_at, payload)
+        _local_bytes += len(payload)
+        while _local_bytes > limit and _entries:
+            _, (_, evicted) = _entries.popitem(last=False)
+            _local_bytes -= len(evicted)
+
+
+def _shared_get(digest: str) -> tuple[float, bytes] | None:
+    try:
+        entry = cache.get(CACHE_KEY.format(digest=digest))
+    except Exception:  # pragma: no cover - el cache es complementario
+        logger.warning("No se pudo leer la respuesta IA cacheada %s", digest, exc_info=True)
+        return None
+    if not entry:
+        return None
+    return float(entry[0]), bytes(entry[1])
+
+
+def _shared_set(digest: str, expires_at: float, payload: bytes, ttl: int) -> None:
+    try:
+        cache.set(CACHE_KEY.format(digest=digest), (expires_at, payload), timeout=ttl)
+    except Exception:  # pragma: no cover - el cache es complementario
+        logger.warning("No se pudo cachear la respuesta IA %s", digest, exc_info=True)
+
+
+def _record(feature: str, counter: str) -> float:
+    with _lock:
+        stats = _stats.setdefault(feature, {name: 0 for name in _COUNTERS})
+        stats[counter] += 1
+        lookups = stats["hits"] + stats["misses"]
+        ratio = stats["hits"] / lookups if lookups else 0.0
+    key = STATS_CACHE_KEY.format(feature=feature, counter=counter)
+    try:
+        if not cache.add(key, 1, timeout=None):
+            cache.incr(key)
+    except Exception:  # pragma: no cover - best effort
+        logger.debug("No se pudo actualizar el contador compartido %s", key, exc_info=True)
+    return ratio
+
+
+def lookup(
+    *,
+    feature: str,
+    scope: str,
+    provider: str,
+    model: str,
+    messages: Any,
+    temperature: float,
+    max_output_tokens: int,
+) -> tuple[str, Any | None]:
+    """Devuelve ``(llave, valor)``; ``valor`` es ``None`` en un fallo. Sólo cuenta los aciertos."""
+
+    digest = build_key(
+        feature=feature,
+        scope=scope,
+        provider=provider,
+        model=model,
+        messages=messages,
+        temperature=temperature,
+        max_output_tokens=max_output_tokens,
+    )
+    now = time.time()
+    payload = _local_get(digest, now)
+    if payload is None:
+        shared = _shared_get(digest)
+        if shared is not None and shared[0] > now:
+            payload = shared[1]
+            _local_set(digest, shared[0], payload)
+    if payload is None:
+        return digest, None
+    try:
+        value = json.loads(zlib.decompress(payload).decode("utf-8"))
+    except (zlib.error, ValueError):
+        logger.warning("Respuesta IA cacheada ilegible %s; se regenera", digest)
+        return digest, None
+    _emit(feature, "hit", _record(feature, "hits"))
+    return digest, value
+
+
+def store(digest: str, value: Any, *, feature: str, bypass: bool = False) -> None:
+    """Guarda una respuesta recién generada y la cuenta como fallo (o ``bypass``)."""
+
+    _emit(feature, "bypass" if bypass else "miss", _record(feature, "bypassed" if bypass else "misses"))
+    payload = zlib.compress(json.dumps(value, ensure_ascii=False).encode("utf-8"))
+    if len(payload) > _max_entry_bytes():
+        return
+    ttl = feature_ttl(feature)
+    if ttl > 0:
+        expires_at = time.time() + ttl
+        _local_set(digest, expires_at, payload)
+        _shared_set(digest, expires_at, payload, ttl)
+
+
+def get_or_generate(
+    *,
+    feature: str,
+    scope: str,
+    provider: str,
+    model: str,
+    messages: Any,
+    temperature: float,
+    max_output_tokens: int,
+    generate: Callable[[], Any],
+    bypass: bool = False,
+) -> tuple[Any, bool]:
+    """Devuelve ``(valor, hit)``; ``generate`` sólo se invoca en un fallo o con ``bypass``.
+
+    ``valor`` debe ser serializable a JSON. Con ``bypass`` se ignora la entrada existente
+    pero la respuesta nueva sí se guarda, así que sirve para refrescar un resultado.
+    """
+
+    if not is_enabled():
+        return generate(), False
+
+    key_parts = {
+        "feature": feature,
+        "scope": scope,
+        "provider": provider,
+        "model": model,
+        "messages": messages,
+        "temperature": temperature,
+        "max_output_tokens": max_output_tokens,
+    }
+    if bypass:
+        digest = build_key(**key_parts)
+    else:
+        digest, value = lookup(**key_parts)
+        if value is not None:
+            return value, True
+
+    value = generate()
+    store(digest, value, feature=feature, bypass=bypass)
+    return value, False
+
+
+def _emit(feature: str, outcome: str, hit_ratio: float) -> None:
+    observability_logger.info(
+        "materialidad_ai_response_cache",
+        extra={"metric": {"feature": feature, "outcome": outcome, "hit_ratio": round(hit_ratio, 4)}},
+    )
+
+
+def get_stats() -> dict[str, Any]:
+    """Contadores de este proceso por funcionalidad, con ``hit_ratio`` y ocupación del LRU."""
+
+    with _lock:
+        features = {
+            feature: {**stats, "hit_ratio": _ratio(stats)}
+            for feature, stats in sorted(_stats.items())
+        }
+        return {"features": features, "local_entries": len(_entries), "local_bytes": _local_bytes}
+
+
+def get_shared_stats(features: list[str] | None = None) -> dict[str, dict[str, Any]]:
+    """Contadores agregados de todos los workers (requieren un cache compartido)."""
+
+    report: dict[str, dict[str, Any]] = {}
+    for feature in features or known_features():
+        keys = {counter: STATS_CACHE_KEY.format(feature=feature, counter=counter) for counter in _COUNTERS}
+        values = cache.get_many(list(keys.values()))
+        stats = {counter: int(values.get(key) or 0) for counter, key in keys.items()}
+        report[feature] = {**stats, "hit_ratio": _ratio(stats)}
+    return report
+
+
+def _ratio(stats: dict[str, int]) -> float:
+    lookups = stats["hits"] + stats["misses"]
+    return round(stats["hits"] / lookups, 4) if lookups else 0.0
+
+
+def reset() -> None:
+    global _local_bytes
+    with _lock:
+        _entries.clear()
+        _local_bytes = 0
+        _stats.clear()
@@ -0,0 +1,211 @@
+"""Peticiones de IA en segundo plano sin broker externo: la tabla ``AIJob`` es la cola.
+
+Las vistas que llaman al LLM aceptan ``asincrono=true`` (o todas, con
+``AI_JOBS_MODE=background``): validan la petición, encolan un ``AIJob`` y responden 202
+sin ocupar el hilo del worker HTTP. ``process_ai_jobs`` toma las tareas con
+``SKIP LOCKED``, activa el tenant y ejecuta el mismo código que la vía síncrona; el
+cliente consulta ``tareas-ia/<id>/`` hasta ver ``COMPLETADO`` o ``ERROR``.
+"""
+
+from __future__ import annotations
+
+import logging
+from datetime import timedelta
+from typing import Any, Callable
+
+from django.conf import settings
+from django.core.files.base import File
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.reverse import reverse
+
+from tenancy.context import TenantContext
+
+from .models import AIJob
+
+logger = logging.getLogger(__name__)
+
+# Cada handler recibe el ``AIJob`` con el tenant ya activo y devuelve
+# ``(código HTTP, cuerpo)``: lo mismo que habría respondido la vista síncrona.
+AI_JOB_HANDLERS: dict[str, str] = {
+    AIJob.Kind.CONTRATO: "materialidad.views.run_contract_generation_job",
+    AIJob.Kind.CONSULTA_LEGAL: "materialidad.views.run_legal_consultation_job",
+    AIJob.Kind.NARRATIVA_FDI: "materialidad.api.dashboard.views.run_fdi_narrative_job",
+    AIJob.Kind.CSF: "materialidad.views.run_csf_extraction_job",
+}
+
+_TRUTHY = {"1", "true", "si", "sí"}
+# Llave de ``AIJob.parametros`` con los ids de lo que el handler ya guardó (ver ``record_ai_job_effect``).
+EFFECTS_KEY = "_efectos"
+
+
+def _jobs_setting(name: str, default: int) -> int:
+    return max(1, int(getattr(settings, name, default) or default))
+
+
+def _request_flag(request, name: str) -> bool:
+    value = request.query_params.get(name)
+    if value is None and hasattr(request.data, "get"):
+        value = request.data.get(name)
+    return str(value or "").lower() in _TRUTHY
+
+
+def ai_jobs_async_requested(request) -> bool:
+    """``True`` si la petición pide (o la instalación impone) el modo asíncrono."""
+
+    if str(getattr(settings, "AI_JOBS_MODE", "inline")).lower() == "background":
+        return True
+    return _request_flag(request, "asincrono")
+
+
+def ai_regeneration_requested(request) -> bool:
+    """``True`` con ``regenerar=true`` (query o cuerpo): la respuesta IA cacheada se ignora y se refresca."""
+
+    return _request_flag(request, "regenerar")
+
+
+def enqueue_ai_job(
+    kind: str,
+    *,
+    tenant_slug: str,
+    user=None,
+    parametros: dict[str, Any] | None = None,
+    archivo: File | None = None,
+) -> AIJob:
+    job = AIJob(
+        tenant_slug=tenant_slug,
+        user=user if getattr(user, "is_authenticated", False) else None,
+        tipo=kind,
+        parametros=parametros or {},
+        encolado_en=timezone.now(),
+    )
+    if archivo is not None:
+        job.archivo.save(archivo.name, archivo, save=False)
+    job.save()
+    return job
+
+
+def ai_job_accepted_response(request, job: AIJob) -> Response:
+    """202 con el estado inicial de la tarea y su URL de consulta en ``Location``."""
+
+    from .serializers import AIJobSerializer
+
+    location = reverse("ai-job-detail", kwargs={"pk": job.pk}, request=request)
+    return Response(AIJobSerializer(job).data, status=status.HTTP_202_ACCEPTED, headers={"Location": location})
+
+
+def claim_next_ai_job(
+    *,
+    stale_seconds: int | None = None,
+    max_attempts: int | None = None,
+    exclude_ids: set[int] | None = None,
+) -> AIJob | None:
+    """Toma la siguiente tarea encolada (o abandonada en ``PROCESANDO``) y la marca como propia."""
+
+    stale_seconds = stale_seconds or _jobs_setting("AI_JOBS_STALE_SECONDS", 600)
+    max_attempts = max_attempts or _jobs_setting("AI_JOBS_MAX_ATTEMPTS", 2)
+    stale_before = timezone.now() - timedelta(seconds=stale_seconds)
+    with transaction.atomic():
+        queryset = (
+            AIJob.objects.select_for_update(skip_locked=True)
+            .filter(encolado_en__isnull=False, intentos__lt=max_attempts)
+            .filter(
+                Q(estatus__in=[AIJob.Status.PENDIENTE, AIJob.Status.ERROR])
+                | Q(estatus=AIJob.Status.PROCESANDO, updated_at__lt=stale_before)
+            )
+            .exclude(pk__in=exclude_ids or ())
+            .order_by("encolado_en", "id")
+        )
+        job = queryset.first()
+        if job is None:
+            return None
+        job.intentos += 1
+        job.estatus = AIJob.Status.PROCESANDO
+        job.iniciado_en = timezone.now()
+        job.save(update_fields=["intentos", "estatus", "iniciado_en", "updated_at"])
+    return job
+
+
+def _resolve_handler(kind: str) -> Callable[[AIJob], tuple[int, Any]]:
+    return import_string(AI_JOB_HANDLERS[kind])
+
+
+def _finish(job: AIJob, *, status_code: int | None, body: Any, error: str = "") -> None:
+    job.codigo_respuesta = status_code
+    job.resultado = body
+    job.error_detalle = error
+    job.estatus = AIJob.Status.ERROR if error else AIJob.Status.COMPLETADO
+    job.encolado_en = None
+    job.finalizado_en = timezone.now()
+    if job.archivo:
+        job.archivo.delete(save=False)
+    job.save()
+
+
+def ai_job_effect(job: AIJob, name: str) -> Any:
+    efectos = job.parametros.get(EFFECTS_KEY) if isinstance(job.parametros, dict) else None
+    return (efectos or {}).get(name)
+
+
+def record_ai_job_effect(job: AIJob, name: str, value: Any) -> None:
+    """Anota en la tarea el id de algo que el handler ya guardó, antes del siguiente paso que
+    pueda fallar: un reintento o una reclamación por ``AI_JOBS_STALE_SECONDS`` lo reutiliza
+    (``ai_job_effect``) en lugar de crear otro.
+    """
+
+    parametros = dict(job.parametros or {})
+    parametros[EFFECTS_KEY] = {**(parametros.get(EFFECTS_KEY) or {}), name: value}
+    job.parametros = parametros
+    job.save(update_fields=["parametros", "updated_at"])
+
+
+def complete_ai_job(job: AIJob, *, status_code: int, body: Any) -> tuple[int, Any]:
+    """Cierra la tarea en cuanto su resultado quedó guardado y devuelve ``(status_code, body)``.
+
+    Una tarea ``COMPLETADO`` ya no se reclama, así que una falla posterior no vuelve a
+    ejecutar el handler (ni a duplicar el contrato o la consulta que persistió).
+    """
+
+    _finish(job, status_code=status_code, body=body)
+    return status_code, body
+
+
+def run_ai_job(job: AIJob, *, max_attempts: int | None = None) -> AIJob:
+    """Ejecuta una tarea tomada de la cola dentro del contexto de su tenant.
+
+    Una respuesta de error del handler (4xx/5xx) es definitiva; una excepción deja la
+    tarea en ``ERROR`` y se reintenta hasta ``AI_JOBS_MAX_ATTEMPTS``.
+    """
+
+    max_attempts = max_attempts or _jobs_setting("AI_JOBS_MAX_ATTEMPTS", 2)
+    try:
+        TenantContext.activate(job.tenant_slug)
+        try:
+            status_code, body = _resolve_handler(job.tipo)(job)
+        finally:
+            TenantContext.clear()
+    except Exception as exc:
+        logger.exception("Tarea de IA %s (%s) falló en el intento %s", job.pk, job.tipo, job.intentos)
+        if job.estatus == AIJob.Status.COMPLETADO:
+            # El handler ya cerró la tarea con ``complete_ai_job``: su resultado es válido.
+            return job
+        if job.intentos >= max_attempts:
+            _finish(job, status_code=None, body=None, error=str(exc) or exc.__class__.__name__)
+        else:
+            job.estatus = AIJob.Status.ERROR
+            job.error_detalle = str(exc)
+            job.save(update_fields=["estatus", "error_detalle", "updated_at"])
+        raise
+
+    if job.estatus == AIJob.Status.COMPLETADO:
+        return job
+    error = ""
+    if status_code >= 400:
+        error = str((body or {}).get("detail", "")) if isinstance(body, dict) else ""
+        error = error or f"HTTP {status_code}"
+    _finish(job, status_code=status_code, body=body, error=error)
+    return job
@@ -1,18 +1,23 @@
 import logging
-import base64
-import hashlib
-import json
 import time
 from datetime import datetime, timedelta
 from decimal import Decimal
-from django.db.models import Sum, Q, F
+from django.db.models import Count, Sum, Q, F
 from django.core.cache import cache
 from django.utils import timezone
 from rest_framework import views, permissions, status
 from rest_framework.exceptions import PermissionDenied
 from rest_framework.response import Response
 from tenancy.context import TenantContext
+from materialidad.ai_jobs import (
+    ai_job_accepted_response,
+    ai_jobs_async_requested,
+    ai_regeneration_requested,
+    enqueue_ai_job,
+)
+from materialidad.dashboard_cache import build_dashboard_cache_key, current_cache_namespace
 from materialidad.fdi_engine import build_internal_fdi_payload, export_public_fdi_payload, serialize_fdi_snapshot_payload
+from materialidad.pagination import decode_cursor_payload, encode_keyset_cursor
 from materialidad.services import (
     build_pending_fdi_narrative,
     generate_fdi_narrative,
@@ -22,6 +27,7 @@ from materialidad.services import (
     serialize_fdi_narrative,
 )
 from materialidad.models import (
+    AIJob,
     Empresa,
     Operacion,
     Contrato,
@@ -45,14 +51,11 @@ RECENT_FDI_SNAPSHOT_MAX_AGE = timedelta(minutes=90)
 
 
 def _cache_key(prefix: str, tenant_slug: str, payload: dict) -> str:
-    raw = json.dumps(payload, sort_keys=True, default=str)
-    digest = hashlib.sha1(raw.encode("utf-8")).hexdigest()
-    return f"dashboard:{prefix}:{tenant_slug}:{digest}"
+    return build_dashboard_cache_key(prefix, tenant_slug, payload)
 
 
 def _tenant_slug_for_cache() -> str:
-    tenant = TenantContext.get_current_tenant()
-    return tenant.slug if tenant else "global"
+    return current_cache_namespace()
 
 
 def _serialize_fdi_snapshot(snapshot: FiscalDefenseIndexSnapshot, *, days: int) -> dict:
@@ -103,17 +106,15 @@ def _can_recalculate_fdi(user) -> bool:
 
 
 def _encode_job_run_cursor(*, started_at: datetime, run_id: int) -> str:
-    raw = json.dumps({"started_at": started_at.isoformat(), "id": run_id}, sort_keys=True)
-    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+    return encode_keyset_cursor({"started_at": started_at, "id": run_id})
 
 
 def _decode_job_run_cursor(cursor: str) -> tuple[datetime, int]:
     try:
-        decoded = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8")
-        payload = json.loads(decoded)
+        payload = decode_cursor_payload(cursor)
         started_at = datetime.fromisoformat(str(payload["started_at"]))
         run_id = int(payload["id"])
-    except (ValueError, TypeError, KeyError, json.JSONDecodeError):
+    except (ValueError, TypeError, KeyError):
         raise ValueError("Cursor inválido")
     return started_at, run_id
 
@@ -175,7 +176,8 @@ class ExecutiveDashboardSummaryView(views.APIView):
         user = request.user
         # Por ahora tomamos todas las empresas, ajusta a `request.tenant` si existe un middleware
         empresas = Empresa.objects.filter(activo=True)
-        if not empresas.exists():
+        empresas_rows = list(empresas.values_list("id", "razon_social"))
+        if not empresas_rows:
             # Return empty payload so dashboard doesn't break
             now = timezone.now()
             payload = {
@@ -217,28 +219,43 @@ class ExecutiveDashboardSummaryView(views.APIView):
                 "date": alerta.fecha_deteccion.strftime('%Y-%m-%d')
             })
 
+        # 2-4, 6. Una sola consulta agrupada por empresa alimenta el portafolio y los KPIs globales.
+        validado = Q(estatus_validacion=Operacion.EstatusValidacion.VALIDADO)
+        riesgoso = Q(proveedor__estatus_69b__in=['PRESUNTO', 'DEFINITIVO'])
+        ops_por_empresa = {
+            row["empresa_id"]: row
+            for row in Operacion.objects.filter(empresa__in=empresas)
+            .order_by()
+            .values("empresa_id")
+            .annotate(
+                monto_total=Sum('monto'),
+                monto_riesgoso=Sum('monto', filter=riesgoso),
+                monto_protegido=Sum('monto', filter=validado & Q(cfdi_estatus=Operacion.EstatusCFDI.VALIDO)),
+                ops_count=Count('id'),
+                validadas_count=Count('id', filter=validado),
+                pendientes_count=Count(
+                    'id',
+                    filter=Q(
+                        estatus_validacion__in=[
+                            Operacion.EstatusValidacion.PENDIENTE,
+                            Operacion.EstatusValidacion.EN_PROCESO,
+                        ]
+                    ),
+                ),
+            )
+        }
+
+        def _ops_total(field: str):
+            return sum((row[field] or 0 for row in ops_por_empresa.values()), Decimal('0.00'))
+
         # 2. Protected Value (Ahorro Protegido)
         # Sum of 'monto' strictly of operations that have been properly validated
-        protected_ops = Operacion.objects.filter(
-            empresa__in=empresas,
-            estatus_validacion=Operacion.EstatusValidacion.VALIDADO,
-            cfdi_estatus=Operacion.EstatusCFDI.VALIDO
-        ).aggregate(total_protegido=Sum('monto'))
-        
-        protected_value = protected_ops['total_protegido'] or Decimal('0.00')
+        protected_value = _ops_total('monto_protegido')
 
         # 3. CSD Risk Score (Exposición a EFOS/69-B)
         # Calculado base: (Monto operado riesgoso / Monto total) * 100
-        total_ops_aggr = Operacion.objects.filter(empresa__in=empresas).aggregate(total=Sum('monto'))
-        monto_total = total_ops_aggr['total'] or Decimal('0.00')
-        
-        riesgosos_aggr = Operacion.objects.filter(
-            empresa__in=empresas,
-            proveedor__estatus_69b__in=[
-                'PRESUNTO', 'DEFINITIVO'
-            ]
-        ).aggregate(total=Sum('monto'))
-        monto_riesgoso = riesgosos_aggr['total'] or Decimal('0.00')
+        monto_total = _ops_total('monto_total')
+        monto_riesgoso = _ops_total('monto_riesgoso')
 
         if monto_total > 0:
             csd_risk_score = round(float((monto_riesgoso / monto_total) * 100), 1)
@@ -250,52 +267,48 @@ class ExecutiveDashboardSummaryView(views.APIView):
 
         # 4. Materiality Coverage
         # Porcentaje de operaciones que tienen entregables COMPLETADOS vs el total requerido
-        total_ops_count = Operacion.objects.filter(empresa__in=empresas).count()
-        validated_ops_count = Operacion.objects.filter(
-            empresa__in=empresas, 
-            estatus_validacion=Operacion.EstatusValidacion.VALIDADO
-        ).count()
+        total_ops_count = int(_ops_total('ops_count'))
+        validated_ops_count = int(_ops_total('validadas_count'))
         
         if total_ops_count > 0:
             materiality_coverage = round((validated_ops_count / total_ops_count) * 100, 1)
         else:
             materiality_coverage = 0.0
 
-        # 5. Intangibles Valuation (NIF C-8)
+        # 5. Intangibles Valuation (NIF C-8) y 7. contratos por vencer en la misma consulta
         # Sumamos contratos de tipo 'ACTIVOS' (Propiedad Intelectual / Regalías)
-        intangibles_aggr = Contrato.objects.filter(
-            empresa__in=empresas,
-            categoria=Contrato.Categoria.ACTIVOS,
-        ).aggregate(total=Sum('beneficio_economico_esperado'))
-        
-        intangibles_value = intangibles_aggr['total'] or Decimal('0.00')
+        now = timezone.now()
+        thirty_days_from_now = now + timezone.timedelta(days=30)
+        thirty_days_ago = now - timezone.timedelta(days=30)
+
+        contratos_aggr = Contrato.objects.filter(empresa__in=empresas).aggregate(
+            intangibles=Sum('beneficio_economico_esperado', filter=Q(categoria=Contrato.Categoria.ACTIVOS)),
+            expiring=Count(
+                'id',
+                filter=Q(
+                    activo=True,
+                    vigencia_fin__isnull=False,
+                    vigencia_fin__lte=thirty_days_from_now.date(),
+                    vigencia_fin__gte=now.date(),  # Don't count already expired ones as 'expiring'
+                ),
+            ),
+        )
+        intangibles_value = contratos_aggr['intangibles'] or Decimal('0.00')
 
         # 6. Portfolio Risks (Tenant Specific)
         portfolio = []
-        for empresa in empresas:
-            # Montos
-            e_ops_aggr = Operacion.objects.filter(empresa=empresa).aggregate(total=Sum('monto'))
-            e_monto_total = e_ops_aggr['total'] or Decimal('0.00')
-            
-            e_riesgos_aggr = Operacion.objects.filter(
-                empresa=empresa,
-                proveedor__estatus_69b__in=['PRESUNTO', 'DEFINITIVO']
-            ).aggregate(total=Sum('monto'))
-            e_monto_riesgoso = e_riesgos_aggr['total'] or Decimal('0.00')
-            
+        for empresa_id, razon_social in empresas_rows:
+            row = ops_por_empresa.get(empresa_id, {})
+            e_monto_total = row.get('monto_total') or Decimal('0.00')
+            e_monto_riesgoso = row.get('monto_riesgoso') or Decimal('0.00')
             e_risk_score = round(float((e_monto_riesgoso / e_monto_total) * 100), 1) if e_monto_total > 0 else 0.0
-            
+
             # Missing files (Operaciones - Operaciones Validadas)
-            e_ops_count = Operacion.objects.filter(empresa=empresa).count()
-            e_val_count = Operacion.objects.filter(
-                empresa=empresa,
-                estatus_validacion=Operacion.EstatusValidacion.VALIDADO
-            ).count()
-            missing_files = max(e_ops_count - e_val_count, 0)
-            
+            missing_files = max(row.get('ops_count', 0) - row.get('validadas_count', 0), 0)
+
             portfolio.append({
-                "id": empresa.id,
-                "name": empresa.razon_social,
+                "id": empresa_id,
+                "name": razon_social,
                 "riskScore": float(e_risk_score),
                 "missingFiles": missing_files
             })
@@ -304,25 +317,8 @@ class ExecutiveDashboardSummaryView(views.APIView):
         portfolio = sorted(portfolio, key=lambda x: x['riskScore'], reverse=True)[:15]
 
         # 7. Operative Workflows (Phase 4 KPIs)
-        now = timezone.now()
-        thirty_days_from_now = now + timezone.timedelta(days=30)
-        thirty_days_ago = now - timezone.timedelta(days=30)
-        
-        contracts_expiring = Contrato.objects.filter(
-            empresa__in=empresas,
-            activo=True,
-            vigencia_fin__isnull=False,
-            vigencia_fin__lte=thirty_days_from_now.date(),
-            vigencia_fin__gte=now.date() # Don't count already expired ones as 'expiring'
-        ).count()
-        
-        pending_dossiers = Operacion.objects.filter(
-            empresa__in=empresas,
-            estatus_validacion__in=[
-                Operacion.EstatusValidacion.PENDIENTE, 
-                Operacion.EstatusValidacion.EN_PROCESO
-            ]
-        ).count()
+        contracts_expiring = contratos_aggr['expiring']
+        pending_dossiers = int(_ops_total('pendientes_count'))
         
         unvalidated_providers = Proveedor.objects.filter(
             operaciones__empresa__in=empresas # Solo proveedores que tengan operaciones con estas empresas
@@ -343,7 +339,7 @@ class ExecutiveDashboardSummaryView(views.APIView):
             "contracts_expiring": contracts_expiring,
             "pending_dossiers": pending_dossiers,
             "unvalidated_providers": unvalidated_providers,
-            "active_clients_count": empresas.count(),
+            "active_clients_count": len(empresas_rows),
             "timestamp": now.isoformat()
         }
 
@@ -404,6 +400,38 @@ class FiscalDefenseIndexView(views.APIView):
         return Response(payload, status=status.HTTP_200_OK)
 
 
+def _fdi_narrative_response(fdi_payload: dict, narrative: dict) -> dict:
+    return {
+        "fdi": {
+            "score": fdi_payload.get("score", 0.0),
+            "level": fdi_payload.get("level", "NO_DATA"),
+            "generated_at": fdi_payload.get("generated_at"),
+            "confidence": fdi_payload.get("confidence", {}),
+            "trace": fdi_payload.get("trace", {}),
+        },
+        "narrative": narrative,
+    }
+
+
+def run_fdi_narrative_job(job: AIJob) -> tuple[int, dict]:
+    parametros = job.parametros
+    audience = parametros["audience"]
+    fdi_payload, _ = _resolve_fdi_payload(
+        days=parametros["days"],
+        empresa_id=parametros.get("empresa_id"),
+        recalculate=bool(parametros.get("recalculate")),
+    )
+    narrative = generate_fdi_narrative(
+        audience=audience,
+        fdi_payload=fdi_payload,
+        bypass_cache=bool(parametros.get("regenerar")),
+    )
+    persist_fdi_narrative(audience=audience, fdi_payload=fdi_payload, narrative_payload=narrative)
+    payload = _fdi_narrative_response(fdi_payload, narrative)
+    cache.set(parametros["cache_key"], payload, FDI_NARRATIVE_CACHE_TTL_SECONDS)
+    return status.HTTP_200_OK, payload
+
+
 class FiscalDefenseNarrativeView(views.APIView):
     permission_classes = [permissions.IsAuthenticated]
 
@@ -442,33 +470,56 @@ class FiscalDefenseNarrativeView(views.APIView):
             },
         )
         recalculate = str(request.data.get("recalculate", "false")).lower() in {"1", "true", "si"}
+        # ``regenerar`` reescribe la narrativa aunque el FDI no cambie (respuesta, narrativa
+        # persistida y caché de respuestas IA); ``recalculate`` además recalcula el FDI.
+        regenerar = ai_regeneration_requested(request)
         cached_payload = cache.get(cache_key)
-        if not recalculate and cached_payload is not None:
+        if not (recalculate or regenerar) and cached_payload is not None:
             elapsed_ms = (time.perf_counter() - started) * 1000
             logger.info("dashboard.fdi_narrative tenant=%s cache=hit duration_ms=%.1f", tenant_slug, elapsed_ms)
             return Response(cached_payload, status=status.HTTP_200_OK)
 
         if recalculate and not _can_recalculate_fdi(request.user):
             raise PermissionDenied("Solo usuarios administradores pueden forzar recálculo del FDI.")
+        if regenerar and not _can_recalculate_fdi(request.user):
+            raise PermissionDenied("Solo usuarios administradores pueden regenerar la narrativa del FDI.")
+        tenant = TenantContext.get_current_tenant()
+        # La generación (y el recálculo) se difieren; una narrativa ya persistida se responde en línea.
+        job_parameters = None
+        if tenant is not None and _can_recalculate_fdi(request.user) and ai_jobs_async_requested(request):
+            job_parameters = {
+                "audience": audience,
+                "days": days,
+                "empresa_id": parsed_empresa_id,
+                "recalculate": recalculate,
+                "regenerar": regenerar,
+                "cache_key": cache_key,
+            }
+        if job_parameters is not None and recalculate:
+            job = enqueue_ai_job(
+                AIJob.Kind.NARRATIVA_FDI, tenant_slug=tenant.slug, user=request.user, parametros=job_parameters
+            )
+            return ai_job_accepted_response(request, job)
+
         fdi_payload, source = _resolve_fdi_payload(days=days, empresa_id=parsed_empresa_id, recalculate=recalculate)
-        persisted_narrative = None if recalculate else get_persisted_fdi_narrative(audience=audience, fdi_payload=fdi_payload)
+        persisted_narrative = (
+            None
+            if recalculate or regenerar
+            else get_persisted_fdi_narrative(audience=audience, fdi_payload=fdi_payload)
+        )
         if persisted_narrative is not None:
             narrative = serialize_fdi_narrative(persisted_narrative)
+        elif job_parameters is not None:
+            job = enqueue_ai_job(
+                AIJob.Kind.NARRATIVA_FDI, tenant_slug=tenant.slug, user=request.user, parametros=job_parameters
+            )
+            return ai_job_accepted_response(request, job)
         elif _can_recalculate_fdi(request.user):
-            narrative = generate_fdi_narrative(audience=audience, fdi_payload=fdi_payload)
+            narrative = generate_fdi_narrative(audience=audience, fdi_payload=fdi_payload, bypass_cache=regenerar)
             persist_fdi_narrative(audience=audience, fdi_payload=fdi_payload, narrative_payload=narrative)
         else:
             narrative = build_pending_fdi_narrative(audience=audience, fdi_payload=fdi_payload)
-        payload = {
-            "fdi": {
-                "score": fdi_payload.get("score", 0.0),
-                "level": fdi_payload.get("level", "NO_DATA"),
-                "generated_at": fdi_payload.get("generated_at"),
-                "confidence": fdi_payload.get("confidence", {}),
-                "trace": fdi_payload.get("trace", {}),
-            },
-            "narrative": narrative,
-        }
+        payload = _fdi_narrative_response(fdi_payload, narrative)
         cache.set(cache_key, payload, FDI_NARRATIVE_CACHE_TTL_SECONDS)
         elapsed_ms = (time.perf_counter() - started) * 1000
         logger.info("dashboard.fdi_narrative tenant=%s source=%s duration_ms=%.1f", tenant_slug, source, elapsed_ms)
@@ -7,3 +7,6 @@ class MaterialidadConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "materialidad"
     verbose_name = "Materialidad Fiscal"
+
+    def ready(self) -> None:
+        from . import signals  # noqa: F401
@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+
+from django.core.cache import cache
+
+from tenancy.context import TenantContext
+
+logger = logging.getLogger(__name__)
+
+GLOBAL_CACHE_NAMESPACE = "global"
+
+
+def _version_key(tenant_slug: str) -> str:
+    return f"dashboard:version:{tenant_slug}"
+
+
+def current_cache_namespace() -> str:
+    tenant = TenantContext.get_current_tenant()
+    return tenant.slug if tenant else GLOBAL_CACHE_NAMESPACE
+
+
+def get_dashboard_cache_version(tenant_slug: str) -> int:
+    key = _version_key(tenant_slug)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, 1, timeout=None)
+        version = cache.get(key) or 1
+    return int(version)
+
+
+def bump_dashboard_cache_version(tenant_slug: str) -> None:
+    """Invalida todas las entradas de dashboard del tenant sin recorrer el cache."""
+
+    key = _version_key(tenant_slug)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 2, timeout=None)
+    except Exception:  # pragma: no cover - una caída del cache no debe bloquear escrituras
+        logger.warning("No se pudo invalidar el cache de dashboard para %s", tenant_slug, exc_info=True)
+
+
+def build_dashboard_cache_key(prefix: str, tenant_slug: str, payload: dict) -> str:
+    raw = json.dumps(payload, sort_keys=True, default=str)
+    digest = hashlib.sha1(raw.encode("utf-8")).hexdigest()
+    version = get_dashboard_cache_version(tenant_slug)
+    return f"dashboard:{prefix}:{tenant_slug}:v{version}:{digest}"
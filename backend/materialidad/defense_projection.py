@@ -5,6 +5,9 @@ from decimal import Decimal, ROUND_HALF_UP
 from typing import Any
 from uuid import UUID, uuid4
 
+from django.db import connections
+from django.db.models import Count, DecimalField, Max, Prefetch, Q, Sum, TextField
+from django.db.models.functions import Cast
 from django.utils import timezone
 
 from tenancy.context import TenantContext
@@ -17,7 +20,14 @@ from .fdi_engine import (
     compute_fdi_confidence,
     compute_legacy_public_score,
 )
-from .models import EvidenciaMaterial, Operacion, OperationDefenseProjection, Proveedor
+from .models import (
+    EvidenciaMaterial,
+    Operacion,
+    OperationDefenseProjection,
+    OperationDefenseProjectionOutbox,
+    OperacionChecklist,
+    Proveedor,
+)
 
 ONE_DECIMAL = Decimal("0.1")
 
@@ -283,23 +293,45 @@ def _operational_score(operacion: Operacion, checklists_resumen: list[dict[str,
     return clamp_score((0.40 * status_score) + (0.30 * provider_validation_score) + (0.30 * checklist_score))
 
 
-def sync_operation_defense_projection(
+PROJECTION_UPDATE_FIELDS = (
+    "tenant_slug",
+    "empresa",
+    "proveedor",
+    "formula_version",
+    "pipeline_version",
+    "correlation_id",
+    "profile",
+    "included_in_fdi",
+    "score_base",
+    "confidence_score",
+    "dm",
+    "se",
+    "sc",
+    "ec",
+    "do",
+    "input_integrity",
+    "completeness_quality",
+    "freshness_quality",
+    "risk_flags_json",
+    "inputs_json",
+    "captured_at",
+    "updated_at",
+)
+
+
+def _projection_defaults(
     *,
     operacion: Operacion,
-    correlation_id: UUID | str | None = None,
-    tenant_slug: str | None = None,
-    captured_at=None,
-) -> OperationDefenseProjection:
+    tenant_slug: str,
+    correlation_id: UUID | str,
+    captured_at,
+) -> dict[str, Any]:
     from .services import get_operacion_checklists_resumen, get_operacion_faltantes_expediente
 
-    tenant = TenantContext.get_current_tenant()
-    resolved_tenant_slug = tenant_slug or (tenant.slug if tenant else "global")
-    resolved_captured_at = captured_at or timezone.now()
-    resolved_correlation_id = correlation_id or uuid4()
-
     perfil, faltantes = get_operacion_faltantes_expediente(operacion)
     checklists_resumen = get_operacion_checklists_resumen(operacion)
-    evidencia_tipos = set(operacion.evidencias.values_list("tipo", flat=True))
+    # ``.all()`` reutiliza el prefetch de evidencias cuando viene del queryset por lotes.
+    evidencia_tipos = {evidencia.tipo for evidencia in operacion.evidencias.all()}
 
     dm = _documentary_score(operacion, faltantes)
     se = _substance_score(operacion=operacion, perfil=perfil, evidencia_tipos=evidencia_tipos)
@@ -320,45 +352,127 @@ def sync_operation_defense_projection(
     )["score"]
     score_base = compute_legacy_public_score(dm=dm, se=se, sc=sc, ec=ec, do=do, has_universe=True)
 
+    return {
+        "tenant_slug": tenant_slug,
+        "empresa": operacion.empresa,
+        "proveedor": operacion.proveedor,
+        "formula_version": FORMULA_VERSION,
+        "pipeline_version": PIPELINE_VERSION,
+        "correlation_id": correlation_id,
+        "profile": perfil,
+        "included_in_fdi": included_in_fdi,
+        "score_base": _quantize_score(score_base),
+        "confidence_score": _quantize_score(confidence),
+        "dm": _quantize_score(dm),
+        "se": _quantize_score(se),
+        "sc": _quantize_score(sc),
+        "ec": _quantize_score(ec),
+        "do": _quantize_score(do),
+        "input_integrity": _quantize_score(input_integrity),
+        "completeness_quality": _quantize_score(completeness_quality),
+        "freshness_quality": _quantize_score(freshness_quality),
+        "risk_flags_json": risk_flags,
+        "inputs_json": {
+            "faltantes": faltantes,
+            "checklists_resumen": checklists_resumen,
+            "evidencia_tipos": sorted(evidencia_tipos),
+            "cfdi_estatus": operacion.cfdi_estatus,
+            "spei_estatus": operacion.spei_estatus,
+            "contract_category": operacion.contrato.categoria if operacion.contrato_id else None,
+            "contract_razon_estado": operacion.contrato.razon_negocio_estado if operacion.contrato_id else None,
+            "provider_riesgo_fiscal": operacion.proveedor.riesgo_fiscal,
+            "provider_estatus_69b": operacion.proveedor.estatus_69b,
+        },
+        "captured_at": captured_at,
+    }
+
+
+def sync_operation_defense_projection(
+    *,
+    operacion: Operacion,
+    correlation_id: UUID | str | None = None,
+    tenant_slug: str | None = None,
+    captured_at=None,
+) -> OperationDefenseProjection:
+    tenant = TenantContext.get_current_tenant()
+    resolved_tenant_slug = tenant_slug or (tenant.slug if tenant else "global")
+
     projection, _ = OperationDefenseProjection.objects.update_or_create(
         operacion=operacion,
-        defaults={
-            "tenant_slug": resolved_tenant_slug,
-            "empresa": operacion.empresa,
-            "proveedor": operacion.proveedor,
-            "formula_version": FORMULA_VERSION,
-            "pipeline_version": PIPELINE_VERSION,
-            "correlation_id": resolved_correlation_id,
-            "profile": perfil,
-            "included_in_fdi": included_in_fdi,
-            "score_base": _quantize_score(score_base),
-            "confidence_score": _quantize_score(confidence),
-            "dm": _quantize_score(dm),
-            "se": _quantize_score(se),
-            "sc": _quantize_score(sc),
-            "ec": _quantize_score(ec),
-            "do": _quantize_score(do),
-            "input_integrity": _quantize_score(input_integrity),
-            "completeness_quality": _quantize_score(completeness_quality),
-            "freshness_quality": _quantize_score(freshness_quality),
-            "risk_flags_json": risk_flags,
-            "inputs_json": {
-                "faltantes": faltantes,
-                "checklists_resumen": checklists_resumen,
-                "evidencia_tipos": sorted(evidencia_tipos),
-                "cfdi_estatus": operacion.cfdi_estatus,
-                "spei_estatus": operacion.spei_estatus,
-                "contract_category": operacion.contrato.categoria if operacion.contrato_id else None,
-                "contract_razon_estado": operacion.contrato.razon_negocio_estado if operacion.contrato_id else None,
-                "provider_riesgo_fiscal": operacion.proveedor.riesgo_fiscal,
-                "provider_estatus_69b": operacion.proveedor.estatus_69b,
-            },
-            "captured_at": resolved_captured_at,
-        },
+        defaults=_projection_defaults(
+            operacion=operacion,
+            tenant_slug=resolved_tenant_slug,
+            correlation_id=correlation_id or uuid4(),
+            captured_at=captured_at or timezone.now(),
+        ),
     )
     return projection
 
 
+def bulk_sync_operation_defense_projections(
+    operaciones,
+    *,
+    correlation_id: UUID | str | None = None,
+    tenant_slug: str | None = None,
+    captured_at=None,
+    batch_size: int = 500,
+) -> int:
+    """Calcula en memoria y persiste las proyecciones por lotes con un upsert.
+
+    Cada lote se escribe con un solo ``INSERT ... ON CONFLICT (operacion_id) DO UPDATE``
+    en lugar de un ``update_or_create`` por operación. Para aprovechar los prefetch de
+    evidencias y checklists conviene pasar ``projection_source_queryset()`` filtrado.
+    """
+
+    tenant = TenantContext.get_current_tenant()
+    resolved_tenant_slug = tenant_slug or (tenant.slug if tenant else "global")
+    resolved_correlation_id = correlation_id or uuid4()
+    resolved_captured_at = captured_at or timezone.now()
+    batch_size = max(1, batch_size)
+
+    synced = 0
+    batch: list[OperationDefenseProjection] = []
+    for operacion in operaciones:
+        batch.append(
+            OperationDefenseProjection(
+                operacion=operacion,
+                **_projection_defaults(
+                    operacion=operacion,
+                    tenant_slug=resolved_tenant_slug,
+                    correlation_id=resolved_correlation_id,
+                    captured_at=resolved_captured_at,
+                ),
+            )
+        )
+        if len(batch) >= batch_size:
+            synced += _upsert_projections(batch)
+            batch = []
+    if batch:
+        synced += _upsert_projections(batch)
+    return synced
+
+
+def _upsert_projections(batch: list[OperationDefenseProjection]) -> int:
+    OperationDefenseProjection.objects.bulk_create(
+        batch,
+        update_conflicts=True,
+        unique_fields=["operacion"],
+        update_fields=list(PROJECTION_UPDATE_FIELDS),
+    )
+    return len(batch)
+
+
+def projection_source_queryset():
+    return Operacion.objects.select_related("empresa", "proveedor", "contrato").prefetch_related(
+        "evidencias",
+        Prefetch(
+            "checklists_operativos",
+            queryset=OperacionChecklist.objects.prefetch_related("items"),
+            to_attr="checklists_operativos_prefetched",
+        ),
+    )
+
+
 def sync_operation_defense_projections_for_window(
     *,
     days: int = 90,
@@ -366,29 +480,180 @@ def sync_operation_defense_projections_for_window(
     tenant_slug: str | None = None,
     correlation_id: UUID | str | None = None,
     captured_at=None,
-) -> list[OperationDefenseProjection]:
+    batch_size: int = 500,
+) -> int:
+    """Refresca las proyecciones de la ventana y regresa cuántas operaciones se sincronizaron."""
+
     start_date, today = _window_bounds(days)
-    queryset = Operacion.objects.select_related("empresa", "proveedor", "contrato").prefetch_related(
-        "evidencias",
-        "checklists_operativos__items",
-    ).filter(
+    queryset = projection_source_queryset().filter(
         fecha_operacion__gte=start_date,
         fecha_operacion__lte=today,
     )
     if empresa_id is not None:
         queryset = queryset.filter(empresa_id=empresa_id)
 
-    resolved_correlation_id = correlation_id or uuid4()
-    resolved_captured_at = captured_at or timezone.now()
-    return [
-        sync_operation_defense_projection(
-            operacion=operacion,
-            correlation_id=resolved_correlation_id,
-            tenant_slug=tenant_slug,
-            captured_at=resolved_captured_at,
+    return bulk_sync_operation_defense_projections(
+        queryset.order_by("id").iterator(chunk_size=batch_size),
+        correlation_id=correlation_id,
+        tenant_slug=tenant_slug,
+        captured_at=captured_at,
+        batch_size=batch_size,
+    )
+
+
+def mark_operation_defense_dirty(
+    source: str,
+    source_ids,
+    *,
+    tenant_slug: str | None = None,
+) -> None:
+    """Registra en el outbox que las operaciones ligadas a ``source_ids`` deben recalcularse.
+
+    Cambios repetidos sobre el mismo origen se colapsan en una sola marca cuyo
+    ``marked_at`` se actualiza, de modo que el drenado no pierde cambios concurrentes.
+    """
+
+    ids = {int(source_id) for source_id in source_ids if source_id}
+    if not ids:
+        return
+    tenant = TenantContext.get_current_tenant()
+    resolved_tenant_slug = tenant_slug or (tenant.slug if tenant else "global")
+    marked_at = timezone.now()
+    OperationDefenseProjectionOutbox.objects.bulk_create(
+        [
+            OperationDefenseProjectionOutbox(
+                tenant_slug=resolved_tenant_slug,
+                source=source,
+                source_id=source_id,
+                marked_at=marked_at,
+            )
+            for source_id in sorted(ids)
+        ],
+        update_conflicts=True,
+        unique_fields=["source", "source_id"],
+        update_fields=["tenant_slug", "marked_at"],
+    )
+
+
+def drain_operation_defense_outbox(
+    *,
+    tenant_slug: str | None = None,
+    batch_size: int = 500,
+) -> dict[str, int]:
+    """Recalcula solo las operaciones afectadas por las marcas pendientes del outbox."""
+
+    from .services import refresh_operacion_riesgo_columns
+
+    tenant = TenantContext.get_current_tenant()
+    resolved_tenant_slug = tenant_slug or (tenant.slug if tenant else "global")
+    Source = OperationDefenseProjectionOutbox.Source
+    marks_processed = 0
+    operations_synced = 0
+
+    while True:
+        marks = list(OperationDefenseProjectionOutbox.objects.order_by("marked_at", "id")[:batch_size])
+        if not marks:
+            break
+
+        ids_by_source: dict[str, set[int]] = {source: set() for source in Source.values}
+        for mark in marks:
+            ids_by_source.setdefault(mark.source, set()).add(mark.source_id)
+        affected = (
+            Q(id__in=ids_by_source[Source.OPERACION])
+            | Q(contrato_id__in=ids_by_source[Source.CONTRATO])
+            | Q(proveedor_id__in=ids_by_source[Source.PROVEEDOR])
         )
-        for operacion in queryset.order_by("id")
-    ]
+
+        operaciones = list(projection_source_queryset().filter(affected).order_by("id"))
+        operations_synced += bulk_sync_operation_defense_projections(
+            operaciones,
+            tenant_slug=resolved_tenant_slug,
+            batch_size=batch_size,
+        )
+        # Cambios de proveedor/contrato también mueven el riesgo persistido de sus operaciones.
+        refresh_operacion_riesgo_columns(operaciones, batch_size=batch_size)
+
+        # Solo se borran las marcas que no volvieron a ensuciarse mientras se recalculaba.
+        processed = Q(pk__in=[])
+        for mark in marks:
+            processed |= Q(pk=mark.pk, marked_at=mark.marked_at)
+        OperationDefenseProjectionOutbox.objects.filter(processed).delete()
+        marks_processed += len(marks)
+        if len(marks) < batch_size:
+            break
+
+    return {"marks_processed": marks_processed, "operations_synced": operations_synced}
+
+
+AVERAGED_PROJECTION_FIELDS = (
+    "dm",
+    "se",
+    "sc",
+    "ec",
+    "do",
+    "confidence_score",
+    "input_integrity",
+    "completeness_quality",
+    "freshness_quality",
+)
+HIGH_RISK_FLAGS = ("proveedor_riesgo_alto",)
+HIGH_69B_FLAGS = ("proveedor_69b_presunto", "proveedor_69b_definitivo")
+
+
+def _risk_flags_q(flags: tuple[str, ...], *, using: str) -> Q:
+    condition = Q(pk__in=[])
+    for flag in flags:
+        if connections[using].features.supports_json_field_contains:
+            condition |= Q(risk_flags_json__contains=[flag])
+        else:
+            # SQLite no soporta contención JSON; el flag entrecomillado identifica el elemento del arreglo.
+            condition |= Q(risk_flags_json__icontains=f'"{flag}"')
+    return condition
+
+
+def _aggregate_projection_window(queryset) -> dict[str, dict[str, Any]]:
+    """Promedios, conteos y flags del universo y del total en una sola consulta agregada.
+
+    Cada promedio es ``round(float(suma_exacta) / n, 1)``: la suma en SQL es exacta y no
+    depende del orden de las filas. El cálculo anterior sumaba los puntajes ya convertidos a
+    ``float``, así que cuando la media exacta cae en un empate ``.x5`` el resultado puede
+    diferir en 0.1 (p. ej. 57.9 contra 57.8 para 30.9 y 84.8); fuera de esos empates coincide.
+    """
+
+    scopes = {"all": Q(), "included": Q(included_in_fdi=True)}
+    high_risk = _risk_flags_q(HIGH_RISK_FLAGS, using=queryset.db)
+    high_69b = _risk_flags_q(HIGH_69B_FLAGS, using=queryset.db)
+    aggregates: dict[str, Any] = {}
+    for scope, condition in scopes.items():
+        aggregates[f"{scope}__count"] = Count("id", filter=condition)
+        aggregates[f"{scope}__high_risk_flags"] = Count("id", filter=condition & high_risk)
+        aggregates[f"{scope}__high_69b_flags"] = Count("id", filter=condition & high_69b)
+        aggregates[f"{scope}__projection_groups"] = Count("correlation_id", distinct=True, filter=condition)
+        aggregates[f"{scope}__correlation_id"] = Max(Cast("correlation_id", TextField()), filter=condition)
+        for field in AVERAGED_PROJECTION_FIELDS:
+            aggregates[f"{scope}__sum_{field}"] = Sum(
+                field,
+                filter=condition,
+                output_field=DecimalField(max_digits=19, decimal_places=1),
+            )
+    row = queryset.aggregate(**aggregates)
+
+    totals: dict[str, dict[str, Any]] = {}
+    for scope in scopes:
+        count = row[f"{scope}__count"] or 0
+        correlation_id = row[f"{scope}__correlation_id"]
+        totals[scope] = {
+            "count": count,
+            "high_risk_flags": row[f"{scope}__high_risk_flags"] or 0,
+            "high_69b_flags": row[f"{scope}__high_69b_flags"] or 0,
+            "projection_groups": row[f"{scope}__projection_groups"] or 0,
+            "correlation_id": str(UUID(str(correlation_id))) if correlation_id else None,
+            "avg": {
+                field: clamp_score(float(row[f"{scope}__sum_{field}"]) / count) if count else 0.0
+                for field in AVERAGED_PROJECTION_FIELDS
+            },
+        }
+    return totals
 
 
 def calculate_fiscal_defense_index_from_projections(
@@ -420,37 +685,32 @@ def calculate_fiscal_defense_index_from_projections(
         captured_at=captured_at if refresh else None,
     )
 
-    projections = list(queryset.order_by("operacion_id"))
-    included = [projection for projection in projections if projection.included_in_fdi]
+    totals = _aggregate_projection_window(queryset)
+    total_operaciones = totals["all"]["count"]
+    operaciones_en_universo = totals["included"]["count"]
     period_start, today = _window_bounds(days)
-    has_universe = len(included) > 0
-
-    def _avg(values: list[float]) -> float:
-        if not values:
-            return 0.0
-        return clamp_score(sum(values) / len(values))
+    has_universe = operaciones_en_universo > 0
 
-    target = included if included else projections
-    correlation_ids = {str(projection.correlation_id) for projection in target if projection.correlation_id}
-    trace_correlation_id = next(iter(correlation_ids)) if len(correlation_ids) == 1 else None
+    target = totals["included"] if has_universe else totals["all"]
+    trace_correlation_id = target["correlation_id"] if target["projection_groups"] == 1 else None
     breakdown = {
-        "DM": _avg([float(projection.dm) for projection in target]),
-        "SE": _avg([float(projection.se) for projection in target]),
-        "SC": _avg([float(projection.sc) for projection in target]),
-        "EC": _avg([float(projection.ec) for projection in target]),
-        "DO": _avg([float(projection.do) for projection in target]),
+        "DM": target["avg"]["dm"],
+        "SE": target["avg"]["se"],
+        "SC": target["avg"]["sc"],
+        "EC": target["avg"]["ec"],
+        "DO": target["avg"]["do"],
     }
     inputs = {
-        "total_operaciones": len(projections),
-        "operaciones_en_universo": len(included),
-        "operaciones_fuera_universo": max(len(projections) - len(included), 0),
-        "avg_confidence_score": _avg([float(projection.confidence_score) for projection in target]),
-        "avg_input_integrity": _avg([float(projection.input_integrity) for projection in target]),
-        "avg_completeness_quality": _avg([float(projection.completeness_quality) for projection in target]),
-        "avg_freshness_quality": _avg([float(projection.freshness_quality) for projection in target]),
-        "high_risk_flags": sum(1 for projection in target if "proveedor_riesgo_alto" in (projection.risk_flags_json or [])),
-        "high_69b_flags": sum(1 for projection in target if any(flag in (projection.risk_flags_json or []) for flag in ("proveedor_69b_presunto", "proveedor_69b_definitivo"))),
-        "projection_groups": len(correlation_ids),
+        "total_operaciones": total_operaciones,
+        "operaciones_en_universo": operaciones_en_universo,
+        "operaciones_fuera_universo": max(total_operaciones - operaciones_en_universo, 0),
+        "avg_confidence_score": target["avg"]["confidence_score"],
+        "avg_input_integrity": target["avg"]["input_integrity"],
+        "avg_completeness_quality": target["avg"]["completeness_quality"],
+        "avg_freshness_quality": target["avg"]["freshness_quality"],
+        "high_risk_flags": target["high_risk_flags"],
+        "high_69b_flags": target["high_69b_flags"],
+        "projection_groups": target["projection_groups"],
     }
     score = compute_legacy_public_score(
         dm=breakdown["DM"],
@@ -464,7 +724,7 @@ def calculate_fiscal_defense_index_from_projections(
         {
             "priority": "info" if has_universe else "warning",
             "title": "Universo técnico sincronizado",
-            "description": f"{len(included)} operaciones incluidas de {len(projections)} proyectadas para el periodo.",
+            "description": f"{operaciones_en_universo} operaciones incluidas de {total_operaciones} proyectadas para el periodo.",
         }
     ]
     if has_universe and inputs["avg_confidence_score"] < 70:
@@ -1,51 +1,122 @@
 from __future__ import annotations
 
 import hashlib
+import logging
 import math
 import re
+from collections.abc import Iterator
+from datetime import timedelta
+from functools import lru_cache
 from pathlib import Path
+from typing import Any
 
+from django.conf import settings
+from django.core.files.base import ContentFile
 from django.core.files.storage import default_storage
 from django.db import transaction
+from django.db.models import Q
 from django.utils import timezone
 from django.utils.text import slugify
 
 from .models import LegalCorpusUpload, LegalReferenceSource
+from .pdf_text import PdfSource, iter_pdf_pages
 
 try:  # pragma: no cover - dependency validation
-	from pypdf import PdfReader  # type: ignore
+	from docx import Document  # type: ignore
 except ModuleNotFoundError:  # pragma: no cover
-	PdfReader = None
+	Document = None
 
 try:  # pragma: no cover - dependency validation
-	from docx import Document  # type: ignore
+	import numpy as np  # type: ignore
 except ModuleNotFoundError:  # pragma: no cover
-	Document = None
+	np = None
+
+logger = logging.getLogger(__name__)
 
 
 SUPPORTED_EXTENSIONS = (".pdf", ".txt", ".md", ".docx")
 HASH_VECTOR_DIM = 64
 HASH_VECTOR_MODEL = "hash64-v1"
+HASH_BUCKET_CACHE_SIZE = 200_000
+EXTRACTION_STORAGE_DIR = "legal_corpus/extraccion"
+LEGAL_SOURCE_UPSERT_FIELDS = [
+	"slug",
+	"ley",
+	"ordenamiento",
+	"corpus_upload",
+	"tipo_fuente",
+	"estatus_vigencia",
+	"es_vigente",
+	"fecha_vigencia_desde",
+	"fecha_vigencia_hasta",
+	"fecha_ultima_revision",
+	"autoridad_emisora",
+	"articulo",
+	"fraccion",
+	"parrafo",
+	"contenido",
+	"resumen",
+	"fuente_documento",
+	"fuente_url",
+	"vigencia",
+	"sat_categoria",
+	"vectorizacion",
+	"vectorizacion_modelo",
+	"vectorizacion_dim",
+	"vectorizado_en",
+	"metadata",
+	"updated_at",
+]
 
 
 def tokenize_legal_text(text: str) -> list[str]:
 	return [token.lower() for token in re.findall(r"[\wÁ-ÿ]{3,}", text or "", flags=re.IGNORECASE)]
 
 
+@lru_cache(maxsize=HASH_BUCKET_CACHE_SIZE)
+def _token_hash(token: str) -> int:
+	# Igual que ``int(sha256(token).hexdigest(), 16)`` (hash64-v1) sin pasar por texto hexadecimal.
+	return int.from_bytes(hashlib.sha256(token.encode("utf-8")).digest(), "big")
+
+
+def _normalize_counts(counts: list[float]) -> list[float]:
+	# Los conteos son enteros: la suma de cuadrados es exacta y el redondeo coincide en ambos caminos.
+	norm = math.sqrt(sum(value * value for value in counts))
+	if not norm:
+		return counts
+	return [round(value / norm, 6) if value else 0.0 for value in counts]
+
+
 def build_hashed_embedding(text: str, *, dimensions: int = HASH_VECTOR_DIM) -> list[float]:
 	if dimensions <= 0:
 		return []
 	vector = [0.0] * dimensions
-	tokens = tokenize_legal_text(text)
-	if not tokens:
-		return vector
-	for token in tokens:
-		bucket = int(hashlib.sha256(token.encode("utf-8")).hexdigest(), 16) % dimensions
-		vector[bucket] += 1.0
-	norm = math.sqrt(sum(value * value for value in vector))
-	if not norm:
-		return vector
-	return [round(value / norm, 6) for value in vector]
+	for token in tokenize_legal_text(text):
+		vector[_token_hash(token) % dimensions] += 1.0
+	return _normalize_counts(vector)
+
+
+def build_hashed_embeddings(texts: list[str], *, dimensions: int = HASH_VECTOR_DIM) -> list[list[float]]:
+	"""Versión por lotes de ``build_hashed_embedding`` con resultados idénticos (hash64-v1).
+
+	Con NumPy los conteos de todos los textos se calculan con un solo ``bincount``.
+	"""
+
+	if dimensions <= 0:
+		return [[] for _ in texts]
+	if np is None:
+		return [build_hashed_embedding(text, dimensions=dimensions) for text in texts]
+
+	buckets: list[int] = []
+	lengths: list[int] = []
+	for text in texts:
+		tokens = tokenize_legal_text(text)
+		buckets.extend(_token_hash(token) % dimensions for token in tokens)
+		lengths.append(len(tokens))
+	rows = np.repeat(np.arange(len(texts), dtype=np.int64), lengths)
+	flat = rows * dimensions + np.asarray(buckets, dtype=np.int64)
+	counts = np.bincount(flat, minlength=len(texts) * dimensions).reshape(len(texts), dimensions)
+	return [_normalize_counts([float(value) for value in row_counts]) for row_counts in counts.tolist()]
 
 
 def cosine_similarity(left: list[float] | None, right: list[float] | None) -> float:
@@ -79,17 +150,23 @@ def is_generic_compendium_name(file_name: str) -> bool:
 	return "contenido_notebook" in lowered or "notebook" in lowered or "compendio" in lowered
 
 
-def extract_legal_text_from_storage(file_name: str) -> str:
+def iter_legal_text_pages(file_name: str, *, start_page: int = 0) -> Iterator[tuple[int, int, str]]:
+	"""Produce ``(índice, total, texto)`` página por página; DOCX y texto plano son una sola página."""
+
 	extension = Path(file_name).suffix.lower()
 	if extension not in SUPPORTED_EXTENSIONS:
 		raise ValueError(f"Formato no soportado: {extension}")
 	if extension == ".pdf":
-		if PdfReader is None:
-			raise ValueError("El paquete 'pypdf' es requerido para leer PDFs")
-		with default_storage.open(file_name, "rb") as fh:
-			reader = PdfReader(fh)
-			text = "\n".join((page.extract_text() or "") for page in reader.pages)
-	elif extension == ".docx":
+		try:
+			source = PdfSource.from_path(default_storage.path(file_name))
+		except NotImplementedError:
+			with default_storage.open(file_name, "rb") as fh:
+				source = PdfSource.from_file(fh)
+		yield from iter_pdf_pages(source, start_page=start_page)
+		return
+	if start_page > 0:
+		return
+	if extension == ".docx":
 		if Document is None:
 			raise ValueError("El paquete 'python-docx' es requerido para leer archivos DOCX")
 		with default_storage.open(file_name, "rb") as fh:
@@ -102,6 +179,11 @@ def extract_legal_text_from_storage(file_name: str) -> str:
 			text = raw.decode("utf-8")
 		except UnicodeDecodeError:
 			text = raw.decode("latin-1", errors="ignore")
+	yield 0, 1, text
+
+
+def extract_legal_text_from_storage(file_name: str) -> str:
+	text = "\n".join(page_text for _, _, page_text in iter_legal_text_pages(file_name))
 	if not text.strip():
 		raise ValueError("El archivo no contiene texto útil")
 	return text
@@ -290,18 +372,193 @@ def extract_structured_legal_segments(
 	return normalized_segments
 
 
+def _invalidate_vector_index(alias: str) -> None:
+	from .legal_vector_index import invalidate
+
+	invalidate(alias, shared=True)
+
+
+def _processing_setting(name: str, default: int) -> int:
+	return max(1, int(getattr(settings, name, default) or default))
+
+
+def _extraction_state(upload: LegalCorpusUpload) -> dict[str, Any]:
+	state = dict((upload.metadata or {}).get("extraction") or {})
+	if state.get("source_file") != upload.archivo.name:
+		return {"source_file": upload.archivo.name, "pages_done": 0, "total_pages": None, "parts": []}
+	return state
+
+
+def _save_metadata(upload: LegalCorpusUpload, **values: Any) -> None:
+	upload.metadata = {**(upload.metadata or {}), **values}
+	upload.save(update_fields=["metadata", "updated_at"])
+
+
+def _store_extraction_part(
+	upload: LegalCorpusUpload,
+	state: dict[str, Any],
+	pages: list[str],
+	*,
+	total_pages: int,
+) -> dict[str, Any]:
+	first_page = int(state["pages_done"])
+	last_page = first_page + len(pages)
+	name = default_storage.save(
+		f"{EXTRACTION_STORAGE_DIR}/{upload.pk}/paginas-{first_page:05d}-{last_page - 1:05d}.txt",
+		ContentFile("\n".join(pages).encode("utf-8")),
+	)
+	state = {**state, "pages_done": last_page, "total_pages": total_pages, "parts": [*state["parts"], name]}
+	_save_metadata(upload, extraction=state)
+	return state
+
+
+def _extract_upload_text(upload: LegalCorpusUpload, *, checkpoint_pages: int) -> str:
+	"""Extrae el texto página por página guardando un bloque en storage cada ``checkpoint_pages``.
+
+	``metadata["extraction"]`` registra las páginas ya extraídas: si el intento anterior
+	se cortó, la lectura continúa desde la última página guardada.
+	"""
+
+	state = _extraction_state(upload)
+	if not state.get("complete"):
+		pages: list[str] = []
+		total_pages = state.get("total_pages") or 0
+		for _, total_pages, page_text in iter_legal_text_pages(upload.archivo.name, start_page=state["pages_done"]):
+			pages.append(page_text)
+			if len(pages) >= checkpoint_pages:
+				state = _store_extraction_part(upload, state, pages, total_pages=total_pages)
+				pages = []
+		if pages:
+			state = _store_extraction_part(upload, state, pages, total_pages=total_pages)
+		state = {**state, "complete": True}
+		_save_metadata(upload, extraction=state)
+
+	texts = []
+	for part in state["parts"]:
+		with default_storage.open(part, "rb") as fh:
+			texts.append(fh.read().decode("utf-8"))
+	text = "\n".join(texts)
+	if not text.strip():
+		raise ValueError("El archivo no contiene texto útil")
+	return text
+
+
+def _discard_extraction(upload: LegalCorpusUpload) -> list[str]:
+	"""Quita el checkpoint de extracción de ``metadata`` y regresa los bloques a borrar."""
+
+	metadata = dict(upload.metadata or {})
+	state = metadata.pop("extraction", None) or {}
+	metadata.pop("progress", None)
+	upload.metadata = metadata
+	return list(state.get("parts") or [])
+
+
+def _delete_extraction_parts(parts: list[str]) -> None:
+	for part in parts:
+		try:
+			default_storage.delete(part)
+		except Exception:  # pragma: no cover - limpieza best effort
+			logger.warning("No se pudo borrar el bloque de extracción %s", part, exc_info=True)
+
+
+def _reset_processing_progress(upload: LegalCorpusUpload) -> None:
+	_delete_extraction_parts(_discard_extraction(upload))
+	upload.fragmentos_procesados = 0
+
+
+def _build_legal_source(
+	upload: LegalCorpusUpload,
+	segment: dict[str, object],
+	*,
+	index: int,
+	chunk: str,
+	vector: list[float],
+	estatus_vigencia: str,
+	es_vigente: bool,
+) -> LegalReferenceSource:
+	metadata = dict(segment.get("metadata") or {})
+	hash_value = hashlib.sha256(
+		f"{upload.ordenamiento}|{upload.autoridad}|{index}|{chunk}".encode("utf-8")
+	).hexdigest()
+	slug = slugify(f"{upload.slug}-{metadata.get('section_type', 'chunk')}-{index}")[:250] or hash_value[:32]
+	return LegalReferenceSource(
+		hash_contenido=hash_value,
+		slug=slug,
+		ley=upload.ordenamiento,
+		ordenamiento=upload.ordenamiento,
+		corpus_upload=upload,
+		tipo_fuente=upload.tipo_fuente,
+		estatus_vigencia=estatus_vigencia,
+		es_vigente=es_vigente,
+		fecha_vigencia_desde=upload.fecha_vigencia_desde,
+		fecha_vigencia_hasta=upload.fecha_vigencia_hasta,
+		fecha_ultima_revision=upload.fecha_ultima_revision,
+		autoridad_emisora=upload.autoridad,
+		articulo=str(segment.get("articulo") or metadata.get("articulo") or "")[:64],
+		fraccion=str(segment.get("fraccion") or metadata.get("fraccion") or "")[:64],
+		parrafo=str(segment.get("parrafo") or metadata.get("parrafo") or "")[:64],
+		contenido=chunk,
+		resumen=str(segment.get("summary") or _build_segment_summary(chunk)),
+		fuente_documento=upload.fuente_documento,
+		fuente_url=upload.fuente_url,
+		vigencia=upload.vigencia,
+		sat_categoria=upload.sat_categoria,
+		vectorizacion=vector,
+		vectorizacion_modelo=HASH_VECTOR_MODEL,
+		vectorizacion_dim=len(vector),
+		vectorizado_en=timezone.now(),
+		metadata={
+			"corpus_upload_id": upload.id,
+			"chunk_index": index,
+			"source_file": upload.archivo.name,
+			"autoridad": upload.autoridad,
+			**metadata,
+		},
+	)
+
+
+def _upsert_legal_sources(sources: list[LegalReferenceSource]) -> int:
+	"""Inserta o actualiza por ``hash_contenido`` en un solo ``INSERT ... ON CONFLICT``; regresa cuántas eran nuevas."""
+
+	hashes = [source.hash_contenido for source in sources]
+	existing = set(
+		LegalReferenceSource.objects.filter(hash_contenido__in=hashes).values_list("hash_contenido", flat=True)
+	)
+	LegalReferenceSource.objects.bulk_create(
+		sources,
+		update_conflicts=True,
+		unique_fields=["hash_contenido"],
+		update_fields=LEGAL_SOURCE_UPSERT_FIELDS,
+	)
+	return len(set(hashes) - existing)
+
+
 def process_legal_corpus_upload(
 	upload: LegalCorpusUpload,
 	*,
 	chunk_size: int = 1200,
 	overlap: int = 200,
+	resume: bool = False,
+	batch_size: int | None = None,
+	checkpoint_pages: int | None = None,
 ) -> dict[str, int]:
+	"""Extrae, fragmenta y vectoriza el archivo del corpus.
+
+	Los fragmentos se escriben en lotes de ``batch_size`` con su propia transacción y
+	``fragmentos_procesados`` avanza con cada lote. Con ``resume`` se reutiliza el texto
+	ya extraído y se continúa desde el último lote confirmado.
+	"""
+
+	batch_size = batch_size or _processing_setting("LEGAL_CORPUS_BATCH_SIZE", 500)
+	checkpoint_pages = checkpoint_pages or _processing_setting("LEGAL_CORPUS_CHECKPOINT_PAGES", 25)
+	if not resume:
+		_reset_processing_progress(upload)
 	upload.estatus = LegalCorpusUpload.ProcessingStatus.PROCESANDO
 	upload.error_detalle = ""
-	upload.save(update_fields=["estatus", "error_detalle", "updated_at"])
+	upload.save(update_fields=["estatus", "error_detalle", "fragmentos_procesados", "metadata", "updated_at"])
 
 	try:
-		text = extract_legal_text_from_storage(upload.archivo.name)
+		text = _extract_upload_text(upload, checkpoint_pages=checkpoint_pages)
 		segments = extract_structured_legal_segments(
 			text,
 			authority=upload.autoridad,
@@ -321,71 +578,51 @@ def process_legal_corpus_upload(
 			effective_status = LegalReferenceSource.VigencyStatus.DESCONOCIDA
 			effective_is_current = False
 
-		created = 0
-		updated = 0
-		with transaction.atomic():
-			for index, segment in enumerate(segments):
-				chunk = str(segment.get("content") or "").strip()
-				metadata = dict(segment.get("metadata") or {})
-				hash_value = hashlib.sha256(
-					f"{upload.ordenamiento}|{upload.autoridad}|{index}|{chunk}".encode("utf-8")
-				).hexdigest()
-				slug = slugify(f"{upload.slug}-{metadata.get('section_type', 'chunk')}-{index}")[:250] or hash_value[:32]
-				vector = build_hashed_embedding(chunk)
-				articulo = str(segment.get("articulo") or metadata.get("articulo") or "")[:64]
-				fraccion = str(segment.get("fraccion") or metadata.get("fraccion") or "")[:64]
-				parrafo = str(segment.get("parrafo") or metadata.get("parrafo") or "")[:64]
-				defaults = {
-					"slug": slug,
-					"ley": upload.ordenamiento,
-					"ordenamiento": upload.ordenamiento,
-					"corpus_upload": upload,
-					"tipo_fuente": upload.tipo_fuente,
-					"estatus_vigencia": effective_status,
-					"es_vigente": effective_is_current,
-					"fecha_vigencia_desde": upload.fecha_vigencia_desde,
-					"fecha_vigencia_hasta": upload.fecha_vigencia_hasta,
-					"fecha_ultima_revision": upload.fecha_ultima_revision,
-					"autoridad_emisora": upload.autoridad,
-					"articulo": articulo,
-					"fraccion": fraccion,
-					"parrafo": parrafo,
-					"contenido": chunk,
-					"resumen": str(segment.get("summary") or _build_segment_summary(chunk)),
-					"fuente_documento": upload.fuente_documento,
-					"fuente_url": upload.fuente_url,
-					"vigencia": upload.vigencia,
-					"sat_categoria": upload.sat_categoria,
-					"vectorizacion": vector,
-					"vectorizacion_modelo": HASH_VECTOR_MODEL,
-					"vectorizacion_dim": len(vector),
-					"vectorizado_en": timezone.now(),
-					"metadata": {
-						"corpus_upload_id": upload.id,
-						"chunk_index": index,
-						"source_file": upload.archivo.name,
-						"autoridad": upload.autoridad,
-						**metadata,
-					},
-				}
-				_, was_created = LegalReferenceSource.objects.update_or_create(
-					hash_contenido=hash_value,
-					defaults=defaults,
+		# Los fragmentos son deterministas: si el total coincide, los lotes ya confirmados no se repiten.
+		progress = dict((upload.metadata or {}).get("progress") or {})
+		start = upload.fragmentos_procesados if upload.total_fragmentos == len(segments) else 0
+		if not start or not progress:
+			start = 0
+			progress = {"created": 0, "updated": 0}
+		upload.total_fragmentos = len(segments)
+		for batch_start in range(start, len(segments), batch_size):
+			batch = segments[batch_start : batch_start + batch_size]
+			chunks = [str(segment.get("content") or "").strip() for segment in batch]
+			vectors = build_hashed_embeddings(chunks)
+			sources = [
+				_build_legal_source(
+					upload,
+					segment,
+					index=batch_start + offset,
+					chunk=chunks[offset],
+					vector=vectors[offset],
+					estatus_vigencia=effective_status,
+					es_vigente=effective_is_current,
 				)
-				if was_created:
-					created += 1
-				else:
-					updated += 1
+				for offset, segment in enumerate(batch)
+			]
+			with transaction.atomic():
+				created = _upsert_legal_sources(sources)
+				progress = {
+					"created": progress["created"] + created,
+					"updated": progress["updated"] + len(sources) - created,
+				}
+				upload.fragmentos_procesados = batch_start + len(batch)
+				upload.metadata = {**(upload.metadata or {}), "progress": progress}
+				upload.save(update_fields=["total_fragmentos", "fragmentos_procesados", "metadata", "updated_at"])
 
-			upload.total_fragmentos = len(segments)
+		total_pages = ((upload.metadata or {}).get("extraction") or {}).get("total_pages")
+		parts = _discard_extraction(upload)
+		with transaction.atomic():
 			upload.fragmentos_procesados = len(segments)
 			upload.estatus = LegalCorpusUpload.ProcessingStatus.COMPLETADO
 			upload.error_detalle = ""
 			upload.processed_at = timezone.now()
 			upload.metadata = {
 				**(upload.metadata or {}),
-				"created": created,
-				"updated": updated,
+				"created": progress["created"],
+				"updated": progress["updated"],
+				"pages": total_pages,
 				"vector_model": HASH_VECTOR_MODEL,
 				"vector_dim": HASH_VECTOR_DIM,
 				"parser": upload.autoridad,
@@ -401,10 +638,96 @@ def process_legal_corpus_upload(
 					"updated_at",
 				]
 			)
-		return {"created": created, "updated": updated, "chunks": len(segments)}
+			# Los demás workers refrescan su índice vectorial con los fragmentos nuevos.
+			alias = upload._state.db or "default"
+			transaction.on_commit(lambda: _invalidate_vector_index(alias))
+		_delete_extraction_parts(parts)
+		return {"created": progress["created"], "updated": progress["updated"], "chunks": len(segments)}
 	except Exception as exc:
 		upload.estatus = LegalCorpusUpload.ProcessingStatus.ERROR
 		upload.error_detalle = str(exc)
 		upload.processed_at = timezone.now()
 		upload.save(update_fields=["estatus", "error_detalle", "processed_at", "updated_at"])
 		raise
+
+
+def legal_corpus_background_enabled() -> bool:
+	return str(getattr(settings, "LEGAL_CORPUS_PROCESSING_MODE", "inline")).lower() == "background"
+
+
+def enqueue_legal_corpus_upload(upload: LegalCorpusUpload, *, resume: bool = False) -> LegalCorpusUpload:
+	"""Deja la carga en la cola que drena ``process_legal_corpus_queue``."""
+
+	if not resume:
+		_reset_processing_progress(upload)
+	upload.estatus = LegalCorpusUpload.ProcessingStatus.PENDIENTE
+	upload.error_detalle = ""
+	upload.encolado_en = timezone.now()
+	upload.intentos = 0
+	upload.save(
+		update_fields=[
+			"estatus",
+			"error_detalle",
+			"encolado_en",
+			"intentos",
+			"fragmentos_procesados",
+			"metadata",
+			"updated_at",
+		]
+	)
+	return upload
+
+
+def claim_next_legal_corpus_upload(
+	*,
+	stale_seconds: int | None = None,
+	max_attempts: int | None = None,
+	exclude_ids: set[int] | None = None,
+) -> LegalCorpusUpload | None:
+	"""Toma la siguiente carga encolada (o abandonada en ``PROCESANDO``) y la marca como propia.
+
+	En PostgreSQL ``SKIP LOCKED`` permite varios workers sin que dos tomen la misma carga.
+	"""
+
+	stale_seconds = stale_seconds or _processing_setting("LEGAL_CORPUS_STALE_SECONDS", 900)
+	max_attempts = max_attempts or _processing_setting("LEGAL_CORPUS_MAX_ATTEMPTS", 3)
+	stale_before = timezone.now() - timedelta(seconds=stale_seconds)
+	with transaction.atomic():
+		queryset = (
+			LegalCorpusUpload.objects.select_for_update(skip_locked=True)
+			.filter(encolado_en__isnull=False, intentos__lt=max_attempts)
+			.filter(
+				Q(
+					estatus__in=[
+						LegalCorpusUpload.ProcessingStatus.PENDIENTE,
+						LegalCorpusUpload.ProcessingStatus.ERROR,
+					]
+				)
+				| Q(estatus=LegalCorpusUpload.ProcessingStatus.PROCESANDO, updated_at__lt=stale_before)
+			)
+			.exclude(pk__in=exclude_ids or ())
+			.order_by("encolado_en", "id")
+		)
+		upload = queryset.first()
+		if upload is None:
+			return None
+		upload.intentos += 1
+		upload.estatus = LegalCorpusUpload.ProcessingStatus.PROCESANDO
+		upload.save(update_fields=["intentos", "estatus", "updated_at"])
+	return upload
+
+
+def run_queued_legal_corpus_upload(upload: LegalCorpusUpload, *, max_attempts: int | None = None) -> dict[str, int]:
+	"""Procesa una carga tomada de la cola reanudando su checkpoint; sale de la cola al terminar o agotar intentos."""
+
+	max_attempts = max_attempts or _processing_setting("LEGAL_CORPUS_MAX_ATTEMPTS", 3)
+	try:
+		result = process_legal_corpus_upload(upload, resume=True)
+	except Exception:
+		if upload.intentos >= max_attempts:
+			upload.encolado_en = None
+			upload.save(update_fields=["encolado_en", "updated_at"])
+		raise
+	upload.encolado_en = None
+	upload.save(update_fields=["encolado_en", "updated_at"])
+	return result
@@ -0,0 +1,273 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from dataclasses import dataclass, replace
+from typing import Any
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .legal_corpus import HASH_VECTOR_DIM
+from .models import LegalReferenceSource
+
+try:  # pragma: no cover - dependency validation
+    import numpy as np  # type: ignore
+except ModuleNotFoundError:  # pragma: no cover
+    np = None
+
+logger = logging.getLogger(__name__)
+
+SHARED_VERSION_CACHE_KEY = "materialidad:legal_vector_index:version:{alias}"
+LOAD_CHUNK_SIZE = 5000
+
+
+@dataclass(frozen=True)
+class LegalVectorIndex:
+    """Matriz ``(n, dim)`` de embeddings normalizados con su mapa de ids y vigencia."""
+
+    ids: Any
+    matrix: Any
+    vigentes: Any
+    dimensions: int
+    watermark: Any = None
+    version: tuple[int, int] = (0, 0)
+    loaded_at: float = 0.0
+
+    @classmethod
+    def empty(cls, dimensions: int = HASH_VECTOR_DIM) -> "LegalVectorIndex":
+        return cls(
+            ids=np.empty(0, dtype=np.int64),
+            matrix=np.empty((0, dimensions), dtype=np.float32),
+            vigentes=np.empty(0, dtype=bool),
+            dimensions=dimensions,
+        )
+
+    def __len__(self) -> int:
+        return int(self.ids.shape[0])
+
+    def top_k(self, query_vector: list[float], *, k: int, only_current: bool = True) -> dict[int, float]:
+        """Regresa ``{id: similitud}`` de los ``k`` fragmentos más cercanos con un solo producto matriz-vector."""
+
+        if not len(self) or k <= 0 or len(query_vector) != self.dimensions:
+            return {}
+        scores = self.matrix @ np.asarray(query_vector, dtype=np.float32)
+        if only_current:
+            scores = np.where(self.vigentes, scores, -np.inf)
+        k = min(k, scores.shape[0])
+        top = np.argpartition(scores, -k)[-k:]
+        top = top[np.argsort(scores[top])[::-1]]
+        return {
+            int(self.ids[position]): float(scores[position])
+            for position in top
+            if scores[position] > 0.0
+        }
+
+    def upsert(self, rows: list[tuple[int, list[float] | None, bool]]) -> "LegalVectorIndex":
+        """Copia del índice con ``rows`` reemplazados o agregados (vectores inválidos quedan en cero)."""
+
+        positions = {int(source_id): position for position, source_id in enumerate(self.ids)}
+        matrix = self.matrix.copy()
+        vigentes = self.vigentes.copy()
+        new_ids: list[int] = []
+        new_vectors: list[list[float]] = []
+        new_vigentes: list[bool] = []
+        for source_id, vector, es_vigente in rows:
+            vector = _coerce_vector(vector, self.dimensions)
+            position = positions.get(source_id)
+            if position is None:
+                new_ids.append(source_id)
+                new_vectors.append(vector)
+                new_vigentes.append(es_vigente)
+            else:
+                matrix[position] = vector
+                vigentes[position] = es_vigente
+        if new_ids:
+            matrix = np.vstack([matrix, np.asarray(new_vectors, dtype=np.float32)])
+            vigentes = np.concatenate([vigentes, np.asarray(new_vigentes, dtype=bool)])
+            ids = np.concatenate([self.ids, np.asarray(new_ids, dtype=np.int64)])
+        else:
+            ids = self.ids
+        return LegalVectorIndex(
+            ids=ids,
+            matrix=matrix,
+            vigentes=vigentes,
+            dimensions=self.dimensions,
+            watermark=self.watermark,
+            version=self.version,
+            loaded_at=self.loaded_at,
+        )
+
+
+def _coerce_vector(vector: Any, dimensions: int) -> list[float]:
+    if isinstance(vector, list) and len(vector) == dimensions:
+        return vector
+    return [0.0] * dimensions
+
+
+_lock = threading.Lock()
+_indexes: dict[str, LegalVectorIndex] = {}
+_local_versions: dict[str, int] = {}
+_stats = {"full_builds": 0, "incremental_refreshes": 0, "queries": 0}
+
+
+def is_enabled() -> bool:
+    return np is not None and bool(getattr(settings, "LEGAL_VECTOR_INDEX_ENABLED", True))
+
+
+def _ttl_seconds() -> int:
+    return int(getattr(settings, "LEGAL_VECTOR_INDEX_TTL_SECONDS", 900))
+
+
+def _current_version(alias: str) -> tuple[int, int]:
+    local = _local_versions.get(alias, 0)
+    try:
+        shared = int(cache.get(SHARED_VERSION_CACHE_KEY.format(alias=alias)) or 0)
+    except Exception:  # pragma: no cover - el cache compartido no debe tirar la consulta
+        logger.warning("No se pudo leer la versión compartida del índice vectorial legal", exc_info=True)
+        shared = -1
+    return local, shared
+
+
+def _iter_row_chunks(alias: str, *, updated_since=None, chunk_size: int = LOAD_CHUNK_SIZE):
+    """Lee ``(id, vector, es_vigente, updated_at)`` en bloques para no materializar todo el corpus en listas."""
+
+    qs = LegalReferenceSource.objects.using(alias)
+    if updated_since is not None:
+        qs = qs.filter(updated_at__gte=updated_since)
+    chunk: list[tuple[int, list[float] | None, bool, Any]] = []
+    for row in qs.values_list("id", "vectorizacion", "es_vigente", "updated_at").iterator(chunk_size=chunk_size):
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _build(alias: str, *, version: tuple[int, int], now: float) -> LegalVectorIndex:
+    dimensions = HASH_VECTOR_DIM
+    ids: list[Any] = []
+    matrices: list[Any] = []
+    vigentes: list[Any] = []
+    watermark = None
+    for chunk in _iter_row_chunks(alias):
+        ids.append(np.fromiter((row[0] for row in chunk), dtype=np.int64, count=len(chunk)))
+        matrices.append(np.asarray([_coerce_vector(row[1], dimensions) for row in chunk], dtype=np.float32))
+        vigentes.append(np.fromiter((row[2] for row in chunk), dtype=bool, count=len(chunk)))
+        chunk_watermark = max(row[3] for row in chunk)
+        watermark = chunk_watermark if watermark is None else max(watermark, chunk_watermark)
+    with _lock:
+        _stats["full_builds"] += 1
+    if not ids:
+        return replace(LegalVectorIndex.empty(dimensions), version=version, loaded_at=now)
+    return LegalVectorIndex(
+        ids=np.concatenate(ids),
+        matrix=np.vstack(matrices),
+        vigentes=np.concatenate(vigentes),
+        dimensions=dimensions,
+        watermark=watermark,
+        version=version,
+        loaded_at=now,
+    )
+
+
+def _refresh(alias: str, current: LegalVectorIndex, *, version: tuple[int, int], now: float) -> LegalVectorIndex:
+    """Agrega o reemplaza sólo los fragmentos escritos desde la última carga.
+
+    Si el total de filas no coincide (hubo borrados) se reconstruye completo.
+    """
+
+    index = current
+    watermark = current.watermark
+    for chunk in _iter_row_chunks(alias, updated_since=current.watermark):
+        index = index.upsert([(source_id, vector, es_vigente) for source_id, vector, es_vigente, _ in chunk])
+        watermark = max(watermark, *(row[3] for row in chunk))
+    if len(index) != LegalReferenceSource.objects.using(alias).count():
+        return _build(alias, version=version, now=now)
+    with _lock:
+        _stats["incremental_refreshes"] += 1
+    return LegalVectorIndex(
+        ids=index.ids,
+        matrix=index.matrix,
+        vigentes=index.vigentes,
+        dimensions=index.dimensions,
+        watermark=watermark,
+        version=version,
+        loaded_at=current.loaded_at,
+    )
+
+
+def get_index(alias: str) -> LegalVectorIndex | None:
+    """Índice vigente del alias (tenant); lo construye o refresca si cambió la versión o venció el TTL."""
+
+    if not is_enabled():
+        return None
+    version = _current_version(alias)
+    now = time.monotonic()
+    current = _indexes.get(alias)
+    if current is not None and version[1] < 0:
+        # Sin cache compartido se conserva el índice local hasta que venza el TTL.
+        version = (version[0], current.version[1])
+    if current is not None and current.version == version:
+        ttl = _ttl_seconds()
+        if ttl <= 0 or (now - current.loaded_at) < ttl:
+            return current
+        current = None
+
+    if current is None or current.watermark is None:
+        index = _build(alias, version=version, now=now)
+    else:
+        index = _refresh(alias, current, version=version, now=now)
+    with _lock:
+        _indexes[alias] = index
+    return index
+
+
+def semantic_candidates(
+    query_vector: list[float],
+    *,
+    alias: str,
+    limit: int,
+    only_current: bool = True,
+) -> dict[int, float]:
+    if not query_vector or not any(query_vector):
+        return {}
+    index = get_index(alias)
+    if index is None:
+        return {}
+    with _lock:
+        _stats["queries"] += 1
+    return index.top_k(query_vector, k=limit, only_current=only_current)
+
+
+def invalidate(alias: str, *, shared: bool = False) -> None:
+    """Marca el índice del alias como desactualizado; ``shared`` avisa también a otros workers."""
+
+    with _lock:
+        _local_versions[alias] = _local_versions.get(alias, 0) + 1
+    if not shared:
+        return
+    key = SHARED_VERSION_CACHE_KEY.format(alias=alias)
+    try:
+        if not cache.add(key, 1, timeout=None):
+            cache.incr(key)
+    except Exception:  # pragma: no cover - best effort
+        logger.warning("No se pudo incrementar la versión compartida del índice vectorial legal", exc_info=True)
+
+
+def get_stats() -> dict[str, Any]:
+    with _lock:
+        return {
+            **_stats,
+            "indexes": {alias: len(index) for alias, index in _indexes.items()},
+        }
+
+
+def reset() -> None:
+    with _lock:
+        _indexes.clear()
+        _local_versions.clear()
+        for key in _stats:
+            _stats[key] = 0
@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Prefetch
+
+from materialidad.models import Operacion, OperacionChecklist
+from materialidad.services import refresh_operacion_riesgo_columns
+from tenancy.context import TenantContext
+from tenancy.models import Tenant
+
+
+class Command(BaseCommand):
+    help = "Calcula y persiste perfil_validacion/riesgo_nivel/riesgo_score de las operaciones por tenant."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--tenant",
+            action="append",
+            dest="tenants",
+            help="Slug del tenant a procesar. Se puede repetir el argumento para varios.",
+        )
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            dest="recalculate_all",
+            help="Recalcula todas las operaciones, no solo las que aún no tienen riesgo persistido.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Operaciones por transacción (default: 500).",
+        )
+
+    def handle(self, *args, **options):
+        tenant_slugs: list[str] | None = options.get("tenants")
+        recalculate_all: bool = options.get("recalculate_all", False)
+        batch_size: int = max(1, options.get("batch_size") or 500)
+
+        queryset = Tenant.objects.using("default").filter(is_active=True)
+        if tenant_slugs:
+            queryset = queryset.filter(slug__in=tenant_slugs)
+            missing = set(tenant_slugs) - set(queryset.values_list("slug", flat=True))
+            if missing:
+                raise CommandError(f"Tenants no encontrados o inactivos: {', '.join(sorted(missing))}")
+
+        if not queryset.exists():
+            raise CommandError("No hay tenants activos para procesar")
+
+        processed = 0
+        errors = 0
+        for tenant in queryset.order_by("slug"):
+            try:
+                TenantContext.activate(tenant.slug)
+                operaciones = Operacion.objects.select_related("proveedor", "contrato").prefetch_related(
+                    "evidencias",
+                    Prefetch(
+                        "checklists_operativos",
+                        queryset=OperacionChecklist.objects.prefetch_related("items"),
+                        to_attr="checklists_operativos_prefetched",
+                    ),
+                )
+                if not recalculate_all:
+                    operaciones = operaciones.filter(perfil_validacion="")
+                refreshed = refresh_operacion_riesgo_columns(
+                    operaciones.order_by("id").iterator(chunk_size=batch_size),
+                    batch_size=batch_size,
+                )
+                processed += 1
+                self.stdout.write(self.style.SUCCESS(f"Riesgo persistido para {tenant.slug}: {refreshed} operaciones"))
+            except Exception as exc:  # pragma: no cover - errores operativos
+                errors += 1
+                self.stderr.write(self.style.ERROR(f"Error en {tenant.slug}: {exc}"))
+            finally:
+                TenantContext.clear()
+
+        summary = f"Backfill de riesgo completado. Tenants: {processed}. Errores: {errors}."
+        color = self.style.SUCCESS if errors == 0 else self.style.WARNING
+        self.stdout.write(color(summary))
@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from materialidad import legal_vector_index
+from materialidad.legal_corpus import HASH_VECTOR_DIM, cosine_similarity
+from materialidad.legal_vector_index import LegalVectorIndex, np
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide la latencia top-k del índice vectorial legal en memoria con embeddings sintéticos "
+        "(no toca la base de datos)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes",
+            type=int,
+            nargs="+",
+            default=[10_000, 100_000, 1_000_000],
+            help="Cantidades de fragmentos sintéticos (default: 10000 100000 1000000).",
+        )
+        parser.add_argument("--k", type=int, default=200, help="Candidatos a recuperar (default: 200).")
+        parser.add_argument("--queries", type=int, default=50, help="Consultas por tamaño (default: 50).")
+        parser.add_argument("--seed", type=int, default=7, help="Semilla para datos reproducibles.")
+
+    def handle(self, *args, **options):
+        if not legal_vector_index.is_enabled():
+            raise CommandError("NumPy no está disponible o LEGAL_VECTOR_INDEX_ENABLED está desactivado")
+
+        k = max(1, options["k"])
+        queries = max(1, options["queries"])
+        rng = np.random.default_rng(options["seed"])
+        query_vectors = [self._normalized(rng.random(HASH_VECTOR_DIM, dtype=np.float32)) for _ in range(queries)]
+
+        self.stdout.write(self._baseline(query_vectors, k=k, seed=options["seed"]))
+        for size in options["sizes"]:
+            index = self._synthetic_index(size, rng)
+            timings = []
+            for vector in query_vectors:
+                started = time.perf_counter()
+                index.top_k(vector, k=k, only_current=True)
+                timings.append((time.perf_counter() - started) * 1000)
+            self.stdout.write(self._line(f"índice NumPy n={size}", timings, index.matrix.nbytes))
+
+    @staticmethod
+    def _normalized(vector) -> list[float]:
+        return (vector / np.linalg.norm(vector)).tolist()
+
+    def _synthetic_index(self, size: int, rng) -> LegalVectorIndex:
+        matrix = rng.random((size, HASH_VECTOR_DIM), dtype=np.float32)
+        matrix /= np.linalg.norm(matrix, axis=1, keepdims=True)
+        return LegalVectorIndex(
+            ids=np.arange(1, size + 1, dtype=np.int64),
+            matrix=matrix,
+            vigentes=rng.random(size) > 0.1,
+            dimensions=HASH_VECTOR_DIM,
+        )
+
+    def _baseline(self, query_vectors: list[list[float]], *, k: int, seed: int) -> str:
+        # Camino anterior: coseno en Python puro sobre los candidatos léxicos (vectores JSON).
+        generator = random.Random(seed)
+        candidates = [[generator.random() for _ in range(HASH_VECTOR_DIM)] for _ in range(k)]
+        timings = []
+        for vector in query_vectors:
+            started = time.perf_counter()
+            sorted((cosine_similarity(vector, candidate) for candidate in candidates), reverse=True)
+            timings.append((time.perf_counter() - started) * 1000)
+        return self._line(f"coseno Python n={k}", timings, None)
+
+    @staticmethod
+    def _line(label: str, timings: list[float], nbytes: int | None) -> str:
+        p50 = statistics.median(timings)
+        p95 = sorted(timings)[max(0, int(len(timings) * 0.95) - 1)]
+        memory = f"{nbytes / 1_048_576:8.1f} MB" if nbytes is not None else " " * 11
+        return f"{label:<28} | p50 {p50:8.2f} ms | p95 {p95:8.2f} ms | {memory}"
@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import router, transaction
+from django.utils import timezone
+
+from materialidad.defense_projection import (
+    bulk_sync_operation_defense_projections,
+    projection_source_queryset,
+    sync_operation_defense_projection,
+)
+from materialidad.models import Empresa, Operacion, Proveedor
+from tenancy.context import TenantContext
+from tenancy.models import Tenant
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide operaciones/segundo al sincronizar OperationDefenseProjection con datos sintéticos. "
+        "Todo se ejecuta dentro de una transacción que se revierte al terminar."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--tenant", required=True, help="Slug del tenant cuya base se usará para la prueba.")
+        parser.add_argument(
+            "--sizes",
+            type=int,
+            nargs="+",
+            default=[1000, 10000, 100000],
+            help="Cantidades de operaciones sintéticas a medir (default: 1000 10000 100000).",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Tamaño de lote para el upsert masivo (default: 500).",
+        )
+        parser.add_argument(
+            "--legacy-max",
+            type=int,
+            default=10000,
+            help="Mide también el camino por operación hasta este tamaño (0 lo desactiva).",
+        )
+
+    def handle(self, *args, **options):
+        tenant_slug: str = options["tenant"]
+        batch_size = max(1, options["batch_size"])
+        legacy_max: int = options["legacy_max"]
+
+        if not Tenant.objects.using("default").filter(slug=tenant_slug, is_active=True).exists():
+            raise CommandError(f"Tenant no encontrado o inactivo: {tenant_slug}")
+
+        TenantContext.activate(tenant_slug)
+        try:
+            for size in options["sizes"]:
+                self._run_size(size, tenant_slug=tenant_slug, batch_size=batch_size, legacy=0 < size <= legacy_max)
+        finally:
+            TenantContext.clear()
+
+    def _run_size(self, size: int, *, tenant_slug: str, batch_size: int, legacy: bool) -> None:
+        alias = router.db_for_write(Operacion)
+        try:
+            with transaction.atomic(using=alias):
+                empresa_id = self._seed(size, batch_size=batch_size)
+                queryset = projection_source_queryset().filter(empresa_id=empresa_id).order_by("id")
+
+                if legacy:
+                    started = time.perf_counter()
+                    for operacion in queryset:
+                        sync_operation_defense_projection(operacion=operacion, tenant_slug=tenant_slug)
+                    self._report(size, "por operación", time.perf_counter() - started)
+
+                started = time.perf_counter()
+                synced = bulk_sync_operation_defense_projections(
+                    queryset.iterator(chunk_size=batch_size),
+                    tenant_slug=tenant_slug,
+                    batch_size=batch_size,
+                )
+                self._report(synced, "upsert masivo", time.perf_counter() - started)
+                raise _Rollback
+        except _Rollback:
+            pass
+
+    def _report(self, count: int, label: str, elapsed: float) -> None:
+        rate = count / elapsed if elapsed > 0 else 0.0
+        self.stdout.write(f"{count:>7} operaciones | {label:<14} | {elapsed:8.2f} s | {rate:10.1f} ops/s")
+
+    def _seed(self, size: int, *, batch_size: int) -> int:
+        suffix = timezone.now().strftime("%H%M%S")
+        empresa = Empresa.objects.create(
+            razon_social="Empresa benchmark FDI",
+            rfc=f"BEN{suffix}AAA"[:13],
+            regimen_fiscal="601",
+            estado="CDMX",
+        )
+        proveedor = Proveedor.objects.create(
+            razon_social="Proveedor benchmark FDI",
+            rfc=f"PBE{suffix}AAA"[:13],
+            riesgo_fiscal=Proveedor.Riesgo.MEDIO,
+            ultima_validacion_sat=timezone.now() - timedelta(days=45),
+        )
+        today = timezone.localdate()
+        tipos = [Operacion.TipoOperacion.SERVICIO, Operacion.TipoOperacion.COMPRA]
+        Operacion.objects.bulk_create(
+            (
+                Operacion(
+                    empresa=empresa,
+                    proveedor=proveedor,
+                    uuid_cfdi=f"bench-{index:030d}",
+                    referencia_spei=f"SPEI-BENCH-{index}" if index % 3 else "",
+                    monto=Decimal("1000.00") + index,
+                    moneda=Operacion.Moneda.MXN,
+                    fecha_operacion=today - timedelta(days=index % 90),
+                    tipo_operacion=tipos[index % len(tipos)],
+                )
+                for index in range(size)
+            ),
+            batch_size=batch_size,
+        )
+        return empresa.id
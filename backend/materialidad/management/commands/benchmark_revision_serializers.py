@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import router, transaction
+from django.db.models import Prefetch
+from django.utils import timezone
+
+from materialidad.defense_projection import projection_source_queryset
+from materialidad.models import (
+    AlertaOperacion,
+    ChecklistItem,
+    CompliancePillar,
+    Empresa,
+    Operacion,
+    OperacionChecklist,
+    OperacionChecklistItem,
+    Proveedor,
+)
+from materialidad.serializers import BandejaRevisionItemSerializer
+from materialidad.services import (
+    evaluate_operacion_materialidad,
+    get_operacion_checklists_resumen,
+    get_operacion_faltantes_expediente,
+    get_operacion_perfil_validacion,
+    get_operacion_riesgo_materialidad,
+)
+from tenancy.context import TenantContext
+from tenancy.models import Tenant
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide el costo por fila de evaluar riesgo y expediente en la bandeja de revisión con datos "
+        "sintéticos. Todo se ejecuta dentro de una transacción que se revierte al terminar."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--tenant", required=True, help="Slug del tenant cuya base se usará para la prueba.")
+        parser.add_argument(
+            "--rows",
+            type=int,
+            default=500,
+            help="Cantidad de operaciones sintéticas a serializar (default: 500).",
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=5,
+            help="Repeticiones por medición; se reporta la mejor (default: 5).",
+        )
+
+    def handle(self, *args, **options):
+        tenant_slug: str = options["tenant"]
+        rows = max(1, options["rows"])
+        repeat = max(1, options["repeat"])
+
+        if not Tenant.objects.using("default").filter(slug=tenant_slug, is_active=True).exists():
+            raise CommandError(f"Tenant no encontrado o inactivo: {tenant_slug}")
+
+        TenantContext.activate(tenant_slug)
+        try:
+            alias = router.db_for_write(Operacion)
+            try:
+                with transaction.atomic(using=alias):
+                    empresa_id = self._seed(rows)
+                    operaciones = list(
+                        projection_source_queryset()
+                        .filter(empresa_id=empresa_id)
+                        .prefetch_related(
+                            Prefetch(
+                                "alertas",
+                                queryset=AlertaOperacion.objects.filter(estatus=AlertaOperacion.Estatus.ACTIVA),
+                                to_attr="alertas_activas_prefetched",
+                            )
+                        )
+                        .order_by("id")
+                    )
+                    self._run(operaciones, repeat=repeat)
+                    raise _Rollback
+            except _Rollback:
+                pass
+        finally:
+            TenantContext.clear()
+
+    def _run(self, operaciones: list[Operacion], *, repeat: int) -> None:
+        self._report(len(operaciones), "por campo", self._best(repeat, lambda: self._legacy_fields(operaciones)))
+        self._report(
+            len(operaciones),
+            "evaluación única",
+            self._best(repeat, lambda: [evaluate_operacion_materialidad(operacion) for operacion in operaciones]),
+        )
+        self._report(
+            len(operaciones),
+            "serializer",
+            self._best(repeat, lambda: BandejaRevisionItemSerializer(operaciones, many=True).data),
+        )
+
+    @staticmethod
+    def _legacy_fields(operaciones: list[Operacion]) -> None:
+        # Reproduce las llamadas que hacían los SerializerMethodField antes del contexto por fila.
+        for operacion in operaciones:
+            get_operacion_perfil_validacion(operacion)
+            for _ in range(3):  # riesgo_nivel, riesgo_score, riesgo_motivos
+                get_operacion_riesgo_materialidad(operacion)
+            get_operacion_faltantes_expediente(operacion)
+            get_operacion_checklists_resumen(operacion)
+
+    @staticmethod
+    def _best(repeat: int, func) -> float:
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - started)
+        return min(timings)
+
+    def _report(self, count: int, label: str, elapsed: float) -> None:
+        per_row_us = elapsed / count * 1_000_000 if count else 0.0
+        self.stdout.write(f"{count:>6} filas | {label:<16} | {elapsed * 1000:9.1f} ms | {per_row_us:9.1f} µs/fila")
+
+    def _seed(self, size: int) -> int:
+        suffix = timezone.now().strftime("%H%M%S")
+        empresa = Empresa.objects.create(
+            razon_social="Empresa benchmark bandeja",
+            rfc=f"BBR{suffix}AAA"[:13],
+            regimen_fiscal="601",
+            estado="CDMX",
+        )
+        proveedor = Proveedor.objects.create(
+            razon_social="Proveedor benchmark bandeja",
+            rfc=f"PBR{suffix}AAA"[:13],
+            riesgo_fiscal=Proveedor.Riesgo.MEDIO,
+        )
+        today = timezone.localdate()
+        operaciones = Operacion.objects.bulk_create(
+            Operacion(
+                empresa=empresa,
+                proveedor=proveedor,
+                uuid_cfdi=f"bench-bandeja-{index:023d}" if index % 2 else "",
+                referencia_spei=f"SPEI-BANDEJA-{index}" if index % 3 else "",
+                monto=Decimal("1000.00") + index,
+                moneda=Operacion.Moneda.MXN,
+                fecha_operacion=today - timedelta(days=index % 90),
+                tipo_operacion=Operacion.TipoOperacion.SERVICIO,
+            )
+            for index in range(size)
+        )
+        checklists = OperacionChecklist.objects.bulk_create(
+            OperacionChecklist(operacion=operacion, nombre="Checklist benchmark", tipo_gasto="Servicios")
+            for operacion in operaciones
+        )
+        OperacionChecklistItem.objects.bulk_create(
+            OperacionChecklistItem(
+                operacion_checklist=checklist,
+                pillar=CompliancePillar.ENTREGABLES,
+                titulo=f"Entregable {item}",
+                requerido=True,
+                estado=ChecklistItem.Estado.COMPLETO if item % 2 else ChecklistItem.Estado.PENDIENTE,
+            )
+            for checklist in checklists
+            for item in range(4)
+        )
+        return empresa.id
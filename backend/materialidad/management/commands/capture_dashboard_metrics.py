@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from django.core.management.base import BaseCommand, CommandError
 
-from materialidad.services import persist_dashboard_snapshot
+from materialidad.services import persist_dashboard_snapshot, refresh_dashboard_metrics_projection
 from tenancy.context import TenantContext
 from tenancy.models import Tenant
 
@@ -37,6 +37,7 @@ class Command(BaseCommand):
             try:
                 TenantContext.activate(tenant.slug)
                 snapshot = persist_dashboard_snapshot(tenant.slug)
+                refresh_dashboard_metrics_projection(tenant.slug)
                 processed += 1
                 self.stdout.write(
                     self.style.SUCCESS(
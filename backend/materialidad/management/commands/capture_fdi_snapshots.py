@@ -40,12 +40,19 @@ class Command(BaseCommand):
             dest="refresh_projections",
             help="Sincroniza OperationDefenseProjection antes de capturar el snapshot FDI.",
         )
+        parser.add_argument(
+            "--skip-legacy-comparison",
+            action="store_true",
+            dest="skip_legacy_comparison",
+            help="No ejecuta el comparador FDI legacy en modo sombra para este snapshot.",
+        )
 
     def handle(self, *args, **options):
         tenant_slugs: list[str] | None = options.get("tenants")
         days: int = options.get("days", 90)
         empresa_id: int | None = options.get("empresa")
         refresh_projections: bool = options.get("refresh_projections", False)
+        legacy_comparison: bool = not options.get("skip_legacy_comparison", False)
 
         queryset = Tenant.objects.using("default").filter(is_active=True)
         if tenant_slugs:
@@ -71,19 +78,23 @@ class Command(BaseCommand):
             try:
                 TenantContext.activate(tenant.slug)
                 if refresh_projections:
-                    refreshed = sync_operation_defense_projections_for_window(
+                    refreshed_count = sync_operation_defense_projections_for_window(
                         days=days,
                         empresa_id=empresa_id,
                         tenant_slug=tenant.slug,
                     )
-                    refreshed_count = len(refreshed)
                     projections_synced = refreshed_count
                     self.stdout.write(
                         self.style.NOTICE(
                             f"Proyecciones FDI sincronizadas para {tenant.slug}: {refreshed_count} operaciones"
                         )
                     )
-                snapshot = persist_fdi_snapshot(days=days, empresa_id=empresa_id, source="command")
+                snapshot = persist_fdi_snapshot(
+                    days=days,
+                    empresa_id=empresa_id,
+                    source="command",
+                    legacy_comparison=legacy_comparison,
+                )
                 snapshots_created = 1
                 processed += 1
                 self.stdout.write(
@@ -109,7 +120,10 @@ class Command(BaseCommand):
                         snapshots_created=snapshots_created,
                         snapshot=snapshot,
                         error_message=error_message[:4000],
-                        metadata_json={"processed": status_value == FDIJobRun.Status.SUCCESS},
+                        metadata_json={
+                            "processed": status_value == FDIJobRun.Status.SUCCESS,
+                            "legacy_comparison": getattr(snapshot, "legacy_comparison_json", None) or None,
+                        },
                         started_at=started_at,
                         finished_at=timezone.now(),
                         duration_ms=max(int((time.perf_counter() - started_clock) * 1000), 0),
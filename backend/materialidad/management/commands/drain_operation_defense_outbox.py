@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from materialidad.defense_projection import drain_operation_defense_outbox
+from materialidad.models import FDIJobRun
+from tenancy.context import TenantContext
+from tenancy.models import Tenant
+
+
+class Command(BaseCommand):
+    help = "Recalcula solo las OperationDefenseProjection marcadas en el outbox de cambios."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--tenant",
+            action="append",
+            dest="tenants",
+            help="Slug del tenant a procesar. Se puede repetir el argumento para varios.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Marcas del outbox procesadas por lote (default: 500).",
+        )
+
+    def handle(self, *args, **options):
+        tenant_slugs: list[str] | None = options.get("tenants")
+        batch_size: int = max(1, options.get("batch_size") or 500)
+
+        queryset = Tenant.objects.using("default").filter(is_active=True)
+        if tenant_slugs:
+            queryset = queryset.filter(slug__in=tenant_slugs)
+            missing = set(tenant_slugs) - set(queryset.values_list("slug", flat=True))
+            if missing:
+                raise CommandError(f"Tenants no encontrados o inactivos: {', '.join(sorted(missing))}")
+
+        if not queryset.exists():
+            raise CommandError("No hay tenants activos para procesar")
+
+        processed = 0
+        errors = 0
+        for tenant in queryset.order_by("slug"):
+            started_at = timezone.now()
+            started_clock = time.perf_counter()
+            result = {"marks_processed": 0, "operations_synced": 0}
+            status_value = FDIJobRun.Status.SUCCESS
+            error_message = ""
+            try:
+                TenantContext.activate(tenant.slug)
+                result = drain_operation_defense_outbox(tenant_slug=tenant.slug, batch_size=batch_size)
+                processed += 1
+                self.stdout.write(
+                    self.style.SUCCESS(
+                        f"Outbox drenado para {tenant.slug}: {result['marks_processed']} marcas, "
+                        f"{result['operations_synced']} operaciones sincronizadas"
+                    )
+                )
+            except Exception as exc:  # pragma: no cover - errores operativos
+                status_value = FDIJobRun.Status.FAILURE
+                error_message = str(exc)
+                errors += 1
+                self.stderr.write(self.style.ERROR(f"Error en {tenant.slug}: {exc}"))
+            finally:
+                try:
+                    FDIJobRun.objects.create(
+                        tenant_slug=tenant.slug,
+                        command=FDIJobRun.Command.DRAIN_PROJECTION_OUTBOX,
+                        status=status_value,
+                        refresh_projections=True,
+                        projections_synced=result["operations_synced"],
+                        snapshots_created=0,
+                        error_message=error_message[:4000],
+                        metadata_json={
+                            "processed": status_value == FDIJobRun.Status.SUCCESS,
+                            "marks_processed": result["marks_processed"],
+                            "batch_size": batch_size,
+                        },
+                        started_at=started_at,
+                        finished_at=timezone.now(),
+                        duration_ms=max(int((time.perf_counter() - started_clock) * 1000), 0),
+                    )
+                finally:
+                    TenantContext.clear()
+
+        summary = f"Drenado del outbox completado. Tenants: {processed}. Errores: {errors}."
+        color = self.style.SUCCESS if errors == 0 else self.style.WARNING
+        self.stdout.write(color(summary))
@@ -10,13 +10,9 @@ from django.db import transaction
 from django.utils import timezone
 from django.utils.text import slugify
 
-from materialidad.legal_corpus import HASH_VECTOR_MODEL, build_hashed_embedding
+from materialidad.legal_corpus import HASH_VECTOR_MODEL, build_hashed_embeddings
 from materialidad.models import LegalReferenceSource
-
-try:  # pragma: no cover - dependency validation
-    from pypdf import PdfReader  # type: ignore
-except ModuleNotFoundError:  # pragma: no cover
-    PdfReader = None
+from materialidad.pdf_text import PdfReader, PdfSource, extract_pdf_text
 
 try:  # pragma: no cover - dependency validation
     from docx import Document  # type: ignore
@@ -169,11 +165,12 @@ class Command(BaseCommand):
             if max_chunks is not None:
                 chunks = chunks[:max_chunks]
 
+            vectors = build_hashed_embeddings(chunks)
             for index, chunk in enumerate(chunks):
                 slug = self._build_slug(law_name, source_path, index)
                 resumen = self._summarize(chunk)
                 hash_value = self._hash_chunk(law_name, source_path, index, chunk)
-                vector = build_hashed_embedding(chunk)
+                vector = vectors[index]
                 defaults = {
                     "ley": law_name,
                     "ordenamiento": law_name,
@@ -256,15 +253,10 @@ class Command(BaseCommand):
 
     def _extract_pdf_text(self, pdf_path: Path) -> str:
         try:
-            reader = PdfReader(str(pdf_path))
+            full_text = extract_pdf_text(PdfSource.from_path(pdf_path))
         except Exception as exc:  # pragma: no cover - PDF parsing errors
             raise CommandError(f"No se pudo leer {pdf_path.name}: {exc}") from exc
 
-        pages: list[str] = []
-        for page in reader.pages:
-            text = page.extract_text() or ""
-            pages.append(text)
-        full_text = "\n".join(pages)
         if not full_text.strip():
             raise CommandError(f"El PDF {pdf_path.name} no contiene texto extraíble")
         return full_text
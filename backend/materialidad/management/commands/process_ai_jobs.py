@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from materialidad.ai_jobs import claim_next_ai_job, run_ai_job
+
+
+class Command(BaseCommand):
+    help = (
+        "Atiende las tareas de IA encoladas (asincrono=true o AI_JOBS_MODE=background): "
+        "generación de contratos, consultas legales, narrativa FDI y extracción de CSF."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--limit",
+            type=int,
+            default=20,
+            help="Máximo de tareas a procesar por pasada (default: 20).",
+        )
+        parser.add_argument(
+            "--stale-seconds",
+            type=int,
+            default=None,
+            help="Segundos tras los cuales una tarea en PROCESANDO se retoma (default: AI_JOBS_STALE_SECONDS).",
+        )
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="No terminar: al vaciar la cola espera --sleep segundos y vuelve a revisar.",
+        )
+        parser.add_argument(
+            "--sleep",
+            type=float,
+            default=2.0,
+            help="Pausa entre revisiones de la cola en modo --loop (default: 2).",
+        )
+
+    def handle(self, *args, **options):
+        limit: int = max(1, options.get("limit") or 20)
+        stale_seconds: int | None = options.get("stale_seconds")
+        sleep_seconds = max(0.1, float(options.get("sleep") or 2.0))
+
+        while True:
+            processed, errors = self._drain(limit=limit, stale_seconds=stale_seconds)
+            if not options.get("loop"):
+                summary = f"Cola de tareas de IA drenada. Procesadas: {processed}. Errores: {errors}."
+                color = self.style.SUCCESS if errors == 0 else self.style.WARNING
+                self.stdout.write(color(summary))
+                return
+            if processed + errors < limit:
+                close_old_connections()
+                time.sleep(sleep_seconds)
+
+    def _drain(self, *, limit: int, stale_seconds: int | None) -> tuple[int, int]:
+        processed = 0
+        errors = 0
+        seen: set[int] = set()
+        while processed + errors < limit:
+            job = claim_next_ai_job(stale_seconds=stale_seconds, exclude_ids=seen)
+            if job is None:
+                break
+            seen.add(job.pk)
+            started_clock = time.perf_counter()
+            try:
+                run_ai_job(job)
+                processed += 1
+                self.stdout.write(
+                    f"Tarea {job.pk} ({job.tipo}, tenant {job.tenant_slug}) -> {job.estatus} "
+                    f"[{job.codigo_respuesta}] en {int((time.perf_counter() - started_clock) * 1000)} ms"
+                )
+            except Exception as exc:  # pragma: no cover - errores operativos
+                errors += 1
+                self.stderr.write(
+                    self.style.ERROR(
+                        f"Error en la tarea {job.pk} ({job.tipo}, tenant {job.tenant_slug}, "
+                        f"intento {job.intentos}): {exc}"
+                    )
+                )
+        return processed, errors
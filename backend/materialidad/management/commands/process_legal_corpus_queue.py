@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from materialidad.legal_corpus import claim_next_legal_corpus_upload, run_queued_legal_corpus_upload
+
+
+class Command(BaseCommand):
+    help = (
+        "Procesa los corpus legales encolados (LEGAL_CORPUS_PROCESSING_MODE=background) "
+        "y reanuda los que quedaron a medias."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--limit",
+            type=int,
+            default=5,
+            help="Máximo de cargas a procesar en esta ejecución (default: 5).",
+        )
+        parser.add_argument(
+            "--stale-seconds",
+            type=int,
+            default=None,
+            help="Segundos sin avance tras los cuales una carga en PROCESANDO se retoma "
+            "(default: LEGAL_CORPUS_STALE_SECONDS).",
+        )
+
+    def handle(self, *args, **options):
+        limit: int = max(1, options.get("limit") or 5)
+        stale_seconds: int | None = options.get("stale_seconds")
+
+        processed = 0
+        errors = 0
+        seen: set[int] = set()
+        while processed + errors < limit:
+            upload = claim_next_legal_corpus_upload(stale_seconds=stale_seconds, exclude_ids=seen)
+            if upload is None:
+                break
+            seen.add(upload.pk)
+            started_clock = time.perf_counter()
+            try:
+                result = run_queued_legal_corpus_upload(upload)
+                processed += 1
+                self.stdout.write(
+                    self.style.SUCCESS(
+                        f"Corpus {upload.slug} procesado (intento {upload.intentos}): "
+                        f"{result['chunks']} fragmentos, {result['created']} nuevos, "
+                        f"{result['updated']} actualizados en "
+                        f"{int((time.perf_counter() - started_clock) * 1000)} ms"
+                    )
+                )
+            except Exception as exc:  # pragma: no cover - errores operativos
+                errors += 1
+                self.stderr.write(
+                    self.style.ERROR(
+                        f"Error en corpus {upload.slug} (intento {upload.intentos}, "
+                        f"{upload.fragmentos_procesados}/{upload.total_fragmentos} fragmentos): {exc}"
+                    )
+                )
+
+        summary = f"Cola de corpus legales drenada. Procesados: {processed}. Errores: {errors}."
+        color = self.style.SUCCESS if errors == 0 else self.style.WARNING
+        self.stdout.write(color(summary))
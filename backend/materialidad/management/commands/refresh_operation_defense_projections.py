@@ -60,12 +60,11 @@ class Command(BaseCommand):
             error_message = ""
             try:
                 TenantContext.activate(tenant.slug)
-                refreshed = sync_operation_defense_projections_for_window(
+                refreshed_count = sync_operation_defense_projections_for_window(
                     days=days,
                     empresa_id=empresa_id,
                     tenant_slug=tenant.slug,
                 )
-                refreshed_count = len(refreshed)
                 processed += 1
                 self.stdout.write(
                     self.style.SUCCESS(
@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+import json
+
+from django.core.management.base import BaseCommand
+
+from materialidad.ai import response_cache
+
+
+class Command(BaseCommand):
+    help = "Reporta aciertos y fallos del cache de respuestas IA por funcionalidad (todos los workers)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--feature",
+            action="append",
+            dest="features",
+            default=None,
+            help="Funcionalidad a reportar; se puede repetir (default: todas las conocidas).",
+        )
+        parser.add_argument("--format", choices=["json", "text"], default="text")
+
+    def handle(self, *args, **options):
+        report = response_cache.get_shared_stats(options.get("features"))
+
+        if options["format"] == "json":
+            self.stdout.write(json.dumps(report, indent=2, sort_keys=True))
+            return
+
+        for feature, stats in report.items():
+            self.stdout.write(
+                f"- {feature}: hit_ratio={stats['hit_ratio']:.2%} "
+                f"hits={stats['hits']} misses={stats['misses']} bypassed={stats['bypassed']} "
+                f"ttl={response_cache.feature_ttl(feature)}s"
+            )
@@ -0,0 +1,27 @@
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('materialidad', '0060_alter_fdijobrun_command'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DashboardMetricsProjection',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tenant_slug', models.SlugField(max_length=255, unique=True)),
+                ('payload', models.JSONField(blank=True, default=dict)),
+                ('duration_ms', models.PositiveIntegerField(default=0)),
+                ('refreshed_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'verbose_name': 'Dashboard metrics projection',
+                'verbose_name_plural': 'Dashboard metrics projections',
+                'db_table': 'materialidad_dashboard_metrics_projection',
+            },
+        ),
+    ]
@@ -0,0 +1,38 @@
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('materialidad', '0061_dashboard_metrics_projection'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='fdijobrun',
+            name='command',
+            field=models.CharField(choices=[('capture_fdi_snapshots', 'Capture FDI Snapshots'), ('refresh_operation_defense_projections', 'Refresh Operation Defense Projections'), ('backfill_fdi_formula_version', 'Backfill FDI Formula Version'), ('drain_operation_defense_outbox', 'Drain Operation Defense Outbox')], max_length=64),
+        ),
+        migrations.CreateModel(
+            name='OperationDefenseProjectionOutbox',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tenant_slug', models.SlugField(max_length=255)),
+                ('source', models.CharField(choices=[('operacion', 'Operación'), ('contrato', 'Contrato'), ('proveedor', 'Proveedor')], max_length=16)),
+                ('source_id', models.PositiveBigIntegerField()),
+                ('marked_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'verbose_name': 'Operation defense outbox',
+                'verbose_name_plural': 'Operation defense outbox',
+                'db_table': 'materialidad_operation_defense_outbox',
+                'ordering': ('marked_at', 'id'),
+                'indexes': [models.Index(fields=['marked_at'], name='op_defense_outbox_marked_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='operationdefenseprojectionoutbox',
+            constraint=models.UniqueConstraint(fields=('source', 'source_id'), name='op_defense_outbox_source_uniq'),
+        ),
+    ]
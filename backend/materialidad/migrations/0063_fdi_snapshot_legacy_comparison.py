@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('materialidad', '0062_operation_defense_outbox'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='fiscaldefenseindexsnapshot',
+            name='legacy_comparison_json',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
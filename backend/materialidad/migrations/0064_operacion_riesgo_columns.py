@@ -0,0 +1,34 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('materialidad', '0063_fdi_snapshot_legacy_comparison'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='operacion',
+            name='perfil_validacion',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=32),
+        ),
+        migrations.AddField(
+            model_name='operacion',
+            name='riesgo_nivel',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=8),
+        ),
+        migrations.AddField(
+            model_name='operacion',
+            name='riesgo_score',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='operacion',
+            index=models.Index(fields=['-riesgo_score', 'fecha_operacion', 'id'], name='operacion_riesgo_orden_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='operacion',
+            index=models.Index(fields=['fecha_operacion', '-riesgo_score', 'id'], name='operacion_antiguedad_idx'),
+        ),
+    ]
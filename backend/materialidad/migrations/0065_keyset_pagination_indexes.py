@@ -0,0 +1,19 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('materialidad', '0064_operacion_riesgo_columns'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='alertaoperacion',
+            index=models.Index(fields=['fecha_alerta', 'id'], name='alerta_op_fecha_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='movimientobancario',
+            index=models.Index(fields=['fecha', 'id'], name='mov_fecha_id_idx'),
+        ),
+    ]
@@ -0,0 +1,59 @@
+from django.db import migrations
+
+TABLE = "materialidad_legal_reference_source"
+
+
+def add_fulltext_search(apps, schema_editor):
+    # LegalReferenceSource es un modelo compartido: su tabla sólo existe en la base de control.
+    if schema_editor.connection.alias != "default" or schema_editor.connection.vendor != 'postgresql':
+        return
+    # Columna generada: se mantiene sincronizada sin señales ni triggers.
+    schema_editor.execute(f"""
+        ALTER TABLE {TABLE}
+        ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS (
+            setweight(to_tsvector('spanish'::regconfig, coalesce(articulo, '')), 'A')
+            || setweight(to_tsvector('spanish'::regconfig, coalesce(resumen, '')), 'A')
+            || setweight(to_tsvector('spanish'::regconfig, coalesce(contenido, '')), 'B')
+            || setweight(to_tsvector('spanish'::regconfig, coalesce(fraccion, '') || ' ' || coalesce(parrafo, '')), 'C')
+        ) STORED
+    """)
+    schema_editor.execute(
+        f"CREATE INDEX IF NOT EXISTS legal_src_search_gin_idx ON {TABLE} USING gin (search_vector)"
+    )
+    schema_editor.execute(f"""
+        DO $$
+        BEGIN
+            BEGIN
+                CREATE EXTENSION IF NOT EXISTS pg_trgm;
+            EXCEPTION WHEN insufficient_privilege THEN
+                RAISE NOTICE 'pg_trgm no disponible; se omite el índice trigram de articulo';
+            END;
+            IF EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm') THEN
+                CREATE INDEX IF NOT EXISTS legal_src_articulo_trgm_idx
+                ON {TABLE} USING gin (articulo gin_trgm_ops);
+            END IF;
+        END$$;
+    """)
+
+
+def drop_fulltext_search(apps, schema_editor):
+    if schema_editor.connection.alias != "default" or schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute("DROP INDEX IF EXISTS legal_src_articulo_trgm_idx")
+    schema_editor.execute("DROP INDEX IF EXISTS legal_src_search_gin_idx")
+    schema_editor.execute(f"ALTER TABLE {TABLE} DROP COLUMN IF EXISTS search_vector")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('materialidad', '0065_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            add_fulltext_search,
+            reverse_code=drop_fulltext_search,
+            hints={"model_name": "legalreferencesource"},
+        ),
+    ]
@@ -0,0 +1,25 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('materialidad', '0066_legal_reference_fulltext'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='legalcorpusupload',
+            name='encolado_en',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='legalcorpusupload',
+            name='intentos',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='legalcorpusupload',
+            index=models.Index(fields=['encolado_en'], name='legal_corpus_cola_idx'),
+        ),
+    ]
@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('materialidad', '0067_legal_corpus_queue'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='legalconsultation',
+            name='prompt_bytes',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
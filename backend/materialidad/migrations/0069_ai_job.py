@@ -0,0 +1,42 @@
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('materialidad', '0068_legal_consultation_prompt_bytes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AIJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tenant_slug', models.SlugField(max_length=255)),
+                ('tipo', models.CharField(choices=[('CONTRATO', 'Generación de contrato'), ('CONSULTA_LEGAL', 'Consulta legal'), ('NARRATIVA_FDI', 'Narrativa FDI'), ('CSF', 'Extracción de CSF')], max_length=32)),
+                ('estatus', models.CharField(choices=[('PENDIENTE', 'Pendiente'), ('PROCESANDO', 'Procesando'), ('COMPLETADO', 'Completado'), ('ERROR', 'Error')], default='PENDIENTE', max_length=16)),
+                ('parametros', models.JSONField(blank=True, default=dict)),
+                ('archivo', models.FileField(blank=True, upload_to='ai_jobs/%Y/%m/')),
+                ('resultado', models.JSONField(blank=True, null=True)),
+                ('codigo_respuesta', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('error_detalle', models.TextField(blank=True)),
+                ('encolado_en', models.DateTimeField(blank=True, null=True)),
+                ('intentos', models.PositiveSmallIntegerField(default=0)),
+                ('iniciado_en', models.DateTimeField(blank=True, null=True)),
+                ('finalizado_en', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='ai_jobs', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Tarea de IA',
+                'verbose_name_plural': 'Tareas de IA',
+                'db_table': 'materialidad_ai_job',
+                'ordering': ('-created_at',),
+                'indexes': [models.Index(fields=['encolado_en'], name='ai_job_cola_idx'), models.Index(fields=['tenant_slug', 'created_at'], name='ai_job_tenant_idx')],
+            },
+        ),
+    ]
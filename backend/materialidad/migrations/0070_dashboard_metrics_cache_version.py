@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('materialidad', '0069_ai_job'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dashboardmetricsprojection',
+            name='cache_version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -539,6 +539,11 @@ class Operacion(models.Model):
     )
     creado_por_usuario_id = models.BigIntegerField(null=True, blank=True)
     creado_por_email = models.EmailField(blank=True)
+    # Copia indexable de metadata["riesgo_materialidad"]; la mantiene sync_operacion_materialidad.
+    # perfil_validacion vacío indica que la operación aún no se ha evaluado.
+    perfil_validacion = models.CharField(max_length=32, blank=True, default="", db_index=True)
+    riesgo_nivel = models.CharField(max_length=8, blank=True, default="", db_index=True)
+    riesgo_score = models.PositiveSmallIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -551,6 +556,8 @@ class Operacion(models.Model):
             models.Index(fields=["fecha_operacion"]),
             models.Index(fields=["contrato"]),
             models.Index(fields=["cfdi_estatus", "spei_estatus"]),
+            models.Index(fields=["-riesgo_score", "fecha_operacion", "id"], name="operacion_riesgo_orden_idx"),
+            models.Index(fields=["fecha_operacion", "-riesgo_score", "id"], name="operacion_antiguedad_idx"),
         ]
 
     def __str__(self) -> str:
@@ -636,6 +643,7 @@ class MovimientoBancario(models.Model):
         indexes = [
             models.Index(fields=["cuenta", "fecha"], name="mov_cuenta_fecha_idx"),
             models.Index(fields=["spei_referencia"], name="mov_spei_ref_idx"),
+            models.Index(fields=["fecha", "id"], name="mov_fecha_id_idx"),
         ]
 
     def __str__(self) -> str:
@@ -726,6 +734,8 @@ class LegalCorpusUpload(models.Model):
     total_fragmentos = models.PositiveIntegerField(default=0)
     fragmentos_procesados = models.PositiveIntegerField(default=0)
     error_detalle = models.TextField(blank=True)
+    encolado_en = models.DateTimeField(null=True, blank=True)
+    intentos = models.PositiveSmallIntegerField(default=0)
     uploaded_by = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.SET_NULL,
@@ -747,6 +757,7 @@ class LegalCorpusUpload(models.Model):
             models.Index(fields=["autoridad", "ordenamiento"]),
             models.Index(fields=["estatus", "created_at"]),
             models.Index(fields=["es_vigente", "fecha_ultima_revision"]),
+            models.Index(fields=["encolado_en"], name="legal_corpus_cola_idx"),
         ]
 
     def __str__(self) -> str:
@@ -928,6 +939,26 @@ class DashboardSnapshot(models.Model):
         return f"Snapshot {self.tenant_slug} @ {self.captured_at:%Y-%m-%d %H:%M}"
 
 
+class DashboardMetricsProjection(models.Model):
+    """Fila materializada por tenant con el payload de ``get_dashboard_metrics``."""
+
+    tenant_slug = models.SlugField(max_length=255, unique=True)
+    payload = models.JSONField(default=dict, blank=True)
+    duration_ms = models.PositiveIntegerField(default=0)
+    refreshed_at = models.DateTimeField(default=timezone.now)
+    # Versión del cache de dashboard del tenant al calcular la fila; si otra escritura la
+    # incrementó, la fila ya no está vigente aunque no haya expirado.
+    cache_version = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        db_table = "materialidad_dashboard_metrics_projection"
+        verbose_name = "Dashboard metrics projection"
+        verbose_name_plural = "Dashboard metrics projections"
+
+    def __str__(self) -> str:
+        return f"Métricas {self.tenant_slug} @ {self.refreshed_at:%Y-%m-%d %H:%M}"
+
+
 class AuditMaterialityDossier(models.Model):
     empresa = models.ForeignKey(
         Empresa,
@@ -1017,6 +1048,7 @@ class FiscalDefenseIndexSnapshot(models.Model):
     correlation_id = models.UUIDField(null=True, blank=True, db_index=True)
     inputs_json = models.JSONField(default=dict, blank=True)
     actions_json = models.JSONField(default=list, blank=True)
+    legacy_comparison_json = models.JSONField(default=dict, blank=True)
     source = models.CharField(max_length=32, default="scheduled")
     captured_at = models.DateTimeField(auto_now_add=True)
 
@@ -1085,6 +1117,7 @@ class FDIJobRun(models.Model):
         CAPTURE_SNAPSHOTS = "capture_fdi_snapshots", "Capture FDI Snapshots"
         REFRESH_PROJECTIONS = "refresh_operation_defense_projections", "Refresh Operation Defense Projections"
         BACKFILL_FORMULA_VERSION = "backfill_fdi_formula_version", "Backfill FDI Formula Version"
+        DRAIN_PROJECTION_OUTBOX = "drain_operation_defense_outbox", "Drain Operation Defense Outbox"
 
     class Status(models.TextChoices):
         SUCCESS = "success", "Success"
@@ -1181,6 +1214,36 @@ class OperationDefenseProjection(models.Model):
         return f"Projection op {self.operacion_id} {self.score_base} ({self.formula_version})"
 
 
+
+class OperationDefenseProjectionOutbox(models.Model):
+    """Marca pendiente de propagar a las proyecciones de las operaciones afectadas."""
+
+    class Source(models.TextChoices):
+        OPERACION = "operacion", "Operación"
+        CONTRATO = "contrato", "Contrato"
+        PROVEEDOR = "proveedor", "Proveedor"
+
+    tenant_slug = models.SlugField(max_length=255, db_index=True)
+    source = models.CharField(max_length=16, choices=Source.choices)
+    source_id = models.PositiveBigIntegerField()
+    marked_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        db_table = "materialidad_operation_defense_outbox"
+        verbose_name = "Operation defense outbox"
+        verbose_name_plural = "Operation defense outbox"
+        ordering = ("marked_at", "id")
+        constraints = [
+            models.UniqueConstraint(fields=("source", "source_id"), name="op_defense_outbox_source_uniq"),
+        ]
+        indexes = [
+            models.Index(fields=("marked_at",), name="op_defense_outbox_marked_idx"),
+        ]
+
+    def __str__(self) -> str:
+        return f"Outbox {self.source}:{self.source_id} @ {self.marked_at:%Y-%m-%d %H:%M}"
+
+
 class LegalConsultation(models.Model):
     tenant_slug = models.SlugField(max_length=255, db_index=True)
     user = models.ForeignKey(
@@ -1195,6 +1258,7 @@ class LegalConsultation(models.Model):
     answer = models.TextField(blank=True)
     references = models.JSONField(default=list, blank=True)
     ai_model = models.CharField(max_length=128, blank=True)
+    prompt_bytes = models.PositiveIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
@@ -1210,6 +1274,57 @@ class LegalConsultation(models.Model):
         return f"Consulta {self.tenant_slug} #{self.pk}"
 
 
+class AIJob(models.Model):
+    """Petición de IA diferida: la atiende ``process_ai_jobs`` fuera del worker HTTP."""
+
+    class Kind(models.TextChoices):
+        CONTRATO = "CONTRATO", "Generación de contrato"
+        CONSULTA_LEGAL = "CONSULTA_LEGAL", "Consulta legal"
+        NARRATIVA_FDI = "NARRATIVA_FDI", "Narrativa FDI"
+        CSF = "CSF", "Extracción de CSF"
+
+    class Status(models.TextChoices):
+        PENDIENTE = "PENDIENTE", "Pendiente"
+        PROCESANDO = "PROCESANDO", "Procesando"
+        COMPLETADO = "COMPLETADO", "Completado"
+        ERROR = "ERROR", "Error"
+
+    tenant_slug = models.SlugField(max_length=255, db_index=True)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        related_name="ai_jobs",
+        null=True,
+        blank=True,
+    )
+    tipo = models.CharField(max_length=32, choices=Kind.choices)
+    estatus = models.CharField(max_length=16, choices=Status.choices, default=Status.PENDIENTE)
+    parametros = models.JSONField(default=dict, blank=True)
+    archivo = models.FileField(upload_to="ai_jobs/%Y/%m/", blank=True)
+    resultado = models.JSONField(null=True, blank=True)
+    codigo_respuesta = models.PositiveSmallIntegerField(null=True, blank=True)
+    error_detalle = models.TextField(blank=True)
+    encolado_en = models.DateTimeField(null=True, blank=True)
+    intentos = models.PositiveSmallIntegerField(default=0)
+    iniciado_en = models.DateTimeField(null=True, blank=True)
+    finalizado_en = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = "materialidad_ai_job"
+        verbose_name = "Tarea de IA"
+        verbose_name_plural = "Tareas de IA"
+        ordering = ("-created_at",)
+        indexes = [
+            models.Index(fields=["encolado_en"], name="ai_job_cola_idx"),
+            models.Index(fields=["tenant_slug", "created_at"], name="ai_job_tenant_idx"),
+        ]
+
+    def __str__(self) -> str:  # pragma: no cover - representación
+        return f"{self.get_tipo_display()} {self.tenant_slug} #{self.pk}"
+
+
 class CompliancePillar(models.TextChoices):
     ENTREGABLES = "ENTREGABLES", "Entregables"
     RAZON_NEGOCIO = "RAZON_NEGOCIO", "Razón de negocio"
@@ -1771,6 +1886,7 @@ class AlertaOperacion(models.Model):
             models.Index(fields=["proveedor", "estatus"], name="alerta_op_prv_est_idx"),
             models.Index(fields=["tipo_alerta", "estatus"], name="alerta_op_tipo_est_idx"),
             models.Index(fields=["clave_dedupe"], name="alerta_op_clave_idx"),
+            models.Index(fields=["fecha_alerta", "id"], name="alerta_op_fecha_id_idx"),
         ]
         constraints = [
             models.UniqueConstraint(
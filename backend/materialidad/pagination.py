@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+import base64
+import json
+from typing import Any
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Q
+from rest_framework.exceptions import ParseError
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+TRUE_VALUES = {"1", "true", "si", "sí", "yes"}
+
+
+def encode_keyset_cursor(values: dict[str, Any]) -> str:
+    """Cursor opaco: JSON (fechas en ISO 8601) en base64 url-safe.
+
+    Es el mismo formato de los cursores de ``fdi/jobs/`` en el dashboard.
+    """
+
+    raw = json.dumps(values, sort_keys=True, default=lambda value: value.isoformat())
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor_payload(cursor: str) -> dict[str, Any]:
+    """Inverso de ``encode_keyset_cursor``; ``ValueError`` si el cursor no es válido."""
+
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8"))
+    except (ValueError, TypeError):
+        raise ValueError("Cursor inválido")
+    if not isinstance(payload, dict):
+        raise ValueError("Cursor inválido")
+    return payload
+
+
+def decode_keyset_cursor(cursor: str, *, model, fields: tuple[str, ...]) -> dict[str, Any]:
+    try:
+        payload = decode_cursor_payload(cursor)
+        values = {}
+        for name in fields:
+            value = model._meta.get_field(name).to_python(payload[name])
+            if value is None:
+                raise ValueError(name)
+            values[name] = value
+    except (ValueError, TypeError, KeyError, AttributeError, DjangoValidationError):
+        raise ValueError("Cursor inválido")
+    return values
+
+
+def _keyset_filter(ordering: tuple[str, ...], values: dict[str, Any]) -> Q:
+    """``(a, b, c) < (va, vb, vc)`` respetando la dirección de cada campo del orden."""
+
+    condition = Q()
+    equal = Q()
+    for index, term in enumerate(ordering):
+        name = term.lstrip("-")
+        lookup = "lt" if term.startswith("-") else "gt"
+        step = equal & Q(**{f"{name}__{lookup}": values[name]})
+        condition = step if index == 0 else condition | step
+        equal &= Q(**{name: values[name]})
+    return condition
+
+
+class KeysetOptInPagination(PageNumberPagination):
+    """Paginación por número de página con modo cursor (keyset) opcional.
+
+    Con ``?paginacion=cursor`` o ``?cursor=`` la página se resuelve con
+    ``WHERE (campos) < cursor ORDER BY campos LIMIT n`` sobre ``view.cursor_ordering``:
+    no hay ``OFFSET`` y el ``COUNT(*)`` sólo se ejecuta con ``?count=true``.
+    Sin esos parámetros se comporta igual que ``PageNumberPagination``. En modo cursor un
+    ``?ordering=`` distinto de ``cursor_ordering`` regresa ``400`` en lugar de ignorarse.
+    """
+
+    cursor_query_param = "cursor"
+    mode_query_param = "paginacion"
+    count_query_param = "count"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        ordering = tuple(getattr(view, "cursor_ordering", None) or ())
+        self.keyset_mode = bool(ordering) and (
+            request.query_params.get(self.mode_query_param) == "cursor"
+            or self.cursor_query_param in request.query_params
+        )
+        if not self.keyset_mode:
+            return super().paginate_queryset(queryset, request, view)
+
+        requested_ordering = tuple(
+            term.strip() for term in request.query_params.get(api_settings.ORDERING_PARAM, "").split(",") if term.strip()
+        )
+        if requested_ordering and requested_ordering != ordering:
+            raise ParseError(
+                f"El modo cursor sólo admite el orden {','.join(ordering)}; quite '{api_settings.ORDERING_PARAM}'"
+            )
+
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+
+        self.request = request
+        self.count = None
+        if request.query_params.get(self.count_query_param, "").lower() in TRUE_VALUES:
+            self.count = queryset.count()
+
+        queryset = queryset.order_by(*ordering)
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            fields = tuple(term.lstrip("-") for term in ordering)
+            try:
+                values = decode_keyset_cursor(cursor, model=queryset.model, fields=fields)
+            except ValueError:
+                raise ParseError("El parámetro 'cursor' es inválido")
+            queryset = queryset.filter(_keyset_filter(ordering, values))
+
+        rows = list(queryset[: page_size + 1])
+        page = rows[:page_size]
+        self.next_cursor = None
+        if len(rows) > page_size and page:
+            last = page[-1]
+            self.next_cursor = encode_keyset_cursor(
+                {term.lstrip("-"): getattr(last, term.lstrip("-")) for term in ordering}
+            )
+        return page
+
+    def get_next_link(self):
+        if not getattr(self, "keyset_mode", False):
+            return super().get_next_link()
+        if self.next_cursor is None:
+            return None
+        url = remove_query_param(self.request.build_absolute_uri(), self.page_query_param)
+        return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+
+    def get_paginated_response(self, data):
+        if not getattr(self, "keyset_mode", False):
+            return super().get_paginated_response(data)
+        payload = {
+            "next": self.get_next_link(),
+            "next_cursor": self.next_cursor,
+            "has_more": self.next_cursor is not None,
+            "results": data,
+        }
+        if self.count is not None:
+            payload["count"] = self.count
+        return Response(payload)
+
+    def get_paginated_response_schema(self, schema):
+        response_schema = super().get_paginated_response_schema(schema)
+        response_schema["properties"].update(
+            {
+                "next_cursor": {"type": "string", "nullable": True},
+                "has_more": {"type": "boolean"},
+            }
+        )
+        return response_schema
@@ -0,0 +1,226 @@
+"""Extracción de texto nativo de PDFs compartida por corpus legal, CSF y cotizaciones.
+
+Los PDFs grandes se dividen en rangos de páginas que se extraen en un pool de procesos;
+el texto sale en orden como generador y se guarda en el cache por SHA-256 del archivo,
+así que volver a subir o reprocesar el mismo documento no vuelve a leerlo.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import io
+import json
+import logging
+import math
+import multiprocessing
+import os
+import tempfile
+import threading
+import zlib
+from collections.abc import Iterator
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from django.conf import settings
+from django.core.cache import cache
+
+try:  # pragma: no cover - dependency validation
+    from pypdf import PdfReader  # type: ignore
+except ModuleNotFoundError:  # pragma: no cover
+    PdfReader = None
+
+logger = logging.getLogger(__name__)
+
+CACHE_KEY = "materialidad:pdf_text:v1:{sha256}"
+HASH_READ_SIZE = 1024 * 1024
+MIN_PAGES_PER_RANGE = 8
+
+
+@dataclass(frozen=True)
+class PdfSource:
+    """PDF en disco (``path``) o en memoria (``data``) con su huella SHA-256."""
+
+    sha256: str
+    path: str | None = None
+    data: bytes | None = None
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "PdfSource":
+        return cls(sha256=hashlib.sha256(data).hexdigest(), data=data)
+
+    @classmethod
+    def from_path(cls, path: str | Path) -> "PdfSource":
+        digest = hashlib.sha256()
+        with open(path, "rb") as fh:
+            for block in iter(lambda: fh.read(HASH_READ_SIZE), b""):
+                digest.update(block)
+        return cls(sha256=digest.hexdigest(), path=str(path))
+
+    @classmethod
+    def from_file(cls, file_obj: Any) -> "PdfSource":
+        """Archivo abierto (upload, ``FieldFile`` o ``default_storage.open``); usa su ruta si está en disco."""
+
+        try:
+            path = file_obj.path if hasattr(file_obj, "path") else file_obj.temporary_file_path()
+        except (AttributeError, NotImplementedError, ValueError):
+            path = None
+        if path and os.path.exists(path):
+            return cls.from_path(path)
+        if hasattr(file_obj, "seek"):
+            file_obj.seek(0)
+        data = file_obj.read()
+        return cls.from_bytes(data if isinstance(data, bytes) else bytes(data))
+
+    def open_reader(self):
+        if PdfReader is None:
+            raise ValueError("El paquete 'pypdf' es requerido para leer PDFs")
+        return PdfReader(self.path if self.path else io.BytesIO(self.data or b""))
+
+
+def _extract_page_range(path: str, start: int, stop: int) -> list[str]:
+    # Corre en el proceso hijo: abre su propio lector para no compartir estado de pypdf.
+    reader = PdfReader(path)
+    return [reader.pages[index].extract_text() or "" for index in range(start, stop)]
+
+
+def _workers() -> int:
+    configured = getattr(settings, "PDF_EXTRACTION_WORKERS", None)
+    if configured is None:
+        return os.cpu_count() or 1
+    return max(0, int(configured))
+
+
+def _parallel_min_pages() -> int:
+    return max(1, int(getattr(settings, "PDF_PARALLEL_MIN_PAGES", 40)))
+
+
+_pool_lock = threading.Lock()
+_pool: ProcessPoolExecutor | None = None
+_pool_size = 0
+
+
+def _get_pool(workers: int) -> ProcessPoolExecutor:
+    # ``spawn`` evita heredar conexiones de base de datos e hilos del worker web.
+    global _pool, _pool_size
+    with _pool_lock:
+        if _pool is None or _pool_size != workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+            _pool_size = workers
+        return _pool
+
+
+def shutdown_pool() -> None:
+    global _pool, _pool_size
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=True, cancel_futures=True)
+        _pool = None
+        _pool_size = 0
+
+
+def _page_ranges(start: int, stop: int, workers: int) -> list[tuple[int, int]]:
+    # Dos rangos por worker para repartir mejor páginas de distinto peso.
+    size = max(MIN_PAGES_PER_RANGE, math.ceil((stop - start) / (workers * 2)))
+    return [(first, min(first + size, stop)) for first in range(start, stop, size)]
+
+
+def _iter_parallel(source: PdfSource, start: int, stop: int, workers: int) -> Iterator[str]:
+    temp_path = None
+    path = source.path
+    if path is None:
+        with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as tmp:
+            tmp.write(source.data or b"")
+            temp_path = path = tmp.name
+    try:
+        pool = _get_pool(workers)
+        futures = [pool.submit(_extract_page_range, path, first, last) for first, last in _page_ranges(start, stop, workers)]
+        try:
+            for future in futures:
+                yield from future.result()
+        finally:
+            for future in futures:
+                future.cancel()
+    finally:
+        if temp_path:
+            os.unlink(temp_path)
+
+
+def _cache_get(sha256: str) -> list[str] | None:
+    try:
+        payload = cache.get(CACHE_KEY.format(sha256=sha256))
+        if payload is None:
+            return None
+        return json.loads(zlib.decompress(payload).decode("utf-8"))
+    except Exception:  # pragma: no cover - el cache es complementario
+        logger.warning("No se pudo leer el texto cacheado del PDF %s", sha256, exc_info=True)
+        return None
+
+
+def _cache_set(sha256: str, pages: list[str]) -> None:
+    payload = zlib.compress(json.dumps(pages, ensure_ascii=False).encode("utf-8"))
+    if len(payload) > int(getattr(settings, "PDF_TEXT_CACHE_MAX_BYTES", 16 * 1024 * 1024)):
+        return
+    try:
+        cache.set(
+            CACHE_KEY.format(sha256=sha256),
+            payload,
+            timeout=int(getattr(settings, "PDF_TEXT_CACHE_TIMEOUT", 7 * 24 * 3600)),
+        )
+    except Exception:  # pragma: no cover - el cache es complementario
+        logger.warning("No se pudo cachear el texto del PDF %s", sha256, exc_info=True)
+
+
+def iter_pdf_pages(
+    source: PdfSource,
+    *,
+    start_page: int = 0,
+    max_pages: int | None = None,
+) -> Iterator[tuple[int, int, str]]:
+    """Produce ``(índice, total, texto)`` en orden desde ``start_page``.
+
+    Un documento ya leído sale del cache; si no, los PDFs con al menos
+    ``PDF_PARALLEL_MIN_PAGES`` páginas se extraen en paralelo. Sólo una lectura
+    completa (desde la página 0 y sin ``max_pages``) se guarda en el cache.
+    """
+
+    cached = _cache_get(source.sha256)
+    if cached is not None:
+        total = len(cached)
+        stop = total if max_pages is None else min(total, start_page + max_pages)
+        for index in range(start_page, stop):
+            yield index, total, cached[index]
+        return
+
+    reader = source.open_reader()
+    total = len(reader.pages)
+    stop = total if max_pages is None else min(total, start_page + max_pages)
+    if start_page >= stop:
+        return
+    workers = _workers()
+    if workers > 1 and stop - start_page >= _parallel_min_pages():
+        texts = _iter_parallel(source, start_page, stop, workers)
+    else:
+        texts = (reader.pages[index].extract_text() or "" for index in range(start_page, stop))
+
+    complete = start_page == 0 and stop == total
+    pages: list[str] = []
+    for index, text in enumerate(texts, start=start_page):
+        if complete:
+            pages.append(text)
+        yield index, total, text
+    if complete:
+        _cache_set(source.sha256, pages)
+
+
+def extract_pdf_text(source: PdfSource, *, max_pages: int | None = None, skip_empty: bool = False) -> str:
+    """Texto de las páginas unido con saltos de línea."""
+
+    return "\n".join(
+        text
+        for _, _, text in iter_pdf_pages(source, max_pages=max_pages)
+        if text or not skip_empty
+    )
@@ -9,6 +9,7 @@ from django.utils.text import slugify
 from rest_framework import serializers
 
 from .models import (
+    AIJob,
     AlertaOperacion,
     AuditMaterialityDossier,
     AuditMaterialityDossierVersion,
@@ -46,12 +47,11 @@ from .models import (
 from .checklist_templates import assign_default_checklists_to_operacion
 from .services import (
     _detect_legal_consultation_focus,
+    build_operacion_riesgo_snapshot,
+    evaluate_operacion_materialidad,
     get_operacion_checklists_resumen,
-    get_operacion_faltantes_expediente,
     get_operacion_faltantes_materialidad,
     get_legal_consultation_type_label,
-    get_operacion_perfil_validacion,
-    get_operacion_riesgo_materialidad,
     operacion_forma_pago_documentada,
     trigger_proveedor_validacion,
     trigger_validacion_proveedor,
@@ -1499,6 +1499,8 @@ class LegalCorpusUploadSerializer(serializers.ModelSerializer):
             "total_fragmentos",
             "fragmentos_procesados",
             "error_detalle",
+            "encolado_en",
+            "intentos",
             "uploaded_by",
             "uploaded_by_email",
             "metadata",
@@ -1513,6 +1515,8 @@ class LegalCorpusUploadSerializer(serializers.ModelSerializer):
             "total_fragmentos",
             "fragmentos_procesados",
             "error_detalle",
+            "encolado_en",
+            "intentos",
             "uploaded_by",
             "uploaded_by_email",
             "metadata",
@@ -1661,6 +1665,26 @@ class LegalConsultationSerializer(serializers.ModelSerializer):
         return {"code": focus, "label": get_legal_consultation_type_label(focus)}
 
 
+class AIJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = AIJob
+        fields = (
+            "id",
+            "tipo",
+            "estatus",
+            "codigo_respuesta",
+            "resultado",
+            "error_detalle",
+            "intentos",
+            "encolado_en",
+            "iniciado_en",
+            "finalizado_en",
+            "created_at",
+            "updated_at",
+        )
+        read_only_fields = fields
+
+
 class ChecklistItemSerializer(serializers.ModelSerializer):
     def validate(self, attrs):
         attrs = super().validate(attrs)
@@ -2162,7 +2186,55 @@ class AlertaOperacionSerializer(serializers.ModelSerializer):
         )
 
 
-class BandejaRevisionItemSerializer(serializers.ModelSerializer):
+class _OperacionEvaluacionMixin:
+    """Sirve expediente y riesgo de cada operación desde una sola fuente.
+
+    Si la operación ya se sincronizó se usan sus columnas de riesgo (las que la vista usa para
+    filtrar y ordenar) y la foto de ``metadata["riesgo_materialidad"]``; si no, todos los campos
+    salen de una única evaluación. Con ``many=True`` DRF reutiliza la misma instancia hija para
+    todas las filas, así que el caché vive en el serializer y se descarta al terminar la respuesta.
+    """
+
+    def _riesgo(self, obj: Operacion) -> dict:
+        cache = self.__dict__.setdefault("_riesgos", {})
+        riesgo = cache.get(obj.pk)
+        if riesgo is None:
+            riesgo = cache[obj.pk] = self._riesgo_persistido(obj) or build_operacion_riesgo_snapshot(
+                evaluate_operacion_materialidad(obj)
+            )
+        return riesgo
+
+    @staticmethod
+    def _riesgo_persistido(obj: Operacion) -> dict | None:
+        metadata = obj.metadata if isinstance(obj.metadata, dict) else {}
+        riesgo = metadata.get("riesgo_materialidad")
+        # Las fotos anteriores a ``build_operacion_riesgo_snapshot`` no traen faltantes/checklists.
+        if not obj.perfil_validacion or not isinstance(riesgo, dict) or "checklists_resumen" not in riesgo:
+            return None
+        return {
+            **riesgo,
+            "perfil_validacion": obj.perfil_validacion,
+            "nivel": obj.riesgo_nivel,
+            "score": obj.riesgo_score,
+        }
+
+    def get_perfil_validacion(self, obj: Operacion) -> str:
+        return str(self._riesgo(obj).get("perfil_validacion") or "")
+
+    def get_riesgo_nivel(self, obj: Operacion) -> str:
+        return str(self._riesgo(obj).get("nivel", "BAJO"))
+
+    def get_riesgo_score(self, obj: Operacion) -> int:
+        return int(self._riesgo(obj).get("score", 0) or 0)
+
+    def get_faltantes(self, obj: Operacion) -> list[str]:
+        return list(self._riesgo(obj).get("faltantes") or [])
+
+    def get_checklists_resumen(self, obj: Operacion) -> list[dict]:
+        return list(self._riesgo(obj).get("checklists_resumen") or [])
+
+
+class BandejaRevisionItemSerializer(_OperacionEvaluacionMixin, serializers.ModelSerializer):
     empresa_rfc = serializers.CharField(source="empresa.rfc", read_only=True)
     empresa_nombre = serializers.CharField(source="empresa.razon_social", read_only=True)
     proveedor_rfc = serializers.CharField(source="proveedor.rfc", read_only=True)
@@ -2205,37 +2277,18 @@ class BandejaRevisionItemSerializer(serializers.ModelSerializer):
             "checklists_resumen",
         )
 
-    def _riesgo_payload(self, obj: Operacion) -> dict:
-        return get_operacion_riesgo_materialidad(obj)
-
     def get_contrato_nombre(self, obj: Operacion) -> str | None:
         return obj.contrato.nombre if obj.contrato else None
 
     def get_contrato_categoria(self, obj: Operacion) -> str | None:
         return obj.contrato.categoria if obj.contrato else None
 
-    def get_perfil_validacion(self, obj: Operacion) -> str:
-        return get_operacion_perfil_validacion(obj)
-
-    def get_riesgo_nivel(self, obj: Operacion) -> str:
-        return str(self._riesgo_payload(obj).get("nivel", "BAJO"))
-
-    def get_riesgo_score(self, obj: Operacion) -> int:
-        return int(self._riesgo_payload(obj).get("score", 0) or 0)
-
     def get_riesgo_motivos(self, obj: Operacion) -> list[str]:
-        motivos = self._riesgo_payload(obj).get("motivos")
+        motivos = self._riesgo(obj).get("motivos")
         if isinstance(motivos, list):
             return [str(motivo) for motivo in motivos]
         return []
 
-    def get_faltantes(self, obj: Operacion) -> list[str]:
-        _, faltantes = get_operacion_faltantes_expediente(obj)
-        return faltantes
-
-    def get_checklists_resumen(self, obj: Operacion) -> list[dict]:
-        return get_operacion_checklists_resumen(obj)
-
     def get_alertas_activas(self, obj: Operacion) -> list[dict]:
         alertas = getattr(obj, "alertas_activas_prefetched", None)
         if alertas is None:
@@ -2253,7 +2306,7 @@ class BandejaRevisionItemSerializer(serializers.ModelSerializer):
         ]
 
 
-class MatrizMaterialidadItemSerializer(serializers.ModelSerializer):
+class MatrizMaterialidadItemSerializer(_OperacionEvaluacionMixin, serializers.ModelSerializer):
     empresa_rfc = serializers.CharField(source="empresa.rfc", read_only=True)
     empresa_nombre = serializers.CharField(source="empresa.razon_social", read_only=True)
     proveedor_rfc = serializers.CharField(source="proveedor.rfc", read_only=True)
@@ -2295,25 +2348,9 @@ class MatrizMaterialidadItemSerializer(serializers.ModelSerializer):
             "checklists_resumen",
         )
 
-    def _riesgo_payload(self, obj: Operacion) -> dict:
-        return get_operacion_riesgo_materialidad(obj)
-
-    def get_riesgo_nivel(self, obj: Operacion) -> str:
-        return str(self._riesgo_payload(obj).get("nivel", "BAJO"))
-
-    def get_riesgo_score(self, obj: Operacion) -> int:
-        return int(self._riesgo_payload(obj).get("score", 0) or 0)
-
-    def get_faltantes(self, obj: Operacion) -> list[str]:
-        _, faltantes = get_operacion_faltantes_expediente(obj)
-        return faltantes
-
     def get_estado_completitud(self, obj: Operacion) -> str:
         return "COMPLETO" if not self.get_faltantes(obj) else "INCOMPLETO"
 
-    def get_perfil_validacion(self, obj: Operacion) -> str:
-        return get_operacion_perfil_validacion(obj)
-
     def get_cadena_documental(self, obj: Operacion) -> dict:
         evidencias = list(obj.evidencias.all())
         evidencia_tipos = sorted({e.tipo for e in evidencias})
@@ -2360,6 +2397,3 @@ class MatrizMaterialidadItemSerializer(serializers.ModelSerializer):
             }
             for alerta in alertas
         ]
-
-    def get_checklists_resumen(self, obj: Operacion) -> list[dict]:
-        return get_operacion_checklists_resumen(obj)
@@ -3,21 +3,27 @@ from __future__ import annotations
 import hashlib
 import json
 import logging
+import random
 from datetime import date, datetime, timedelta
 from decimal import Decimal, ROUND_HALF_UP
 import re
-from typing import Any
+import time
+from dataclasses import dataclass
+from typing import Any, Iterator
 from uuid import UUID
 
 import requests
 from django.conf import settings
-from django.db import DatabaseError
-from django.db.models import Q, Sum, Count
+from django.db import DatabaseError, connections, router, transaction
+from django.db.models import BooleanField, Count, F, FloatField, Func, JSONField, Prefetch, Q, Sum
+from django.db.models.expressions import RawSQL
 from django.utils import timezone
 
 from tenancy.context import TenantContext
 
 from .ai.client import ChatMessage, get_ai_client, OpenAIClientError
+from .ai.compendium import COMPENDIUM_SYSTEM_PROMPT, get_legal_compendium
+from .dashboard_cache import get_dashboard_cache_version
 from .fdi_engine import (
     build_internal_fdi_payload,
     clamp_score,
@@ -26,11 +32,13 @@ from .fdi_engine import (
     legacy_fdi_level,
     percent,
 )
+from . import legal_vector_index
 from .legal_corpus import build_hashed_embedding, cosine_similarity
 from .models import (
     AlertaOperacion,
     ChecklistItem,
     Contrato,
+    DashboardMetricsProjection,
     DashboardSnapshot,
     EvidenciaMaterial,
     Empresa,
@@ -38,6 +46,7 @@ from .models import (
     LegalConsultation,
     LegalReferenceSource,
     Operacion,
+    OperacionChecklist,
     OperationDefenseProjection,
     Proveedor,
     FiscalDefenseIndexSnapshot,
@@ -49,6 +58,7 @@ TWO_DECIMAL = Decimal("0.01")
 ONE_DECIMAL = Decimal("0.1")
 
 logger = logging.getLogger(__name__)
+observability_logger = logging.getLogger("materialidad.observability")
 
 
 CRITICAL_FALTANTE_MARKERS = (
@@ -67,19 +77,22 @@ def _get_operacion_checklists(operacion: Operacion) -> list:
     return list(checklists)
 
 
-def get_operacion_checklists_resumen(operacion: Operacion) -> list[dict[str, Any]]:
+def _evaluate_operacion_checklists(operacion: Operacion) -> tuple[list[dict[str, Any]], list[str]]:
+    """Recorre una sola vez los checklists y regresa ``(resumen, faltantes)``."""
+
     resumen: list[dict[str, Any]] = []
+    faltantes: list[str] = []
 
     for checklist in _get_operacion_checklists(operacion):
         items_attr = getattr(checklist, "items", None)
         items = list(items_attr.all()) if hasattr(items_attr, "all") else list(items_attr or [])
         total = len(items)
         completos = sum(1 for item in items if item.estado == ChecklistItem.Estado.COMPLETO)
-        requeridos_pendientes = sum(
-            1
+        pendientes_requeridos = [
+            item.titulo
             for item in items
             if item.requerido and item.estado != ChecklistItem.Estado.COMPLETO
-        )
+        ]
         resumen.append(
             {
                 "id": checklist.id,
@@ -90,24 +103,9 @@ def get_operacion_checklists_resumen(operacion: Operacion) -> list[dict[str, Any
                 "total_items": total,
                 "completos": completos,
                 "pendientes": max(total - completos, 0),
-                "requeridos_pendientes": requeridos_pendientes,
+                "requeridos_pendientes": len(pendientes_requeridos),
             }
         )
-
-    return resumen
-
-
-def get_operacion_checklist_faltantes(operacion: Operacion) -> list[str]:
-    faltantes: list[str] = []
-
-    for checklist in _get_operacion_checklists(operacion):
-        items_attr = getattr(checklist, "items", None)
-        items = list(items_attr.all()) if hasattr(items_attr, "all") else list(items_attr or [])
-        pendientes_requeridos = [
-            item.titulo
-            for item in items
-            if item.requerido and item.estado != ChecklistItem.Estado.COMPLETO
-        ]
         if not pendientes_requeridos:
             continue
 
@@ -121,6 +119,16 @@ def get_operacion_checklist_faltantes(operacion: Operacion) -> list[str]:
             f"({len(pendientes_requeridos)} requeridos pendientes{detalle})"
         )
 
+    return resumen, faltantes
+
+
+def get_operacion_checklists_resumen(operacion: Operacion) -> list[dict[str, Any]]:
+    resumen, _ = _evaluate_operacion_checklists(operacion)
+    return resumen
+
+
+def get_operacion_checklist_faltantes(operacion: Operacion) -> list[str]:
+    _, faltantes = _evaluate_operacion_checklists(operacion)
     return faltantes
 
 
@@ -187,8 +195,40 @@ def get_operacion_faltantes_materialidad(operacion: Operacion) -> tuple[str, lis
     return perfil, faltantes
 
 
+@dataclass(frozen=True, slots=True)
+class OperacionEvaluacion:
+    """Expediente y riesgo de una operación evaluados en una sola pasada."""
+
+    perfil_validacion: str
+    faltantes: list[str]
+    checklists_resumen: list[dict[str, Any]]
+    riesgo: dict[str, Any]
+
+
+def evaluate_operacion_materialidad(operacion: Operacion) -> OperacionEvaluacion:
+    """Evalúa faltantes, checklists y riesgo recorriendo evidencias y checklists una vez.
+
+    Equivale a llamar ``get_operacion_faltantes_expediente``,
+    ``get_operacion_checklists_resumen`` y ``get_operacion_riesgo_materialidad`` por separado.
+    """
+
+    perfil, faltantes = get_operacion_faltantes_materialidad(operacion)
+    checklists_resumen, checklist_faltantes = _evaluate_operacion_checklists(operacion)
+    faltantes = [*faltantes, *checklist_faltantes]
+    return OperacionEvaluacion(
+        perfil_validacion=perfil,
+        faltantes=faltantes,
+        checklists_resumen=checklists_resumen,
+        riesgo=_build_operacion_riesgo(operacion, perfil, faltantes),
+    )
+
+
 def get_operacion_riesgo_materialidad(operacion: Operacion) -> dict[str, Any]:
     perfil, faltantes = get_operacion_faltantes_expediente(operacion)
+    return _build_operacion_riesgo(operacion, perfil, faltantes)
+
+
+def _build_operacion_riesgo(operacion: Operacion, perfil: str, faltantes: list[str]) -> dict[str, Any]:
     score = 0
     motivos: list[str] = []
 
@@ -293,19 +333,113 @@ def create_or_get_alerta_operacion_faltantes(
     )
 
 
+OPERACION_RIESGO_FIELDS = ("perfil_validacion", "riesgo_nivel", "riesgo_score")
+
+
+class _JSONSetKey(Func):
+    """Reemplaza una llave de primer nivel de un ``JSONField`` dentro del ``UPDATE``.
+
+    El resto del documento no viaja desde Python, así que no se pisan las llaves que otra
+    petición haya escrito mientras se recalculaba. Si el campo no es un objeto (lista, escalar
+    o nulo) se reemplaza por un objeto con la llave, igual que ``_apply_operacion_riesgo``.
+    """
+
+    output_field = JSONField()
+
+    def __init__(self, field: str, key: str, value: Any):
+        super().__init__(F(field))
+        self.key = key
+        self.value = json.dumps(value)
+
+    def as_sql(self, compiler, connection, **extra_context):
+        field_sql, params = compiler.compile(self.get_source_expressions()[0])
+        sql = (
+            f"CASE WHEN json_type({field_sql}) = 'object' THEN json_set({field_sql}, %s, json(%s)) "
+            "ELSE json_object(%s, json(%s)) END"
+        )
+        return sql, [*params, *params, f'$."{self.key}"', self.value, self.key, self.value]
+
+    def as_postgresql(self, compiler, connection, **extra_context):
+        field_sql, params = compiler.compile(self.get_source_expressions()[0])
+        sql = (
+            f"CASE WHEN jsonb_typeof({field_sql}) = 'object' "
+            f"THEN jsonb_set({field_sql}, %s::text[], %s::jsonb, true) "
+            "ELSE jsonb_build_object(%s::text, %s::jsonb) END"
+        )
+        return sql, [*params, *params, f"{{{self.key}}}", self.value, self.key, self.value]
+
+
+def build_operacion_riesgo_snapshot(evaluacion: OperacionEvaluacion) -> dict[str, Any]:
+    """Foto que se persiste en ``metadata["riesgo_materialidad"]``.
+
+    Incluye faltantes y resumen de checklists para que la bandeja y la matriz sirvan todos los
+    campos de riesgo de la misma evaluación que alimenta las columnas indexadas.
+    """
+
+    return {
+        **evaluacion.riesgo,
+        "faltantes": evaluacion.faltantes,
+        "checklists_resumen": evaluacion.checklists_resumen,
+    }
+
+
+def _apply_operacion_riesgo(operacion: Operacion, evaluacion: OperacionEvaluacion) -> dict[str, Any]:
+    snapshot = build_operacion_riesgo_snapshot(evaluacion)
+    metadata = dict(operacion.metadata) if isinstance(operacion.metadata, dict) else {}
+    metadata["riesgo_materialidad"] = snapshot
+    operacion.metadata = metadata
+    operacion.perfil_validacion = snapshot["perfil_validacion"]
+    operacion.riesgo_nivel = snapshot["nivel"]
+    operacion.riesgo_score = snapshot["score"]
+    return snapshot
+
+
+def refresh_operacion_riesgo_columns(operaciones, *, batch_size: int = 500) -> int:
+    """Recalcula y persiste el riesgo de materialidad de varias operaciones.
+
+    Cada fila se escribe con un ``UPDATE`` que sólo toca las columnas de riesgo y la llave
+    ``metadata["riesgo_materialidad"]``; las filas se confirman en transacciones de
+    ``batch_size``. Para evitar consultas por fila conviene pasar operaciones con
+    ``proveedor``/``contrato`` en ``select_related`` y evidencias/checklists precargados.
+    """
+
+    alias = router.db_for_write(Operacion)
+    refreshed = 0
+    batch: list[Operacion] = []
+    for operacion in operaciones:
+        batch.append(operacion)
+        if len(batch) >= batch_size:
+            refreshed += _write_operacion_riesgo_batch(batch, using=alias)
+            batch = []
+    if batch:
+        refreshed += _write_operacion_riesgo_batch(batch, using=alias)
+    return refreshed
+
+
+def _write_operacion_riesgo_batch(batch: list[Operacion], *, using: str) -> int:
+    with transaction.atomic(using=using):
+        for operacion in batch:
+            snapshot = _apply_operacion_riesgo(operacion, evaluate_operacion_materialidad(operacion))
+            Operacion.objects.using(using).filter(pk=operacion.pk).update(
+                metadata=_JSONSetKey("metadata", "riesgo_materialidad", snapshot),
+                **{field: getattr(operacion, field) for field in OPERACION_RIESGO_FIELDS},
+            )
+    return len(batch)
+
+
 def sync_operacion_materialidad(
     *,
     operacion: Operacion,
     owner_email: str = "",
     sync_alertas: bool = False,
 ) -> dict[str, Any]:
-    perfil_validacion, faltantes_expediente = get_operacion_faltantes_expediente(operacion)
-    riesgo = get_operacion_riesgo_materialidad(operacion)
+    evaluacion = evaluate_operacion_materialidad(operacion)
+    perfil_validacion = evaluacion.perfil_validacion
+    faltantes_expediente = evaluacion.faltantes
+    riesgo = evaluacion.riesgo
 
-    metadata = dict(operacion.metadata or {})
-    metadata["riesgo_materialidad"] = riesgo
-    operacion.metadata = metadata
-    operacion.save(update_fields=["metadata", "updated_at"])
+    _apply_operacion_riesgo(operacion, evaluacion)
+    operacion.save(update_fields=["metadata", *OPERACION_RIESGO_FIELDS, "updated_at"])
 
     alerta = None
     alertas_qs = AlertaOperacion.objects.filter(
@@ -338,7 +472,7 @@ def sync_operacion_materialidad(
         "faltantes": faltantes_expediente,
         "riesgo": riesgo,
         "alerta": alerta,
-        "checklists_resumen": get_operacion_checklists_resumen(operacion),
+        "checklists_resumen": evaluacion.checklists_resumen,
     }
 
 
@@ -667,20 +801,39 @@ def _calculate_legacy_fdi_internal(*, days: int = 90, empresa_id: int | None = N
     return internal_payload
 
 
-def calculate_fiscal_defense_index_internal(*, days: int = 90, empresa_id: int | None = None) -> dict[str, Any]:
+def _should_sample_legacy_comparison() -> bool:
+    rate = float(getattr(settings, "FDI_LEGACY_SHADOW_SAMPLE_RATE", 0.0) or 0.0)
+    return rate > 0 and random.random() < rate
+
+
+def calculate_fiscal_defense_index_internal(
+    *,
+    days: int = 90,
+    empresa_id: int | None = None,
+    legacy_comparison: bool | None = None,
+) -> dict[str, Any]:
+    """FDI desde proyecciones; el comparador legacy corre solo en modo sombra.
+
+    ``legacy_comparison=None`` lo muestrea con ``FDI_LEGACY_SHADOW_SAMPLE_RATE``; los
+    jobs programados lo fuerzan con ``True`` y lo persisten en el snapshot.
+    """
+
     days = max(7, min(days, 365))
+    if legacy_comparison is None:
+        legacy_comparison = _should_sample_legacy_comparison()
     try:
         from .defense_projection import calculate_fiscal_defense_index_from_projections
 
         payload = calculate_fiscal_defense_index_from_projections(days=days, empresa_id=empresa_id)
-        try:
-            legacy_payload = _calculate_legacy_fdi_internal(days=days, empresa_id=empresa_id)
-            payload.setdefault("meta", {})["legacy_comparison"] = _build_fdi_legacy_comparison(
-                current_payload=payload,
-                legacy_payload=legacy_payload,
-            )
-        except Exception as compare_exc:  # pragma: no cover - diagnostico complementario
-            logger.warning("FDI legacy comparator failed: %s", compare_exc)
+        if legacy_comparison:
+            try:
+                legacy_payload = _calculate_legacy_fdi_internal(days=days, empresa_id=empresa_id)
+                payload.setdefault("meta", {})["legacy_comparison"] = _build_fdi_legacy_comparison(
+                    current_payload=payload,
+                    legacy_payload=legacy_payload,
+                )
+            except Exception as compare_exc:  # pragma: no cover - diagnostico complementario
+                logger.warning("FDI legacy comparator failed: %s", compare_exc)
         return payload
     except Exception as exc:  # pragma: no cover - fallback operativo
         if not getattr(settings, "FDI_ALLOW_LEGACY_FALLBACK", True):
@@ -697,7 +850,12 @@ def calculate_fiscal_defense_index(*, days: int = 90, empresa_id: int | None = N
     )
 
 
-def generate_fdi_narrative(*, audience: str, fdi_payload: dict[str, Any]) -> dict[str, Any]:
+def generate_fdi_narrative(
+    *,
+    audience: str,
+    fdi_payload: dict[str, Any],
+    bypass_cache: bool = False,
+) -> dict[str, Any]:
     audience = (audience or "CFO").upper()
     if audience not in {"RECTOR", "CFO", "DESPACHO"}:
         audience = "CFO"
@@ -728,6 +886,8 @@ def generate_fdi_narrative(*, audience: str, fdi_payload: dict[str, Any]) -> dic
             ],
             temperature=0.2,
             max_output_tokens=700,
+            cache_feature="fdi_narrative",
+            bypass_cache=bypass_cache,
         )
         parsed = _extract_json_payload(raw_response)
         return {
@@ -869,12 +1029,23 @@ def build_pending_fdi_narrative(*, audience: str, fdi_payload: dict[str, Any]) -
     }
 
 
-def persist_fdi_snapshot(*, days: int = 90, empresa_id: int | None = None, source: str = "scheduled") -> FiscalDefenseIndexSnapshot:
+def persist_fdi_snapshot(
+    *,
+    days: int = 90,
+    empresa_id: int | None = None,
+    source: str = "scheduled",
+    legacy_comparison: bool | None = None,
+) -> FiscalDefenseIndexSnapshot:
     tenant = TenantContext.get_current_tenant()
     if not tenant:
         raise ValueError("Se requiere tenant activo para persistir snapshot FDI")
 
-    internal_payload = calculate_fiscal_defense_index_internal(days=days, empresa_id=empresa_id)
+    internal_payload = calculate_fiscal_defense_index_internal(
+        days=days,
+        empresa_id=empresa_id,
+        legacy_comparison=legacy_comparison,
+    )
+    legacy_comparison_payload = (internal_payload.get("meta") or {}).get("legacy_comparison")
     payload = export_public_fdi_payload(internal_payload)
     period = payload.get("period", {}) or {}
     confidence = payload.get("confidence", {}) or {}
@@ -911,6 +1082,7 @@ def persist_fdi_snapshot(*, days: int = 90, empresa_id: int | None = None, sourc
         correlation_id=trace.get("correlation_id") or None,
         inputs_json=payload.get("inputs", {}) or {},
         actions_json=payload.get("actions", []) or [],
+        legacy_comparison_json=legacy_comparison_payload if isinstance(legacy_comparison_payload, dict) else {},
         source=source,
     )
 
@@ -966,19 +1138,18 @@ def get_fdi_operability_metrics(*, days: int = 90, empresa_id: int | None = None
             return None
         return round((now - timestamp).total_seconds() / 60.0, 1)
 
+    # La divergencia legacy-vs-nuevo se lee del último snapshot evaluado en modo sombra;
+    # recalcular el comparador legacy aquí repetía toda la ruta transaccional por petición.
     divergence: dict[str, Any] = {
         "available": False,
     }
-    try:
-        internal_payload = calculate_fiscal_defense_index_internal(days=days, empresa_id=empresa_id)
-        legacy_comparison = (internal_payload.get("meta") or {}).get("legacy_comparison")
-        if isinstance(legacy_comparison, dict):
-            divergence = {
-                "available": True,
-                **legacy_comparison,
-            }
-    except Exception as exc:  # pragma: no cover - observabilidad no debe romper el dashboard
-        logger.warning("No se pudo calcular divergencia FDI legacy-vs-nuevo: %s", exc)
+    shadow_snapshot = snapshots_qs.exclude(legacy_comparison_json={}).order_by("-captured_at").first()
+    if shadow_snapshot is not None and isinstance(shadow_snapshot.legacy_comparison_json, dict):
+        divergence = {
+            "available": True,
+            **shadow_snapshot.legacy_comparison_json,
+            "evaluated_at": shadow_snapshot.captured_at.isoformat(),
+        }
 
     projection_lag = _lag_minutes(getattr(latest_projection, "captured_at", None))
     snapshot_lag = _lag_minutes(getattr(latest_snapshot, "captured_at", None))
@@ -1123,70 +1294,84 @@ def get_dashboard_metrics(*, include_fdi_operability: bool = False) -> dict[str,
     today = timezone.now().date()
     horizon = today + timedelta(days=30)
 
-    empresas_total = Empresa.objects.count()
-    empresas_activas = Empresa.objects.filter(activo=True).count()
-    contratos_sin_vigencia = (
-        Contrato.objects.filter(activo=True)
-        .filter(Q(vigencia_inicio__isnull=True) | Q(vigencia_fin__isnull=True))
-        .count()
-    )
-    contratos_vigentes_qs = Contrato.objects.filter(
+    # Una consulta por tabla base con agregados condicionales.
+    contrato_vigente_q = Q(
         activo=True,
         vigencia_inicio__isnull=False,
         vigencia_fin__isnull=False,
         vigencia_inicio__lte=today,
         vigencia_fin__gte=today,
     )
-    empresas_con_contrato = (
-        Empresa.objects.filter(activo=True, contratos__in=contratos_vigentes_qs)
-        .distinct()
-        .count()
+    empresas_aggr = Empresa.objects.aggregate(
+        total=Count("id", distinct=True),
+        activas=Count("id", filter=Q(activo=True), distinct=True),
+        con_contrato=Count(
+            "id",
+            filter=Q(
+                activo=True,
+                contratos__activo=True,
+                contratos__vigencia_inicio__isnull=False,
+                contratos__vigencia_fin__isnull=False,
+                contratos__vigencia_inicio__lte=today,
+                contratos__vigencia_fin__gte=today,
+            ),
+            distinct=True,
+        ),
     )
-
-    contratos_vigentes = contratos_vigentes_qs.count()
-    contratos_por_vencer = contratos_vigentes_qs.filter(
-        vigencia_fin__gte=today, vigencia_fin__lte=horizon
-    ).count()
-    contratos_vencidos = (
-        Contrato.objects.filter(
-            activo=True,
-            vigencia_inicio__isnull=False,
-            vigencia_fin__isnull=False,
-            vigencia_fin__lt=today,
-        ).count()
+    empresas_total = empresas_aggr["total"]
+    empresas_activas = empresas_aggr["activas"]
+    empresas_con_contrato = empresas_aggr["con_contrato"]
+
+    contratos_aggr = Contrato.objects.aggregate(
+        sin_vigencia=Count(
+            "id",
+            filter=Q(activo=True) & (Q(vigencia_inicio__isnull=True) | Q(vigencia_fin__isnull=True)),
+        ),
+        vigentes=Count("id", filter=contrato_vigente_q),
+        por_vencer=Count("id", filter=contrato_vigente_q & Q(vigencia_fin__lte=horizon)),
+        vencidos=Count(
+            "id",
+            filter=Q(
+                activo=True,
+                vigencia_inicio__isnull=False,
+                vigencia_fin__isnull=False,
+                vigencia_fin__lt=today,
+            ),
+        ),
     )
+    contratos_sin_vigencia = contratos_aggr["sin_vigencia"]
+    contratos_vigentes = contratos_aggr["vigentes"]
+    contratos_por_vencer = contratos_aggr["por_vencer"]
+    contratos_vencidos = contratos_aggr["vencidos"]
 
     pendientes_estatus = [
         Operacion.EstatusValidacion.PENDIENTE,
         Operacion.EstatusValidacion.EN_PROCESO,
     ]
-    operaciones_pendientes = Operacion.objects.filter(
-        estatus_validacion__in=pendientes_estatus
-    ).count()
-    operaciones_rechazadas = Operacion.objects.filter(
-        estatus_validacion=Operacion.EstatusValidacion.RECHAZADO
-    ).count()
-    operaciones_validadas = Operacion.objects.filter(
-        estatus_validacion=Operacion.EstatusValidacion.VALIDADO
+    validadas_q = Q(estatus_validacion=Operacion.EstatusValidacion.VALIDADO)
+    operaciones_aggr = Operacion.objects.aggregate(
+        pendientes=Count("id", filter=Q(estatus_validacion__in=pendientes_estatus)),
+        rechazadas=Count("id", filter=Q(estatus_validacion=Operacion.EstatusValidacion.RECHAZADO)),
+        validadas_30d=Count("id", filter=validadas_q & Q(fecha_operacion__gte=today - timedelta(days=30))),
+        monto_validado=Sum("monto", filter=validadas_q & Q(moneda="MXN")),
     )
-    operaciones_ultimos_30 = operaciones_validadas.filter(
-        fecha_operacion__gte=today - timedelta(days=30)
-    ).count()
-    monto_validado = operaciones_validadas.filter(moneda="MXN").aggregate(total=Sum("monto"))[
-        "total"
-    ] or 0
-
-    proveedores_total = Proveedor.objects.count()
-    proveedores_sin_validar = Proveedor.objects.filter(
-        Q(estatus_sat__isnull=True) | Q(estatus_sat="")
-    ).count()
-    proveedores_con_alerta = (
-        Proveedor.objects.filter(
-            operaciones__estatus_validacion=Operacion.EstatusValidacion.RECHAZADO
-        )
-        .distinct()
-        .count()
+    operaciones_pendientes = operaciones_aggr["pendientes"]
+    operaciones_rechazadas = operaciones_aggr["rechazadas"]
+    operaciones_ultimos_30 = operaciones_aggr["validadas_30d"]
+    monto_validado = operaciones_aggr["monto_validado"] or 0
+
+    proveedores_aggr = Proveedor.objects.aggregate(
+        total=Count("id", distinct=True),
+        sin_validar=Count("id", filter=Q(estatus_sat__isnull=True) | Q(estatus_sat=""), distinct=True),
+        con_alerta=Count(
+            "id",
+            filter=Q(operaciones__estatus_validacion=Operacion.EstatusValidacion.RECHAZADO),
+            distinct=True,
+        ),
     )
+    proveedores_total = proveedores_aggr["total"]
+    proveedores_sin_validar = proveedores_aggr["sin_validar"]
+    proveedores_con_alerta = proveedores_aggr["con_alerta"]
 
     insights: list[dict[str, Any]] = []
     if contratos_por_vencer:
@@ -1316,22 +1501,79 @@ def persist_dashboard_snapshot(tenant_slug: str | None = None) -> DashboardSnaps
     return snapshot
 
 
+def refresh_dashboard_metrics_projection(tenant_slug: str | None = None) -> DashboardMetricsProjection:
+    """Recalcula y materializa las métricas de dashboard del tenant activo."""
+
+    tenant = TenantContext.get_current_tenant()
+    slug = tenant_slug or (tenant.slug if tenant else None)
+    if not slug:
+        raise ValueError("Se requiere un tenant activo para materializar métricas")
+
+    # La versión se lee antes de calcular: una escritura durante el cálculo deja la fila vencida.
+    cache_version = get_dashboard_cache_version(slug)
+    started = time.perf_counter()
+    payload = get_dashboard_metrics(include_fdi_operability=True)
+    duration_ms = int((time.perf_counter() - started) * 1000)
+    projection, _ = DashboardMetricsProjection.objects.update_or_create(
+        tenant_slug=slug,
+        defaults={
+            "payload": payload,
+            "duration_ms": duration_ms,
+            "refreshed_at": timezone.now(),
+            "cache_version": cache_version,
+        },
+    )
+    return projection
+
+
+def get_materialized_dashboard_metrics() -> dict[str, Any]:
+    """Lee la fila materializada del tenant; la recalcula si no existe, expiró o si la versión
+    del cache de dashboard cambió desde que se calculó (escrituras de Operacion, Contrato, etc.).
+    """
+
+    tenant = TenantContext.get_current_tenant()
+    if tenant is None:
+        return get_dashboard_metrics(include_fdi_operability=True)
+
+    max_age = timedelta(seconds=int(getattr(settings, "DASHBOARD_METRICS_MAX_AGE_SECONDS", 300)))
+    projection = DashboardMetricsProjection.objects.filter(tenant_slug=tenant.slug).first()
+    if (
+        projection is not None
+        and projection.cache_version == get_dashboard_cache_version(tenant.slug)
+        and timezone.now() - projection.refreshed_at <= max_age
+    ):
+        return projection.payload
+    return refresh_dashboard_metrics_projection(tenant.slug).payload
+
+
 def get_dashboard_cobertura_p0(*, days: int = 90, empresa_id: int | None = None) -> dict[str, Any]:
     days = max(7, min(days, 365))
     today = timezone.localdate()
     start_date = today - timedelta(days=days)
 
     operaciones_qs = (
-        Operacion.objects.select_related("empresa", "proveedor", "contrato")
-        .prefetch_related("evidencias")
+        Operacion.objects.select_related("proveedor", "contrato")
+        .prefetch_related(
+            Prefetch("evidencias", queryset=EvidenciaMaterial.objects.only("id", "operacion_id", "tipo")),
+            Prefetch(
+                "checklists_operativos",
+                queryset=OperacionChecklist.objects.prefetch_related("items"),
+                to_attr="checklists_operativos_prefetched",
+            ),
+        )
         .filter(fecha_operacion__gte=start_date, fecha_operacion__lte=today)
     )
     if empresa_id:
         operaciones_qs = operaciones_qs.filter(empresa_id=empresa_id)
 
-    operaciones = list(operaciones_qs)
-    total_operaciones = len(operaciones)
+    # Semanas móviles que terminan hoy; el índice 0 es la más antigua, igual que antes.
+    total_weeks = max(1, min((days + 6) // 7, 12))
+    trend_buckets = [
+        {"total_operaciones": 0, "validadas": 0, "completas": 0}
+        for _ in range(total_weeks)
+    ]
 
+    total_operaciones = 0
     completas = 0
     incompletas = 0
     riesgo_dist = {
@@ -1340,12 +1582,24 @@ def get_dashboard_cobertura_p0(*, days: int = 90, empresa_id: int | None = None)
         "ALTO": {"count": 0, "monto": 0.0},
     }
 
-    for operacion in operaciones:
+    # Una sola pasada: los faltantes se evalúan una vez por operación y alimentan
+    # tanto la cobertura como la tendencia semanal.
+    for operacion in operaciones_qs.iterator(chunk_size=2000):
+        total_operaciones += 1
         _, faltantes = get_operacion_faltantes_materialidad(operacion)
-        if faltantes:
-            incompletas += 1
-        else:
+        completa = not faltantes
+        if completa:
             completas += 1
+        else:
+            incompletas += 1
+
+        weeks_ago = (today - operacion.fecha_operacion).days // 7
+        if weeks_ago < total_weeks:
+            bucket = trend_buckets[total_weeks - weeks_ago - 1]
+            bucket["total_operaciones"] += 1
+            bucket["completas"] += int(completa)
+            if operacion.estatus_validacion == Operacion.EstatusValidacion.VALIDADO:
+                bucket["validadas"] += 1
 
         metadata = operacion.metadata or {}
         riesgo = metadata.get("riesgo_materialidad") if isinstance(metadata, dict) else None
@@ -1363,14 +1617,21 @@ def get_dashboard_cobertura_p0(*, days: int = 90, empresa_id: int | None = None)
         alertas_qs = AlertaOperacion.objects.filter(estatus=AlertaOperacion.Estatus.ACTIVA)
         if empresa_id:
             alertas_qs = alertas_qs.filter(empresa_id=empresa_id)
-        alertas_activas_total = alertas_qs.count()
+        alertas_totals = alertas_qs.aggregate(
+            total=Count("id"),
+            faltantes_criticos=Count(
+                "id",
+                filter=Q(tipo_alerta=AlertaOperacion.TipoAlerta.FALTANTES_CRITICOS),
+            ),
+            vencimiento_evidencia=Count(
+                "id",
+                filter=Q(tipo_alerta=AlertaOperacion.TipoAlerta.VENCIMIENTO_EVIDENCIA),
+            ),
+        )
+        alertas_activas_total = alertas_totals["total"]
         alertas_por_tipo = {
-            AlertaOperacion.TipoAlerta.FALTANTES_CRITICOS: alertas_qs.filter(
-                tipo_alerta=AlertaOperacion.TipoAlerta.FALTANTES_CRITICOS
-            ).count(),
-            AlertaOperacion.TipoAlerta.VENCIMIENTO_EVIDENCIA: alertas_qs.filter(
-                tipo_alerta=AlertaOperacion.TipoAlerta.VENCIMIENTO_EVIDENCIA
-            ).count(),
+            AlertaOperacion.TipoAlerta.FALTANTES_CRITICOS: alertas_totals["faltantes_criticos"],
+            AlertaOperacion.TipoAlerta.VENCIMIENTO_EVIDENCIA: alertas_totals["vencimiento_evidencia"],
         }
     except DatabaseError:
         logger.exception("No se pudieron consultar alertas activas para cobertura P0")
@@ -1381,31 +1642,17 @@ def get_dashboard_cobertura_p0(*, days: int = 90, empresa_id: int | None = None)
         }
 
     trend_weeks: list[dict[str, Any]] = []
-    total_weeks = max(1, min((days + 6) // 7, 12))
-    for week_index in range(total_weeks):
+    for week_index, bucket in enumerate(trend_buckets):
         week_end = today - timedelta(days=7 * (total_weeks - week_index - 1))
         week_start = week_end - timedelta(days=6)
-        week_ops = [
-            op
-            for op in operaciones
-            if week_start <= op.fecha_operacion <= week_end
-        ]
-        week_total = len(week_ops)
-        week_validadas = sum(1 for op in week_ops if op.estatus_validacion == Operacion.EstatusValidacion.VALIDADO)
-        week_completas = 0
-        for op in week_ops:
-            _, faltantes = get_operacion_faltantes_materialidad(op)
-            if not faltantes:
-                week_completas += 1
-        week_incompletas = week_total - week_completas
         trend_weeks.append(
             {
                 "week_start": week_start.isoformat(),
                 "week_end": week_end.isoformat(),
-                "total_operaciones": week_total,
-                "validadas": week_validadas,
-                "completas": week_completas,
-                "incompletas": week_incompletas,
+                "total_operaciones": bucket["total_operaciones"],
+                "validadas": bucket["validadas"],
+                "completas": bucket["completas"],
+                "incompletas": bucket["total_operaciones"] - bucket["completas"],
             }
         )
 
@@ -1741,6 +1988,7 @@ def _score_legal_source(
     ordenamiento: str | None,
     query_vector: list[float],
     today: date,
+    semantic_similarity: float | None = None,
 ) -> int:
     searchable_parts = [
         source.ley,
@@ -1807,12 +2055,50 @@ def _score_legal_source(
         score += 2
     if source.fuente_documento:
         score += 2
-    if query_vector and source.vectorizacion:
-        score += int(round(max(cosine_similarity(query_vector, source.vectorizacion), 0.0) * 35))
+    if semantic_similarity is None and query_vector and source.vectorizacion:
+        semantic_similarity = cosine_similarity(query_vector, source.vectorizacion)
+    if semantic_similarity:
+        score += int(round(max(semantic_similarity, 0.0) * 35))
 
     return score
 
 
+LEGAL_CANDIDATE_POOL = 200
+LEGAL_FULLTEXT_CONFIG = "spanish"
+
+
+def _legal_fulltext_enabled(qs) -> bool:
+    # ``search_vector`` y los índices GIN sólo existen en PostgreSQL (migración 0066).
+    return connections[qs.db].vendor == "postgresql"
+
+
+def _legal_fulltext_queryset(qs, tokens: list[str]):
+    """Filtra por ``search_vector @@ tsquery`` y ordena por ``ts_rank`` en SQL.
+
+    Los tokens se combinan con OR igual que el filtro ``icontains``; ``articulo`` se compara
+    además con ``ILIKE`` para que el índice trigram resuelva identificadores como "69-B".
+    """
+
+    # ``_tokenize_query`` admite caracteres como "×" que romperían la sintaxis de ``to_tsquery``.
+    terms = list(dict.fromkeys(filter(None, (re.sub(r"\W", "", token.lower()) for token in tokens))))
+    if not terms:
+        return qs.none()
+    vector = f"{connections[qs.db].ops.quote_name(LegalReferenceSource._meta.db_table)}.search_vector"
+    tsquery = f"to_tsquery('{LEGAL_FULLTEXT_CONFIG}', %s)"
+    params = (" | ".join(terms),)
+    articulo_filter = Q()
+    for term in terms:
+        articulo_filter |= Q(articulo__icontains=term)
+    return (
+        qs.annotate(
+            fulltext_match=RawSQL(f"{vector} @@ {tsquery}", params, output_field=BooleanField()),
+            fulltext_rank=RawSQL(f"ts_rank({vector}, {tsquery})", params, output_field=FloatField()),
+        )
+        .filter(Q(fulltext_match=True) | articulo_filter)
+        .order_by("-fulltext_rank", "-fecha_ultima_revision", "-id")
+    )
+
+
 def _fetch_candidate_sources(
     *,
     query: str,
@@ -1835,9 +2121,12 @@ def _fetch_candidate_sources(
         qs = qs.filter(autoridad_emisora__iexact=authority.strip())
     if only_current:
         qs = qs.filter(es_vigente=True)
+    filtered_qs = qs
 
     tokens = _tokenize_query(query)
-    if tokens:
+    if tokens and _legal_fulltext_enabled(qs):
+        qs = _legal_fulltext_queryset(qs, tokens)
+    elif tokens:
         text_filter = Q()
         for token in tokens:
             text_filter |= (
@@ -1853,7 +2142,18 @@ def _fetch_candidate_sources(
 
     today = timezone.localdate()
     query_vector = build_hashed_embedding(query)
-    candidates = list(qs[:200])
+    candidates = list(qs[:LEGAL_CANDIDATE_POOL])
+    # Candidatos semánticos de todo el corpus (un producto matriz-vector), fusionados con los léxicos.
+    semantic = legal_vector_index.semantic_candidates(
+        query_vector,
+        alias=filtered_qs.db,
+        limit=LEGAL_CANDIDATE_POOL,
+        only_current=only_current,
+    )
+    lexical_ids = {source.id for source in candidates}
+    semantic_only_ids = [source_id for source_id in semantic if source_id not in lexical_ids]
+    if semantic_only_ids:
+        candidates.extend(filtered_qs.filter(id__in=semantic_only_ids))
     candidates.sort(
         key=lambda source: (
             _score_legal_source(
@@ -1866,6 +2166,7 @@ def _fetch_candidate_sources(
                 ordenamiento=ordenamiento,
                 query_vector=query_vector,
                 today=today,
+                semantic_similarity=semantic.get(source.id),
             ),
             source.fecha_ultima_revision or date.min,
             source.updated_at,
@@ -2277,6 +2578,18 @@ def _build_structured_fallback_answer(
     return "\n".join(sections).strip()
 
 
+def _complete_legal_answer(client, messages: list[ChatMessage], *, stream: bool, **options: Any) -> Iterator[tuple[str, Any]]:
+    """Obtiene la respuesta del proveedor; con ``stream`` reenvía cada fragmento como evento ``delta``."""
+
+    if not stream:
+        return client.generate_text(messages, **options)
+    parts: list[str] = []
+    for fragment in client.stream_text(messages, **options):
+        parts.append(fragment)
+        yield "delta", fragment
+    return "".join(parts)
+
+
 def perform_legal_consultation(
     *,
     question: str,
@@ -2289,6 +2602,70 @@ def perform_legal_consultation(
     max_refs: int,
     user,
 ) -> LegalConsultation:
+    events = _legal_consultation_events(
+        question=question,
+        context=context,
+        ley=ley,
+        source_type=source_type,
+        authority=authority,
+        ordenamiento=ordenamiento,
+        only_current=only_current,
+        max_refs=max_refs,
+        user=user,
+        stream=False,
+    )
+    for event, data in events:
+        if event == "done":
+            return data
+    raise RuntimeError("La consulta legal terminó sin persistirse")
+
+
+def stream_legal_consultation(
+    *,
+    question: str,
+    context: str | None,
+    ley: str | None,
+    source_type: str | None,
+    authority: str | None,
+    ordenamiento: str | None,
+    only_current: bool,
+    max_refs: int,
+    user,
+) -> Iterator[tuple[str, Any]]:
+    """Consulta legal en eventos ``(nombre, dato)`` para entregarla conforme se genera.
+
+    ``meta`` lleva las referencias recuperadas, ``delta`` cada fragmento del proveedor,
+    ``replace`` el texto completo cuando la respuesta final no es la que se transmitió
+    (respaldo estructurado) y ``done`` la ``LegalConsultation`` ya guardada.
+    """
+
+    return _legal_consultation_events(
+        question=question,
+        context=context,
+        ley=ley,
+        source_type=source_type,
+        authority=authority,
+        ordenamiento=ordenamiento,
+        only_current=only_current,
+        max_refs=max_refs,
+        user=user,
+        stream=True,
+    )
+
+
+def _legal_consultation_events(
+    *,
+    question: str,
+    context: str | None,
+    ley: str | None,
+    source_type: str | None,
+    authority: str | None,
+    ordenamiento: str | None,
+    only_current: bool,
+    max_refs: int,
+    user,
+    stream: bool,
+) -> Iterator[tuple[str, Any]]:
     tenant = TenantContext.get_current_tenant()
     if not tenant:
         raise ValueError("Se requiere un tenant activo para consultar la biblioteca legal")
@@ -2333,6 +2710,7 @@ def perform_legal_consultation(
         )
         for ref in references
     ]
+    yield "meta", {"referencias": payload}
 
     system_prompt = (
         "Eres una asesora legal fiscal mexicana de alto nivel. Tu objetivo es proporcionar un análisis "
@@ -2352,6 +2730,9 @@ def perform_legal_consultation(
     # Integración con NotebookLM MCP & Motor de Consulta
     answer_text = ""
     model_name = "materialidad-expert-engine"
+    prompt_bytes = 0
+    cached_prefix_bytes = 0
+    answer_streamed = False
 
     # Verificamos si tenemos llaves para IA Real
     gemini_key = getattr(settings, "GEMINI_API_KEY", None)
@@ -2363,33 +2744,16 @@ def perform_legal_consultation(
             # 1. MODO GEMINI (Notebook Context)
             client = get_ai_client(tenant)  # usa key del tenant si la tiene, sino settings
             
-            # Cargamos el contenido del notebook como contexto masivo
-            notebook_path = "/home/gaibarra/materialidad/docs/fuentes/contenido_notebook.txt"
-            notebook_content = ""
-            try:
-                import os
-                if os.path.exists(notebook_path):
-                    with open(notebook_path, "r", encoding="utf-8") as f:
-                        notebook_content = f.read(750000) # Límite de 750k caracteres para evitar exceder cuota de tokens
-                else:
-                    logger.warning(f"Archivo de notebook no encontrado en {notebook_path}")
-            except Exception as e:
-                logger.error(f"Error leyendo notebook: {e}")
-
+            # El compendio se carga una vez por proceso y su prefijo se cachea del lado de Gemini.
+            compendium = get_legal_compendium()
             system_prompt = (
-                "Eres un Socio Senior de una firma fiscal líder en México, experto en materialidad y cumplimiento.\n"
-                "Tienes acceso a un COMPENDIO DE NORMATIVIDAD FISCAL detallado que se te proporciona a continuación.\n"
-                "Tu objetivo es dar una respuesta técnica, precisa y accionable basada estrictamente en este conocimiento y en el contexto del cliente.\n\n"
-                "INSTRUCCIONES DE FORMATO:\n"
-                "1. Usa Markdown con títulos descriptivos.\n"
-                "2. Abre siempre con '## 0. Conclusión Ejecutiva' e incluye tres bullets: postura, nivel de sustento y acción inmediata.\n"
-                "3. Cita específicamente leyes y artículos mencionados en el compendio.\n"
-                "4. Divide el resto de tu respuesta en: Análisis Normativo, Aplicación al Caso, Riesgos Identificados y Pasos a Seguir.\n"
-                "5. Si el compendio no contiene la información, indícalo claramente.\n\n"
-                f"--- COMPENDIO DE NORMATIVIDAD FISCAL ---\n{notebook_content}\n--- FIN DEL COMPENDIO ---"
+                compendium.system_prompt
+                if compendium is not None
+                else COMPENDIUM_SYSTEM_PROMPT.format(content="")
             )
 
-            answer_text = client.generate_text(
+            answer_text = yield from _complete_legal_answer(
+                client,
                 [
                     ChatMessage(role="system", content=system_prompt),
                     ChatMessage(role="user", content=(
@@ -2399,10 +2763,15 @@ def perform_legal_consultation(
                         f"REFERENCIAS PRIORIZADAS:\n{references_block}"
                     )),
                 ],
+                stream=stream,
                 temperature=0.1,
                 max_output_tokens=3000,
+                cache_system_prompt=True,
             )
             model_name = f"{client.model_name} (Notebook Context)"
+            prompt_bytes = client.last_prompt_bytes
+            cached_prefix_bytes = client.last_cached_prefix_bytes
+            answer_streamed = stream
 
         elif openai_key:
             # 2. MODO OPENAI: consulta real con GPT
@@ -2442,14 +2811,18 @@ def perform_legal_consultation(
                 f"Referencias disponibles:\n{references_block}"
             )
 
-            answer_text = client.generate_text(
+            answer_text = yield from _complete_legal_answer(
+                client,
                 [
                     ChatMessage(role="system", content=system_prompt),
                     ChatMessage(role="user", content=user_prompt),
                 ],
+                stream=stream,
                 temperature=0.15,
                 max_output_tokens=2000,
             )
+            prompt_bytes = client.last_prompt_bytes
+            answer_streamed = stream
         else:
             model_name = "materialidad-rag-fallback"
             answer_text = _build_structured_fallback_answer(
@@ -2465,6 +2838,7 @@ def perform_legal_consultation(
     except Exception as exc:
         logger.error("Error crítico en servicio de consulta legal", exc_info=exc)
         model_name = f"{model_name} (fallback)"
+        answer_streamed = False
         answer_text = _build_structured_fallback_answer(
             question=cleaned_question,
             context_block=context_block,
@@ -2477,6 +2851,7 @@ def perform_legal_consultation(
 
     if not answer_text.strip():
         model_name = f"{model_name} (fallback)"
+        answer_streamed = False
         answer_text = _build_structured_fallback_answer(
             question=cleaned_question,
             context_block=context_block,
@@ -2487,6 +2862,9 @@ def perform_legal_consultation(
             used_non_current_support=used_non_current_support,
         )
 
+    if stream and not answer_streamed:
+        yield "replace", answer_text.strip()
+
     consultation = LegalConsultation.objects.create(
         tenant_slug=tenant.slug,
         user=user if getattr(user, "is_authenticated", False) else None,
@@ -2495,5 +2873,18 @@ def perform_legal_consultation(
         answer=answer_text.strip(),
         references=payload,
         ai_model=model_name,
+        prompt_bytes=prompt_bytes,
+    )
+    observability_logger.info(
+        "materialidad_legal_consultation_prompt",
+        extra={
+            "metric": {
+                "tenant": tenant.slug,
+                "consultation_id": consultation.id,
+                "ai_model": model_name,
+                "prompt_bytes": prompt_bytes,
+                "cached_prefix_bytes": cached_prefix_bytes,
+            }
+        },
     )
-    return consultation
+    yield "done", consultation
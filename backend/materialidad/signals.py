@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import logging
+
+from django.db import router, transaction
+from django.db.models.signals import post_delete, post_save
+
+from .dashboard_cache import bump_dashboard_cache_version, current_cache_namespace
+from . import legal_vector_index
+from .defense_projection import mark_operation_defense_dirty
+from .models import (
+    Contrato,
+    EvidenciaMaterial,
+    FiscalDefenseIndexSnapshot,
+    LegalReferenceSource,
+    Operacion,
+    OperationDefenseProjectionOutbox,
+    Proveedor,
+    RazonNegocioAprobacion,
+)
+
+logger = logging.getLogger(__name__)
+
+DASHBOARD_SOURCE_MODELS = (Operacion, Contrato, Proveedor, FiscalDefenseIndexSnapshot)
+
+
+def invalidate_dashboard_cache(sender, instance, **kwargs) -> None:
+    # Los snapshots FDI se guardan en la BD del tenant (no están en shared_models del router),
+    # pero también traen tenant_slug: se usa ese y no el namespace activo, por si se guardan
+    # desde un comando que recorre tenants.
+    tenant_slug = getattr(instance, "tenant_slug", "") or current_cache_namespace()
+    bump_dashboard_cache_version(tenant_slug)
+    # El commit que importa es el de la BD donde se guardó la instancia (la del tenant).
+    transaction.on_commit(lambda: bump_dashboard_cache_version(tenant_slug), using=instance._state.db)
+
+
+for _model in DASHBOARD_SOURCE_MODELS:
+    post_save.connect(
+        invalidate_dashboard_cache,
+        sender=_model,
+        dispatch_uid=f"materialidad_dashboard_cache_save_{_model._meta.model_name}",
+    )
+    post_delete.connect(
+        invalidate_dashboard_cache,
+        sender=_model,
+        dispatch_uid=f"materialidad_dashboard_cache_delete_{_model._meta.model_name}",
+    )
+
+
+def _mark_defense_outbox(source: str, source_id) -> None:
+    try:
+        # El savepoint evita que un fallo del outbox aborte la transacción del guardado original;
+        # se abre en la BD a la que el router manda el outbox (la del tenant).
+        with transaction.atomic(using=router.db_for_write(OperationDefenseProjectionOutbox)):
+            mark_operation_defense_dirty(source, [source_id])
+    except Exception as exc:  # pragma: no cover - el outbox es complementario
+        logger.warning("No se pudo registrar el cambio %s:%s en el outbox de proyecciones: %s", source, source_id, exc)
+
+
+def mark_operacion_dirty(sender, instance, **kwargs) -> None:
+    _mark_defense_outbox(OperationDefenseProjectionOutbox.Source.OPERACION, instance.pk)
+
+
+def mark_evidencia_dirty(sender, instance, **kwargs) -> None:
+    _mark_defense_outbox(OperationDefenseProjectionOutbox.Source.OPERACION, instance.operacion_id)
+
+
+def mark_contrato_dirty(sender, instance, **kwargs) -> None:
+    _mark_defense_outbox(OperationDefenseProjectionOutbox.Source.CONTRATO, instance.pk)
+
+
+def mark_proveedor_dirty(sender, instance, **kwargs) -> None:
+    _mark_defense_outbox(OperationDefenseProjectionOutbox.Source.PROVEEDOR, instance.pk)
+
+
+def mark_razon_negocio_dirty(sender, instance, **kwargs) -> None:
+    _mark_defense_outbox(OperationDefenseProjectionOutbox.Source.CONTRATO, instance.contrato_id)
+
+
+post_save.connect(mark_operacion_dirty, sender=Operacion, dispatch_uid="materialidad_defense_outbox_operacion")
+for signal, suffix in ((post_save, "save"), (post_delete, "delete")):
+    signal.connect(
+        mark_evidencia_dirty,
+        sender=EvidenciaMaterial,
+        dispatch_uid=f"materialidad_defense_outbox_evidencia_{suffix}",
+    )
+post_save.connect(mark_contrato_dirty, sender=Contrato, dispatch_uid="materialidad_defense_outbox_contrato")
+post_save.connect(mark_proveedor_dirty, sender=Proveedor, dispatch_uid="materialidad_defense_outbox_proveedor")
+for signal, suffix in ((post_save, "save"), (post_delete, "delete")):
+    signal.connect(
+        mark_razon_negocio_dirty,
+        sender=RazonNegocioAprobacion,
+        dispatch_uid=f"materialidad_defense_outbox_razon_{suffix}",
+    )
+
+
+def invalidate_legal_vector_index(sender, instance, using, **kwargs) -> None:
+    # Sólo local: la carga de corpus avisa a los demás workers una vez al confirmar.
+    legal_vector_index.invalidate(using)
+
+
+for signal, suffix in ((post_save, "save"), (post_delete, "delete")):
+    signal.connect(
+        invalidate_legal_vector_index,
+        sender=LegalReferenceSource,
+        dispatch_uid=f"materialidad_legal_vector_index_{suffix}",
+    )
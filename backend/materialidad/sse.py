@@ -0,0 +1,64 @@
+"""Entrega de texto de IA como ``text/event-stream`` (SSE) conforme el proveedor lo genera.
+
+Las vistas producen eventos ``(nombre, dato)`` y ``event_stream_response`` los serializa
+como ``event: <nombre>\\ndata: <json>``. El cuerpo se consume después de que
+``TenantMiddleware`` limpió el contexto, así que el generador vuelve a activar el tenant
+de la petición mientras dura el flujo.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+from collections.abc import Iterable, Iterator
+from typing import Any
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from rest_framework.renderers import BaseRenderer
+
+from tenancy.context import TenantContext
+
+logger = logging.getLogger(__name__)
+
+
+def format_event(event: str, data: Any) -> bytes:
+    payload = json.dumps(data, ensure_ascii=False, cls=DjangoJSONEncoder)
+    return f"event: {event}\ndata: {payload}\n\n".encode("utf-8")
+
+
+class EventStreamRenderer(BaseRenderer):
+    """Permite ``Accept: text/event-stream``; sólo renderiza respuestas previas al flujo (errores)."""
+
+    media_type = "text/event-stream"
+    format = "sse"
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return format_event("error", data)
+
+
+def event_stream_response(events: Iterable[tuple[str, Any]], *, tenant_slug: str | None) -> StreamingHttpResponse:
+    def body() -> Iterator[bytes]:
+        # Un comentario SSE sale de inmediato para que proxies y cliente vean la conexión viva.
+        yield b": stream\n\n"
+        if tenant_slug:
+            TenantContext.activate(tenant_slug)
+        try:
+            for event, data in events:
+                yield format_event(event, data)
+        except Exception:
+            logger.exception("Falló la generación en streaming")
+            yield format_event("error", {"detail": "No se pudo completar la generación", "status": 500})
+        finally:
+            close = getattr(events, "close", None)
+            if callable(close):
+                close()
+            if tenant_slug:
+                TenantContext.clear()
+
+    response = StreamingHttpResponse(body(), content_type="text/event-stream; charset=utf-8")
+    response["Cache-Control"] = "no-cache"
+    # nginx no debe acumular el cuerpo: cada evento tiene que llegar al navegador al salir.
+    response["X-Accel-Buffering"] = "no"
+    return response
@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+from unittest.mock import MagicMock, patch
+
+from django.test import TestCase, override_settings
+
+from materialidad.ai import client as ai_client
+from materialidad.ai.client import get_ai_client, get_tenant_api_key
+from tenancy import ai_config_cache
+from tenancy.models import Tenant, TenantAIConfig
+
+
+@override_settings(AI_PROVIDER="openai", OPENAI_API_KEY="global-key", OPENAI_DEFAULT_MODEL="gpt-test")
+class AIClientPoolTests(TestCase):
+    def setUp(self):
+        ai_client.reset_pool()
+        ai_config_cache.invalidate()
+        self.addCleanup(ai_client.reset_pool)
+        self.addCleanup(ai_config_cache.invalidate)
+        self.tenant = Tenant.objects.create(
+            name="Pool IA",
+            slug="pool-ia",
+            db_name="tenant_pool_ia",
+            db_user="tenant_pool_ia",
+            db_password="secret",
+        )
+
+    def test_reutiliza_el_transporte_openai_por_api_key(self):
+        with patch.object(ai_client, "OpenAI", MagicMock(side_effect=lambda **kwargs: MagicMock())) as openai_cls:
+            primero = get_ai_client(self.tenant)
+            segundo = get_ai_client(self.tenant)
+            self.assertIs(primero._client, segundo._client)
+            self.assertEqual(openai_cls.call_count, 1)
+
+            TenantAIConfig.objects.create(tenant=self.tenant, api_key="tenant-key")
+            propio = get_ai_client(self.tenant)
+
+        self.assertIsNot(propio._client, primero._client)
+        self.assertEqual(openai_cls.call_args.kwargs["api_key"], "tenant-key")
+        self.assertEqual(ai_client.get_pool_stats(), {"created": 2, "reused": 1, "size": 2})
+
+    def test_key_del_tenant_se_cachea_y_se_invalida_al_guardar(self):
+        config = TenantAIConfig.objects.create(tenant=self.tenant, api_key="key-1")
+
+        with self.assertNumQueries(1):
+            self.assertEqual(get_tenant_api_key(self.tenant), "key-1")
+            self.assertEqual(get_tenant_api_key(self.tenant), "key-1")
+
+        config.api_key = "key-2"
+        config.save()
+        self.assertEqual(get_tenant_api_key(self.tenant), "key-2")
+
+        config.delete()
+        self.assertIsNone(get_tenant_api_key(self.tenant))
+
+    @override_settings(AI_PROVIDER="perplexity", PERPLEXITY_API_KEY="pplx", PERPLEXITY_DEFAULT_MODEL="sonar")
+    def test_perplexity_comparte_la_sesion_http(self):
+        primero = get_ai_client()
+        segundo = get_ai_client()
+
+        self.assertIs(primero._perplexity_session, segundo._perplexity_session)
+
+    def test_modelo_gemini_fija_su_cliente_con_la_key_con_que_se_creo(self):
+        import google.generativeai as genai
+        from google.generativeai import client as genai_client
+
+        configured: dict[str, str] = {}
+        with patch.object(genai, "configure", side_effect=lambda api_key: configured.update(key=api_key)), patch.object(
+            genai_client, "get_default_generative_client", side_effect=lambda: f"cliente-{configured['key']}"
+        ):
+            modelo_a = ai_client.get_gemini_model("key-a", "gemini-test")
+            modelo_b = ai_client.get_gemini_model("key-b", "gemini-test")
+
+        # Sin fijarlo, el modelo A tomaría en su primera llamada el cliente de la key B.
+        self.assertEqual(modelo_a._client, "cliente-key-a")
+        self.assertEqual(modelo_b._client, "cliente-key-b")
@@ -0,0 +1,220 @@
+from __future__ import annotations
+
+import threading
+import time
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from django.test import TestCase, override_settings
+
+from materialidad.ai import client as ai_client
+from materialidad.ai import latency
+from materialidad.ai.client import (
+    ChatMessage,
+    OpenAIClient,
+    OpenAIClientError,
+    OpenAIModelNotFoundError,
+    get_ai_client,
+)
+from tenancy import ai_config_cache
+from tenancy.models import Tenant, TenantAIConfig
+
+
+@override_settings(
+    AI_PROVIDER="openai",
+    OPENAI_API_KEY="global-key",
+    OPENAI_DEFAULT_MODEL="gpt-test",
+    OPENAI_FALLBACK_MODEL="gpt-fallback",
+    AI_RESPONSE_CACHE_ENABLED=False,
+    AI_HEDGING_MIN_SAMPLES=3,
+    AI_HEDGING_MIN_DELAY_SECONDS=0.01,
+)
+class AIHedgingTests(TestCase):
+    def setUp(self):
+        ai_client.reset_pool()
+        ai_config_cache.invalidate()
+        latency.reset()
+        self.addCleanup(ai_client.reset_pool)
+        self.addCleanup(ai_config_cache.invalidate)
+        self.addCleanup(latency.reset)
+        self.messages = [ChatMessage(role="user", content="Resume la operación.")]
+        self.release_primary = threading.Event()
+        self.release_fallback = threading.Event()
+        self.fallback_started = threading.Event()
+        self.addCleanup(self.release_primary.set)
+        self.addCleanup(self.release_fallback.set)
+        self.primary_error: Exception | None = None
+        self.calls: list[str] = []
+
+    def _fake_chat(self, payload, *, model_name, temperature, max_output_tokens):
+        self.calls.append(model_name)
+        if model_name == "gpt-test":
+            self.release_primary.wait(timeout=5)
+            if self.primary_error is not None:
+                raise self.primary_error
+            return "respuesta primaria"
+        self.fallback_started.set()
+        self.release_fallback.wait(timeout=5)
+        return "respuesta de respaldo"
+
+    def _when_fallback_starts(self, *events: threading.Event) -> None:
+        def release():
+            self.fallback_started.wait(timeout=5)
+            for event in events:
+                event.set()
+
+        threading.Thread(target=release, daemon=True).start()
+
+    def _fail_fast(self, error: Exception):
+        def fake(payload, *, model_name, **kwargs):
+            self.calls.append(model_name)
+            if model_name == "gpt-test":
+                raise error
+            return "respuesta de respaldo"
+
+        return fake
+
+    def _wait_for_samples(self, model: str, count: int) -> None:
+        # La llamada perdedora sigue en segundo plano: se espera a que registre su latencia
+        # para que no caiga en la ventana de la siguiente prueba.
+        deadline = time.monotonic() + 5
+        while latency.percentiles("openai", model)["samples"] < count and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(latency.percentiles("openai", model)["samples"], count)
+
+    def _seed_latency(self):
+        for _ in range(3):
+            latency.record("openai", "gpt-test", 0.005)
+
+    def _client(self, **kwargs) -> OpenAIClient:
+        transport = SimpleNamespace(chat=SimpleNamespace(completions=None))
+        with patch.object(ai_client, "get_openai_transport", return_value=transport):
+            return OpenAIClient(**kwargs)
+
+    def test_el_tenant_activa_el_hedging_desde_su_configuracion(self):
+        tenant = Tenant.objects.create(
+            name="Hedging",
+            slug="hedging",
+            db_name="tenant_hedging",
+            db_user="tenant_hedging",
+            db_password="secret",
+        )
+        self.assertFalse(get_ai_client(tenant)._hedging)
+
+        TenantAIConfig.objects.create(tenant=tenant, metadata={"hedging": True})
+        with self.assertNumQueries(1):
+            self.assertTrue(get_ai_client(tenant)._hedging)
+
+    def test_primario_lento_se_cubre_y_gana_el_respaldo_sin_esperarlo(self):
+        self._seed_latency()
+        self.release_fallback.set()
+        client = self._client(hedging=True)
+
+        with patch.object(OpenAIClient, "_generate_via_chat", side_effect=self._fake_chat):
+            started = time.monotonic()
+            text = client.generate_text(self.messages)
+            elapsed = time.monotonic() - started
+
+        self.assertEqual(text, "respuesta de respaldo")
+        self.assertEqual(client.model_name, "gpt-fallback")
+        self.assertLess(elapsed, 2)
+        self.assertEqual(self.calls, ["gpt-test", "gpt-fallback"])
+        stats = latency.get_stats()
+        self.assertEqual(stats["outcomes"]["hedged_fallback"], 1)
+        self.assertEqual(stats["hedge_win_ratio"], 1.0)
+
+        self.release_primary.set()
+        self._wait_for_samples("gpt-test", 4)
+
+    def test_primario_lento_que_falla_cede_al_respaldo_ya_lanzado(self):
+        self._seed_latency()
+        self.primary_error = OpenAIClientError("timeout")
+        self._when_fallback_starts(self.release_primary, self.release_fallback)
+        client = self._client(hedging=True)
+
+        with patch.object(OpenAIClient, "_generate_via_chat", side_effect=self._fake_chat):
+            text = client.generate_text(self.messages)
+
+        self.assertEqual(text, "respuesta de respaldo")
+        self.assertEqual(latency.get_stats()["outcomes"]["hedged_fallback"], 1)
+        self._wait_for_samples("gpt-test", 4)
+
+    def test_primario_que_responde_antes_que_el_respaldo_gana_la_cobertura(self):
+        self._seed_latency()
+        self._when_fallback_starts(self.release_primary)
+        client = self._client(hedging=True)
+
+        with patch.object(OpenAIClient, "_generate_via_chat", side_effect=self._fake_chat):
+            text = client.generate_text(self.messages)
+
+        self.assertEqual(text, "respuesta primaria")
+        self.assertEqual(client.model_name, "gpt-test")
+        self.assertEqual(latency.get_stats()["outcomes"]["hedged_primary"], 1)
+
+    @override_settings(AI_HEDGING_MIN_DELAY_SECONDS=5)
+    def test_error_del_primario_antes_de_cubrirse_no_pasa_al_respaldo(self):
+        self._seed_latency()
+        client = self._client(hedging=True)
+
+        with patch.object(OpenAIClient, "_generate_via_chat", side_effect=self._fail_fast(OpenAIClientError("cuota"))):
+            with self.assertRaises(OpenAIClientError):
+                client.generate_text(self.messages)
+
+        self.assertEqual(self.calls, ["gpt-test"])
+        self.assertEqual(latency.get_stats()["outcomes"]["failed"], 1)
+        # La llamada fallida también cuenta en la ventana de latencia.
+        self.assertEqual(latency.percentiles("openai", "gpt-test")["samples"], 4)
+
+    @override_settings(AI_HEDGING_MIN_DELAY_SECONDS=5)
+    def test_modelo_inexistente_antes_de_cubrirse_pasa_al_respaldo(self):
+        self._seed_latency()
+        client = self._client(hedging=True)
+
+        with patch.object(
+            OpenAIClient, "_generate_via_chat", side_effect=self._fail_fast(OpenAIModelNotFoundError("gpt-test"))
+        ):
+            text = client.generate_text(self.messages)
+
+        self.assertEqual(text, "respuesta de respaldo")
+        self.assertEqual(self.calls, ["gpt-test", "gpt-fallback"])
+        self.assertEqual(latency.get_stats()["outcomes"]["failover"], 1)
+
+    def test_sin_lugar_en_el_pool_se_omite_la_cobertura(self):
+        self._seed_latency()
+        _, slots = latency._get_executor()
+        taken = 0
+        while slots.acquire(blocking=False):
+            taken += 1
+        self.addCleanup(lambda: [slots.release() for _ in range(taken)])
+        timer = threading.Timer(0.1, self.release_primary.set)
+        timer.start()
+        self.addCleanup(timer.cancel)
+        client = self._client(hedging=True)
+
+        with patch.object(OpenAIClient, "_generate_via_chat", side_effect=self._fake_chat):
+            text = client.generate_text(self.messages)
+
+        self.assertEqual(text, "respuesta primaria")
+        self.assertEqual(self.calls, ["gpt-test"])
+        self.assertEqual(latency.get_stats()["outcomes"]["skipped"], 1)
+
+    def test_sin_muestras_suficientes_no_se_cubre(self):
+        self.release_primary.set()
+        client = self._client(hedging=True)
+
+        with patch.object(OpenAIClient, "_generate_via_chat", side_effect=self._fake_chat):
+            text = client.generate_text(self.messages)
+
+        self.assertEqual(text, "respuesta primaria")
+        self.assertEqual(self.calls, ["gpt-test"])
+        self.assertEqual(latency.percentiles("openai", "gpt-test")["samples"], 1)
+        self.assertEqual(latency.get_stats()["outcomes"]["hedged_fallback"], 0)
+
+    def test_la_latencia_se_registra_tambien_cuando_la_llamada_falla(self):
+        client = self._client()
+
+        with patch.object(OpenAIClient, "_generate_via_chat", side_effect=self._fail_fast(OpenAIClientError("timeout"))):
+            with self.assertRaises(OpenAIClientError):
+                client.generate_text(self.messages)
+
+        self.assertEqual(latency.percentiles("openai", "gpt-test")["samples"], 1)
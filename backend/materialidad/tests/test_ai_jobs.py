@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.db import connections
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from materialidad import ai_jobs, views
+from materialidad.models import AIJob, ContractDocument, Contrato, Empresa
+from tenancy.context import TenantContext
+from tenancy.models import Tenant
+
+
+class _StubAIClient:
+    model_name = "stub-openai-model"
+    last_prompt_bytes = 0
+    last_cached_prefix_bytes = 0
+
+    def generate_text(self, messages, temperature=0.0, max_output_tokens=0, cache_system_prompt=False):
+        return "## 1. Análisis Normativo\nRespuesta diferida."
+
+
+@override_settings(TENANT_REQUIRED_PATH_PREFIXES=["/api/materialidad/"], OPENAI_API_KEY="test-key", AI_PROVIDER="openai")
+class AIJobQueueTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self._base_connection_aliases = set(connections.databases.keys())
+        self.user = User.objects.create_user(email="cola@example.com", password="Password123!")
+        self.tenant = Tenant.objects.create(
+            name="Cola IA",
+            slug="cola-ia",
+            db_name="tenant_cola_ia",
+            db_user="tenant_cola_ia",
+            db_password="secret",
+        )
+        self.other_tenant = Tenant.objects.create(
+            name="Otra Cola",
+            slug="otra-cola",
+            db_name="tenant_otra_cola",
+            db_user="tenant_otra_cola",
+            db_password="secret",
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def tearDown(self):
+        TenantContext.clear()
+        for alias in list(connections.databases.keys()):
+            if alias in self._base_connection_aliases:
+                continue
+            if alias in connections:
+                connections[alias].close()
+            connections.databases.pop(alias, None)
+            if hasattr(connections, "_connections") and hasattr(connections._connections, alias):
+                delattr(connections._connections, alias)
+
+    @patch("materialidad.services.get_ai_client", return_value=_StubAIClient())
+    def test_consulta_asincrona_responde_202_y_el_worker_guarda_el_resultado(self, _mock_get_ai_client):
+        response = self.client.post(
+            "/api/materialidad/consultas-legales/?asincrono=true",
+            {"pregunta": "¿Qué dice el artículo 5 del CFF?", "max_referencias": 3},
+            format="json",
+            HTTP_X_TENANT=self.tenant.slug,
+        )
+
+        self.assertEqual(response.status_code, 202, response.data)
+        self.assertEqual(response.data["estatus"], AIJob.Status.PENDIENTE)
+        self.assertTrue(response["Location"].endswith(f"/api/materialidad/tareas-ia/{response.data['id']}/"))
+        _mock_get_ai_client.assert_not_called()
+
+        out = StringIO()
+        call_command("process_ai_jobs", stdout=out)
+
+        job = AIJob.objects.get(pk=response.data["id"])
+        self.assertEqual((job.estatus, job.codigo_respuesta, job.tenant_slug), ("COMPLETADO", 201, "cola-ia"))
+        self.assertIsNone(job.encolado_en)
+        self.assertIn("Respuesta diferida", job.resultado["respuesta"])
+
+        estado = self.client.get(f"/api/materialidad/tareas-ia/{job.pk}/", HTTP_X_TENANT=self.tenant.slug)
+        self.assertEqual(estado.status_code, 200)
+        self.assertEqual(estado.data["resultado"]["id"], job.resultado["id"])
+        otro = self.client.get(f"/api/materialidad/tareas-ia/{job.pk}/", HTTP_X_TENANT=self.other_tenant.slug)
+        self.assertEqual(otro.status_code, 404)
+
+    def test_peticion_invalida_no_se_encola(self):
+        response = self.client.post(
+            "/api/materialidad/consultas-legales/",
+            {"asincrono": True},
+            format="json",
+            HTTP_X_TENANT=self.tenant.slug,
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(AIJob.objects.exists())
+
+    def test_excepcion_reintenta_hasta_agotar_intentos(self):
+        job = ai_jobs.enqueue_ai_job(
+            AIJob.Kind.CONSULTA_LEGAL,
+            tenant_slug=self.tenant.slug,
+            user=self.user,
+            parametros={"pregunta": "x"},
+        )
+
+        with patch.object(ai_jobs, "_resolve_handler", return_value=lambda job: 1 / 0):
+            for intento in (1, 2):
+                claimed = ai_jobs.claim_next_ai_job(max_attempts=2)
+                self.assertEqual((claimed.pk, claimed.intentos), (job.pk, intento))
+                with self.assertRaises(ZeroDivisionError):
+                    ai_jobs.run_ai_job(claimed, max_attempts=2)
+
+        self.assertIsNone(ai_jobs.claim_next_ai_job(max_attempts=2))
+        job.refresh_from_db()
+        self.assertEqual(job.estatus, AIJob.Status.ERROR)
+        self.assertIsNone(job.encolado_en)
+        self.assertIsNotNone(job.finalizado_en)
+
+    def test_reintento_de_contrato_reutiliza_el_contrato_ya_creado(self):
+        empresa = Empresa.objects.create(
+            razon_social="Empresa Cola SA de CV",
+            rfc="ECO010101AAA",
+            regimen_fiscal="601",
+            estado="CDMX",
+        )
+        job = ai_jobs.enqueue_ai_job(
+            AIJob.Kind.CONTRATO,
+            tenant_slug=self.tenant.slug,
+            user=self.user,
+            parametros={"empresa": empresa.pk, "resumen_necesidades": "Servicios de limpieza"},
+        )
+        borrador = {"documento_markdown": "# Contrato", "idioma": "es", "tono": "formal", "modelo": "stub"}
+
+        with patch(
+            "materialidad.views.generate_contract_document",
+            side_effect=[RuntimeError("corte del proveedor"), borrador],
+        ):
+            with self.assertRaises(RuntimeError):
+                views.run_contract_generation_job(job)
+            # El reintento lee la tarea de nuevo, como ``claim_next_ai_job``.
+            status_code, body = views.run_contract_generation_job(AIJob.objects.get(pk=job.pk))
+
+        self.assertEqual(status_code, 200)
+        contrato = Contrato.objects.get()
+        self.assertEqual(body["contrato_id"], contrato.id)
+        self.assertEqual(ContractDocument.objects.filter(contrato=contrato).count(), 1)
+        job.refresh_from_db()
+        self.assertEqual(job.estatus, AIJob.Status.COMPLETADO)
+        self.assertEqual(ai_jobs.ai_job_effect(job, "contrato_id"), contrato.id)
+
+    def test_tarea_cerrada_por_el_handler_no_se_vuelve_a_ejecutar(self):
+        job = ai_jobs.enqueue_ai_job(
+            AIJob.Kind.CONSULTA_LEGAL,
+            tenant_slug=self.tenant.slug,
+            user=self.user,
+            parametros={"pregunta": "x"},
+        )
+
+        def handler(job):
+            ai_jobs.complete_ai_job(job, status_code=201, body={"id": 7})
+            raise ConnectionError("se perdió la conexión tras guardar la consulta")
+
+        with patch.object(ai_jobs, "_resolve_handler", return_value=handler):
+            claimed = ai_jobs.claim_next_ai_job(max_attempts=2)
+            ai_jobs.run_ai_job(claimed, max_attempts=2)
+
+        self.assertIsNone(ai_jobs.claim_next_ai_job(max_attempts=2))
+        job.refresh_from_db()
+        self.assertEqual((job.estatus, job.codigo_respuesta, job.resultado), (AIJob.Status.COMPLETADO, 201, {"id": 7}))
@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from materialidad.ai import client as ai_client
+from materialidad.ai import response_cache
+from materialidad.ai.client import ChatMessage, OpenAIClient
+
+
+@override_settings(AI_PROVIDER="openai", OPENAI_API_KEY="global-key", OPENAI_DEFAULT_MODEL="gpt-test")
+class AIResponseCacheTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        response_cache.reset()
+        ai_client.reset_pool()
+        self.addCleanup(cache.clear)
+        self.addCleanup(response_cache.reset)
+        self.addCleanup(ai_client.reset_pool)
+        self.messages = [
+            ChatMessage(role="system", content="Devuelve JSON."),
+            ChatMessage(role="user", content="Resume el contrato."),
+        ]
+
+    def _generate(self, client: OpenAIClient, messages=None, **kwargs) -> str:
+        return client.generate_text(
+            messages or self.messages,
+            temperature=0.2,
+            max_output_tokens=700,
+            cache_feature="fdi_narrative",
+            **kwargs,
+        )
+
+    def test_peticion_identica_no_vuelve_al_proveedor(self):
+        client = OpenAIClient(cache_scope="tenant:1")
+        with patch.object(OpenAIClient, "_generate_uncached", side_effect=["uno", "dos"]) as generate:
+            self.assertEqual(self._generate(client), "uno")
+            self.assertFalse(client.last_response_cached)
+            # Espacios finales y CRLF no cambian la llave.
+            variante = [
+                ChatMessage(role="system", content="Devuelve JSON.  \r\n"),
+                ChatMessage(role="user", content="Resume el contrato."),
+            ]
+            self.assertEqual(self._generate(OpenAIClient(cache_scope="tenant:1"), variante), "uno")
+
+        self.assertEqual(generate.call_count, 1)
+        stats = response_cache.get_stats()["features"]["fdi_narrative"]
+        self.assertEqual((stats["hits"], stats["misses"], stats["hit_ratio"]), (1, 1, 0.5))
+
+    def test_tenants_distintos_y_bypass_no_comparten_respuesta(self):
+        with patch.object(OpenAIClient, "_generate_uncached", side_effect=["a", "b", "c"]):
+            self.assertEqual(self._generate(OpenAIClient(cache_scope="tenant:1")), "a")
+            self.assertEqual(self._generate(OpenAIClient(cache_scope="tenant:2")), "b")
+            self.assertEqual(self._generate(OpenAIClient(cache_scope="tenant:1"), bypass_cache=True), "c")
+            # El bypass refresca la entrada.
+            self.assertEqual(self._generate(OpenAIClient(cache_scope="tenant:1")), "c")
+
+        self.assertEqual(response_cache.get_stats()["features"]["fdi_narrative"]["bypassed"], 1)
+
+    def test_segundo_worker_lee_del_cache_compartido(self):
+        with patch.object(OpenAIClient, "_generate_uncached", return_value="compartida") as generate:
+            self._generate(OpenAIClient())
+            response_cache.reset()  # simula otro proceso: LRU vacío, cache de Django poblado
+            self.assertEqual(self._generate(OpenAIClient()), "compartida")
+
+        self.assertEqual(generate.call_count, 1)
+        self.assertEqual(response_cache.get_stats()["local_entries"], 1)
+
+    @override_settings(AI_RESPONSE_CACHE_ENABLED=False)
+    def test_desactivado_siempre_llama_al_proveedor(self):
+        with patch.object(OpenAIClient, "_generate_uncached", return_value="x") as generate:
+            self._generate(OpenAIClient())
+            self._generate(OpenAIClient())
+
+        self.assertEqual(generate.call_count, 2)
+
+    def test_lru_local_respeta_el_tope_de_bytes(self):
+        with override_settings(AI_RESPONSE_CACHE_LOCAL_MAX_BYTES=200):
+            for index in range(20):
+                response_cache.get_or_generate(
+                    feature="redlines",
+                    scope="global",
+                    provider="openai",
+                    model="gpt-test",
+                    messages=[{"role": "user", "content": f"cambio {index}"}],
+                    temperature=0.15,
+                    max_output_tokens=1100,
+                    generate=lambda index=index: {"resumen": f"resumen {index}"},
+                )
+
+        stats = response_cache.get_stats()
+        self.assertLessEqual(stats["local_bytes"], 200)
+        self.assertLess(stats["local_entries"], 20)
+
+    def test_reporte_de_hit_ratio_por_funcionalidad(self):
+        with patch.object(OpenAIClient, "_generate_uncached", return_value="x"):
+            for _ in range(4):
+                self._generate(OpenAIClient())
+
+        out = StringIO()
+        call_command("report_ai_response_cache", "--feature", "fdi_narrative", stdout=out)
+        self.assertIn("fdi_narrative: hit_ratio=75.00% hits=3 misses=1", out.getvalue())
+
+
+@override_settings(
+    AI_PROVIDER="openai",
+    OPENAI_API_KEY="global-key",
+    OPENAI_DEFAULT_MODEL="gpt-test",
+    TENANT_REQUIRED_PATH_PREFIXES=[],
+)
+class AIRegenerationViewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        response_cache.reset()
+        ai_client.reset_pool()
+        self.addCleanup(cache.clear)
+        self.addCleanup(response_cache.reset)
+        self.addCleanup(ai_client.reset_pool)
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(email="regenerar@example.com", password="Password123!"))
+
+    def _optimizar(self, path="/api/materialidad/contratos/optimizar-clausula/", **extra):
+        return self.client.post(
+            path,
+            {"texto_clausula": "El proveedor entregará reportes mensuales.", **extra},
+            format="json",
+        )
+
+    def test_regenerar_ignora_la_respuesta_cacheada_y_la_refresca(self):
+        with patch.object(OpenAIClient, "_generate_uncached", side_effect=["primera", "segunda"]) as generate:
+            primera = self._optimizar()
+            cacheada = self._optimizar()
+            regenerada = self._optimizar("/api/materialidad/contratos/optimizar-clausula/?regenerar=true")
+            refrescada = self._optimizar()
+
+        self.assertEqual(primera.status_code, 200, primera.data)
+        self.assertEqual(
+            [response.data["texto_mejorado"] for response in (primera, cacheada, regenerada, refrescada)],
+            ["primera", "primera", "segunda", "segunda"],
+        )
+        self.assertEqual(generate.call_count, 2)
+        self.assertEqual(response_cache.get_stats()["features"]["clause_optimizer"]["bypassed"], 1)
+
+    def test_regenerar_en_el_cuerpo_llega_a_redlines(self):
+        with patch("materialidad.views.analyze_redlines", return_value={"segmentos": []}) as analyze:
+            response = self.client.post(
+                "/api/materialidad/contratos/redlines/",
+                {"texto_original": "Cláusula A", "texto_revisado": "Cláusula B", "regenerar": "true"},
+                format="json",
+            )
+
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertTrue(analyze.call_args.kwargs["bypass_cache"])
@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+import json
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.db import connections
+from django.test import SimpleTestCase, TestCase, override_settings
+from openai import APIError
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from materialidad.ai import client as ai_client
+from materialidad.ai import response_cache
+from materialidad.ai.client import ChatMessage, OpenAIClient, OpenAIClientError
+from materialidad.models import LegalConsultation
+from tenancy.context import TenantContext
+from tenancy.models import Tenant
+
+
+def _parse_events(response) -> list[tuple[str, object]]:
+    body = b"".join(response.streaming_content).decode("utf-8")
+    events = []
+    for block in body.split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines() if not line.startswith(":"))
+        if "event" in lines:
+            events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+class _StreamingStubClient:
+    model_name = "stub-openai-model"
+    last_prompt_bytes = 0
+    last_cached_prefix_bytes = 0
+
+    def __init__(self, fragments, *, fail_after: bool = False):
+        self.fragments = fragments
+        self.fail_after = fail_after
+
+    def stream_text(self, messages, temperature=0.0, max_output_tokens=0, cache_system_prompt=False):
+        yield from self.fragments
+        if self.fail_after:
+            raise OpenAIClientError("corte de red")
+
+
+@override_settings(TENANT_REQUIRED_PATH_PREFIXES=["/api/materialidad/"], OPENAI_API_KEY="test-key", AI_PROVIDER="openai")
+class LegalConsultationStreamTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self._base_connection_aliases = set(connections.databases.keys())
+        self.user = User.objects.create_user(email="sse@example.com", password="Password123!")
+        self.tenant = Tenant.objects.create(
+            name="Streaming",
+            slug="streaming",
+            db_name="tenant_streaming",
+            db_user="tenant_streaming",
+            db_password="secret",
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def tearDown(self):
+        TenantContext.clear()
+        for alias in list(connections.databases.keys()):
+            if alias in self._base_connection_aliases:
+                continue
+            if alias in connections:
+                connections[alias].close()
+            connections.databases.pop(alias, None)
+            if hasattr(connections, "_connections") and hasattr(connections._connections, alias):
+                delattr(connections._connections, alias)
+
+    def _stream(self):
+        return self.client.post(
+            "/api/materialidad/consultas-legales/stream/",
+            {"pregunta": "¿Qué dice el artículo 5 del CFF?", "max_referencias": 3},
+            format="json",
+            HTTP_X_TENANT=self.tenant.slug,
+            HTTP_ACCEPT="text/event-stream",
+        )
+
+    def test_fragmentos_llegan_en_orden_y_la_consulta_se_guarda_al_final(self):
+        stub = _StreamingStubClient(["## 0. Conclusión", " Ejecutiva\n", "Respuesta en vivo."])
+        with patch("materialidad.services.get_ai_client", return_value=stub):
+            response = self._stream()
+            self.assertEqual(response.status_code, 200)
+            self.assertTrue(response["Content-Type"].startswith("text/event-stream"))
+            self.assertEqual(response["X-Accel-Buffering"], "no")
+            events = _parse_events(response)
+
+        names = [name for name, _ in events]
+        self.assertEqual(names, ["meta", "delta", "delta", "delta", "done"])
+        done = events[-1][1]
+        consultation = LegalConsultation.objects.get(pk=done["id"])
+        self.assertEqual(consultation.answer, "## 0. Conclusión Ejecutiva\nRespuesta en vivo.")
+        self.assertEqual((consultation.tenant_slug, consultation.ai_model), ("streaming", "stub-openai-model"))
+
+    def test_corte_del_proveedor_envia_respaldo_completo(self):
+        stub = _StreamingStubClient(["Respuesta parcial"], fail_after=True)
+        with patch("materialidad.services.get_ai_client", return_value=stub):
+            events = _parse_events(self._stream())
+
+        names = [name for name, _ in events]
+        self.assertEqual(names, ["meta", "delta", "replace", "done"])
+        consultation = LegalConsultation.objects.get(pk=events[-1][1]["id"])
+        self.assertEqual(consultation.answer, events[2][1])
+        self.assertTrue(consultation.ai_model.endswith("(fallback)"))
+
+
+class _FakeChatCompletions:
+    def __init__(self):
+        self.calls = []
+
+    def create(self, **kwargs):
+        self.calls.append(kwargs)
+        if "max_tokens" in kwargs:
+            raise APIError("Unsupported parameter: 'max_tokens'; use 'max_completion_tokens'", request=None, body=None)
+        return iter(
+            [
+                SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=text))])
+                for text in ("Hola", " ", "mundo")
+            ]
+        )
+
+
+@override_settings(AI_PROVIDER="openai", OPENAI_API_KEY="global-key", OPENAI_DEFAULT_MODEL="gpt-test")
+class OpenAIStreamTextTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        response_cache.reset()
+        ai_client.reset_pool()
+        self.addCleanup(cache.clear)
+        self.addCleanup(response_cache.reset)
+        self.addCleanup(ai_client.reset_pool)
+
+    def test_chat_reintenta_parametros_y_cachea_el_texto_completo(self):
+        completions = _FakeChatCompletions()
+        transport = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+        messages = [ChatMessage(role="user", content="Saluda.")]
+
+        with patch.object(ai_client, "get_openai_transport", return_value=transport):
+            client = OpenAIClient(cache_scope="tenant:1")
+            first = list(client.stream_text(messages, cache_feature="contract_document"))
+            second = list(client.stream_text(messages, cache_feature="contract_document"))
+
+        self.assertEqual(first, ["Hola", " ", "mundo"])
+        self.assertEqual(second, ["Hola mundo"])
+        self.assertTrue(client.last_response_cached)
+        self.assertEqual(len(completions.calls), 2)
+        self.assertTrue(all(call["stream"] for call in completions.calls))
+        self.assertIn("max_completion_tokens", completions.calls[-1])
@@ -32,7 +32,7 @@ class CaptureFDISnapshotsCommandTests(TestCase):
         mock_activate,
         mock_clear,
     ):
-        mock_refresh.return_value = [object()] * 5
+        mock_refresh.return_value = 5
         mock_snapshot.return_value = FiscalDefenseIndexSnapshot.objects.create(
             tenant_slug=self.tenant.slug,
             empresa_id=None,
@@ -50,6 +50,7 @@ class CaptureFDISnapshotsCommandTests(TestCase):
             pipeline_version="pipeline-v1",
             inputs_json={},
             actions_json=[],
+            legacy_comparison_json={"legacy_score": 68.0, "score_delta": 2.0},
             source="test",
         )
         stdout = StringIO()
@@ -66,7 +67,7 @@ class CaptureFDISnapshotsCommandTests(TestCase):
 
         mock_activate.assert_called_once_with(self.tenant.slug)
         mock_refresh.assert_called_once_with(days=30, empresa_id=None, tenant_slug=self.tenant.slug)
-        mock_snapshot.assert_called_once_with(days=30, empresa_id=None, source="command")
+        mock_snapshot.assert_called_once_with(days=30, empresa_id=None, source="command", legacy_comparison=True)
         mock_clear.assert_called_once()
         self.assertIn("5 operaciones", stdout.getvalue())
         run = FDIJobRun.objects.get()
@@ -74,6 +75,7 @@ class CaptureFDISnapshotsCommandTests(TestCase):
         self.assertEqual(run.status, FDIJobRun.Status.SUCCESS)
         self.assertEqual(run.projections_synced, 5)
         self.assertEqual(run.snapshots_created, 1)
+        self.assertEqual(run.metadata_json["legacy_comparison"]["score_delta"], 2.0)
 
     @patch("materialidad.management.commands.capture_fdi_snapshots.TenantContext.clear")
     @patch("materialidad.management.commands.capture_fdi_snapshots.TenantContext.activate")
@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+from datetime import date
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from materialidad.dashboard_cache import build_dashboard_cache_key, bump_dashboard_cache_version
+from materialidad.models import Empresa, Operacion, Proveedor
+
+
+@override_settings(TENANT_REQUIRED_PATH_PREFIXES=[])
+class DashboardCacheInvalidationTests(TestCase):
+    url = "/api/materialidad/dashboard/executive-summary/"
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(email="qa.cache@example.com", password="Password123!")
+        self.client.force_authenticate(user=self.user)
+        self.empresa = Empresa.objects.create(
+            razon_social="Empresa Cache SA de CV",
+            rfc="ECA010101AAA",
+            regimen_fiscal="601",
+            estado="CDMX",
+        )
+        self.proveedor = Proveedor.objects.create(razon_social="Proveedor Cache SA de CV", rfc="PCA010101AAA")
+
+    def tearDown(self):
+        cache.clear()
+
+    def _crear_operacion(self) -> Operacion:
+        return Operacion.objects.create(
+            empresa=self.empresa,
+            proveedor=self.proveedor,
+            monto="1500.00",
+            moneda=Operacion.Moneda.MXN,
+            fecha_operacion=date(2026, 2, 10),
+            tipo_operacion=Operacion.TipoOperacion.SERVICIO,
+            concepto="Servicio cache",
+        )
+
+    def test_summary_is_served_from_cache_until_source_rows_change(self):
+        first = self.client.get(self.url)
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first.data["total_ops_count"], 0)
+
+        with self.assertNumQueries(0):
+            cached = self.client.get(self.url)
+        self.assertEqual(cached.data["timestamp"], first.data["timestamp"])
+
+        operacion = self._crear_operacion()
+        refreshed = self.client.get(self.url)
+        self.assertEqual(refreshed.data["total_ops_count"], 1)
+
+        operacion.delete()
+        after_delete = self.client.get(self.url)
+        self.assertEqual(after_delete.data["total_ops_count"], 0)
+
+    def test_cache_keys_are_namespaced_and_versioned_per_tenant(self):
+        key_a = build_dashboard_cache_key("executive_summary", "tenant-a", {"path": self.url})
+        key_b = build_dashboard_cache_key("executive_summary", "tenant-b", {"path": self.url})
+        self.assertNotEqual(key_a, key_b)
+
+        bump_dashboard_cache_version("tenant-a")
+
+        self.assertNotEqual(build_dashboard_cache_key("executive_summary", "tenant-a", {"path": self.url}), key_a)
+        self.assertEqual(build_dashboard_cache_key("executive_summary", "tenant-b", {"path": self.url}), key_b)
+
+    def test_saves_inside_a_tenant_only_invalidate_that_tenant(self):
+        key_global = build_dashboard_cache_key("executive_summary", "global", {"path": self.url})
+        with patch("materialidad.signals.current_cache_namespace", return_value="tenant-a"):
+            self.proveedor.save()
+
+        self.assertEqual(build_dashboard_cache_key("executive_summary", "global", {"path": self.url}), key_global)
@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import shutil
+import tempfile
 from datetime import date, timedelta
 from unittest.mock import patch
 from uuid import uuid4
@@ -18,6 +20,9 @@ from materialidad.defense_projection import sync_operation_defense_projection
 @override_settings(TENANT_REQUIRED_PATH_PREFIXES=[])
 class DashboardCoberturaP0Tests(TestCase):
     def setUp(self):
+        self.media_dir = tempfile.mkdtemp(prefix="materialidad-evidencias-")
+        self.override = override_settings(MEDIA_ROOT=self.media_dir)
+        self.override.enable()
         self.client = APIClient()
         self.user = User.objects.create_user(email="qa.dashboard@example.com", password="Password123!")
         self.client.force_authenticate(user=self.user)
@@ -41,6 +46,10 @@ class DashboardCoberturaP0Tests(TestCase):
             tipo_empresa=Contrato.TipoEmpresa.SERVICIOS,
         )
 
+    def tearDown(self):
+        self.override.disable()
+        shutil.rmtree(self.media_dir, ignore_errors=True)
+
     def _crear_operacion(self, **kwargs) -> Operacion:
         defaults = {
             "empresa": self.empresa,
@@ -138,6 +147,37 @@ class DashboardCoberturaP0Tests(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response.data["coverage"]["total_operaciones"], 1)
 
+    def test_dashboard_cobertura_p0_trend_evalua_faltantes_una_vez_por_operacion(self):
+        today = timezone.localdate()
+        riesgo = {"riesgo_materialidad": {"nivel": "BAJO", "score": 0, "motivos": []}}
+        self._crear_operacion(
+            fecha_operacion=today,
+            estatus_validacion=Operacion.EstatusValidacion.VALIDADO,
+            metadata=riesgo,
+        )
+        self._crear_operacion(fecha_operacion=today - timedelta(days=6), metadata=riesgo)
+        self._crear_operacion(fecha_operacion=today - timedelta(days=7), metadata=riesgo)
+        self._crear_operacion(fecha_operacion=today - timedelta(days=40), metadata=riesgo)
+
+        from materialidad import services
+
+        with patch(
+            "materialidad.services.get_operacion_faltantes_materialidad",
+            wraps=services.get_operacion_faltantes_materialidad,
+        ) as mock_faltantes:
+            response = self.client.get("/api/materialidad/dashboard/metricas/cobertura-p0/?days=28")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(mock_faltantes.call_count, 3)
+        trend = response.data["trend_weekly"]
+        self.assertEqual(len(trend), 4)
+        self.assertEqual(trend[-1]["week_end"], today.isoformat())
+        self.assertEqual(trend[-1]["total_operaciones"], 2)
+        self.assertEqual(trend[-1]["validadas"], 1)
+        self.assertEqual(trend[-1]["incompletas"], 2)
+        self.assertEqual(trend[-2]["total_operaciones"], 1)
+        self.assertEqual(sum(week["total_operaciones"] for week in trend), 3)
+
     @patch("materialidad.services.AlertaOperacion.objects.filter", side_effect=DatabaseError("table missing"))
     def test_dashboard_cobertura_p0_no_falla_si_alertas_no_disponibles(self, _mock_alertas_filter):
         self._crear_operacion(empresa=self.empresa, proveedor=self.proveedor)
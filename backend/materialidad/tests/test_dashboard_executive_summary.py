@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+from datetime import date
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from materialidad.models import Empresa, Operacion, Proveedor
+
+
+@override_settings(TENANT_REQUIRED_PATH_PREFIXES=[])
+class ExecutiveDashboardSummaryTests(TestCase):
+    url = "/api/materialidad/dashboard/executive-summary/"
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(email="qa.summary@example.com", password="Password123!")
+        self.client.force_authenticate(user=self.user)
+        self.proveedor_sano = Proveedor.objects.create(razon_social="Proveedor Sano SA de CV", rfc="PSA010101AAA")
+        self.proveedor_efos = Proveedor.objects.create(
+            razon_social="Proveedor EFOS SA de CV",
+            rfc="PEF010101AAA",
+            estatus_69b="DEFINITIVO",
+        )
+        self._empresas = 0
+
+    def tearDown(self):
+        cache.clear()
+
+    def _crear_empresa(self) -> Empresa:
+        self._empresas += 1
+        empresa = Empresa.objects.create(
+            razon_social=f"Empresa Resumen {self._empresas} SA de CV",
+            rfc=f"ERS0101{self._empresas:02d}AAA",
+            regimen_fiscal="601",
+            estado="CDMX",
+        )
+        self._crear_operacion(
+            empresa,
+            self.proveedor_sano,
+            "3000.00",
+            estatus_validacion=Operacion.EstatusValidacion.VALIDADO,
+            cfdi_estatus=Operacion.EstatusCFDI.VALIDO,
+        )
+        self._crear_operacion(empresa, self.proveedor_efos, "1000.00")
+        return empresa
+
+    def _crear_operacion(self, empresa, proveedor, monto, **kwargs) -> Operacion:
+        defaults = {
+            "empresa": empresa,
+            "proveedor": proveedor,
+            "monto": monto,
+            "moneda": Operacion.Moneda.MXN,
+            "fecha_operacion": date(2026, 2, 10),
+            "tipo_operacion": Operacion.TipoOperacion.SERVICIO,
+            "concepto": "Servicio resumen",
+            "estatus_validacion": Operacion.EstatusValidacion.PENDIENTE,
+        }
+        defaults.update(kwargs)
+        return Operacion.objects.create(**defaults)
+
+    def _get_counting_queries(self):
+        cache.clear()
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        return response, len(ctx.captured_queries)
+
+    def test_payload_matches_per_empresa_semantics(self):
+        empresa = self._crear_empresa()
+        vacia = Empresa.objects.create(
+            razon_social="Empresa Sin Operaciones SA de CV",
+            rfc="ESO010101AAA",
+            regimen_fiscal="601",
+            estado="CDMX",
+        )
+
+        response, _ = self._get_counting_queries()
+
+        data = response.data
+        self.assertEqual(data["protected_value"], 3000.0)
+        self.assertEqual(data["csd_risk_score"], 25.0)
+        self.assertEqual(data["total_ops_count"], 2)
+        self.assertEqual(data["validated_ops_count"], 1)
+        self.assertEqual(data["materiality_coverage"], 50.0)
+        self.assertEqual(data["pending_dossiers"], 1)
+        self.assertEqual(data["active_clients_count"], 2)
+        self.assertEqual(
+            data["portfolio"],
+            [
+                {"id": empresa.id, "name": empresa.razon_social, "riskScore": 25.0, "missingFiles": 1},
+                {"id": vacia.id, "name": vacia.razon_social, "riskScore": 0.0, "missingFiles": 0},
+            ],
+        )
+
+    def test_query_count_is_constant_regardless_of_empresa_count(self):
+        self._crear_empresa()
+        _, queries_with_one = self._get_counting_queries()
+
+        for _ in range(5):
+            self._crear_empresa()
+        response, queries_with_six = self._get_counting_queries()
+
+        self.assertEqual(len(response.data["portfolio"]), 6)
+        self.assertEqual(queries_with_one, queries_with_six)
+        self.assertLessEqual(queries_with_six, 6)
@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+from datetime import timedelta
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from django.test import TestCase
+from django.utils import timezone
+
+from materialidad.dashboard_cache import get_dashboard_cache_version
+from materialidad.models import Contrato, DashboardMetricsProjection, Empresa, Operacion, Proveedor
+from materialidad.services import get_dashboard_metrics, get_materialized_dashboard_metrics
+
+
+class DashboardMetricsTests(TestCase):
+    def setUp(self):
+        today = timezone.localdate()
+        self.empresa = Empresa.objects.create(
+            razon_social="Empresa Metricas SA de CV",
+            rfc="EME010101AAA",
+            regimen_fiscal="601",
+            estado="CDMX",
+        )
+        Empresa.objects.create(
+            razon_social="Empresa Inactiva SA de CV",
+            rfc="EIN010101AAA",
+            regimen_fiscal="601",
+            estado="CDMX",
+            activo=False,
+        )
+        self.proveedor = Proveedor.objects.create(razon_social="Proveedor Metricas SA de CV", rfc="PME010101AAA")
+        Proveedor.objects.create(razon_social="Proveedor Validado SA de CV", rfc="PVA010101AAA", estatus_sat="ACTIVO")
+        for nombre, inicio, fin in (
+            ("Vigente", today - timedelta(days=10), today + timedelta(days=200)),
+            ("Por vencer", today - timedelta(days=10), today + timedelta(days=5)),
+            ("Vencido", today - timedelta(days=100), today - timedelta(days=1)),
+            ("Sin vigencia", None, None),
+        ):
+            Contrato.objects.create(
+                empresa=self.empresa,
+                proveedor=self.proveedor,
+                nombre=nombre,
+                categoria=Contrato.Categoria.PROVEEDORES,
+                proceso=Contrato.ProcesoNegocio.OPERACIONES,
+                tipo_empresa=Contrato.TipoEmpresa.SERVICIOS,
+                vigencia_inicio=inicio,
+                vigencia_fin=fin,
+            )
+        for estatus, monto in (
+            (Operacion.EstatusValidacion.VALIDADO, "1000.00"),
+            (Operacion.EstatusValidacion.VALIDADO, "500.00"),
+            (Operacion.EstatusValidacion.RECHAZADO, "300.00"),
+            (Operacion.EstatusValidacion.RECHAZADO, "200.00"),
+            (Operacion.EstatusValidacion.PENDIENTE, "100.00"),
+        ):
+            Operacion.objects.create(
+                empresa=self.empresa,
+                proveedor=self.proveedor,
+                monto=monto,
+                moneda=Operacion.Moneda.MXN,
+                fecha_operacion=today - timedelta(days=3),
+                tipo_operacion=Operacion.TipoOperacion.SERVICIO,
+                concepto="Servicio metricas",
+                estatus_validacion=estatus,
+            )
+
+    def test_metrics_use_one_query_per_base_table(self):
+        with self.assertNumQueries(4):
+            payload = get_dashboard_metrics()
+
+        self.assertEqual(
+            payload["empresas"],
+            {"total": 2, "activas": 1, "con_contrato": 1, "cobertura_contractual": 100.0},
+        )
+        self.assertEqual(
+            payload["contratos"],
+            {"vigentes": 2, "por_vencer_30": 1, "vencidos": 1, "sin_vigencia": 1},
+        )
+        self.assertEqual(
+            payload["operaciones"],
+            {"pendientes_validacion": 1, "rechazadas": 2, "validadas_30d": 2, "monto_validado_mxn": 1500.0},
+        )
+        self.assertEqual(payload["proveedores"], {"total": 2, "observados": 1, "sin_validacion_sat": 1})
+
+    @patch("materialidad.services.get_fdi_operability_metrics", return_value={"status": "ok"})
+    @patch(
+        "materialidad.services.TenantContext.get_current_tenant",
+        return_value=SimpleNamespace(slug="tenant-metricas"),
+    )
+    def test_materialized_row_is_read_in_constant_queries(self, _tenant, _fdi):
+        first = get_materialized_dashboard_metrics()
+        self.assertEqual(DashboardMetricsProjection.objects.get(tenant_slug="tenant-metricas").payload, first)
+
+        with self.assertNumQueries(1):
+            second = get_materialized_dashboard_metrics()
+        self.assertEqual(second, first)
+
+        DashboardMetricsProjection.objects.update(refreshed_at=timezone.now() - timedelta(hours=1))
+        refreshed = get_materialized_dashboard_metrics()
+        self.assertNotEqual(refreshed["generated_at"], first["generated_at"])
+
+    @patch("materialidad.services.get_fdi_operability_metrics", return_value={"status": "ok"})
+    @patch(
+        "materialidad.services.TenantContext.get_current_tenant",
+        return_value=SimpleNamespace(slug="tenant-metricas"),
+    )
+    def test_materialized_row_follows_dashboard_cache_invalidation(self, _tenant, _fdi):
+        first = get_materialized_dashboard_metrics()
+        self.assertEqual(first["operaciones"]["pendientes_validacion"], 1)
+
+        # Una escritura del tenant incrementa la versión del cache de dashboard (signals).
+        with patch(
+            "materialidad.dashboard_cache.TenantContext.get_current_tenant",
+            return_value=SimpleNamespace(slug="tenant-metricas"),
+        ):
+            Operacion.objects.create(
+                empresa=self.empresa,
+                proveedor=self.proveedor,
+                monto="50.00",
+                moneda=Operacion.Moneda.MXN,
+                fecha_operacion=timezone.localdate(),
+                tipo_operacion=Operacion.TipoOperacion.SERVICIO,
+                concepto="Servicio nuevo",
+                estatus_validacion=Operacion.EstatusValidacion.PENDIENTE,
+            )
+
+        refreshed = get_materialized_dashboard_metrics()
+        self.assertEqual(refreshed["operaciones"]["pendientes_validacion"], 2)
+        projection = DashboardMetricsProjection.objects.get(tenant_slug="tenant-metricas")
+        self.assertEqual(projection.cache_version, get_dashboard_cache_version("tenant-metricas"))
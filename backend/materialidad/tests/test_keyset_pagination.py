@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+from datetime import date
+
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from materialidad.models import AuditLog, Empresa, Operacion, Proveedor
+
+
+@override_settings(TENANT_REQUIRED_PATH_PREFIXES=[])
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            email="qa.keyset@example.com",
+            password="Password123!",
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def _crear_logs(self, total: int) -> None:
+        AuditLog.objects.bulk_create(
+            AuditLog(action="update", object_type="operacion", object_id=str(index))
+            for index in range(total)
+        )
+        # Mismo ``created_at`` para todos: el desempate por ``id`` debe mantener el orden estable.
+        AuditLog.objects.update(created_at=timezone.now())
+
+    def test_cursor_recorre_todas_las_filas_sin_count(self):
+        self._crear_logs(60)
+
+        ids: list[int] = []
+        params = {"paginacion": "cursor"}
+        pages = 0
+        while True:
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get("/api/materialidad/audit-log/", params)
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn("count", response.data)
+            self.assertFalse(any("COUNT(" in query["sql"].upper() for query in queries.captured_queries))
+            ids.extend(row["id"] for row in response.data["results"])
+            pages += 1
+            if not response.data["has_more"]:
+                self.assertIsNone(response.data["next"])
+                break
+            self.assertIn("cursor=", response.data["next"])
+            params = {"cursor": response.data["next_cursor"]}
+
+        self.assertEqual(pages, 3)
+        self.assertEqual(ids, sorted(AuditLog.objects.values_list("id", flat=True), reverse=True))
+
+    def test_cursor_con_count_y_cursor_invalido(self):
+        self._crear_logs(3)
+
+        response = self.client.get("/api/materialidad/audit-log/", {"paginacion": "cursor", "count": "true"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["count"], 3)
+        self.assertFalse(response.data["has_more"])
+
+        invalido = self.client.get("/api/materialidad/audit-log/", {"cursor": "no-es-un-cursor"})
+        self.assertEqual(invalido.status_code, 400)
+
+        paginado = self.client.get("/api/materialidad/audit-log/")
+        self.assertEqual(paginado.data["count"], 3)
+        self.assertNotIn("next_cursor", paginado.data)
+
+    def test_cursor_rechaza_un_ordering_distinto_al_del_cursor(self):
+        self._crear_logs(3)
+
+        response = self.client.get("/api/materialidad/audit-log/", {"paginacion": "cursor", "ordering": "action"})
+        self.assertEqual(response.status_code, 400)
+
+        mismo_orden = self.client.get(
+            "/api/materialidad/audit-log/", {"paginacion": "cursor", "ordering": "-created_at,-id"}
+        )
+        self.assertEqual(mismo_orden.status_code, 200)
+
+        por_pagina = self.client.get("/api/materialidad/audit-log/", {"ordering": "action"})
+        self.assertEqual(por_pagina.status_code, 200)
+
+    def test_bandeja_cursor_respeta_orden_por_riesgo(self):
+        empresa = Empresa.objects.create(
+            razon_social="Empresa Keyset SA de CV",
+            rfc="EKS010101AAA",
+            regimen_fiscal="601",
+            estado="CDMX",
+        )
+        proveedor = Proveedor.objects.create(razon_social="Proveedor Keyset SA de CV", rfc="PKS010101AAA")
+        for index in range(30):
+            Operacion.objects.create(
+                empresa=empresa,
+                proveedor=proveedor,
+                monto="1000.00",
+                moneda=Operacion.Moneda.MXN,
+                fecha_operacion=date(2026, 1, 1 + (index % 28)),
+                tipo_operacion=Operacion.TipoOperacion.SERVICIO,
+                uuid_cfdi=f"keyset-{index}" if index % 2 else "",
+            )
+
+        primera = self.client.get("/api/materialidad/operaciones/bandeja-revision/", {"paginacion": "cursor"})
+        self.assertEqual(primera.status_code, 200)
+        self.assertTrue(primera.data["has_more"])
+        segunda = self.client.get(
+            "/api/materialidad/operaciones/bandeja-revision/",
+            {"cursor": primera.data["next_cursor"]},
+        )
+        self.assertFalse(segunda.data["has_more"])
+
+        rows = [*primera.data["results"], *segunda.data["results"]]
+        self.assertEqual(len({row["id"] for row in rows}), 30)
+        keys = [(-row["riesgo_score"], row["fecha_operacion"], row["id"]) for row in rows]
+        self.assertEqual(keys, sorted(keys))
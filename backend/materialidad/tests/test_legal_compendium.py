@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import os
+import shutil
+import sys
+import tempfile
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+
+from materialidad.ai import client as ai_client
+from materialidad.ai import compendium
+from materialidad.ai.client import ChatMessage, GeminiClient
+
+
+class LegalCompendiumTests(SimpleTestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp(prefix="materialidad-compendio-")
+        self.addCleanup(shutil.rmtree, self.tmp_dir, ignore_errors=True)
+        self.path = os.path.join(self.tmp_dir, "contenido_notebook.txt")
+        compendium.reset()
+        self.addCleanup(compendium.reset)
+
+    def _write(self, text: str, *, mtime_ns: int) -> None:
+        with open(self.path, "w", encoding="utf-8") as fh:
+            fh.write(text)
+        os.utime(self.path, ns=(mtime_ns, mtime_ns))
+
+    def test_carga_una_vez_y_recarga_al_cambiar_mtime(self):
+        self._write("Artículo 5 CFF. Aplicación estricta.", mtime_ns=1_000_000_000)
+
+        with override_settings(LEGAL_COMPENDIUM_PATH=self.path, LEGAL_COMPENDIUM_MAX_CHARS=20):
+            primera = compendium.get_legal_compendium()
+            self.assertIs(compendium.get_legal_compendium(), primera)
+            self.assertEqual(primera.content, "Artículo 5 CFF. Apli")
+            self.assertIn(primera.content, primera.system_prompt)
+
+            self._write("Artículo 69-B CFF. Operaciones inexistentes.", mtime_ns=2_000_000_000)
+            segunda = compendium.get_legal_compendium()
+
+        self.assertTrue(segunda.content.startswith("Artículo 69-B"))
+        self.assertNotEqual(segunda.sha256, primera.sha256)
+        self.assertEqual(compendium.get_stats(), {"loads": 2, "hits": 1})
+
+    def test_archivo_inexistente_regresa_none(self):
+        with override_settings(LEGAL_COMPENDIUM_PATH=os.path.join(self.tmp_dir, "no-existe.txt")):
+            self.assertIsNone(compendium.get_legal_compendium())
+
+
+@override_settings(GEMINI_API_KEY="gemini-test", GEMINI_DEFAULT_MODEL="gemini-test-model")
+class GeminiContextCacheTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        ai_client._context_models.clear()
+        self.addCleanup(cache.clear)
+        self.addCleanup(ai_client._context_models.clear)
+
+    def test_reutiliza_el_prefijo_cacheado_y_solo_envia_el_mensaje_del_usuario(self):
+        caching = SimpleNamespace(CachedContent=MagicMock())
+        caching.CachedContent.create.return_value = SimpleNamespace(name="cachedContents/abc", expire_time=None)
+        cached_model = MagicMock()
+        cached_model.start_chat.return_value.send_message.return_value = SimpleNamespace(text=" Dictamen ")
+
+        with patch.dict(sys.modules, {"google.generativeai.caching": caching}):
+            gemini = GeminiClient()
+            # ``from_cached_content`` llegó en google-generativeai 0.7.
+            with patch.object(
+                gemini._genai.GenerativeModel, "from_cached_content", return_value=cached_model, create=True
+            ):
+                messages = [
+                    ChatMessage(role="system", content="COMPENDIO " * 1000),
+                    ChatMessage(role="user", content="¿Qué dice el artículo 5?"),
+                ]
+                for _ in range(2):
+                    self.assertEqual(gemini.generate_text(messages, cache_system_prompt=True), "Dictamen")
+
+        caching.CachedContent.create.assert_called_once()
+        self.assertEqual(gemini.last_prompt_bytes, len("¿Qué dice el artículo 5?".encode("utf-8")))
+        self.assertEqual(gemini.last_cached_prefix_bytes, len(messages[0].content))
+        cached_model.start_chat.assert_called_with(history=[])
+
+    def test_cada_api_key_tiene_su_propio_contenido_cacheado(self):
+        caching = SimpleNamespace(CachedContent=MagicMock())
+        caching.CachedContent.create.side_effect = [
+            SimpleNamespace(name="cachedContents/proyecto-a", expire_time=None),
+            SimpleNamespace(name="cachedContents/proyecto-b", expire_time=None),
+        ]
+        messages = [
+            ChatMessage(role="system", content="COMPENDIO " * 1000),
+            ChatMessage(role="user", content="¿Qué dice el artículo 5?"),
+        ]
+
+        with patch.dict(sys.modules, {"google.generativeai.caching": caching}):
+            gemini_a = GeminiClient()
+            with override_settings(GEMINI_API_KEY="gemini-otro-proyecto"):
+                gemini_b = GeminiClient()
+            with patch.object(gemini_a._genai.GenerativeModel, "from_cached_content", create=True) as from_cached:
+                from_cached.side_effect = lambda cached_content: MagicMock(name=cached_content.name)
+                modelo_a = gemini_a._cached_context_model(messages[0].content)
+                modelo_b = gemini_b._cached_context_model(messages[0].content)
+
+        self.assertEqual(caching.CachedContent.create.call_count, 2)
+        self.assertIsNot(modelo_a, modelo_b)
+        self.assertEqual(len(ai_client._context_models), 2)
@@ -23,15 +23,27 @@ from tenancy.models import Tenant
 
 class _StubAIClient:
     model_name = "stub-openai-model"
+    last_prompt_bytes = 0
+    last_cached_prefix_bytes = 0
 
-    def generate_text(self, messages, temperature=0.0, max_output_tokens=0):
+    def generate_text(self, messages, temperature=0.0, max_output_tokens=0, cache_system_prompt=False):
+        self.last_prompt_bytes = sum(len(message.content.encode("utf-8")) for message in messages)
         return "## 1. Análisis Normativo\nRespuesta de prueba con referencia vigente."
 
 
 class _StubGeminiClient:
     model_name = "stub-gemini-model"
+    last_prompt_bytes = 0
+    last_cached_prefix_bytes = 0
 
-    def generate_text(self, messages, temperature=0.0, max_output_tokens=0):
+    def __init__(self):
+        self.calls = []
+
+    def generate_text(self, messages, temperature=0.0, max_output_tokens=0, cache_system_prompt=False):
+        self.calls.append({"messages": messages, "cache_system_prompt": cache_system_prompt})
+        # Simula un prefijo cacheado del lado del proveedor: sólo viaja el mensaje del usuario.
+        self.last_cached_prefix_bytes = len(messages[0].content.encode("utf-8"))
+        self.last_prompt_bytes = len(messages[-1].content.encode("utf-8"))
         return "## 1. Análisis Normativo\nDictamen generado desde notebook."
 
 
@@ -286,7 +298,7 @@ class LegalConsultationApiTests(TestCase):
 
     @override_settings(OPENAI_API_KEY="", GEMINI_API_KEY="gemini-test", AI_PROVIDER="gemini")
     @patch("materialidad.services.get_ai_client", return_value=_StubGeminiClient())
-    def test_create_consultation_with_gemini_persists_structured_references(self, _mock_get_ai_client):
+    def test_create_consultation_with_gemini_persists_structured_references(self, mock_get_ai_client):
         LegalReferenceSource.objects.create(
             slug="cff-gemini-5",
             ley="Código Fiscal de la Federación",
@@ -318,6 +330,12 @@ class LegalConsultationApiTests(TestCase):
         self.assertEqual(len(response.data["referencias"]), 1)
         self.assertEqual(response.data["referencias"][0]["articulo"], "5")
 
+        stub = mock_get_ai_client.return_value
+        self.assertTrue(stub.calls[-1]["cache_system_prompt"])
+        self.assertIn("COMPENDIO DE NORMATIVIDAD FISCAL", stub.calls[-1]["messages"][0].content)
+        consultation = LegalConsultation.objects.get(pk=response.data["id"])
+        self.assertEqual(consultation.prompt_bytes, stub.last_prompt_bytes)
+
 
 class LegalConsultationExecutiveConclusionTests(TestCase):
     def test_detect_focus_for_materialidad(self):
@@ -1,7 +1,13 @@
+import hashlib
+import math
+
 from django.test import SimpleTestCase
 
 from materialidad.legal_corpus import (
+    build_hashed_embedding,
+    build_hashed_embeddings,
     extract_structured_legal_segments,
+    tokenize_legal_text,
     parse_dof_segments,
     parse_sat_segments,
     parse_scjn_segments,
@@ -89,3 +95,37 @@ class LegalCorpusParserTests(SimpleTestCase):
         self.assertGreater(len(segments), 1)
         self.assertEqual(segments[0]["metadata"]["parser"], "GENERIC")
         self.assertEqual(segments[0]["metadata"]["section_type"], "CHUNK")
+
+
+def _hash64_v1_reference(text: str, dimensions: int = 64) -> list[float]:
+    vector = [0.0] * dimensions
+    tokens = tokenize_legal_text(text)
+    if not tokens:
+        return vector
+    for token in tokens:
+        bucket = int(hashlib.sha256(token.encode("utf-8")).hexdigest(), 16) % dimensions
+        vector[bucket] += 1.0
+    norm = math.sqrt(sum(value * value for value in vector))
+    return [round(value / norm, 6) for value in vector]
+
+
+class HashedEmbeddingTests(SimpleTestCase):
+    TEXTS = [
+        "Artículo 27. Las deducciones autorizadas deberán reunir los requisitos siguientes.",
+        "Operaciones inexistentes: artículo 69-B del Código Fiscal de la Federación, artículo 69-B.",
+        "",
+        "a b",
+        "Razón de negocio, materialidad y beneficio económico " * 40,
+    ]
+
+    def test_embedding_matches_hash64_v1_reference(self):
+        for text in self.TEXTS:
+            self.assertEqual(build_hashed_embedding(text), _hash64_v1_reference(text))
+        self.assertEqual(build_hashed_embedding("deducción", dimensions=10), _hash64_v1_reference("deducción", 10))
+
+    def test_batched_embeddings_match_single_path(self):
+        self.assertEqual(
+            build_hashed_embeddings(self.TEXTS),
+            [build_hashed_embedding(text) for text in self.TEXTS],
+        )
+        self.assertEqual(build_hashed_embeddings([]), [])
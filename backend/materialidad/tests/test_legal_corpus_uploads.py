@@ -2,12 +2,19 @@ from __future__ import annotations
 
 import shutil
 import tempfile
+from io import StringIO
+from unittest.mock import patch
 
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
 from django.test import TestCase, override_settings
 from rest_framework.test import APIClient
 
 from accounts.models import User
+from materialidad import legal_corpus
+from materialidad.legal_corpus import process_legal_corpus_upload
 from materialidad.models import LegalCorpusUpload, LegalReferenceSource
 
 
@@ -88,3 +95,106 @@ class LegalCorpusUploadTests(TestCase):
 
         self.assertEqual(response.status_code, 403)
         self.assertEqual(LegalCorpusUpload.objects.count(), 0)
+
+    @override_settings(LEGAL_CORPUS_PROCESSING_MODE="background")
+    def test_modo_background_encola_y_el_comando_procesa(self):
+        self.client.force_authenticate(user=self.superuser)
+        file_obj = SimpleUploadedFile(
+            "lisr_27.txt",
+            b"Articulo 27. Las deducciones autorizadas deben ser estrictamente indispensables.\n\n"
+            b"Articulo 28. No seran deducibles los gastos que no reunan requisitos.",
+            content_type="text/plain",
+        )
+
+        response = self.client.post(
+            "/api/materialidad/corpus-legales/",
+            {
+                "titulo": "LISR vigente",
+                "autoridad": "DOF",
+                "ordenamiento": "Ley del Impuesto sobre la Renta",
+                "tipo_fuente": LegalReferenceSource.SourceType.LEY,
+                "archivo": file_obj,
+                "procesar_ahora": "true",
+            },
+            format="multipart",
+        )
+
+        self.assertEqual(response.status_code, 202, response.data)
+        self.assertEqual(response.data["estatus"], LegalCorpusUpload.ProcessingStatus.PENDIENTE)
+        self.assertIsNotNone(response.data["encolado_en"])
+        self.assertFalse(LegalReferenceSource.objects.exists())
+
+        call_command("process_legal_corpus_queue", stdout=StringIO())
+
+        upload = LegalCorpusUpload.objects.get(pk=response.data["id"])
+        self.assertEqual(upload.estatus, LegalCorpusUpload.ProcessingStatus.COMPLETADO)
+        self.assertIsNone(upload.encolado_en)
+        self.assertEqual(upload.intentos, 1)
+        self.assertEqual(upload.fragmentos_procesados, upload.total_fragmentos)
+        self.assertEqual(LegalReferenceSource.objects.filter(corpus_upload=upload).count(), upload.total_fragmentos)
+        self.assertNotIn("extraction", upload.metadata)
+        self.assertEqual(default_storage.listdir(f"{legal_corpus.EXTRACTION_STORAGE_DIR}/{upload.pk}")[1], [])
+
+    def test_reanuda_desde_la_ultima_pagina_y_lote_confirmados(self):
+        upload = LegalCorpusUpload.objects.create(
+            titulo="CFF compilado",
+            slug="cff-compilado",
+            archivo=default_storage.save("legal_corpus/cff.pdf", ContentFile(b"%PDF")),
+            autoridad=LegalCorpusUpload.Authority.OTRO,
+            ordenamiento="Código Fiscal de la Federación",
+        )
+        pages = [f"Pagina {index}. " + "Contenido fiscal de la pagina. " * 60 for index in range(4)]
+        calls: list[int] = []
+
+        def fake_pages(file_name, *, start_page=0):
+            calls.append(start_page)
+            for index in range(start_page, len(pages)):
+                if len(calls) == 1 and index == 2:
+                    raise OSError("lectura interrumpida")
+                yield index, len(pages), pages[index]
+
+        with patch.object(legal_corpus, "iter_legal_text_pages", fake_pages):
+            with self.assertRaises(OSError):
+                process_legal_corpus_upload(upload, checkpoint_pages=1, batch_size=2)
+            upload.refresh_from_db()
+            self.assertEqual(upload.estatus, LegalCorpusUpload.ProcessingStatus.ERROR)
+            self.assertEqual(upload.metadata["extraction"]["pages_done"], 2)
+
+            result = process_legal_corpus_upload(upload, resume=True, checkpoint_pages=1, batch_size=2)
+
+        self.assertEqual(calls, [0, 2])
+        upload.refresh_from_db()
+        self.assertEqual(upload.estatus, LegalCorpusUpload.ProcessingStatus.COMPLETADO)
+        self.assertEqual(upload.metadata["pages"], 4)
+        self.assertEqual(result["created"], result["chunks"])
+        self.assertEqual(upload.fragmentos_procesados, result["chunks"])
+        contenido = " ".join(LegalReferenceSource.objects.order_by("id").values_list("contenido", flat=True))
+        self.assertIn("Pagina 0.", contenido)
+        self.assertIn("Pagina 3.", contenido)
+
+        # Un fallo a mitad de la escritura reanuda desde el último lote confirmado.
+        original_upsert = legal_corpus._upsert_legal_sources
+        batches: list[int] = []
+        fallas = [2]
+
+        def failing_upsert(sources):
+            batches.append(len(sources))
+            if fallas and len(batches) == fallas[0]:
+                fallas.clear()
+                raise RuntimeError("conexión perdida")
+            return original_upsert(sources)
+
+        with patch.object(legal_corpus, "iter_legal_text_pages", fake_pages), patch.object(
+            legal_corpus, "_upsert_legal_sources", failing_upsert
+        ):
+            with self.assertRaises(RuntimeError):
+                process_legal_corpus_upload(upload, checkpoint_pages=1, batch_size=2)
+            upload.refresh_from_db()
+            self.assertEqual(upload.fragmentos_procesados, 2)
+            batches.clear()
+            result = process_legal_corpus_upload(upload, resume=True, checkpoint_pages=1, batch_size=2)
+
+        self.assertEqual(sum(batches), result["chunks"] - 2)
+        self.assertEqual(result["created"], 0)
+        self.assertEqual(result["updated"], result["chunks"])
+        self.assertEqual(LegalReferenceSource.objects.count(), result["chunks"])
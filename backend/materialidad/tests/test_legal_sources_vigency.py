@@ -1,11 +1,18 @@
 from __future__ import annotations
 
 from datetime import date
+from unittest import skipUnless
 
+from django.db import connection
 from django.test import TestCase
 
 from materialidad.models import LegalReferenceSource
-from materialidad.services import _fetch_candidate_sources, _reference_payload
+from materialidad.services import (
+    _fetch_candidate_sources,
+    _legal_fulltext_enabled,
+    _legal_fulltext_queryset,
+    _reference_payload,
+)
 
 
 class LegalSourcesVigencyTests(TestCase):
@@ -118,4 +125,50 @@ class LegalSourcesVigencyTests(TestCase):
         self.assertEqual(payload["registro_digital"], "2025010")
         self.assertIn("VALOR AGREGADO", payload["rubro"])
         self.assertEqual(payload["tesis"], "I.1o.A.10 A (11a.)")
-        self.assertEqual(payload["parser"], "SCJN")
\ No newline at end of file
+        self.assertEqual(payload["parser"], "SCJN")
+
+
+class LegalFulltextQuerysetTests(TestCase):
+    def test_fulltext_queryset_ranks_in_sql_with_sanitized_tsquery(self):
+        qs = LegalReferenceSource.objects.filter(es_vigente=True)
+        # En SQLite la búsqueda conserva los filtros ``icontains``.
+        self.assertFalse(_legal_fulltext_enabled(qs))
+
+        fulltext_qs = _legal_fulltext_queryset(qs, ["Deducción", "69×B", "deducción"])
+        sql = str(fulltext_qs.query)
+
+        self.assertIn("search_vector @@ to_tsquery('spanish', deducción | 69b)", sql)
+        self.assertIn("ts_rank(", sql)
+        self.assertIn('"articulo" LIKE', sql)
+        self.assertEqual(fulltext_qs.query.order_by[0], "-fulltext_rank")
+
+    @skipUnless(
+        connection.vendor == "postgresql",
+        "search_vector (migración 0066) y to_tsquery sólo existen en PostgreSQL.",
+    )
+    def test_fulltext_queryset_filters_and_ranks_on_postgresql(self):
+        deducciones = LegalReferenceSource.objects.create(
+            slug="lisr-fulltext-27",
+            ley="Ley del ISR",
+            tipo_fuente=LegalReferenceSource.SourceType.LEY,
+            es_vigente=True,
+            articulo="27",
+            contenido="Artículo 27. Las deducciones autorizadas deberán reunir los requisitos siguientes.",
+            hash_contenido="f" * 64,
+        )
+        LegalReferenceSource.objects.create(
+            slug="cff-fulltext-5",
+            ley="Código Fiscal de la Federación",
+            tipo_fuente=LegalReferenceSource.SourceType.LEY,
+            es_vigente=True,
+            articulo="5",
+            contenido="Las disposiciones fiscales que establezcan cargas a los particulares son de aplicación estricta.",
+            hash_contenido="0" * 64,
+        )
+        qs = LegalReferenceSource.objects.filter(es_vigente=True)
+        self.assertTrue(_legal_fulltext_enabled(qs))
+
+        results = list(_legal_fulltext_queryset(qs, ["deducciones", "autorizadas"]))
+
+        self.assertEqual([source.pk for source in results], [deducciones.pk])
+        self.assertGreater(results[0].fulltext_rank, 0)
@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+from django.test import TestCase
+
+from materialidad import legal_vector_index
+from materialidad.legal_corpus import build_hashed_embedding, cosine_similarity
+from materialidad.models import LegalReferenceSource
+
+
+class LegalVectorIndexTests(TestCase):
+    def setUp(self):
+        legal_vector_index.reset()
+        self.addCleanup(legal_vector_index.reset)
+
+    def _crear_fuente(self, slug: str, contenido: str, *, es_vigente: bool = True) -> LegalReferenceSource:
+        vector = build_hashed_embedding(contenido)
+        return LegalReferenceSource.objects.create(
+            slug=slug,
+            ley="Código Fiscal de la Federación",
+            contenido=contenido,
+            es_vigente=es_vigente,
+            hash_contenido=slug.ljust(64, "0")[:64],
+            vectorizacion=vector,
+            vectorizacion_dim=len(vector),
+        )
+
+    def test_top_k_coincide_con_coseno_y_respeta_vigencia(self):
+        deduccion = self._crear_fuente("deduccion", "Requisitos de las deducciones autorizadas y comprobantes fiscales")
+        self._crear_fuente("operaciones", "Operaciones inexistentes y presunción del artículo 69-B")
+        historica = self._crear_fuente(
+            "historica",
+            "Deducciones autorizadas con comprobantes fiscales del ejercicio anterior",
+            es_vigente=False,
+        )
+
+        query_vector = build_hashed_embedding("deducciones autorizadas comprobantes")
+        results = legal_vector_index.semantic_candidates(query_vector, alias="default", limit=5)
+
+        self.assertEqual(next(iter(results)), deduccion.id)
+        self.assertNotIn(historica.id, results)
+        self.assertAlmostEqual(
+            results[deduccion.id],
+            cosine_similarity(query_vector, deduccion.vectorizacion),
+            places=5,
+        )
+        with_history = legal_vector_index.semantic_candidates(
+            query_vector, alias="default", limit=5, only_current=False
+        )
+        self.assertIn(historica.id, with_history)
+
+    def test_refresca_incrementalmente_y_reconstruye_tras_borrados(self):
+        self._crear_fuente("base", "Materialidad de servicios profesionales")
+        self.assertEqual(len(legal_vector_index.get_index("default")), 1)
+
+        nueva = self._crear_fuente("nueva", "Razón de negocio y beneficio económico")
+        index = legal_vector_index.get_index("default")
+        self.assertEqual(len(index), 2)
+        self.assertIn(nueva.id, index.ids.tolist())
+        stats = legal_vector_index.get_stats()
+        self.assertEqual((stats["full_builds"], stats["incremental_refreshes"]), (1, 1))
+
+        nueva.delete()
+        index = legal_vector_index.get_index("default")
+        self.assertNotIn(nueva.id, index.ids.tolist())
+        self.assertEqual(legal_vector_index.get_stats()["full_builds"], 2)
+
+        # Sin cambios se reutiliza el índice cargado.
+        self.assertIs(legal_vector_index.get_index("default"), index)
@@ -1,11 +1,13 @@
 from __future__ import annotations
 
 from datetime import date
+from unittest.mock import patch
 
 from django.test import TestCase, override_settings
 from rest_framework.test import APIClient
 
 from accounts.models import User
+from materialidad import serializers as serializers_module
 from materialidad.models import AlertaOperacion, Contrato, Empresa, Operacion, Proveedor
 
 
@@ -170,3 +172,36 @@ class OperacionBandejaRevisionTests(TestCase):
         rows = self._get_results(response)
         self.assertEqual(len(rows), 1)
         self.assertEqual(rows[0]["alertas_activas"][0]["id"], alerta.id)
+
+    def test_bandeja_persiste_riesgo_y_no_reevalua_la_pagina(self):
+        for index in range(30):
+            self._crear_operacion(fecha_operacion=date(2026, 1, 1 + (index % 28)))
+        con_contrato = self._crear_operacion(
+            fecha_operacion=date(2026, 1, 2),
+            contrato=self._crear_contrato(),
+            uuid_cfdi="d12504e0-4f89-41d3-9a0c-0305e82c3312",
+            referencia_spei="SPEI-LOW-002",
+        )
+
+        primera = self.client.get("/api/materialidad/operaciones/bandeja-revision/")
+        self.assertEqual(primera.status_code, 200)
+        self.assertFalse(Operacion.objects.filter(perfil_validacion="").exists())
+        con_contrato.refresh_from_db()
+        self.assertEqual(con_contrato.perfil_validacion, "SERVICIOS")
+        self.assertEqual(con_contrato.riesgo_nivel, con_contrato.metadata["riesgo_materialidad"]["nivel"])
+
+        with patch(
+            "materialidad.serializers.evaluate_operacion_materialidad",
+            wraps=serializers_module.evaluate_operacion_materialidad,
+        ) as mock_evaluacion:
+            response = self.client.get("/api/materialidad/operaciones/bandeja-revision/", {"orden": "riesgo"})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["count"], 31)
+        self.assertEqual(len(response.data["results"]), 25)
+        self.assertEqual(mock_evaluacion.call_count, 0)
+        scores = [row["riesgo_score"] for row in response.data["results"]]
+        self.assertEqual(scores, sorted(scores, reverse=True))
+
+        ultima = self.client.get("/api/materialidad/operaciones/bandeja-revision/", {"orden": "riesgo", "page": 2})
+        self.assertEqual(ultima.data["results"][-1]["id"], con_contrato.id)
@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import shutil
+import tempfile
 from datetime import date
 from unittest.mock import patch
 
@@ -14,6 +16,9 @@ from materialidad.models import AlertaOperacion, AuditLog, Contrato, Empresa, Ev
 @override_settings(TENANT_REQUIRED_PATH_PREFIXES=[])
 class OperacionCambioEstatusTests(TestCase):
     def setUp(self):
+        self.media_dir = tempfile.mkdtemp(prefix="materialidad-evidencias-")
+        self.override = override_settings(MEDIA_ROOT=self.media_dir)
+        self.override.enable()
         self.client = APIClient()
         self.user = User.objects.create_user(
             email="qa@example.com",
@@ -32,6 +37,10 @@ class OperacionCambioEstatusTests(TestCase):
             rfc="PRD010101AAA",
         )
 
+    def tearDown(self):
+        self.override.disable()
+        shutil.rmtree(self.media_dir, ignore_errors=True)
+
     def _crear_contrato(self, categoria: str = Contrato.Categoria.PROVEEDORES) -> Contrato:
         return Contrato.objects.create(
             empresa=self.empresa,
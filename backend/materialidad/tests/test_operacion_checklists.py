@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import shutil
+import tempfile
 from datetime import date
 from unittest.mock import patch
 
@@ -27,6 +29,9 @@ from materialidad.models import (
 @override_settings(TENANT_REQUIRED_PATH_PREFIXES=[])
 class OperacionChecklistTests(TestCase):
     def setUp(self):
+        self.media_dir = tempfile.mkdtemp(prefix="materialidad-evidencias-")
+        self.override = override_settings(MEDIA_ROOT=self.media_dir)
+        self.override.enable()
         self.client = APIClient()
         self.user = User.objects.create_user(
             email="qa.checklists@example.com",
@@ -66,6 +71,10 @@ class OperacionChecklistTests(TestCase):
             responsable="Operaciones",
         )
 
+    def tearDown(self):
+        self.override.disable()
+        shutil.rmtree(self.media_dir, ignore_errors=True)
+
     def test_crear_operacion_asigna_checklist_base_y_resume_en_respuesta(self):
         response = self.client.post(
             "/api/materialidad/operaciones/",
@@ -2,6 +2,8 @@ from __future__ import annotations
 
 import hashlib
 import json
+import shutil
+import tempfile
 from datetime import date
 from io import BytesIO
 from zipfile import ZipFile
@@ -17,6 +19,9 @@ from materialidad.models import Contrato, Empresa, EvidenciaMaterial, Operacion,
 @override_settings(TENANT_REQUIRED_PATH_PREFIXES=[])
 class OperacionExportDossierTests(TestCase):
     def setUp(self):
+        self.media_dir = tempfile.mkdtemp(prefix="materialidad-evidencias-")
+        self.override = override_settings(MEDIA_ROOT=self.media_dir)
+        self.override.enable()
         self.client = APIClient()
         self.user = User.objects.create_user(
             email="qa.zip@example.com",
@@ -43,6 +48,10 @@ class OperacionExportDossierTests(TestCase):
             tipo_empresa=Contrato.TipoEmpresa.SERVICIOS,
         )
 
+    def tearDown(self):
+        self.override.disable()
+        shutil.rmtree(self.media_dir, ignore_errors=True)
+
     def _crear_operacion(self) -> Operacion:
         operacion = Operacion.objects.create(
             empresa=self.empresa,
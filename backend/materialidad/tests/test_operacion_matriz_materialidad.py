@@ -1,12 +1,16 @@
 from __future__ import annotations
 
+import shutil
+import tempfile
 from datetime import date
+from unittest.mock import patch
 
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import TestCase, override_settings
 from rest_framework.test import APIClient
 
 from accounts.models import User
+from materialidad import services
 from materialidad.checklist_templates import assign_default_checklists_to_operacion
 from materialidad.models import (
     Checklist,
@@ -23,6 +27,9 @@ from materialidad.models import (
 @override_settings(TENANT_REQUIRED_PATH_PREFIXES=[])
 class OperacionMatrizMaterialidadTests(TestCase):
     def setUp(self):
+        self.media_dir = tempfile.mkdtemp(prefix="materialidad-evidencias-")
+        self.override = override_settings(MEDIA_ROOT=self.media_dir)
+        self.override.enable()
         self.client = APIClient()
         self.user = User.objects.create_user(
             email="qa.matriz@example.com",
@@ -70,6 +77,10 @@ class OperacionMatrizMaterialidadTests(TestCase):
             responsable="Operaciones",
         )
 
+    def tearDown(self):
+        self.override.disable()
+        shutil.rmtree(self.media_dir, ignore_errors=True)
+
     def _crear_operacion(self, **kwargs) -> Operacion:
         defaults = {
             "empresa": self.empresa,
@@ -217,3 +228,79 @@ class OperacionMatrizMaterialidadTests(TestCase):
         self.assertTrue(any("Checklist operativo incompleto" in item for item in row["faltantes"]))
         self.assertEqual(len(row["checklists_resumen"]), 1)
         self.assertEqual(row["checklists_resumen"][0]["requeridos_pendientes"], 2)
+
+    def test_matriz_sirve_riesgo_persistido_sin_reevaluar(self):
+        operaciones = [
+            self._crear_operacion(
+                contrato=self.contrato,
+                uuid_cfdi=f"d12504e0-4f89-41d3-9a0c-0305e82c331{index}",
+                referencia_spei=f"SPEI-MAT-01{index}",
+            )
+            for index in range(3)
+        ]
+        for operacion in operaciones:
+            assign_default_checklists_to_operacion(operacion=operacion, tenant_slug="")
+
+        # La primera consulta persiste las columnas de riesgo pendientes.
+        self.client.get("/api/materialidad/operaciones/matriz-materialidad/")
+
+        operacion = operaciones[0]
+        perfil, faltantes = services.get_operacion_faltantes_expediente(operacion)
+        riesgo = services.get_operacion_riesgo_materialidad(operacion)
+        # Evidencia cargada sin pasar por la API: la fila conserva la foto sincronizada
+        # completa en lugar de mezclar faltantes nuevos con el riesgo persistido.
+        EvidenciaMaterial.objects.create(
+            operacion=operacion,
+            tipo=EvidenciaMaterial.Tipo.ENTREGABLE,
+            archivo=SimpleUploadedFile("entregable-matriz-directo.txt", b"entregable"),
+            descripcion="Entregable",
+        )
+
+        with patch(
+            "materialidad.services.get_operacion_faltantes_materialidad",
+            wraps=services.get_operacion_faltantes_materialidad,
+        ) as mock_faltantes, patch(
+            "materialidad.services._evaluate_operacion_checklists",
+            wraps=services._evaluate_operacion_checklists,
+        ) as mock_checklists:
+            response = self.client.get("/api/materialidad/operaciones/matriz-materialidad/")
+
+        self.assertEqual(response.status_code, 200)
+        rows = self._get_results(response)
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(mock_faltantes.call_count, 0)
+        self.assertEqual(mock_checklists.call_count, 0)
+
+        row = next(item for item in rows if item["id"] == operacion.id)
+        self.assertEqual(row["perfil_validacion"], perfil)
+        self.assertEqual(row["faltantes"], faltantes)
+        self.assertEqual(row["checklists_resumen"], services.get_operacion_checklists_resumen(operacion))
+        self.assertEqual((row["riesgo_nivel"], row["riesgo_score"]), (riesgo["nivel"], riesgo["score"]))
+
+    def test_refresh_riesgo_solo_reescribe_su_llave_de_metadata(self):
+        operacion = self._crear_operacion(contrato=self.contrato, metadata={"origen": "carga"})
+        # Otra petición agrega una llave mientras esta instancia ya está en memoria.
+        Operacion.objects.filter(pk=operacion.pk).update(metadata={"origen": "carga", "forma_pago": "TRANSFERENCIA"})
+
+        self.assertEqual(services.refresh_operacion_riesgo_columns([operacion]), 1)
+
+        operacion.refresh_from_db()
+        self.assertEqual(operacion.metadata["forma_pago"], "TRANSFERENCIA")
+        self.assertEqual(operacion.metadata["origen"], "carga")
+        riesgo = operacion.metadata["riesgo_materialidad"]
+        self.assertEqual((operacion.riesgo_nivel, operacion.riesgo_score), (riesgo["nivel"], riesgo["score"]))
+        self.assertEqual(operacion.perfil_validacion, "SERVICIOS")
+        self.assertIn("UUID CFDI", riesgo["faltantes"])
+
+    def test_refresh_riesgo_reemplaza_metadata_que_no_es_objeto(self):
+        operacion = self._crear_operacion(contrato=self.contrato, metadata={})
+        Operacion.objects.filter(pk=operacion.pk).update(metadata=["valor-invalido"])
+        operacion.refresh_from_db()
+
+        self.assertEqual(services.refresh_operacion_riesgo_columns([operacion]), 1)
+
+        operacion.refresh_from_db()
+        self.assertEqual(list(operacion.metadata), ["riesgo_materialidad"])
+        self.assertEqual(operacion.metadata["riesgo_materialidad"]["score"], operacion.riesgo_score)
+        response = self.client.get("/api/materialidad/operaciones/matriz-materialidad/")
+        self.assertEqual(response.status_code, 200)
@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+from datetime import date, timedelta
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from django.test import TestCase
+from django.utils import timezone
+
+from materialidad.defense_projection import (
+    drain_operation_defense_outbox,
+    mark_operation_defense_dirty,
+    sync_operation_defense_projection,
+)
+from materialidad.models import (
+    Contrato,
+    Empresa,
+    Operacion,
+    OperationDefenseProjection,
+    OperationDefenseProjectionOutbox,
+    Proveedor,
+)
+
+
+class OperationDefenseOutboxTests(TestCase):
+    def setUp(self):
+        self.empresa = Empresa.objects.create(
+            razon_social="Empresa Outbox SA de CV",
+            rfc="EOB010101AAA",
+            regimen_fiscal="601",
+            estado="CDMX",
+        )
+        self.proveedor = Proveedor.objects.create(
+            razon_social="Proveedor Outbox SA de CV",
+            rfc="POB010101AAA",
+            riesgo_fiscal=Proveedor.Riesgo.BAJO,
+            ultima_validacion_sat=timezone.now() - timedelta(days=10),
+        )
+        self.contrato = Contrato.objects.create(
+            empresa=self.empresa,
+            proveedor=self.proveedor,
+            nombre="Contrato outbox",
+            categoria=Contrato.Categoria.PROVEEDORES,
+            proceso=Contrato.ProcesoNegocio.OPERACIONES,
+            tipo_empresa=Contrato.TipoEmpresa.SERVICIOS,
+            vigencia_inicio=date(2026, 1, 1),
+            vigencia_fin=date(2026, 12, 31),
+            razon_negocio_estado="APROBADO",
+            fecha_cierta_requerida=False,
+        )
+        self.operacion = Operacion.objects.create(
+            empresa=self.empresa,
+            proveedor=self.proveedor,
+            contrato=self.contrato,
+            uuid_cfdi="3f2504e0-4f89-41d3-9a0c-0305e82c3401",
+            referencia_spei="SPEI-700001",
+            monto="15000.00",
+            moneda=Operacion.Moneda.MXN,
+            fecha_operacion=date(2026, 2, 10),
+            tipo_operacion=Operacion.TipoOperacion.SERVICIO,
+            estatus_validacion=Operacion.EstatusValidacion.VALIDADO,
+            cfdi_estatus=Operacion.EstatusCFDI.VALIDO,
+            spei_estatus=Operacion.EstatusSPEI.VALIDADO,
+        )
+        with patch("materialidad.defense_projection.TenantContext.get_current_tenant", return_value=SimpleNamespace(slug="tenant-outbox")):
+            sync_operation_defense_projection(operacion=self.operacion)
+            drain_operation_defense_outbox()
+
+    def test_proveedor_change_marks_outbox_and_drain_refreshes_projection(self):
+        self.proveedor.riesgo_fiscal = Proveedor.Riesgo.ALTO
+        self.proveedor.save(update_fields=["riesgo_fiscal"])
+
+        self.assertTrue(
+            OperationDefenseProjectionOutbox.objects.filter(
+                source=OperationDefenseProjectionOutbox.Source.PROVEEDOR,
+                source_id=self.proveedor.id,
+            ).exists()
+        )
+
+        with patch("materialidad.defense_projection.TenantContext.get_current_tenant", return_value=SimpleNamespace(slug="tenant-outbox")):
+            result = drain_operation_defense_outbox()
+
+        self.assertEqual(result, {"marks_processed": 1, "operations_synced": 1})
+        projection = OperationDefenseProjection.objects.get(operacion=self.operacion)
+        self.assertIn("proveedor_riesgo_alto", projection.risk_flags_json)
+        self.assertFalse(OperationDefenseProjectionOutbox.objects.exists())
+
+    def test_repeated_marks_collapse_and_untouched_operations_are_skipped(self):
+        otra = Operacion.objects.create(
+            empresa=self.empresa,
+            proveedor=self.proveedor,
+            uuid_cfdi="3f2504e0-4f89-41d3-9a0c-0305e82c3402",
+            referencia_spei="SPEI-700002",
+            monto="500.00",
+            moneda=Operacion.Moneda.MXN,
+            fecha_operacion=date(2026, 2, 12),
+            tipo_operacion=Operacion.TipoOperacion.SERVICIO,
+        )
+        OperationDefenseProjectionOutbox.objects.all().delete()
+
+        for _ in range(3):
+            mark_operation_defense_dirty(
+                OperationDefenseProjectionOutbox.Source.CONTRATO,
+                [self.contrato.id],
+                tenant_slug="tenant-outbox",
+            )
+        self.assertEqual(OperationDefenseProjectionOutbox.objects.count(), 1)
+
+        result = drain_operation_defense_outbox(tenant_slug="tenant-outbox")
+
+        self.assertEqual(result["operations_synced"], 1)
+        self.assertFalse(OperationDefenseProjection.objects.filter(operacion=otra).exists())
@@ -1,6 +1,8 @@
 from __future__ import annotations
 
-from datetime import date, timedelta
+import shutil
+import tempfile
+from datetime import date, datetime, timedelta, timezone as dt_timezone
 from types import SimpleNamespace
 from unittest.mock import patch
 from uuid import uuid4
@@ -9,14 +11,103 @@ from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import TestCase, override_settings
 from django.utils import timezone
 
-from materialidad.defense_projection import calculate_fiscal_defense_index_from_projections, sync_operation_defense_projection
-from materialidad.fdi_engine import FORMULA_VERSION, PIPELINE_VERSION
-from materialidad.services import calculate_fiscal_defense_index_internal, persist_fdi_snapshot
+from materialidad.defense_projection import (
+    _projection_queryset_for_window,
+    _window_bounds,
+    bulk_sync_operation_defense_projections,
+    calculate_fiscal_defense_index_from_projections,
+    projection_source_queryset,
+    sync_operation_defense_projection,
+)
+from materialidad.fdi_engine import FORMULA_VERSION, PIPELINE_VERSION, build_internal_fdi_payload, clamp_score
+from materialidad.services import (
+    calculate_fiscal_defense_index_internal,
+    get_fdi_operability_metrics,
+    persist_fdi_snapshot,
+)
 from materialidad.models import Contrato, Empresa, EvidenciaMaterial, Operacion, OperationDefenseProjection, Proveedor
 
 
+
+def _legacy_projection_payload(*, days: int, tenant_slug: str) -> dict:
+    """Cálculo previo a la agregación en SQL: recorre las proyecciones en Python."""
+
+    captured_at = timezone.now()
+    projections = list(
+        _projection_queryset_for_window(tenant_slug=tenant_slug, days=days, empresa_id=None).order_by("operacion_id")
+    )
+    included = [projection for projection in projections if projection.included_in_fdi]
+    period_start, today = _window_bounds(days)
+    has_universe = len(included) > 0
+
+    def _avg(values: list[float]) -> float:
+        if not values:
+            return 0.0
+        return clamp_score(sum(values) / len(values))
+
+    target = included if included else projections
+    correlation_ids = {str(projection.correlation_id) for projection in target if projection.correlation_id}
+    trace_correlation_id = next(iter(correlation_ids)) if len(correlation_ids) == 1 else None
+    breakdown = {key: _avg([float(getattr(projection, key.lower())) for projection in target]) for key in ("DM", "SE", "SC", "EC", "DO")}
+    inputs = {
+        "total_operaciones": len(projections),
+        "operaciones_en_universo": len(included),
+        "operaciones_fuera_universo": max(len(projections) - len(included), 0),
+        "avg_confidence_score": _avg([float(projection.confidence_score) for projection in target]),
+        "avg_input_integrity": _avg([float(projection.input_integrity) for projection in target]),
+        "avg_completeness_quality": _avg([float(projection.completeness_quality) for projection in target]),
+        "avg_freshness_quality": _avg([float(projection.freshness_quality) for projection in target]),
+        "high_risk_flags": sum(1 for projection in target if "proveedor_riesgo_alto" in (projection.risk_flags_json or [])),
+        "high_69b_flags": sum(
+            1
+            for projection in target
+            if any(flag in (projection.risk_flags_json or []) for flag in ("proveedor_69b_presunto", "proveedor_69b_definitivo"))
+        ),
+        "projection_groups": len(correlation_ids),
+    }
+    actions = [
+        {
+            "priority": "info" if has_universe else "warning",
+            "title": "Universo técnico sincronizado",
+            "description": f"{len(included)} operaciones incluidas de {len(projections)} proyectadas para el periodo.",
+        }
+    ]
+    if has_universe and inputs["avg_confidence_score"] < 70:
+        actions.append(
+            {
+                "priority": "high",
+                "title": "Elevar confianza del universo",
+                "description": "Completar faltantes estructurales y refrescar validaciones SAT para robustecer el snapshot oficial.",
+            }
+        )
+    payload = build_internal_fdi_payload(
+        generated_at=captured_at.isoformat(),
+        days=days,
+        period_from=period_start.isoformat(),
+        period_to=today.isoformat(),
+        empresa_id=None,
+        has_universe=has_universe,
+        breakdown=breakdown,
+        inputs=inputs,
+        actions=actions,
+        confidence_score=inputs["avg_confidence_score"],
+        trace={
+            "correlation_id": trace_correlation_id,
+            "formula_version": FORMULA_VERSION,
+            "pipeline_version": PIPELINE_VERSION,
+            "source": "operation_defense_projection",
+        },
+    )
+    payload["meta"]["source"] = "operation_defense_projection"
+    payload["meta"]["projection_correlation_id"] = trace_correlation_id
+    return payload
+
+
 class OperationDefenseProjectionTests(TestCase):
     def setUp(self):
+        self.media_dir = tempfile.mkdtemp(prefix="materialidad-evidencias-")
+        self.override = override_settings(MEDIA_ROOT=self.media_dir)
+        self.override.enable()
         self.empresa = Empresa.objects.create(
             razon_social="Empresa Proyeccion SA de CV",
             rfc="EPR010101AAA",
@@ -68,6 +159,10 @@ class OperationDefenseProjectionTests(TestCase):
             descripcion="Bitacora de seguimiento",
         )
 
+    def tearDown(self):
+        self.override.disable()
+        shutil.rmtree(self.media_dir, ignore_errors=True)
+
     def _create_operacion_with_evidence(self, *, fecha_operacion: date, uuid_cfdi: str, referencia_spei: str) -> Operacion:
         operacion = Operacion.objects.create(
             empresa=self.empresa,
@@ -133,6 +228,37 @@ class OperationDefenseProjectionTests(TestCase):
         self.assertEqual(second.correlation_id, second_correlation)
         self.assertIn("proveedor_riesgo_alto", second.risk_flags_json)
 
+    def test_bulk_sync_matches_single_sync_with_constant_queries(self):
+        extra = [
+            self._create_operacion_with_evidence(
+                fecha_operacion=date(2026, 2, 11 + index),
+                uuid_cfdi=f"3f2504e0-4f89-41d3-9a0c-0305e82c35{index:02d}",
+                referencia_spei=f"SPEI-BULK-{index}",
+            )
+            for index in range(4)
+        ]
+        single = sync_operation_defense_projection(operacion=self.operacion, tenant_slug="tenant-test")
+        OperationDefenseProjection.objects.all().delete()
+
+        queryset = projection_source_queryset().order_by("id")
+        # Operaciones + evidencias + checklists (sin items que precargar) y un solo upsert por lote.
+        with self.assertNumQueries(4):
+            synced = bulk_sync_operation_defense_projections(queryset, tenant_slug="tenant-test", batch_size=10)
+
+        self.assertEqual(synced, 5)
+        self.assertEqual(OperationDefenseProjection.objects.count(), 5)
+        bulk = OperationDefenseProjection.objects.get(operacion=self.operacion)
+        for field in ("score_base", "confidence_score", "dm", "se", "sc", "ec", "do", "included_in_fdi", "profile"):
+            self.assertEqual(getattr(bulk, field), getattr(single, field), field)
+        self.assertEqual(bulk.inputs_json, single.inputs_json)
+
+        self.proveedor.riesgo_fiscal = Proveedor.Riesgo.ALTO
+        self.proveedor.save(update_fields=["riesgo_fiscal", "updated_at"])
+        bulk_sync_operation_defense_projections(projection_source_queryset().filter(id=extra[0].id), tenant_slug="tenant-test")
+        refreshed = OperationDefenseProjection.objects.get(operacion=extra[0])
+        self.assertIn("proveedor_riesgo_alto", refreshed.risk_flags_json)
+        self.assertEqual(OperationDefenseProjection.objects.count(), 5)
+
     def test_sync_excludes_pending_operation_with_critical_missing_documents(self):
         operacion = Operacion.objects.create(
             empresa=self.empresa,
@@ -173,6 +299,77 @@ class OperationDefenseProjectionTests(TestCase):
         self.assertEqual(payload["inputs"]["operaciones_en_universo"], 1)
         self.assertGreater(payload["score"], 0.0)
 
+    def test_aggregate_computes_averages_and_flags_in_one_query(self):
+        today = timezone.localdate()
+        operaciones = [
+            self._create_operacion_with_evidence(
+                fecha_operacion=today - timedelta(days=index + 1),
+                uuid_cfdi=f"3f2504e0-4f89-41d3-9a0c-0305e82c36{index:02d}",
+                referencia_spei=f"SPEI-AGG-{index}",
+            )
+            for index in range(3)
+        ]
+        correlation_id = uuid4()
+        for operacion in operaciones:
+            sync_operation_defense_projection(operacion=operacion, tenant_slug="tenant-test", correlation_id=correlation_id)
+        OperationDefenseProjection.objects.filter(operacion=operaciones[0]).update(
+            dm="71.3",
+            risk_flags_json=["proveedor_riesgo_alto", "proveedor_69b_presunto"],
+        )
+        OperationDefenseProjection.objects.filter(operacion=operaciones[1]).update(
+            dm="64.8",
+            risk_flags_json=["proveedor_69b_definitivo"],
+        )
+        OperationDefenseProjection.objects.filter(operacion=operaciones[2]).update(included_in_fdi=False)
+
+        with self.assertNumQueries(1):
+            payload = calculate_fiscal_defense_index_from_projections(days=30, tenant_slug="tenant-test", refresh=False)
+
+        self.assertEqual(payload["inputs"]["total_operaciones"], 3)
+        self.assertEqual(payload["inputs"]["operaciones_en_universo"], 2)
+        self.assertEqual(payload["inputs"]["operaciones_fuera_universo"], 1)
+        self.assertEqual(payload["breakdown"]["DM"], 68.0)
+        self.assertEqual(payload["inputs"]["high_risk_flags"], 1)
+        self.assertEqual(payload["inputs"]["high_69b_flags"], 2)
+        self.assertEqual(payload["inputs"]["projection_groups"], 1)
+        self.assertEqual(payload["meta"]["projection_correlation_id"], str(correlation_id))
+
+    def test_aggregate_mean_rounds_exact_sum_within_a_tenth_of_python_mean(self):
+        today = timezone.localdate()
+        operaciones = [
+            self._create_operacion_with_evidence(
+                fecha_operacion=today - timedelta(days=index + 1),
+                uuid_cfdi=f"3f2504e0-4f89-41d3-9a0c-0305e82c37{index:02d}",
+                referencia_spei=f"SPEI-EQ-{index}",
+            )
+            for index in range(2)
+        ]
+        correlation_id = uuid4()
+        for operacion in operaciones:
+            sync_operation_defense_projection(operacion=operacion, tenant_slug="tenant-test", correlation_id=correlation_id)
+        # La media exacta de DM es 57.85: la suma exacta (115.7) entre 2 redondea a 57.9, la suma
+        # en float del cálculo anterior (115.69999999999999) redondea a 57.8.
+        for operacion, dm in zip(operaciones, ("30.9", "84.8")):
+            OperationDefenseProjection.objects.filter(operacion=operacion).update(dm=dm)
+
+        fixed_now = datetime(2026, 3, 1, 12, 0, tzinfo=dt_timezone.utc)
+        with patch("materialidad.defense_projection.timezone.now", return_value=fixed_now), patch(
+            "django.utils.timezone.now", return_value=fixed_now
+        ):
+            legacy = _legacy_projection_payload(days=30, tenant_slug="tenant-test")
+            current = calculate_fiscal_defense_index_from_projections(days=30, tenant_slug="tenant-test", refresh=False)
+
+        self.assertEqual(current["breakdown"]["DM"], 57.9)
+        self.assertEqual(legacy["breakdown"]["DM"], 57.8)
+        for key, value in legacy["breakdown"].items():
+            self.assertAlmostEqual(current["breakdown"][key], value, delta=0.1 + 1e-9)
+        for key, value in legacy["inputs"].items():
+            if key.startswith("avg_"):
+                self.assertAlmostEqual(current["inputs"][key], value, delta=0.1 + 1e-9)
+            else:
+                self.assertEqual(current["inputs"][key], value)
+        self.assertAlmostEqual(current["score"], legacy["score"], delta=0.1 + 1e-9)
+
     def test_aggregate_filters_projection_window_and_aligns_trace_to_window_universe(self):
         today = timezone.localdate()
         recent_operacion = self._create_operacion_with_evidence(
@@ -219,12 +416,32 @@ class OperationDefenseProjectionTests(TestCase):
             tenant_slug="tenant-test",
         )
 
-        payload = calculate_fiscal_defense_index_internal(days=90, empresa_id=self.empresa.id)
+        payload = calculate_fiscal_defense_index_internal(days=90, empresa_id=self.empresa.id, legacy_comparison=True)
 
         self.assertIn("legacy_comparison", payload["meta"])
         self.assertEqual(payload["meta"]["legacy_comparison"]["legacy_score"], 65.0)
         self.assertIn("score_delta", payload["meta"]["legacy_comparison"])
 
+    @override_settings(FDI_LEGACY_SHADOW_SAMPLE_RATE=0.0)
+    @patch("materialidad.defense_projection.TenantContext.get_current_tenant")
+    @patch("materialidad.services._calculate_legacy_fdi_internal")
+    def test_internal_calculation_skips_legacy_comparison_unless_sampled(self, mock_legacy, mock_current_tenant):
+        mock_current_tenant.return_value = SimpleNamespace(slug="tenant-test")
+        sync_operation_defense_projection(
+            operacion=self.operacion,
+            tenant_slug="tenant-test",
+        )
+
+        payload = calculate_fiscal_defense_index_internal(days=90, empresa_id=self.empresa.id)
+
+        mock_legacy.assert_not_called()
+        self.assertNotIn("legacy_comparison", payload["meta"])
+
+        with override_settings(FDI_LEGACY_SHADOW_SAMPLE_RATE=1.0):
+            sampled = calculate_fiscal_defense_index_internal(days=90, empresa_id=self.empresa.id)
+        mock_legacy.assert_called_once()
+        self.assertIn("legacy_comparison", sampled["meta"])
+
     @patch("materialidad.services.TenantContext.get_current_tenant")
     def test_persist_snapshot_stores_confidence_and_trace(self, mock_current_tenant):
         mock_current_tenant.return_value = SimpleNamespace(slug="tenant-test")
@@ -240,6 +457,25 @@ class OperationDefenseProjectionTests(TestCase):
         self.assertEqual(snapshot.pipeline_version, PIPELINE_VERSION)
         self.assertIsNotNone(snapshot.correlation_id)
 
+    @patch("materialidad.services.TenantContext.get_current_tenant")
+    @patch("materialidad.services._calculate_legacy_fdi_internal")
+    def test_shadow_snapshot_feeds_operability_divergence(self, mock_legacy, mock_current_tenant):
+        mock_current_tenant.return_value = SimpleNamespace(slug="tenant-test")
+        mock_legacy.return_value = {"score": 65.0, "level": "CONTROLADO"}
+        sync_operation_defense_projection(
+            operacion=self.operacion,
+            tenant_slug="tenant-test",
+        )
+
+        snapshot = persist_fdi_snapshot(days=90, source="test", legacy_comparison=True)
+        mock_legacy.reset_mock()
+        metrics = get_fdi_operability_metrics(days=90)
+
+        self.assertEqual(snapshot.legacy_comparison_json["legacy_score"], 65.0)
+        mock_legacy.assert_not_called()
+        self.assertTrue(metrics["divergence"]["available"])
+        self.assertEqual(metrics["divergence"]["legacy_score"], 65.0)
+
     @override_settings(FDI_ALLOW_LEGACY_FALLBACK=True)
     @patch("materialidad.services._calculate_legacy_fdi_internal")
     @patch("materialidad.defense_projection.calculate_fiscal_defense_index_from_projections", side_effect=RuntimeError("projection failed"))
@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+from io import BytesIO
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+from reportlab.pdfgen import canvas
+
+from materialidad import pdf_text
+from materialidad.pdf_text import PdfSource, extract_pdf_text, iter_pdf_pages
+
+
+def _build_pdf(pages: int) -> bytes:
+    buffer = BytesIO()
+    pdf = canvas.Canvas(buffer)
+    for index in range(pages):
+        pdf.drawString(72, 720, f"Pagina {index} del compendio fiscal")
+        pdf.showPage()
+    pdf.save()
+    return buffer.getvalue()
+
+
+class PdfTextExtractionTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    @override_settings(PDF_EXTRACTION_WORKERS=2, PDF_PARALLEL_MIN_PAGES=4)
+    def test_extraccion_paralela_conserva_el_orden_de_las_paginas(self):
+        self.addCleanup(pdf_text.shutdown_pool)
+        source = PdfSource.from_bytes(_build_pdf(20))
+
+        with patch.object(pdf_text, "MIN_PAGES_PER_RANGE", 3):
+            pages = list(iter_pdf_pages(source))
+
+        self.assertIsNotNone(pdf_text._pool)
+        self.assertEqual([index for index, _, _ in pages], list(range(20)))
+        self.assertEqual({total for _, total, _ in pages}, {20})
+        for index, _, text in pages:
+            self.assertIn(f"Pagina {index} ", text)
+
+    @override_settings(PDF_EXTRACTION_WORKERS=0)
+    def test_segunda_lectura_sale_del_cache_por_sha256(self):
+        data = _build_pdf(5)
+        primera = extract_pdf_text(PdfSource.from_bytes(data))
+
+        with patch.object(PdfSource, "open_reader", side_effect=AssertionError("no debe releer el PDF")):
+            self.assertEqual(extract_pdf_text(PdfSource.from_bytes(data)), primera)
+            parcial = list(iter_pdf_pages(PdfSource.from_bytes(data), start_page=1, max_pages=2))
+
+        self.assertEqual([index for index, _, _ in parcial], [1, 2])
+        self.assertIn("Pagina 4 ", primera)
+
+    @override_settings(PDF_EXTRACTION_WORKERS=0)
+    def test_lectura_parcial_no_se_cachea(self):
+        data = _build_pdf(4)
+        texto = extract_pdf_text(PdfSource.from_bytes(data), max_pages=2)
+
+        self.assertIn("Pagina 1 ", texto)
+        self.assertNotIn("Pagina 2 ", texto)
+        self.assertIsNone(pdf_text._cache_get(PdfSource.from_bytes(data).sha256))
@@ -29,7 +29,7 @@ class RefreshOperationDefenseProjectionsCommandTests(TestCase):
         mock_activate,
         mock_clear,
     ):
-        mock_sync.return_value = [object()] * 7
+        mock_sync.return_value = 7
         stdout = StringIO()
 
         call_command(
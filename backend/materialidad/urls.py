@@ -4,6 +4,7 @@ from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
 from .views import (
+    AIJobViewSet,
     ChecklistItemViewSet,
     ChecklistViewSet,
     OperacionChecklistItemViewSet,
@@ -57,6 +58,7 @@ router.register("conciliaciones", OperacionConciliacionViewSet, basename="concil
 router.register("fuentes-legales", LegalReferenceSourceViewSet, basename="legal-reference")
 router.register("corpus-legales", LegalCorpusUploadViewSet, basename="legal-corpus-upload")
 router.register("consultas-legales", LegalConsultationViewSet, basename="legal-consultation")
+router.register("tareas-ia", AIJobViewSet, basename="ai-job")
 router.register("checklists", ChecklistViewSet, basename="checklist")
 router.register("checklist-items", ChecklistItemViewSet, basename="checklist-item")
 router.register("operacion-checklist-items", OperacionChecklistItemViewSet, basename="operacion-checklist-item")
@@ -5,6 +5,7 @@ from datetime import date, datetime, time, timedelta
 import logging
 from decimal import Decimal
 import re
+from typing import Any, Iterator
 from uuid import UUID
 from django.db import DatabaseError, IntegrityError, transaction
 from django.db.models import Prefetch, Q
@@ -20,6 +21,7 @@ from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.parsers import FormParser, MultiPartParser
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
 from rest_framework.views import APIView
 
 from tenancy.context import TenantContext
@@ -96,15 +98,7 @@ def _extract_document_text(uploaded_file) -> str:
 
             return "\n\n".join(parts)
         if extension in {"pdf"}:
-            from pypdf import PdfReader
-
-            reader = PdfReader(uploaded_file)
-            chunks: list[str] = []
-            for page in reader.pages:
-                text = page.extract_text() or ""
-                if text:
-                    chunks.append(text)
-            return "\n".join(chunks)
+            return extract_pdf_text(PdfSource.from_file(uploaded_file), skip_empty=True)
     except Exception as exc:
         logger.warning("No se pudo extraer texto del archivo %s: %s", filename, exc)
     finally:
@@ -240,13 +234,22 @@ def _extract_pdf_concepts(file_obj, filename: str) -> tuple[list[dict], dict]:
 
     return concepts, metadata
 
-from .ai.client import OpenAIClientError
+from .ai.client import GeminiClientError, OpenAIClientError
 from .ai.checklists import generate_checklist_draft
 from .ai.clause_library import suggest_clauses
 from .ai.clause_optimizer import optimize_clause, ClauseOptimizationError
-from .ai.contracts import generate_contract_document, generate_definitive_contract
+from .ai.contracts import generate_contract_document, generate_definitive_contract, stream_contract_document
 from .ai.citations import render_citations_markdown
 from .ai.redlines import analyze_redlines
+from .ai_jobs import (
+    ai_job_accepted_response,
+    ai_jobs_async_requested,
+    ai_job_effect,
+    ai_regeneration_requested,
+    complete_ai_job,
+    enqueue_ai_job,
+    record_ai_job_effect,
+)
 from .exporters import (
     build_audit_materiality_docx,
     build_audit_materiality_pdf,
@@ -255,8 +258,16 @@ from .exporters import (
     build_operacion_dossier_zip,
     markdown_to_docx_bytes,
 )
-from .legal_corpus import process_legal_corpus_upload
+from .legal_corpus import (
+    enqueue_legal_corpus_upload,
+    legal_corpus_background_enabled,
+    process_legal_corpus_upload,
+)
+from .pagination import KeysetOptInPagination
+from .pdf_text import PdfSource, extract_pdf_text
+from .sse import EventStreamRenderer, event_stream_response
 from .models import (
+    AIJob,
     AlertaOperacion,
     AuditMaterialityDossier,
     AuditMaterialityDossierVersion,
@@ -292,6 +303,7 @@ from .models import (
 )
 from .checklist_templates import refresh_operacion_checklist_progress
 from .serializers import (
+    AIJobSerializer,
     AlertaOperacionSerializer,
     AuditMaterialityDossierSerializer,
     AuditMaterialityDossierVersionSerializer,
@@ -349,10 +361,12 @@ from .serializers import (
 from .services import (
     get_dashboard_cobertura_p0,
     create_or_get_alerta_operacion_faltantes,
-    get_dashboard_metrics,
+    get_materialized_dashboard_metrics,
     get_operacion_faltantes_materialidad,
     get_operacion_riesgo_materialidad,
     perform_legal_consultation,
+    stream_legal_consultation,
+    refresh_operacion_riesgo_columns,
     sync_operacion_materialidad,
     trigger_proveedor_validacion,
     trigger_validacion_proveedor,
@@ -415,6 +429,19 @@ def _resolve_actor_display_name(user) -> str:
 from .ai.csf_extractor import extract_csf_data
 
 
+def _current_tenant_slug() -> str | None:
+    tenant = TenantContext.get_current_tenant()
+    return tenant.slug if tenant else None
+
+
+def _job_parameters(data) -> dict:
+    """Copia JSON de ``request.data`` para re-validarla en ``process_ai_jobs``."""
+
+    if hasattr(data, "lists"):
+        return {key: values if len(values) > 1 else values[0] for key, values in data.lists()}
+    return dict(data)
+
+
 class _CSFUploadMixin:
     """Mixin que agrega acción upload_csf a un ViewSet de Empresa o Proveedor."""
 
@@ -432,15 +459,36 @@ class _CSFUploadMixin:
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
+        if ai_jobs_async_requested(request) and _current_tenant_slug():
+            job = enqueue_ai_job(
+                AIJob.Kind.CSF,
+                tenant_slug=_current_tenant_slug(),
+                user=request.user,
+                parametros={"nombre_archivo": archivo.name},
+                archivo=archivo,
+            )
+            return ai_job_accepted_response(request, job)
+
         # Leer contenido
         content = archivo.read()
         tenant = getattr(request, "tenant", None)
-        try:
-            datos = extract_csf_data(content, archivo.name, tenant=tenant)
-        except RuntimeError as exc:
-            return Response({"detail": str(exc)}, status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+        status_code, body = _extract_csf_response(content, archivo.name, tenant=tenant)
+        return Response(body, status=status_code)
+
+
+def _extract_csf_response(content: bytes, filename: str, *, tenant) -> tuple[int, dict]:
+    try:
+        datos = extract_csf_data(content, filename, tenant=tenant)
+    except RuntimeError as exc:
+        return status.HTTP_422_UNPROCESSABLE_ENTITY, {"detail": str(exc)}
+    return status.HTTP_200_OK, {"datos_extraidos": datos}
 
-        return Response({"datos_extraidos": datos})
+
+def run_csf_extraction_job(job: AIJob) -> tuple[int, dict]:
+    with job.archivo.open("rb") as fh:
+        content = fh.read()
+    filename = job.parametros.get("nombre_archivo") or job.archivo.name
+    return _extract_csf_response(content, filename, tenant=TenantContext.get_current_tenant())
 
 
 def _apply_csf_fields(instance, datos: dict) -> None:
@@ -718,6 +766,144 @@ class ProveedorViewSet(_CSFUploadMixin, viewsets.ModelViewSet):
         return Response(self.get_serializer(proveedor).data, status=status.HTTP_200_OK)
 
 
+def _prepare_contract_for_draft(data: dict) -> Contrato:
+    """Crea o actualiza el contrato al que se adjuntará el borrador AI."""
+
+    contrato = data.get("contrato")
+    template = data.get("template")
+    if contrato is None:
+        categoria = template.categoria if template else Contrato.Categoria.BASE_CORPORATIVA
+        proceso = template.proceso if template else Contrato.ProcesoNegocio.OPERACIONES
+        tipo_empresa = template.tipo_empresa if template else Contrato.TipoEmpresa.MIXTA
+        nombre_base = template.nombre if template else "Contrato generado"
+        contrato = Contrato.objects.create(
+            empresa=data["empresa"],
+            proveedor=data.get("proveedor"),
+            template=template,
+            nombre=f"{nombre_base} - {data['empresa'].razon_social}",
+            categoria=categoria,
+            proceso=proceso,
+            tipo_empresa=tipo_empresa,
+            descripcion=(data.get("resumen_necesidades") or (template.descripcion if template else "")),
+            razon_negocio=data.get("razon_negocio", ""),
+            beneficio_economico_esperado=data.get("beneficio_economico_esperado"),
+            beneficio_fiscal_estimado=data.get("beneficio_fiscal_estimado"),
+            fecha_cierta_requerida=data.get("fecha_cierta_requerida", False),
+            metadata={"generado_por": "ai"},
+        )
+    else:
+        # Actualizar datos del contrato existente
+        contrato.empresa = data["empresa"]
+        if "proveedor" in data:
+            contrato.proveedor = data.get("proveedor")
+        if template:
+            contrato.template = template
+            contrato.categoria = template.categoria
+            contrato.proceso = template.proceso
+            contrato.tipo_empresa = template.tipo_empresa
+        if "resumen_necesidades" in data:
+            contrato.descripcion = data.get("resumen_necesidades")
+        if "razon_negocio" in data:
+            contrato.razon_negocio = data.get("razon_negocio")
+        if "beneficio_economico_esperado" in data:
+            contrato.beneficio_economico_esperado = data.get("beneficio_economico_esperado")
+        if "beneficio_fiscal_estimado" in data:
+            contrato.beneficio_fiscal_estimado = data.get("beneficio_fiscal_estimado")
+        if "fecha_cierta_requerida" in data:
+            contrato.fecha_cierta_requerida = data.get("fecha_cierta_requerida", False)
+        contrato.save()
+    return contrato
+
+
+def _contract_draft_options(data: dict) -> dict:
+    return {
+        "empresa": data["empresa"],
+        "template": data.get("template"),
+        "razon_negocio": data.get("razon_negocio"),
+        "beneficio_economico_esperado": data.get("beneficio_economico_esperado"),
+        "beneficio_fiscal_estimado": data.get("beneficio_fiscal_estimado"),
+        "fecha_cierta_requerida": data.get("fecha_cierta_requerida", False),
+        "resumen_necesidades": data.get("resumen_necesidades", ""),
+        "clausulas_especiales": data.get("clausulas_especiales"),
+        "idioma": data.get("idioma", "es"),
+        "tono": data.get("tono", "formal"),
+    }
+
+
+def _save_contract_draft(contrato: Contrato, resultado: dict) -> dict:
+    documento = ContractDocument.objects.create(
+        contrato=contrato,
+        kind=ContractDocument.Kind.BORRADOR_AI,
+        source=ContractDocument.Source.AI,
+        idioma=resultado.get("idioma", "es"),
+        tono=resultado.get("tono", "formal"),
+        modelo=resultado.get("modelo", ""),
+        markdown_text=resultado.get("documento_markdown", ""),
+        metadata={
+            "citas_legales": resultado.get("citas_legales") or [],
+            "citas_legales_metadata": resultado.get("citas_legales_metadata") or {},
+        },
+    )
+    resultado["contrato_id"] = contrato.id
+    resultado["documento_id"] = documento.id
+    return resultado
+
+
+def _generate_contract_draft(
+    data: dict,
+    *,
+    bypass_cache: bool = False,
+    contrato: Contrato | None = None,
+) -> tuple[int, dict]:
+    """Crea/actualiza el contrato y su borrador AI; devuelve ``(código HTTP, cuerpo)``."""
+
+    contrato = contrato or _prepare_contract_for_draft(data)
+    try:
+        resultado = _save_contract_draft(
+            contrato,
+            generate_contract_document(bypass_cache=bypass_cache, **_contract_draft_options(data)),
+        )
+    except ImproperlyConfigured as exc:
+        return status.HTTP_503_SERVICE_UNAVAILABLE, {"detail": str(exc)}
+    except OpenAIClientError as exc:
+        return status.HTTP_502_BAD_GATEWAY, {"detail": str(exc)}
+    return status.HTTP_200_OK, resultado
+
+
+def _contract_draft_events(contrato: Contrato, data: dict, *, bypass_cache: bool = False) -> Iterator[tuple[str, Any]]:
+    yield "meta", {"contrato_id": contrato.id}
+    try:
+        for event, payload in stream_contract_document(bypass_cache=bypass_cache, **_contract_draft_options(data)):
+            if event == "done":
+                payload = _save_contract_draft(contrato, payload)
+            yield event, payload
+    except ImproperlyConfigured as exc:
+        yield "error", {"detail": str(exc), "status": status.HTTP_503_SERVICE_UNAVAILABLE}
+    except (OpenAIClientError, GeminiClientError) as exc:
+        yield "error", {"detail": str(exc), "status": status.HTTP_502_BAD_GATEWAY}
+
+
+def run_contract_generation_job(job: AIJob) -> tuple[int, dict]:
+    serializer = ContratoGeneracionSerializer(data=job.parametros)
+    if not serializer.is_valid():
+        return status.HTTP_400_BAD_REQUEST, serializer.errors
+    data = dict(serializer.validated_data)
+    # Un intento previo ya creó el contrato: se actualiza ese en lugar de crear otro.
+    contrato_id = ai_job_effect(job, "contrato_id")
+    if data.get("contrato") is None and contrato_id:
+        data["contrato"] = Contrato.objects.filter(pk=contrato_id).first()
+    contrato = _prepare_contract_for_draft(data)
+    record_ai_job_effect(job, "contrato_id", contrato.id)
+    status_code, body = _generate_contract_draft(
+        data,
+        bypass_cache=bool(job.parametros.get("regenerar")),
+        contrato=contrato,
+    )
+    if status_code >= 400:
+        return status_code, body
+    return complete_ai_job(job, status_code=status_code, body=body)
+
+
 class ContratoViewSet(viewsets.ModelViewSet):
     serializer_class = ContratoSerializer
     queryset = (
@@ -744,90 +930,38 @@ class ContratoViewSet(viewsets.ModelViewSet):
     def generar_contrato(self, request, *args, **kwargs):
         serializer = ContratoGeneracionSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        data = serializer.validated_data
-        contrato = data.get("contrato")
-        template = data.get("template")
-        if contrato is None:
-            categoria = template.categoria if template else Contrato.Categoria.BASE_CORPORATIVA
-            proceso = template.proceso if template else Contrato.ProcesoNegocio.OPERACIONES
-            tipo_empresa = template.tipo_empresa if template else Contrato.TipoEmpresa.MIXTA
-            nombre_base = template.nombre if template else "Contrato generado"
-            contrato = Contrato.objects.create(
-                empresa=data["empresa"],
-                proveedor=data.get("proveedor"),
-                template=template,
-                nombre=f"{nombre_base} - {data['empresa'].razon_social}",
-                categoria=categoria,
-                proceso=proceso,
-                tipo_empresa=tipo_empresa,
-                descripcion=(data.get("resumen_necesidades") or (template.descripcion if template else "")),
-                razon_negocio=data.get("razon_negocio", ""),
-                beneficio_economico_esperado=data.get("beneficio_economico_esperado"),
-                beneficio_fiscal_estimado=data.get("beneficio_fiscal_estimado"),
-                fecha_cierta_requerida=data.get("fecha_cierta_requerida", False),
-                metadata={"generado_por": "ai"},
+        regenerar = ai_regeneration_requested(request)
+        if ai_jobs_async_requested(request) and _current_tenant_slug():
+            job = enqueue_ai_job(
+                AIJob.Kind.CONTRATO,
+                tenant_slug=_current_tenant_slug(),
+                user=request.user,
+                parametros={**_job_parameters(request.data), "regenerar": regenerar},
             )
-        else:
-            # Actualizar datos del contrato existente
-            contrato.empresa = data["empresa"]
-            if "proveedor" in data:
-                contrato.proveedor = data.get("proveedor")
-            if template:
-                contrato.template = template
-                contrato.categoria = template.categoria
-                contrato.proceso = template.proceso
-                contrato.tipo_empresa = template.tipo_empresa
-            if "resumen_necesidades" in data:
-                contrato.descripcion = data.get("resumen_necesidades")
-            if "razon_negocio" in data:
-                contrato.razon_negocio = data.get("razon_negocio")
-            if "beneficio_economico_esperado" in data:
-                contrato.beneficio_economico_esperado = data.get("beneficio_economico_esperado")
-            if "beneficio_fiscal_estimado" in data:
-                contrato.beneficio_fiscal_estimado = data.get("beneficio_fiscal_estimado")
-            if "fecha_cierta_requerida" in data:
-                contrato.fecha_cierta_requerida = data.get("fecha_cierta_requerida", False)
-            contrato.save()
+            return ai_job_accepted_response(request, job)
+        status_code, resultado = _generate_contract_draft(serializer.validated_data, bypass_cache=regenerar)
+        return Response(resultado, status=status_code)
+
+    @action(
+        detail=False,
+        methods=["post"],
+        url_path="generar/stream",
+        renderer_classes=[*api_settings.DEFAULT_RENDERER_CLASSES, EventStreamRenderer],
+    )
+    def generar_contrato_stream(self, request, *args, **kwargs):
+        """Como ``generar`` pero entrega el borrador por SSE conforme el modelo lo escribe."""
 
-        try:
-            resultado = generate_contract_document(
-                empresa=data["empresa"],
-                template=template,
-                razon_negocio=data.get("razon_negocio"),
-                beneficio_economico_esperado=data.get("beneficio_economico_esperado"),
-                beneficio_fiscal_estimado=data.get("beneficio_fiscal_estimado"),
-                fecha_cierta_requerida=data.get("fecha_cierta_requerida", False),
-                resumen_necesidades=data.get("resumen_necesidades", ""),
-                clausulas_especiales=data.get("clausulas_especiales"),
-                idioma=data.get("idioma", "es"),
-                tono=data.get("tono", "formal"),
-            )
-            documento = ContractDocument.objects.create(
-                contrato=contrato,
-                kind=ContractDocument.Kind.BORRADOR_AI,
-                source=ContractDocument.Source.AI,
-                idioma=resultado.get("idioma", "es"),
-                tono=resultado.get("tono", "formal"),
-                modelo=resultado.get("modelo", ""),
-                markdown_text=resultado.get("documento_markdown", ""),
-                metadata={
-                    "citas_legales": resultado.get("citas_legales") or [],
-                    "citas_legales_metadata": resultado.get("citas_legales_metadata") or {},
-                },
-            )
-            resultado["contrato_id"] = contrato.id
-            resultado["documento_id"] = documento.id
-        except ImproperlyConfigured as exc:
-            return Response(
-                {"detail": str(exc)},
-                status=status.HTTP_503_SERVICE_UNAVAILABLE,
-            )
-        except OpenAIClientError as exc:
-            return Response(
-                {"detail": str(exc)},
-                status=status.HTTP_502_BAD_GATEWAY,
-            )
-        return Response(resultado, status=status.HTTP_200_OK)
+        serializer = ContratoGeneracionSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        contrato = _prepare_contract_for_draft(serializer.validated_data)
+        return event_stream_response(
+            _contract_draft_events(
+                contrato,
+                serializer.validated_data,
+                bypass_cache=ai_regeneration_requested(request),
+            ),
+            tenant_slug=_current_tenant_slug(),
+        )
 
     @action(detail=False, methods=["post"], url_path="exportar-docx")
     def exportar_docx(self, request, *args, **kwargs):
@@ -1040,6 +1174,7 @@ class ContratoViewSet(viewsets.ModelViewSet):
                 original_text=data["texto_original"],
                 revised_text=data["texto_revisado"],
                 idioma=data.get("idioma", "es"),
+                bypass_cache=ai_regeneration_requested(request),
             )
         except ValueError as exc:
             return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
@@ -1059,6 +1194,7 @@ class ContratoViewSet(viewsets.ModelViewSet):
                 contexto_contrato=data.get("contexto_contrato", ""),
                 objetivo=data.get("objetivo", "mejorar_fiscal"),
                 idioma=data.get("idioma", "es"),
+                bypass_cache=ai_regeneration_requested(request),
             )
         except ClauseOptimizationError as exc:
             return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
@@ -1304,7 +1440,10 @@ class LegalCorpusUploadViewSet(
         procesar_ahora = serializer.validated_data.get("procesar_ahora", True)
         upload = serializer.save(uploaded_by=request.user)
 
-        if procesar_ahora:
+        encolado = procesar_ahora and legal_corpus_background_enabled()
+        if encolado:
+            enqueue_legal_corpus_upload(upload)
+        elif procesar_ahora:
             try:
                 process_legal_corpus_upload(upload)
             except Exception as exc:
@@ -1327,7 +1466,10 @@ class LegalCorpusUploadViewSet(
                 "estatus": upload.estatus,
             },
         )
-        return Response(self.get_serializer(upload).data, status=status.HTTP_201_CREATED)
+        return Response(
+            self.get_serializer(upload).data,
+            status=status.HTTP_202_ACCEPTED if encolado else status.HTTP_201_CREATED,
+        )
 
     @action(detail=True, methods=["post"], url_path="reprocesar")
     def reprocesar(self, request, *args, **kwargs):
@@ -1335,6 +1477,17 @@ class LegalCorpusUploadViewSet(
         if denied:
             return denied
         upload = self.get_object()
+        if legal_corpus_background_enabled():
+            if upload.estatus == LegalCorpusUpload.ProcessingStatus.PROCESANDO:
+                return Response(
+                    {"detail": "El corpus se está procesando; espera a que termine para reprocesarlo"},
+                    status=status.HTTP_409_CONFLICT,
+                )
+            # ``reanudar=true`` conserva las páginas y lotes ya procesados de un intento fallido.
+            reanudar = str(request.data.get("reanudar", "")).lower() in {"1", "true", "si", "sí"}
+            enqueue_legal_corpus_upload(upload, resume=reanudar)
+            _audit(request, "legal_corpus_upload_reprocesado", upload, changes={"estatus": upload.estatus})
+            return Response(self.get_serializer(upload).data, status=status.HTTP_202_ACCEPTED)
         try:
             process_legal_corpus_upload(upload)
         except Exception as exc:
@@ -1377,6 +1530,7 @@ class ChecklistViewSet(viewsets.ModelViewSet):
             proveedor=payload.get("proveedor"),
             contrato=payload.get("contrato"),
             operacion=payload.get("operacion"),
+            bypass_cache=ai_regeneration_requested(request),
         )
         output = ChecklistDraftResponseSerializer(result)
         return Response(output.data, status=status.HTTP_200_OK)
@@ -1497,12 +1651,22 @@ class EvidenciaMaterialViewSet(viewsets.ModelViewSet):
 
     def perform_create(self, serializer):
         evidencia = serializer.save()
+        sync_operacion_materialidad(
+            operacion=evidencia.operacion,
+            owner_email=getattr(self.request.user, "email", ""),
+            sync_alertas=False,
+        )
         _sync_operation_defense_projection_safe(operacion=evidencia.operacion)
         _audit(self.request, "evidencia_creada", evidencia, changes=serializer.validated_data)
 
     def perform_update(self, serializer):
         changes = serializer.validated_data.copy()
         evidencia = serializer.save()
+        sync_operacion_materialidad(
+            operacion=evidencia.operacion,
+            owner_email=getattr(self.request.user, "email", ""),
+            sync_alertas=False,
+        )
         _sync_operation_defense_projection_safe(operacion=evidencia.operacion)
         if changes:
             _audit(self.request, "evidencia_actualizada", evidencia, changes=changes)
@@ -1511,6 +1675,11 @@ class EvidenciaMaterialViewSet(viewsets.ModelViewSet):
         operacion = instance.operacion
         _audit(self.request, "evidencia_eliminada", instance, changes={"id": instance.id})
         super().perform_destroy(instance)
+        sync_operacion_materialidad(
+            operacion=operacion,
+            owner_email=getattr(self.request.user, "email", ""),
+            sync_alertas=False,
+        )
         _sync_operation_defense_projection_safe(operacion=operacion)
 
 
@@ -1545,6 +1714,8 @@ class MovimientoBancarioViewSet(viewsets.ModelViewSet):
     ordering_fields = ("fecha", "monto", "created_at")
     ordering = ("-fecha",)
     filterset_fields = ("cuenta", "estado_cuenta", "tipo", "es_circular", "alerta_capacidad")
+    pagination_class = KeysetOptInPagination
+    cursor_ordering = ("-fecha", "-id")
 
     def get_queryset(self):
         qs = MovimientoBancario.objects.select_related("cuenta", "estado_cuenta", "cuenta__empresa")
@@ -1721,6 +1892,62 @@ class RazonNegocioAprobacionViewSet(viewsets.ModelViewSet):
         )
 
 
+def _legal_consultation_options(payload: dict, *, user) -> dict:
+    return {
+        "question": payload["pregunta"],
+        "context": payload.get("contexto"),
+        "ley": payload.get("ley"),
+        "source_type": payload.get("tipo_fuente"),
+        "authority": payload.get("autoridad_emisora"),
+        "ordenamiento": payload.get("ordenamiento"),
+        "only_current": payload.get("solo_vigentes", True),
+        "max_refs": payload.get("max_referencias", 3),
+        "user": user,
+    }
+
+
+def _perform_legal_consultation_request(payload: dict, *, user) -> LegalConsultation:
+    return perform_legal_consultation(**_legal_consultation_options(payload, user=user))
+
+
+def _legal_consultation_events(payload: dict, *, user) -> Iterator[tuple[str, Any]]:
+    for event, data in stream_legal_consultation(**_legal_consultation_options(payload, user=user)):
+        if event == "done":
+            data = LegalConsultationSerializer(data).data
+        yield event, data
+
+
+def run_legal_consultation_job(job: AIJob) -> tuple[int, dict]:
+    request_serializer = LegalConsultationRequestSerializer(data=job.parametros)
+    if not request_serializer.is_valid():
+        return status.HTTP_400_BAD_REQUEST, request_serializer.errors
+    try:
+        consultation = _perform_legal_consultation_request(request_serializer.validated_data, user=job.user)
+    except ValueError as exc:
+        return status.HTTP_400_BAD_REQUEST, {"detail": str(exc)}
+    return complete_ai_job(
+        job,
+        status_code=status.HTTP_201_CREATED,
+        body=LegalConsultationSerializer(consultation).data,
+    )
+
+
+class AIJobViewSet(viewsets.ReadOnlyModelViewSet):
+    """Estado de las tareas de IA encoladas con ``asincrono=true``."""
+
+    serializer_class = AIJobSerializer
+    filterset_fields = ("tipo", "estatus")
+
+    def get_queryset(self):
+        tenant = TenantContext.get_current_tenant()
+        if not tenant:
+            return AIJob.objects.none()
+        queryset = AIJob.objects.filter(tenant_slug=tenant.slug).order_by("-created_at")
+        if not self.request.user.is_staff:
+            queryset = queryset.filter(user=self.request.user)
+        return queryset
+
+
 class LegalConsultationViewSet(
     mixins.CreateModelMixin,
     mixins.ListModelMixin,
@@ -1746,19 +1973,16 @@ class LegalConsultationViewSet(
     def create(self, request, *args, **kwargs):
         request_serializer = LegalConsultationRequestSerializer(data=request.data)
         request_serializer.is_valid(raise_exception=True)
-        payload = request_serializer.validated_data
-        try:
-            consultation = perform_legal_consultation(
-                question=payload["pregunta"],
-                context=payload.get("contexto"),
-                ley=payload.get("ley"),
-                source_type=payload.get("tipo_fuente"),
-                authority=payload.get("autoridad_emisora"),
-                ordenamiento=payload.get("ordenamiento"),
-                only_current=payload.get("solo_vigentes", True),
-                max_refs=payload.get("max_referencias", 3),
+        if ai_jobs_async_requested(request) and _current_tenant_slug():
+            job = enqueue_ai_job(
+                AIJob.Kind.CONSULTA_LEGAL,
+                tenant_slug=_current_tenant_slug(),
                 user=request.user,
+                parametros=_job_parameters(request.data),
             )
+            return ai_job_accepted_response(request, job)
+        try:
+            consultation = _perform_legal_consultation_request(request_serializer.validated_data, user=request.user)
         except ValueError as exc:
             return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
 
@@ -1766,6 +1990,28 @@ class LegalConsultationViewSet(
         headers = self.get_success_headers(serializer.data)
         return Response(serializer.data, status=status.HTTP_201_CREATED, headers=headers)
 
+    @action(
+        detail=False,
+        methods=["post"],
+        url_path="stream",
+        renderer_classes=[*api_settings.DEFAULT_RENDERER_CLASSES, EventStreamRenderer],
+    )
+    def stream(self, request, *args, **kwargs):
+        """Consulta legal por SSE: referencias, fragmentos de la respuesta y la consulta guardada."""
+
+        request_serializer = LegalConsultationRequestSerializer(data=request.data)
+        request_serializer.is_valid(raise_exception=True)
+        tenant_slug = _current_tenant_slug()
+        if not tenant_slug:
+            return Response(
+                {"detail": "Se requiere un tenant activo para consultar la biblioteca legal"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        return event_stream_response(
+            _legal_consultation_events(request_serializer.validated_data, user=request.user),
+            tenant_slug=tenant_slug,
+        )
+
     @action(detail=True, methods=["get"], url_path="exportar-pdf")
     def exportar_pdf(self, request, *args, **kwargs):
         consultation = self.get_object()
@@ -1793,6 +2039,8 @@ class OperacionViewSet(viewsets.ModelViewSet):
     filter_backends = (filters.SearchFilter, filters.OrderingFilter)
     search_fields = ("uuid_cfdi", "empresa__razon_social", "proveedor__razon_social")
     ordering_fields = ("fecha_operacion", "monto", "created_at")
+    pagination_class = KeysetOptInPagination
+    cursor_ordering = ("-fecha_operacion", "-id")
     filterset_fields = (
         "estatus_validacion",
         "moneda",
@@ -1865,6 +2113,7 @@ class OperacionViewSet(viewsets.ModelViewSet):
             proveedor=payload.get("proveedor", operacion.proveedor),
             contrato=payload.get("contrato", operacion.contrato),
             operacion=operacion,
+            bypass_cache=ai_regeneration_requested(request),
         )
         output = ChecklistDraftResponseSerializer(result)
         return Response(output.data, status=status.HTTP_200_OK)
@@ -1911,37 +2160,13 @@ class OperacionViewSet(viewsets.ModelViewSet):
         if rfc:
             queryset = queryset.filter(Q(empresa__rfc__iexact=rfc) | Q(proveedor__rfc__iexact=rfc))
 
-        operaciones = list(queryset)
-        serializer = BandejaRevisionItemSerializer(operaciones, many=True)
-        items = list(serializer.data)
-
+        self._refresh_riesgo_pendiente(queryset)
         if rol:
-            items = [item for item in items if item.get("perfil_validacion") == rol]
-
+            queryset = queryset.filter(perfil_validacion=rol)
         if riesgo:
-            items = [item for item in items if item.get("riesgo_nivel") == riesgo]
+            queryset = queryset.filter(riesgo_nivel=riesgo)
 
-        if orden == "antiguedad":
-            items.sort(
-                key=lambda item: (
-                    item.get("fecha_operacion") or "",
-                    -int(item.get("riesgo_score") or 0),
-                    int(item.get("id") or 0),
-                )
-            )
-        else:
-            items.sort(
-                key=lambda item: (
-                    -int(item.get("riesgo_score") or 0),
-                    item.get("fecha_operacion") or "",
-                    int(item.get("id") or 0),
-                )
-            )
-
-        page = self.paginate_queryset(items)
-        if page is not None:
-            return self.get_paginated_response(page)
-        return Response(items, status=status.HTTP_200_OK)
+        return self._paginated_revision_response(queryset, orden=orden, serializer_class=BandejaRevisionItemSerializer)
 
     @action(detail=False, methods=["get"], url_path="matriz-materialidad")
     def matriz_materialidad(self, request, *args, **kwargs):
@@ -1988,34 +2213,31 @@ class OperacionViewSet(viewsets.ModelViewSet):
         if rfc:
             queryset = queryset.filter(Q(empresa__rfc__iexact=rfc) | Q(proveedor__rfc__iexact=rfc))
 
-        operaciones = list(queryset)
-        serializer = MatrizMaterialidadItemSerializer(operaciones, many=True)
-        items = list(serializer.data)
-
+        self._refresh_riesgo_pendiente(queryset)
         if riesgo:
-            items = [item for item in items if item.get("riesgo_nivel") == riesgo]
+            queryset = queryset.filter(riesgo_nivel=riesgo)
 
+        return self._paginated_revision_response(queryset, orden=orden, serializer_class=MatrizMaterialidadItemSerializer)
+
+    @staticmethod
+    def _refresh_riesgo_pendiente(queryset) -> None:
+        # Operaciones creadas antes de persistir el riesgo (o por carga directa) se evalúan
+        # una sola vez aquí; en estado estable la consulta no regresa filas.
+        refresh_operacion_riesgo_columns(queryset.filter(perfil_validacion="").iterator(chunk_size=500))
+
+    def _paginated_revision_response(self, queryset, *, orden: str, serializer_class):
         if orden == "antiguedad":
-            items.sort(
-                key=lambda item: (
-                    item.get("fecha_operacion") or "",
-                    -int(item.get("riesgo_score") or 0),
-                    int(item.get("id") or 0),
-                )
-            )
+            ordering = ("fecha_operacion", "-riesgo_score", "id")
         else:
-            items.sort(
-                key=lambda item: (
-                    -int(item.get("riesgo_score") or 0),
-                    item.get("fecha_operacion") or "",
-                    int(item.get("id") or 0),
-                )
-            )
+            ordering = ("-riesgo_score", "fecha_operacion", "id")
+        queryset = queryset.order_by(*ordering)
+        # El modo cursor de la paginación sigue el mismo orden que la bandeja.
+        self.cursor_ordering = ordering
 
-        page = self.paginate_queryset(items)
+        page = self.paginate_queryset(queryset)
         if page is not None:
-            return self.get_paginated_response(page)
-        return Response(items, status=status.HTTP_200_OK)
+            return self.get_paginated_response(serializer_class(page, many=True).data)
+        return Response(serializer_class(queryset, many=True).data, status=status.HTTP_200_OK)
 
     @staticmethod
     def _transiciones_permitidas() -> dict[str, set[str]]:
@@ -2158,6 +2380,8 @@ class AuditLogViewSet(viewsets.ReadOnlyModelViewSet):
     ordering_fields = ("created_at",)
     ordering = ("-created_at",)
     filterset_fields = ("action", "object_type", "actor_email")
+    pagination_class = KeysetOptInPagination
+    cursor_ordering = ("-created_at", "-id")
 
     def get_queryset(self):
         qs = AuditLog.objects.all()
@@ -2567,7 +2791,7 @@ class CotizacionPDFViewSet(viewsets.ModelViewSet):
 
 class DashboardMetricsView(APIView):
     def get(self, request, *args, **kwargs):
-        data = get_dashboard_metrics(include_fdi_operability=True)
+        data = get_materialized_dashboard_metrics()
         return Response(data, status=status.HTTP_200_OK)
 
 
@@ -2726,6 +2950,8 @@ class AlertaOperacionViewSet(viewsets.ModelViewSet):
     ordering_fields = ["fecha_alerta", "created_at", "estatus", "tipo_alerta"]
     ordering = ["-fecha_alerta"]
     filterset_fields = ["empresa", "proveedor", "estatus", "tipo_alerta", "operacion"]
+    pagination_class = KeysetOptInPagination
+    cursor_ordering = ("-fecha_alerta", "-id")
 
     def get_queryset(self):
         qs = AlertaOperacion.objects.select_related("empresa", "proveedor", "operacion")
@@ -88,6 +88,13 @@ DATABASES = {
 
 DATABASE_ROUTERS = ["tenancy.routers.TenantDatabaseRouter"]
 
+# Cache compartido entre workers de gunicorn (redis://, pymemcache://, filecache://, dbcache://).
+# Sin DJANGO_CACHE_URL cada proceso usa su propio LocMemCache.
+CACHES = {
+    "default": env.cache_url("DJANGO_CACHE_URL", default="locmemcache://materialidad"),
+}
+CACHES["default"].setdefault("KEY_PREFIX", env("DJANGO_CACHE_KEY_PREFIX", default="materialidad"))
+
 AUTH_PASSWORD_VALIDATORS = [
     {"NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator"},
     {"NAME": "django.contrib.auth.password_validation.MinimumLengthValidator"},
@@ -166,8 +173,32 @@ TENANT_REQUIRED_PATH_PREFIXES = env.list(
     "TENANT_REQUIRED_PATHS", default=["/api/materialidad/"]
 )
 TENANT_FREE_LIMIT = env.int("TENANT_FREE_LIMIT", default=1)
+TENANT_REGISTRY_TTL_SECONDS = env.int("TENANT_REGISTRY_TTL_SECONDS", default=300)
+TENANT_REGISTRY_SHARED_VERSION = env.bool("TENANT_REGISTRY_SHARED_VERSION", default=False)
+TENANT_AI_CONFIG_TTL_SECONDS = env.int("TENANT_AI_CONFIG_TTL_SECONDS", default=300)
+TENANT_AI_CONFIG_SHARED_VERSION = env.bool("TENANT_AI_CONFIG_SHARED_VERSION", default=False)
+TENANT_DB_POOLING = env.bool("TENANT_DB_POOLING", default=False)
+TENANT_DB_CONN_MAX_AGE = env.int("TENANT_DB_CONN_MAX_AGE", default=600)
+TENANT_DB_CONN_HEALTH_CHECKS = env.bool("TENANT_DB_CONN_HEALTH_CHECKS", default=True)
+TENANT_DB_MAX_IDLE_TENANTS = env.int("TENANT_DB_MAX_IDLE_TENANTS", default=8)
+TENANT_DB_MAX_IDLE_PER_TENANT = env.int("TENANT_DB_MAX_IDLE_PER_TENANT", default=4)
 MATERIALIDAD_OBSERVABILITY_SLOW_MS = env.int("MATERIALIDAD_OBSERVABILITY_SLOW_MS", default=1200)
+DASHBOARD_METRICS_MAX_AGE_SECONDS = env.int("DASHBOARD_METRICS_MAX_AGE_SECONDS", default=300)
 FDI_ALLOW_LEGACY_FALLBACK = env.bool("FDI_ALLOW_LEGACY_FALLBACK", default=True)
+FDI_LEGACY_SHADOW_SAMPLE_RATE = env.float("FDI_LEGACY_SHADOW_SAMPLE_RATE", default=0.0)
+LEGAL_VECTOR_INDEX_ENABLED = env.bool("LEGAL_VECTOR_INDEX_ENABLED", default=True)
+LEGAL_VECTOR_INDEX_TTL_SECONDS = env.int("LEGAL_VECTOR_INDEX_TTL_SECONDS", default=900)
+LEGAL_CORPUS_PROCESSING_MODE = env("LEGAL_CORPUS_PROCESSING_MODE", default="inline")
+LEGAL_CORPUS_BATCH_SIZE = env.int("LEGAL_CORPUS_BATCH_SIZE", default=500)
+LEGAL_CORPUS_CHECKPOINT_PAGES = env.int("LEGAL_CORPUS_CHECKPOINT_PAGES", default=25)
+LEGAL_CORPUS_STALE_SECONDS = env.int("LEGAL_CORPUS_STALE_SECONDS", default=900)
+LEGAL_CORPUS_MAX_ATTEMPTS = env.int("LEGAL_CORPUS_MAX_ATTEMPTS", default=3)
+AI_JOBS_MODE = env("AI_JOBS_MODE", default="inline")
+AI_JOBS_STALE_SECONDS = env.int("AI_JOBS_STALE_SECONDS", default=600)
+AI_JOBS_MAX_ATTEMPTS = env.int("AI_JOBS_MAX_ATTEMPTS", default=2)
+PDF_EXTRACTION_WORKERS = env.int("PDF_EXTRACTION_WORKERS", default=os.cpu_count() or 1)
+PDF_PARALLEL_MIN_PAGES = env.int("PDF_PARALLEL_MIN_PAGES", default=40)
+PDF_TEXT_CACHE_TIMEOUT = env.int("PDF_TEXT_CACHE_TIMEOUT", default=7 * 24 * 3600)
 
 N8N_WEBHOOK_URL = env("N8N_WEBHOOK_URL", default=None)
 N8N_API_KEY = env("N8N_API_KEY", default=None)
@@ -187,8 +218,30 @@ PERPLEXITY_API_BASE_URL = env(
 )
 PERPLEXITY_TIMEOUT_SECONDS = env.int("PERPLEXITY_TIMEOUT_SECONDS", default=90)
 PERPLEXITY_MAX_CONTINUATIONS = env.int("PERPLEXITY_MAX_CONTINUATIONS", default=2)
+# Conexiones keep-alive por host en la sesión HTTP compartida de los proveedores IA.
+AI_HTTP_POOL_MAXSIZE = env.int("AI_HTTP_POOL_MAXSIZE", default=10)
+# Cache de respuestas IA por contenido (ver materialidad/ai/response_cache.py).
+AI_RESPONSE_CACHE_ENABLED = env.bool("AI_RESPONSE_CACHE_ENABLED", default=True)
+AI_RESPONSE_CACHE_TTLS = env.dict("AI_RESPONSE_CACHE_TTLS", cast={"value": int}, default={})
+AI_RESPONSE_CACHE_LOCAL_MAX_BYTES = env.int("AI_RESPONSE_CACHE_LOCAL_MAX_BYTES", default=8 * 1024 * 1024)
+AI_RESPONSE_CACHE_MAX_ENTRY_BYTES = env.int("AI_RESPONSE_CACHE_MAX_ENTRY_BYTES", default=256 * 1024)
+# Solicitudes cubiertas (hedging) al modelo de respaldo cuando el primario excede su p95
+# (ver materialidad/ai/latency.py). Los tenants lo activan con {"hedging": true} en la
+# metadata de TenantAIConfig; AI_HEDGING_ENABLED lo activa para todos.
+AI_HEDGING_ENABLED = env.bool("AI_HEDGING_ENABLED", default=False)
+AI_HEDGING_LATENCY_WINDOW = env.int("AI_HEDGING_LATENCY_WINDOW", default=200)
+AI_HEDGING_MIN_SAMPLES = env.int("AI_HEDGING_MIN_SAMPLES", default=20)
+AI_HEDGING_MIN_DELAY_SECONDS = env.float("AI_HEDGING_MIN_DELAY_SECONDS", default=2.0)
+AI_HEDGING_MAX_WORKERS = env.int("AI_HEDGING_MAX_WORKERS", default=8)
 GEMINI_API_KEY = env("GEMINI_API_KEY", default=None)
 GEMINI_DEFAULT_MODEL = env("GEMINI_DEFAULT_MODEL", default="gemini-1.5-pro")
+GEMINI_CONTEXT_CACHE_ENABLED = env.bool("GEMINI_CONTEXT_CACHE_ENABLED", default=True)
+GEMINI_CONTEXT_CACHE_TTL_SECONDS = env.int("GEMINI_CONTEXT_CACHE_TTL_SECONDS", default=3600)
+LEGAL_COMPENDIUM_PATH = env(
+    "LEGAL_COMPENDIUM_PATH",
+    default=str(BASE_DIR.parent / "docs" / "fuentes" / "contenido_notebook.txt"),
+)
+LEGAL_COMPENDIUM_MAX_CHARS = env.int("LEGAL_COMPENDIUM_MAX_CHARS", default=750_000)
 
 CITATION_CORPUS_VERSION = env("CITATION_CORPUS_VERSION", default="v1")
 CITATION_CACHE_TTL_MINUTES = env.int("CITATION_CACHE_TTL_MINUTES", default=720)
@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+from .models import TenantAIConfig
+from .versioned_cache import VersionedCache
+
+SHARED_VERSION_CACHE_KEY = "tenancy:ai_config:version"
+
+
+@dataclass(frozen=True)
+class TenantAIConfigEntry:
+    """AI settings of a tenant (``api_key`` is ``None`` when it falls back to the global key)."""
+
+    api_key: str | None
+    hedging: bool
+
+
+_cache: VersionedCache[int, TenantAIConfigEntry] = VersionedCache(
+    label="la configuración IA de tenants",
+    version_cache_key=SHARED_VERSION_CACHE_KEY,
+    ttl_setting="TENANT_AI_CONFIG_TTL_SECONDS",
+    shared_setting="TENANT_AI_CONFIG_SHARED_VERSION",
+)
+
+
+def _load(tenant_id: int) -> TenantAIConfigEntry:
+    row = (
+        TenantAIConfig.objects.using("default")
+        .filter(tenant_id=tenant_id)
+        .values_list("api_key", "metadata")
+        .first()
+    )
+    api_key, metadata = row or (None, None)
+    return TenantAIConfigEntry(
+        api_key=api_key or None,
+        hedging=bool(isinstance(metadata, dict) and metadata.get("hedging")),
+    )
+
+
+def _get_entry(tenant_id: int) -> TenantAIConfigEntry:
+    return _cache.get(tenant_id, lambda: _load(tenant_id))
+
+
+def get_api_key(tenant_id: int) -> str | None:
+    """Return the tenant's own API key, reading ``TenantAIConfig`` only on a miss."""
+
+    return _get_entry(tenant_id).api_key
+
+
+def hedging_enabled(tenant_id: int) -> bool:
+    """Whether the tenant opted into hedged AI requests (``{"hedging": true}`` in its metadata)."""
+
+    return _get_entry(tenant_id).hedging
+
+
+invalidate = _cache.invalidate
+get_stats = _cache.get_stats
+reset_stats = _cache.reset_stats
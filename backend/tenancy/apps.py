@@ -7,3 +7,6 @@ class TenancyConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "tenancy"
     verbose_name = "Tenancy"
+
+    def ready(self) -> None:
+        from . import signals  # noqa: F401
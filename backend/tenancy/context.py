@@ -5,6 +5,7 @@ from typing import Optional
 
 from django.db import connections
 
+from . import pool, registry
 from .models import Tenant
 
 
@@ -23,15 +24,17 @@ class TenantContext:
     @classmethod
     def activate(cls, slug: str) -> Tenant:
         try:
-            tenant = Tenant.objects.using("default").get(slug=slug)
+            entry = registry.lookup(slug)
         except Tenant.DoesNotExist as exc:  # type: ignore[attr-defined]
             raise TenantNotFound from exc
 
+        tenant = entry.build_tenant()
         if not tenant.is_active:
             raise TenantNotActive
 
         if tenant.db_alias not in connections.databases:
-            connections.databases[tenant.db_alias] = tenant.database_dict()
+            connections.databases[tenant.db_alias] = pool.configure_database(entry.database)
+        pool.acquire(tenant.db_alias)
 
         setattr(_thread_local, "tenant", tenant)
         setattr(_thread_local, "alias", tenant.db_alias)
@@ -48,8 +51,8 @@ class TenantContext:
     @classmethod
     def clear(cls) -> None:
         alias = cls.get_current_db_alias()
-        if alias and alias in connections:
-            connections[alias].close()
+        if alias:
+            pool.release(alias)
         for attr in ("tenant", "alias"):
             if hasattr(_thread_local, attr):
                 delattr(_thread_local, attr)
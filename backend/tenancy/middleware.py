@@ -4,7 +4,6 @@ import logging
 
 from django.conf import settings
 from django.http import JsonResponse
-from rest_framework_simplejwt.tokens import AccessToken
 
 from .context import TenantContext, TenantNotActive, TenantNotFound
 
@@ -16,15 +15,23 @@ class TenantMiddleware:
         self.get_response = get_response
 
     def _is_superuser_from_token(self, request) -> bool:
-        """Best-effort check: decode JWT to see if user is superuser."""
-        auth = request.META.get("HTTP_AUTHORIZATION", "")
-        if not auth.startswith("Bearer "):
-            return False
+        """Best-effort check: decode JWT to see if user is superuser.
+
+        Tokens carry an ``is_superuser`` claim, so routing needs no query. Legacy
+        tokens without the claim load the user once into the per-request auth
+        cache that ``accounts.authentication.JWTAuthentication`` reuses.
+        """
         try:
-            from accounts.models import User
-            token = AccessToken(auth[7:])
-            user = User.objects.filter(pk=token["user_id"]).only("is_superuser").first()
-            return user.is_superuser if user else False
+            from accounts.authentication import JWTAuthentication
+
+            authenticator = JWTAuthentication()
+            cached = authenticator.resolve_request_token(request)
+            if cached is None:
+                return False
+            claim = cached["token"].payload.get("is_superuser")
+            if claim is not None:
+                return bool(claim)
+            return bool(authenticator.resolve_request_user(cached).is_superuser)
         except Exception:
             return False
 
@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any
+
+from django.conf import settings
+from django.db import connections
+
+_lock = threading.Lock()
+_thread_local = threading.local()
+_stats: dict[str, dict[str, float]] = {}
+_idle_holders: dict[str, set[int]] = {}
+_active_holders: dict[str, set[int]] = {}
+
+
+def is_enabled() -> bool:
+    return bool(getattr(settings, "TENANT_DB_POOLING", False))
+
+
+def _max_idle_tenants() -> int:
+    return max(1, int(getattr(settings, "TENANT_DB_MAX_IDLE_TENANTS", 8)))
+
+
+def _max_idle_per_tenant() -> int:
+    return max(1, int(getattr(settings, "TENANT_DB_MAX_IDLE_PER_TENANT", 4)))
+
+
+def configure_database(database: dict[str, Any]) -> dict[str, Any]:
+    """Return tenant connection settings adjusted for the pooled mode."""
+
+    database = dict(database)
+    if is_enabled():
+        database["CONN_MAX_AGE"] = int(getattr(settings, "TENANT_DB_CONN_MAX_AGE", 600))
+        database["CONN_HEALTH_CHECKS"] = bool(getattr(settings, "TENANT_DB_CONN_HEALTH_CHECKS", True))
+    return database
+
+
+def _alias_stats(alias: str) -> dict[str, float]:
+    return _stats.setdefault(
+        alias,
+        {"opened": 0, "reused": 0, "closed": 0, "evicted": 0, "connect_ms_total": 0.0},
+    )
+
+
+def _thread_lru() -> OrderedDict[str, None]:
+    lru = getattr(_thread_local, "lru", None)
+    if lru is None:
+        lru = OrderedDict()
+        _thread_local.lru = lru
+    return lru
+
+
+def _is_open(alias: str) -> bool:
+    return alias in connections and connections[alias].connection is not None
+
+
+def record_connection_opened(alias: str, connect_ms: float) -> None:
+    with _lock:
+        stats = _alias_stats(alias)
+        stats["opened"] += 1
+        stats["connect_ms_total"] += connect_ms
+
+
+def acquire(alias: str) -> None:
+    """Mark the current thread as using ``alias`` for the duration of a request."""
+
+    thread_id = threading.get_ident()
+    reused = _is_open(alias)
+    _thread_lru().pop(alias, None)
+    with _lock:
+        _idle_holders.get(alias, set()).discard(thread_id)
+        _active_holders.setdefault(alias, set()).add(thread_id)
+        if reused:
+            _alias_stats(alias)["reused"] += 1
+
+
+def _close(alias: str, *, counter: str) -> None:
+    connections[alias].close()
+    with _lock:
+        _idle_holders.get(alias, set()).discard(threading.get_ident())
+        _alias_stats(alias)[counter] += 1
+
+
+def release(alias: str) -> None:
+    """Park the tenant connection for reuse or close it when it cannot be kept.
+
+    Without pooling the connection is closed as before. With pooling it stays open
+    (subject to ``CONN_MAX_AGE``/health checks) while this thread keeps at most
+    ``TENANT_DB_MAX_IDLE_TENANTS`` tenant connections, evicting the least recently used.
+    """
+
+    thread_id = threading.get_ident()
+    with _lock:
+        _active_holders.get(alias, set()).discard(thread_id)
+
+    if alias not in connections:
+        return
+    if not is_enabled():
+        if _is_open(alias):
+            _close(alias, counter="closed")
+        return
+
+    connection = connections[alias]
+    if connection.connection is not None:
+        connection.close_if_unusable_or_obsolete()
+        if connection.connection is None:
+            with _lock:
+                _alias_stats(alias)["closed"] += 1
+    if connection.connection is None:
+        return
+
+    with _lock:
+        idle = _idle_holders.setdefault(alias, set())
+        over_tenant_budget = thread_id not in idle and len(idle) >= _max_idle_per_tenant()
+        if not over_tenant_budget:
+            idle.add(thread_id)
+    if over_tenant_budget:
+        _close(alias, counter="evicted")
+        return
+
+    lru = _thread_lru()
+    lru[alias] = None
+    lru.move_to_end(alias)
+    while len(lru) > _max_idle_tenants():
+        cold_alias, _ = lru.popitem(last=False)
+        if _is_open(cold_alias):
+            _close(cold_alias, counter="evicted")
+
+
+def get_stats() -> dict[str, dict[str, Any]]:
+    with _lock:
+        aliases = set(_stats) | set(_idle_holders) | set(_active_holders)
+        payload: dict[str, dict[str, Any]] = {}
+        for alias in sorted(aliases):
+            stats = _alias_stats(alias)
+            idle = len(_idle_holders.get(alias, ()))
+            active = len(_active_holders.get(alias, ()))
+            opened = int(stats["opened"])
+            payload[alias] = {
+                "open": idle + active,
+                "idle": idle,
+                "active": active,
+                "opened": opened,
+                "reused": int(stats["reused"]),
+                "closed": int(stats["closed"]),
+                "evicted": int(stats["evicted"]),
+                "connect_wait_ms_avg": round(stats["connect_ms_total"] / opened, 2) if opened else 0.0,
+            }
+        return payload
+
+
+def reset() -> None:
+    with _lock:
+        _stats.clear()
+        _idle_holders.clear()
+        _active_holders.clear()
+    _thread_local.lru = OrderedDict()
+
+
+def connect_duration_ms(connection) -> float:
+    """Best-effort connect latency for a freshly created connection.
+
+    ``BaseDatabaseWrapper.connect`` stamps ``close_at`` right before opening the socket,
+    so the elapsed time since that stamp is the time spent connecting.
+    """
+
+    max_age = connection.settings_dict.get("CONN_MAX_AGE")
+    close_at = getattr(connection, "close_at", None)
+    if max_age is None or close_at is None:
+        return 0.0
+    return max(0.0, (time.monotonic() - (close_at - max_age)) * 1000.0)
@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any
+
+from .models import Tenant
+from .versioned_cache import VersionedCache
+
+SHARED_VERSION_CACHE_KEY = "tenancy:registry:version"
+
+
+@dataclass(frozen=True)
+class TenantRegistryEntry:
+    """Snapshot of a control-plane tenant row plus its connection settings."""
+
+    field_names: tuple[str, ...]
+    values: tuple[Any, ...]
+    database: dict[str, Any]
+
+    def build_tenant(self) -> Tenant:
+        # A fresh instance per activation keeps per-request relation caches
+        # (e.g. ``tenant.ai_config``) from leaking between requests.
+        return Tenant.from_db("default", self.field_names, self.values)
+
+
+_cache: VersionedCache[str, TenantRegistryEntry] = VersionedCache(
+    label="el registro de tenants",
+    version_cache_key=SHARED_VERSION_CACHE_KEY,
+    ttl_setting="TENANT_REGISTRY_TTL_SECONDS",
+    shared_setting="TENANT_REGISTRY_SHARED_VERSION",
+)
+
+
+def _load(slug: str) -> TenantRegistryEntry:
+    tenant = Tenant.objects.using("default").get(slug=slug)
+    field_names = tuple(field.attname for field in Tenant._meta.concrete_fields)
+    return TenantRegistryEntry(
+        field_names=field_names,
+        values=tuple(getattr(tenant, name) for name in field_names),
+        database=tenant.database_dict(),
+    )
+
+
+def lookup(slug: str) -> TenantRegistryEntry:
+    """Return the registry entry for ``slug``, loading it from the control DB on a miss.
+
+    Raises ``Tenant.DoesNotExist`` when the slug is unknown; unknown slugs are never cached.
+    """
+
+    return _cache.get(slug, lambda: _load(slug))
+
+
+invalidate = _cache.invalidate
+get_stats = _cache.get_stats
+reset_stats = _cache.reset_stats
@@ -9,6 +9,7 @@ class TenantDatabaseRouter:
         "materialidad.legalcorpusupload",
         "materialidad.legalconsultation",
         "materialidad.legalreferencesource",
+        "materialidad.aijob",
     }
 
     def _tenant_alias(self):
@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import ai_config_cache, pool, registry
+from .models import Tenant, TenantAIConfig
+
+
+@receiver(post_save, sender=Tenant, dispatch_uid="tenancy_registry_invalidate_on_save")
+@receiver(post_delete, sender=Tenant, dispatch_uid="tenancy_registry_invalidate_on_delete")
+def invalidate_tenant_registry(sender, **kwargs) -> None:
+    # Se invalida de inmediato y otra vez al confirmar la transacción para que
+    # ningún worker se quede con la fila previa leída antes del commit.
+    registry.invalidate()
+    transaction.on_commit(registry.invalidate, using="default")
+
+
+@receiver(post_save, sender=TenantAIConfig, dispatch_uid="tenancy_ai_config_invalidate_on_save")
+@receiver(post_delete, sender=TenantAIConfig, dispatch_uid="tenancy_ai_config_invalidate_on_delete")
+def invalidate_tenant_ai_config(sender, **kwargs) -> None:
+    ai_config_cache.invalidate()
+    transaction.on_commit(ai_config_cache.invalidate, using="default")
+
+
+@receiver(connection_created, dispatch_uid="tenancy_pool_connection_created")
+def track_tenant_connection(sender, connection, **kwargs) -> None:
+    if connection.alias.startswith("tenant_"):
+        pool.record_connection_opened(connection.alias, pool.connect_duration_ms(connection))
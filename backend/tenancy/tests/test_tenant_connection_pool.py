@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+
+from tenancy import pool
+
+
+class _FakeConnection:
+    def __init__(self, *, obsolete: bool = False):
+        self.connection = object()
+        self.obsolete = obsolete
+
+    def close(self):
+        self.connection = None
+
+    def close_if_unusable_or_obsolete(self):
+        if self.obsolete:
+            self.close()
+
+
+class _FakeConnections(dict):
+    def __getitem__(self, alias):
+        return self.setdefault(alias, _FakeConnection())
+
+
+class TenantConnectionPoolTests(SimpleTestCase):
+    def setUp(self):
+        pool.reset()
+        self.connections = _FakeConnections()
+        patcher = mock.patch("tenancy.pool.connections", self.connections)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(pool.reset)
+
+    def _request(self, alias: str) -> None:
+        pool.acquire(alias)
+        self.connections[alias]
+        pool.release(alias)
+
+    @override_settings(TENANT_DB_POOLING=False)
+    def test_without_pooling_connection_is_closed_per_request(self):
+        self._request("tenant_a")
+
+        self.assertIsNone(self.connections["tenant_a"].connection)
+        self.assertEqual(pool.get_stats()["tenant_a"]["closed"], 1)
+
+    @override_settings(TENANT_DB_POOLING=True)
+    def test_pooled_connection_is_reused_between_requests(self):
+        self._request("tenant_a")
+        self._request("tenant_a")
+
+        stats = pool.get_stats()["tenant_a"]
+        self.assertIsNotNone(self.connections["tenant_a"].connection)
+        self.assertEqual(stats["reused"], 1)
+        self.assertEqual(stats["idle"], 1)
+        self.assertEqual(stats["open"], 1)
+
+    @override_settings(TENANT_DB_POOLING=True, TENANT_DB_MAX_IDLE_TENANTS=2)
+    def test_cold_tenants_are_evicted_in_lru_order(self):
+        for alias in ("tenant_a", "tenant_b", "tenant_a", "tenant_c"):
+            self._request(alias)
+
+        stats = pool.get_stats()
+        self.assertIsNone(self.connections["tenant_b"].connection)
+        self.assertIsNotNone(self.connections["tenant_a"].connection)
+        self.assertIsNotNone(self.connections["tenant_c"].connection)
+        self.assertEqual(stats["tenant_b"]["evicted"], 1)
+        self.assertEqual(stats["tenant_b"]["idle"], 0)
+
+    @override_settings(TENANT_DB_POOLING=True)
+    def test_obsolete_connection_is_not_parked(self):
+        self.connections["tenant_a"] = _FakeConnection(obsolete=True)
+        self._request("tenant_a")
+
+        stats = pool.get_stats()["tenant_a"]
+        self.assertEqual(stats["closed"], 1)
+        self.assertEqual(stats["idle"], 0)
+
+    @override_settings(TENANT_DB_POOLING=True, TENANT_DB_CONN_MAX_AGE=120)
+    def test_configure_database_enables_persistent_connections(self):
+        database = pool.configure_database({"NAME": "tenant_db", "CONN_MAX_AGE": 0})
+
+        self.assertEqual(database["CONN_MAX_AGE"], 120)
+        self.assertTrue(database["CONN_HEALTH_CHECKS"])
@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from accounts.models import User
+from accounts.serializers import TenantTokenObtainPairSerializer
+
+
+class TenantMiddlewareAuthQueryBudgetTests(TestCase):
+    """Cuenta las consultas a ``accounts_user`` en una petición de control plane.
+
+    Antes del caché por petición se cargaba el usuario dos veces: una en
+    ``TenantMiddleware._is_superuser_from_token`` y otra en ``JWTAuthentication``.
+    """
+
+    url = "/api/materialidad/empresas/"
+
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = User.objects.create_superuser(email="root@example.com", password="Password123")
+
+    def _user_queries(self, access_token: str) -> tuple[int, list[str]]:
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {access_token}")
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        user_queries = [q["sql"] for q in ctx.captured_queries if '"accounts_user"' in q["sql"]]
+        return len(user_queries), user_queries
+
+    def test_token_claims_route_superuser_without_extra_user_query(self):
+        token = TenantTokenObtainPairSerializer.get_token(self.admin).access_token
+        self.assertTrue(token["is_superuser"])
+
+        count, queries = self._user_queries(str(token))
+
+        self.assertEqual(count, 1, queries)
+
+    def test_legacy_token_loads_user_once_per_request(self):
+        token = RefreshToken.for_user(self.admin).access_token
+        self.assertNotIn("is_superuser", token.payload)
+
+        count, queries = self._user_queries(str(token))
+
+        self.assertEqual(count, 1, queries)
+
+    def test_non_superuser_without_tenant_is_rejected(self):
+        user = User.objects.create_user(email="user@example.com", password="Password123")
+        token = TenantTokenObtainPairSerializer.get_token(user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, 400)
+
+    def test_invalid_token_is_rejected(self):
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer no-es-un-token")
+
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, 400)
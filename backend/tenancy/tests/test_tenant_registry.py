@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+from django.db import connections
+from django.test import TestCase, override_settings
+
+from tenancy import registry
+from tenancy.context import TenantContext, TenantNotActive, TenantNotFound
+from tenancy.models import Tenant
+
+
+class TenantRegistryTests(TestCase):
+    def setUp(self):
+        registry.invalidate()
+        registry.reset_stats()
+        self.tenant = Tenant.objects.create(
+            name="Cliente Registro",
+            slug="cliente-registro",
+            db_name="tenant_cliente_registro",
+            db_user="tenant_user",
+            db_password="secret",
+        )
+
+    def tearDown(self):
+        TenantContext.clear()
+        connections.databases.pop(self.tenant.db_alias, None)
+        registry.invalidate()
+
+    def test_steady_state_activation_runs_no_sql(self):
+        TenantContext.activate(self.tenant.slug)
+        TenantContext.clear()
+
+        with self.assertNumQueries(0):
+            tenant = TenantContext.activate(self.tenant.slug)
+
+        self.assertEqual(tenant.pk, self.tenant.pk)
+        self.assertEqual(TenantContext.get_current_db_alias(), "tenant_cliente-registro")
+        stats = registry.get_stats()
+        self.assertEqual(stats["misses"], 1)
+        self.assertEqual(stats["hits"], 1)
+        self.assertEqual(stats["hit_ratio"], 0.5)
+
+    def test_each_activation_returns_independent_instance(self):
+        first = TenantContext.activate(self.tenant.slug)
+        second = TenantContext.activate(self.tenant.slug)
+
+        self.assertIsNot(first, second)
+        self.assertEqual(first.database_dict()["NAME"], "tenant_cliente_registro")
+
+    def test_deactivated_tenant_is_rejected_on_next_request(self):
+        TenantContext.activate(self.tenant.slug)
+        TenantContext.clear()
+
+        self.tenant.is_active = False
+        self.tenant.save(update_fields=["is_active", "updated_at"])
+
+        with self.assertRaises(TenantNotActive):
+            TenantContext.activate(self.tenant.slug)
+        self.assertGreaterEqual(registry.get_stats()["invalidations"], 1)
+
+    def test_deleted_tenant_is_not_served_from_registry(self):
+        TenantContext.activate(self.tenant.slug)
+        TenantContext.clear()
+
+        self.tenant.delete()
+
+        with self.assertRaises(TenantNotFound):
+            TenantContext.activate("cliente-registro")
+
+    @override_settings(TENANT_REGISTRY_TTL_SECONDS=0, TENANT_REGISTRY_SHARED_VERSION=True)
+    def test_shared_version_bump_invalidates_other_workers(self):
+        registry.lookup(self.tenant.slug)
+        # Simula que otro worker guardó el tenant e incrementó la versión compartida.
+        registry._cache.bump_shared_version()
+
+        with self.assertNumQueries(1):
+            registry.lookup(self.tenant.slug)
@@ -4,7 +4,7 @@ from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
 from .admin_views import DespachoViewSet
-from .views import DespachoListView, TenantActivityMonitoringView, TenantProvisionView
+from .views import DespachoListView, TenantActivityMonitoringView, TenantProvisionView, TenantRuntimeStatsView
 
 router = DefaultRouter()
 router.register(r"admin/despachos", DespachoViewSet, basename="admin-despacho")
@@ -14,4 +14,5 @@ urlpatterns = [
     path("provision/", TenantProvisionView.as_view(), name="tenant_provision"),
     path("despachos/", DespachoListView.as_view(), name="despacho_list"),
     path("superadmin/tenant-activity/", TenantActivityMonitoringView.as_view(), name="superadmin_tenant_activity"),
+    path("superadmin/runtime-stats/", TenantRuntimeStatsView.as_view(), name="superadmin_runtime_stats"),
 ]
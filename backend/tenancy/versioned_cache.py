@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from typing import Any, Callable, Generic, Hashable, TypeVar
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class VersionedCache(Generic[K, V]):
+    """In-process cache of control-plane rows, invalidated by version and TTL.
+
+    Each entry remembers the version current when it was loaded. ``invalidate`` bumps the
+    local version and, when ``shared_setting`` is enabled, a counter in Django's cache that the
+    other workers compare against; entries with another version or older than the TTL are
+    reloaded. Failed loads are never cached.
+    """
+
+    def __init__(
+        self,
+        *,
+        label: str,
+        version_cache_key: str,
+        ttl_setting: str,
+        shared_setting: str,
+        default_ttl: int = 300,
+    ):
+        self.label = label
+        self.version_cache_key = version_cache_key
+        self.ttl_setting = ttl_setting
+        self.shared_setting = shared_setting
+        self.default_ttl = default_ttl
+        self._lock = threading.Lock()
+        self._entries: dict[K, tuple[V, int, float]] = {}
+        self._local_version = 0
+        self._stats = {"hits": 0, "misses": 0, "invalidations": 0}
+
+    def _ttl_seconds(self) -> int:
+        return int(getattr(settings, self.ttl_setting, self.default_ttl))
+
+    def _shared_version_enabled(self) -> bool:
+        return bool(getattr(settings, self.shared_setting, False))
+
+    def _current_version(self) -> int:
+        if not self._shared_version_enabled():
+            return self._local_version
+        try:
+            return int(cache.get(self.version_cache_key) or 0)
+        except Exception:  # pragma: no cover - el cache compartido no debe tirar la petición
+            logger.warning("No se pudo leer la versión compartida de %s", self.label, exc_info=True)
+            return -1
+
+    def bump_shared_version(self) -> None:
+        try:
+            if not cache.add(self.version_cache_key, 1, timeout=None):
+                cache.incr(self.version_cache_key)
+        except Exception:  # pragma: no cover - best effort
+            logger.warning("No se pudo incrementar la versión compartida de %s", self.label, exc_info=True)
+
+    def get(self, key: K, loader: Callable[[], V]) -> V:
+        """Return the cached value for ``key``, calling ``loader`` on a miss."""
+
+        version = self._current_version()
+        now = time.monotonic()
+        cached = self._entries.get(key)
+        if cached is not None:
+            value, loaded_version, loaded_at = cached
+            ttl = self._ttl_seconds()
+            if version >= 0 and loaded_version == version and (ttl <= 0 or (now - loaded_at) < ttl):
+                with self._lock:
+                    self._stats["hits"] += 1
+                return value
+
+        value = loader()
+        with self._lock:
+            self._stats["misses"] += 1
+            self._entries[key] = (value, version, now)
+        return value
+
+    def invalidate(self) -> None:
+        """Drop every entry in this process and, if enabled, in the other workers."""
+
+        with self._lock:
+            self._entries.clear()
+            self._local_version += 1
+            self._stats["invalidations"] += 1
+        if self._shared_version_enabled():
+            self.bump_shared_version()
+
+    def get_stats(self) -> dict[str, Any]:
+        with self._lock:
+            hits = self._stats["hits"]
+            misses = self._stats["misses"]
+            total = hits + misses
+            return {
+                "hits": hits,
+                "misses": misses,
+                "invalidations": self._stats["invalidations"],
+                "size": len(self._entries),
+                "hit_ratio": round(hits / total, 4) if total else 0.0,
+            }
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            for key in self._stats:
+                self._stats[key] = 0
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import os
 from collections import defaultdict
 from datetime import datetime, timedelta
 
@@ -14,6 +15,7 @@ from rest_framework.views import APIView
 from accounts.models import User
 from materialidad.models import AuditLog, LegalConsultation
 
+from . import pool, registry
 from .models import Despacho, Tenant
 from .serializers import TenantSerializer
 from .services import TenantProvisionError, provision_tenant, record_provision_log
@@ -427,3 +429,23 @@ class TenantActivityMonitoringView(APIView):
             },
             status=status.HTTP_200_OK,
         )
+
+
+class TenantRuntimeStatsView(APIView):
+    """Métricas en memoria del worker que atiende la petición (registro y conexiones)."""
+
+    permission_classes = [permissions.IsAuthenticated, IsSuperuserOnly]
+
+    def get(self, request):
+        return Response(
+            {
+                "generated_at": timezone.now().isoformat(),
+                "pid": os.getpid(),
+                "tenant_registry": registry.get_stats(),
+                "tenant_connections": {
+                    "pooling_enabled": pool.is_enabled(),
+                    "aliases": pool.get_stats(),
+                },
+            },
+            status=status.HTTP_200_OK,
+        )
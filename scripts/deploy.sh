@@ -282,6 +282,35 @@ if [[ -f "${APP_DIR}/deploy/systemd/materialidad-fdi-snapshots.service" && -f "$
     ok "Timer de snapshots FDI activo"
 fi
 
+if [[ -f "${APP_DIR}/deploy/systemd/materialidad-fdi-outbox.service" && -f "${APP_DIR}/deploy/systemd/materialidad-fdi-outbox.timer" ]]; then
+    info "Instalando timer del outbox de proyecciones FDI..."
+    cp "${APP_DIR}/deploy/systemd/materialidad-fdi-outbox.service" /etc/systemd/system/
+    cp "${APP_DIR}/deploy/systemd/materialidad-fdi-outbox.timer" /etc/systemd/system/
+    systemctl daemon-reload
+    systemctl enable materialidad-fdi-outbox.timer
+    systemctl restart materialidad-fdi-outbox.timer
+    ok "Timer del outbox de proyecciones FDI activo"
+fi
+
+if [[ -f "${APP_DIR}/deploy/systemd/materialidad-legal-corpus.service" && -f "${APP_DIR}/deploy/systemd/materialidad-legal-corpus.timer" ]]; then
+    info "Instalando timer de la cola de corpus legales..."
+    cp "${APP_DIR}/deploy/systemd/materialidad-legal-corpus.service" /etc/systemd/system/
+    cp "${APP_DIR}/deploy/systemd/materialidad-legal-corpus.timer" /etc/systemd/system/
+    systemctl daemon-reload
+    systemctl enable materialidad-legal-corpus.timer
+    systemctl restart materialidad-legal-corpus.timer
+    ok "Timer de la cola de corpus legales activo"
+fi
+
+if [[ -f "${APP_DIR}/deploy/systemd/materialidad-ai-jobs.service" ]]; then
+    info "Instalando worker de tareas de IA..."
+    cp "${APP_DIR}/deploy/systemd/materialidad-ai-jobs.service" /etc/systemd/system/
+    systemctl daemon-reload
+    systemctl enable materialidad-ai-jobs.service
+    systemctl restart materialidad-ai-jobs.service
+    ok "Worker de tareas de IA activo"
+fi
+
 # ══════════════════════════════════════════════════════════════════════
 # 12. NGINX
 # ══════════════════════════════════════════════════════════════════════